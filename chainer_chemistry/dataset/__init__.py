@@ -1,2 +1,6 @@
+from chainer_chemistry.dataset.fingerprint_store import FingerprintStore  # NOQA
+from chainer_chemistry.dataset.fingerprint_store import TanimotoIndex  # NOQA
+from chainer_chemistry.dataset.geometry_store import GeometryStore  # NOQA
 from chainer_chemistry.dataset.indexer import BaseFeatureIndexer  # NOQA
 from chainer_chemistry.dataset.indexer import BaseIndexer  # NOQA
+from chainer_chemistry.dataset.ragged_array import RaggedArray  # NOQA
@@ -0,0 +1,59 @@
+import numpy
+import six
+
+
+def _take(column, index):
+    if isinstance(column, list):
+        return [column[i] for i in numpy.arange(len(column))[index]]
+    return column[index]
+
+
+class ColumnBatch(object):
+
+    """Batch of examples stored as the tuple of stacked features
+
+    It is returned by `get_batch` of datasets, e.g.
+    `NumpyTupleDataset.get_batch`, which extracts each feature of the batch
+    by one fancy indexing instead of making a tuple for each example.
+    `concat_mols` converts it into the tuple of arrays without unpacking the
+    examples.
+
+    It also behaves as the sequence of examples, i.e. ``batch[i]`` is the
+    tuple of the features of ``i``-th example, so that converters which
+    expect the list of examples can be used as they are.
+
+    Args:
+        columns (tuple or list): features of the batch. Each of them is a
+            `numpy.ndarray`, a `RaggedArray` or a list whose length is the
+            batch size.
+
+    """
+
+    def __init__(self, columns):
+        columns = tuple(columns)
+        if not columns:
+            raise ValueError('no columns are given')
+        length = len(columns[0])
+        for i, column in enumerate(columns):
+            if len(column) != length:
+                raise ValueError(
+                    'column of the index {} has a wrong length'.format(i))
+        self.columns = columns
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, (slice, list, numpy.ndarray)):
+            return ColumnBatch([_take(column, index)
+                                for column in self.columns])
+        return tuple([column[index] for column in self.columns])
+
+    def __iter__(self):
+        for i in six.moves.range(self._length):
+            yield self[i]
+
+    def __repr__(self):
+        return 'ColumnBatch(len={}, num_columns={})'.format(
+            self._length, len(self.columns))
@@ -0,0 +1,196 @@
+import copy
+from logging import getLogger
+
+import joblib
+import numpy
+from rdkit import Chem
+from rdkit.Chem import AllChem
+import six
+from tqdm import tqdm
+
+from chainer_chemistry.dataset.feature_cache import FeatureCache
+from chainer_chemistry.dataset.feature_cache import get_config_hash
+from chainer_chemistry.dataset.geometry_store import get_geometry_key
+from chainer_chemistry.dataset.geometry_store import match_coordinates
+from chainer_chemistry.dataset.preprocessors.common import MolFeatureExtractionError  # NOQA
+
+
+def _generate_chunk(generator, keys):
+    results = []
+    for key in keys:
+        results.append((key, generator._get_geometry(key)))
+    return results
+
+
+class ConformerGenerator(object):
+
+    """Reproducible 3D conformer generator with a persistent cache
+
+    Conformers are embedded by `AllChem.EmbedMultipleConfs` with the fixed
+    `random_seed`, so the same molecule always gets the same coordinates.
+    When `num_conformers` is more than 1, all conformers are optimized by
+    MMFF (UFF when MMFF parameters are not available) and the one with the
+    lowest energy is kept.
+
+    The geometry of each molecule, including hydrogens, is generated from
+    its canonical smiles and stored with the key returned by
+    `get_geometry_key`. It is mapped onto the atom order of the molecule
+    being preprocessed by `match_coordinates`, so one cache can be shared by
+    preprocessors with different `add_Hs` and `kekulize` options.
+
+    Args:
+        num_conformers (int): Number of conformers embedded for each
+            molecule.
+        random_seed (int): Random seed of the embedding.
+        max_iters (int): Maximum number of iterations of the optimization,
+            used only when `num_conformers` is more than 1.
+        cache_dir (str or None): If specified, geometries are stored in a
+            `FeatureCache` in this directory and loaded in the following
+            runs. Otherwise they are kept only in memory.
+
+    .. admonition:: Example
+
+       >>> generator = ConformerGenerator(num_conformers=10,
+       ...                                cache_dir='./conformers')
+       >>> generator.precompute(mols, n_jobs=-1)
+       >>> preprocessor = SchNetPreprocessor(conformer_generator=generator)
+
+    """
+
+    def __init__(self, num_conformers=1, random_seed=0, max_iters=200,
+                 cache_dir=None):
+        if num_conformers < 1:
+            raise ValueError('num_conformers must be positive, got {}'
+                             .format(num_conformers))
+        self.num_conformers = num_conformers
+        self.random_seed = random_seed
+        self.max_iters = max_iters
+        self._cache = None if cache_dir is None else FeatureCache(cache_dir)
+        self._namespace = get_config_hash(self)
+        self._geometries = {}
+
+    def generate(self, mol):
+        """Embeds conformers of `mol` and returns the chosen one
+
+        Args:
+            mol (Chem.Mol): mol instance
+
+        Returns (tuple or None): `(atomic_numbers, coordinates)` of the
+            atoms of `mol` with hydrogens added by `AddHs`, i.e. the atoms of
+            `mol` come first in the same order. `None` is returned when the
+            embedding fails.
+
+        """
+        mol = Chem.AddHs(mol)
+        conf_ids = list(AllChem.EmbedMultipleConfs(
+            mol, numConfs=self.num_conformers, randomSeed=self.random_seed,
+            numThreads=1))
+        if not conf_ids:
+            return None
+        conf_id = conf_ids[0]
+        if self.num_conformers > 1:
+            if AllChem.MMFFHasAllMoleculeParams(mol):
+                results = AllChem.MMFFOptimizeMoleculeConfs(
+                    mol, numThreads=1, maxIters=self.max_iters)
+            else:
+                results = AllChem.UFFOptimizeMoleculeConfs(
+                    mol, numThreads=1, maxIters=self.max_iters)
+            energies = [energy for _, energy in results]
+            conf_id = conf_ids[int(numpy.argmin(energies))]
+        atomic_numbers = numpy.array(
+            [atom.GetAtomicNum() for atom in mol.GetAtoms()],
+            dtype=numpy.int32)
+        coordinates = mol.GetConformer(conf_id).GetPositions()
+        return atomic_numbers, coordinates.astype(numpy.float32)
+
+    def _get_geometry(self, key):
+        if key in self._geometries:
+            return self._geometries[key]
+        geometry = None
+        is_cached = False
+        if self._cache is not None:
+            try:
+                geometry = self._cache.get(self._namespace, key)
+                is_cached = geometry is not None
+            except MolFeatureExtractionError:
+                is_cached = True
+        if not is_cached:
+            mol = Chem.MolFromSmiles(key)
+            if mol is not None:
+                geometry = self.generate(mol)
+            if self._cache is not None:
+                self._cache.set(self._namespace, key, geometry)
+        self._geometries[key] = geometry
+        return geometry
+
+    def get_coordinates(self, mol):
+        """Returns coordinates of the atoms of `mol` in its atom order
+
+        Args:
+            mol (Chem.Mol): mol instance
+
+        Returns (numpy.ndarray): coordinates of the shape
+            ``(mol.GetNumAtoms(), 3)``.
+
+        """
+        geometry = self._get_geometry(get_geometry_key(mol))
+        coordinates = None
+        if geometry is not None:
+            coordinates = match_coordinates(mol, *geometry)
+        if coordinates is None and geometry is not None:
+            # bonds perceived from the geometry differ from the ones of
+            # `mol`, embed `mol` itself without using the cache.
+            geometry = self.generate(mol)
+            if geometry is not None:
+                coordinates = geometry[1][:mol.GetNumAtoms()]
+        if coordinates is None:
+            raise MolFeatureExtractionError('failed to embed the molecule')
+        return coordinates
+
+    def precompute(self, mols, n_jobs=1, chunksize=100):
+        """Generates conformers of the molecules in worker processes
+
+        The geometries are kept in this generator and also stored in the
+        cache if `cache_dir` is specified. Molecules which are already
+        generated or cached are skipped.
+
+        Args:
+            mols (list): list of `Chem.Mol` or smiles.
+            n_jobs (int): Number of worker processes used by `joblib`.
+            chunksize (int): Number of molecules processed by a worker at
+                once.
+
+        Returns (int): Number of molecules whose conformers are generated.
+
+        """
+        keys = []
+        seen = set()
+        for mol in mols:
+            if isinstance(mol, six.string_types):
+                mol = Chem.MolFromSmiles(mol)
+            if mol is None:
+                continue
+            key = get_geometry_key(mol)
+            if key in seen or key in self._geometries:
+                continue
+            seen.add(key)
+            if self._cache is not None:
+                try:
+                    geometry = self._cache.get(self._namespace, key)
+                except MolFeatureExtractionError:
+                    continue
+                if geometry is not None:
+                    continue
+            keys.append(key)
+        logger = getLogger(__name__)
+        logger.info('generating conformers of {} molecules'.format(len(keys)))
+        chunks = [keys[i:i + chunksize]
+                  for i in six.moves.range(0, len(keys), chunksize)]
+        # workers do not need the geometries generated so far.
+        worker = copy.copy(self)
+        worker._geometries = {}
+        for chunk_result in joblib.Parallel(n_jobs=n_jobs)(
+                joblib.delayed(_generate_chunk)(worker, chunk)
+                for chunk in tqdm(chunks)):
+            self._geometries.update(chunk_result)
+        return len(keys)
@@ -1,4 +1,29 @@
 import chainer
+import numpy
+
+from chainer_chemistry.dataset.column_batch import ColumnBatch
+from chainer_chemistry.dataset.ragged_array import RaggedArray
+
+
+def _concat_ragged(batch, device, padding):
+    if len(batch) == 0:
+        raise ValueError('batch is empty')
+    if padding is None:
+        if numpy.any(batch.shapes != batch.shapes[0]):
+            raise ValueError('shapes of the examples are different, '
+                             'padding must be specified')
+        padding = 0
+    return chainer.dataset.to_device(device, batch.to_padded(padding))
+
+
+def _concat_column(column, device, padding):
+    if isinstance(column, RaggedArray):
+        return _concat_ragged(column, device, padding)
+    if isinstance(column, numpy.ndarray) and column.dtype != object:
+        # already stacked by fancy indexing of the dataset
+        return chainer.dataset.to_device(device, column)
+    return chainer.dataset.concat_examples(list(column), device,
+                                           padding=padding)
 
 
 @chainer.dataset.converter()
@@ -47,8 +72,14 @@ def concat_mols(batch, device=None, padding=0):
 
     .. seealso:: :func:`chainer.dataset.concat_examples`
 
+    ``batch`` may also be a `RaggedArray`, e.g. a batch of one feature
+    extracted from `NumpyTupleDataset` at once. Its examples are padded into
+    one array without making the list of examples. Similarly, each feature
+    of `ColumnBatch` returned by `NumpyTupleDataset.get_batch` is converted
+    as it is, and the tuple of them is returned.
+
     Args:
-        batch (list):
+        batch (list, RaggedArray or ColumnBatch):
             A list of examples. This is typically given by a dataset
             iterator.
         device (int):
@@ -66,4 +97,11 @@ def concat_mols(batch, device=None, padding=0):
         Array, a tuple of arrays, or a dictionary of arrays:
         The type depends on the type of each example in the batch.
     """
+    if isinstance(batch, RaggedArray):
+        return _concat_ragged(batch, device, padding)
+    if isinstance(batch, ColumnBatch):
+        if len(batch) == 0:
+            raise ValueError('batch is empty')
+        return tuple([_concat_column(column, device, padding)
+                      for column in batch.columns])
     return chainer.dataset.concat_examples(batch, device, padding=padding)
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy
+
+from chainer_chemistry import _version
+from chainer_chemistry.dataset.preprocessors.common import MolFeatureExtractionError  # NOQA
+
+
+def _to_config(obj):
+    """Converts `obj` into json serializable object to compute its hash"""
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        return obj
+    if isinstance(obj, (numpy.integer, numpy.floating, numpy.bool_)):
+        return obj.item()
+    if isinstance(obj, numpy.ndarray):
+        return {'__ndarray__': [str(obj.dtype), list(obj.shape),
+                                hashlib.sha1(obj.tobytes()).hexdigest()]}
+    if isinstance(obj, (list, tuple)):
+        return [_to_config(o) for o in obj]
+    if isinstance(obj, (set, frozenset)):
+        return sorted((_to_config(o) for o in obj), key=repr)
+    if isinstance(obj, dict):
+        return sorted([[_to_config(k), _to_config(v)]
+                       for k, v in obj.items()], key=repr)
+    if callable(obj) and hasattr(obj, '__qualname__'):
+        return '{}.{}'.format(obj.__module__, obj.__qualname__)
+    if hasattr(obj, '__dict__'):
+        cls = type(obj)
+        attrs = {k: _to_config(v) for k, v in vars(obj).items()
+                 if not k.startswith('_')}
+        return {'__class__': '{}.{}'.format(cls.__module__, cls.__qualname__),
+                '__attrs__': attrs}
+    return repr(obj)
+
+
+def get_config_hash(preprocessor):
+    """Computes the hash of the preprocessor class and its configuration
+
+    Its public attributes, which are usually set from the constructor
+    arguments (`max_atoms`, `out_size`, `add_Hs`, `kekulize`, ...), and the
+    version of chainer-chemistry are taken into account.
+
+    Args:
+        preprocessor (BasePreprocessor): preprocessor instance
+
+    Returns (str): hex digest of the configuration.
+
+    """
+    config = {'version': _version.__version__,
+              'preprocessor': _to_config(preprocessor)}
+    data = json.dumps(config, sort_keys=True).encode('utf-8')
+    return hashlib.sha1(data).hexdigest()
+
+
+class FeatureCache(object):
+
+    """Content-addressed on-disk cache of per-molecule features
+
+    Features are stored in `cache_dir/<namespace>/<xx>/<key>.npz`, where
+    `key` is the hash of the canonical smiles of the molecule. `namespace`
+    is usually the hash of the preprocessor configuration computed by
+    `get_config_hash`, so that features of the same molecule made by
+    different preprocessors never collide.
+
+    Each entry is written to a temporary file and then atomically renamed,
+    so that the cache can be shared by several processes, e.g. parsers with
+    `n_jobs` option.
+
+    Molecules whose feature extraction failed by `MolFeatureExtractionError`
+    are also recorded, and the error is raised again when they are looked up.
+
+    Args:
+        cache_dir (str): root directory of the cache.
+
+    .. admonition:: Example
+
+       >>> cache = FeatureCache('./feature_cache')
+       >>> parser = CSVFileParser(NFPPreprocessor(), labels='y',
+       ...                        feature_cache=cache)
+       >>> result = parser.parse('data.csv')  # features are cached
+       >>> result = parser.parse('data.csv')  # features are loaded
+
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def get_namespace(self, preprocessor):
+        return get_config_hash(preprocessor)
+
+    def _get_filepath(self, namespace, smiles):
+        key = hashlib.sha1(smiles.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, namespace, key[:2],
+                            '{}.npz'.format(key))
+
+    def get(self, namespace, smiles):
+        """Returns cached features of `smiles`
+
+        Args:
+            namespace (str): namespace of the features.
+            smiles (str): canonical smiles of the molecule.
+
+        Returns: cached features, i.e. numpy array or tuple of numpy arrays.
+            `None` is returned when `smiles` is not cached.
+
+        """
+        filepath = self._get_filepath(namespace, smiles)
+        if not os.path.exists(filepath):
+            return None
+        with numpy.load(filepath, allow_pickle=False) as npz:
+            if bool(npz['failed']):
+                raise MolFeatureExtractionError(
+                    'feature extraction failed (cached)')
+            num_features = int(npz['num_features'])
+            features = tuple(npz['arr_{}'.format(i)]
+                             for i in range(num_features))
+            if not bool(npz['is_tuple']):
+                features = features[0]
+        return features
+
+    def set(self, namespace, smiles, features):
+        """Stores `features` of `smiles`
+
+        Features containing object arrays are not cached.
+
+        Args:
+            namespace (str): namespace of the features.
+            smiles (str): canonical smiles of the molecule.
+            features: numpy array or tuple of numpy arrays. If `None`, the
+                molecule is recorded as failed.
+
+        Returns (bool): `True` if `features` is stored.
+
+        """
+        is_tuple = isinstance(features, tuple)
+        if features is None:
+            arrays = []
+        elif is_tuple:
+            arrays = [numpy.asarray(f) for f in features]
+        else:
+            arrays = [numpy.asarray(features)]
+        if any(a.dtype == object for a in arrays):
+            return False
+        data = {'arr_{}'.format(i): a for i, a in enumerate(arrays)}
+        data['failed'] = numpy.array(features is None)
+        data['is_tuple'] = numpy.array(is_tuple)
+        data['num_features'] = numpy.array(len(arrays))
+
+        filepath = self._get_filepath(namespace, smiles)
+        dirpath = os.path.dirname(filepath)
+        if not os.path.exists(dirpath):
+            try:
+                os.makedirs(dirpath)
+            except OSError:
+                # directory may be created by another process.
+                if not os.path.isdir(dirpath):
+                    raise
+        fd, tmp_path = tempfile.mkstemp(dir=dirpath, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                numpy.savez(f, **data)
+            os.replace(tmp_path, filepath)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return True
+
+    def get_input_features(self, preprocessor, smiles, mol, namespace=None):
+        """Returns features of `mol`, extracted by `preprocessor` if needed
+
+        Args:
+            preprocessor (MolPreprocessor): preprocessor instance
+            smiles (str): canonical smiles returned by
+                `preprocessor.prepare_smiles_and_mol`.
+            mol (rdkit.Chem.Mol): molecule returned by
+                `preprocessor.prepare_smiles_and_mol`.
+            namespace (str or None): namespace of the features. If `None`,
+                it is computed by `get_namespace(preprocessor)`.
+
+        Returns: features returned by `preprocessor.get_input_features`.
+
+        """
+        if namespace is None:
+            namespace = self.get_namespace(preprocessor)
+        features = self.get(namespace, smiles)
+        if features is not None:
+            return features
+        try:
+            features = preprocessor.get_input_features(mol)
+        except MolFeatureExtractionError:
+            self.set(namespace, smiles, None)
+            raise
+        self.set(namespace, smiles, features)
+        return features
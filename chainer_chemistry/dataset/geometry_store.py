@@ -0,0 +1,190 @@
+import numpy
+from rdkit import Chem
+
+from chainer_chemistry.dataset.ragged_array import RaggedArray
+
+
+def get_geometry_key(mol):
+    """Returns the key of `mol` used to look up its stored geometry
+
+    It is the canonical smiles without stereochemistry and hydrogens, which
+    is same with the one made by `MolPreprocessor.prepare_smiles_and_mol`.
+
+    Args:
+        mol (Chem.Mol): mol instance
+
+    Returns (str): key of the molecule.
+
+    """
+    return Chem.MolToSmiles(Chem.RemoveHs(mol), isomericSmiles=False,
+                            canonical=True)
+
+
+def _construct_bond_graph(atomic_numbers, coordinates, tolerance=0.4):
+    """Constructs the graph of atoms whose distance is a covalent bond length
+
+    Two atoms are bonded when their distance is less than the sum of their
+    covalent radii plus `tolerance`. All bonds are single bonds.
+
+    """
+    table = Chem.GetPeriodicTable()
+    radii = numpy.array([table.GetRcovalent(int(z)) for z in atomic_numbers])
+    diff = coordinates[:, None, :] - coordinates[None, :, :]
+    dists = numpy.sqrt((diff ** 2).sum(axis=2))
+    is_bonded = dists < radii[:, None] + radii[None, :] + tolerance
+    rows, cols = numpy.nonzero(numpy.triu(is_bonded, k=1))
+    graph = Chem.RWMol()
+    for z in atomic_numbers:
+        graph.AddAtom(Chem.Atom(int(z)))
+    for i, j in zip(rows, cols):
+        graph.AddBond(int(i), int(j), Chem.BondType.SINGLE)
+    graph.UpdatePropertyCache(strict=False)
+    Chem.FastFindRings(graph)
+    return graph
+
+
+def _construct_template(mol):
+    """Constructs the graph of `mol` with hydrogens and only single bonds"""
+    template = Chem.RWMol(Chem.AddHs(mol))
+    for atom in template.GetAtoms():
+        atom.SetIsAromatic(False)
+        atom.SetFormalCharge(0)
+    for bond in template.GetBonds():
+        bond.SetBondType(Chem.BondType.SINGLE)
+        bond.SetIsAromatic(False)
+    template.UpdatePropertyCache(strict=False)
+    Chem.FastFindRings(template)
+    return template
+
+
+def match_coordinates(mol, atomic_numbers, coordinates):
+    """Reorders coordinates of the atoms into the atom order of `mol`
+
+    The bonds of the stored geometry are perceived from interatomic
+    distances, and the graph of `mol` with hydrogens is matched to it.
+
+    Args:
+        mol (Chem.Mol): mol instance, with or without hydrogens.
+        atomic_numbers (numpy.ndarray): 1-d array of atomic numbers of all
+            atoms of the geometry including hydrogens.
+        coordinates (numpy.ndarray): array of the shape
+            ``(len(atomic_numbers), 3)``.
+
+    Returns (numpy.ndarray or None): coordinates of the atoms of `mol`, whose
+        shape is ``(mol.GetNumAtoms(), 3)``. `None` is returned when the
+        geometry does not match `mol`.
+
+    """
+    template = _construct_template(mol)
+    if template.GetNumAtoms() != len(atomic_numbers):
+        return None
+    graph = _construct_bond_graph(atomic_numbers, coordinates)
+    if graph.GetNumBonds() != template.GetNumBonds():
+        return None
+    match = graph.GetSubstructMatch(template)
+    if not match:
+        return None
+    return coordinates[list(match[:mol.GetNumAtoms()])]
+
+
+class GeometryStore(object):
+
+    """3D coordinates of molecules looked up by their canonical smiles
+
+    It keeps the geometries, e.g. DFT optimized ones in QM9 dataset, in
+    `RaggedArray` s so that distance based preprocessors such as
+    `SchNetPreprocessor` can use them instead of generating conformers.
+    The atom order of a stored geometry may differ from that of the
+    molecule being preprocessed, it is resolved by `match_coordinates`.
+
+    Args:
+        smiles (numpy.ndarray or list): keys of the molecules made by
+            `get_geometry_key`.
+        atomic_numbers (RaggedArray): atomic numbers of all atoms including
+            hydrogens of each molecule.
+        coordinates (RaggedArray): coordinates of the shape
+            ``(num_atoms, 3)`` of each molecule.
+
+    """
+
+    def __init__(self, smiles, atomic_numbers, coordinates):
+        if not len(smiles) == len(atomic_numbers) == len(coordinates):
+            raise ValueError('smiles, atomic_numbers and coordinates must '
+                             'have the same length')
+        self.smiles = numpy.asarray(smiles, dtype=str)
+        self.atomic_numbers = atomic_numbers
+        self.coordinates = coordinates
+        self._index = None
+
+    def __len__(self):
+        return len(self.smiles)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_index'] = None
+        return state
+
+    def get_index(self, mol):
+        """Returns the index of the geometry of `mol`, or `None`"""
+        if self._index is None:
+            index = {}
+            for i, key in enumerate(self.smiles.tolist()):
+                # keep the first one for duplicated molecules.
+                index.setdefault(key, i)
+            self._index = index
+        return self._index.get(get_geometry_key(mol))
+
+    def get_coordinates(self, mol):
+        """Returns coordinates of the atoms of `mol` in its atom order
+
+        Args:
+            mol (Chem.Mol): mol instance
+
+        Returns (numpy.ndarray or None): coordinates of the shape
+            ``(mol.GetNumAtoms(), 3)``. `None` is returned when `mol` is not
+            stored or its geometry can not be matched.
+
+        """
+        i = self.get_index(mol)
+        if i is None:
+            return None
+        return match_coordinates(mol, numpy.asarray(self.atomic_numbers[i]),
+                                 numpy.asarray(self.coordinates[i]))
+
+    def to_dict(self):
+        """Returns the arrays to save the store with numpy"""
+        data = {'smiles': self.smiles}
+        data.update(self.atomic_numbers.to_dict('atomic_numbers'))
+        data.update(self.coordinates.to_dict('coordinates'))
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Restores the store from the arrays made by `to_dict`
+
+        Args:
+            data: dict-like object, e.g. `NpzFile`.
+
+        Returns (GeometryStore): restored store.
+
+        """
+        return cls(data['smiles'],
+                   RaggedArray.from_dict(data, 'atomic_numbers'),
+                   RaggedArray.from_dict(data, 'coordinates'))
+
+    def save(self, filepath):
+        """Saves the store to `.npz` file, which can be loaded by `load`"""
+        numpy.savez(filepath, **self.to_dict())
+
+    @classmethod
+    def load(cls, filepath):
+        """Loads the store saved by `save`
+
+        Args:
+            filepath (str): path of `.npz` file.
+
+        Returns (GeometryStore): loaded store.
+
+        """
+        with numpy.load(filepath) as data:
+            return cls.from_dict(data)
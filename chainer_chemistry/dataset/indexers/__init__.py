@@ -1 +1,3 @@
 from chainer_chemistry.dataset.indexers.numpy_tuple_dataset_feature_indexer import NumpyTupleDatasetFeatureIndexer  # NOQA
+from chainer_chemistry.dataset.indexers.sharded_numpy_tuple_dataset_feature_indexer import ShardedNumpyTupleDatasetFeatureIndexer  # NOQA
+from chainer_chemistry.dataset.indexers.numpy_tuple_dataset_view_feature_indexer import NumpyTupleDatasetViewFeatureIndexer  # NOQA
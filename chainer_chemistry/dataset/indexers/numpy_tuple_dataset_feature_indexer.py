@@ -1,4 +1,7 @@
+import numpy
+
 from chainer_chemistry.dataset.indexer import BaseFeatureIndexer
+from chainer_chemistry.dataset.ragged_array import RaggedArray
 
 
 class NumpyTupleDatasetFeatureIndexer(BaseFeatureIndexer):
@@ -19,5 +22,28 @@ class NumpyTupleDatasetFeatureIndexer(BaseFeatureIndexer):
     def extract_feature_by_slice(self, slice_index, j):
         return self.datasets[j][slice_index]
 
+    def _extract_feature(self, data_index, j):
+        if isinstance(data_index, (list, numpy.ndarray)):
+            self.check_type_feature_index(j)
+            dataset = self.datasets[j]
+            if isinstance(dataset, RaggedArray):
+                # gathered at once, instead of making object array.
+                return dataset[data_index]
+            if isinstance(dataset, numpy.ndarray) and dataset.dtype != object:
+                # gathered at once by fancy indexing, instead of extracting
+                # each example.
+                data_index = numpy.asarray(data_index)
+                if data_index.dtype == numpy.bool_:
+                    if len(data_index) != self.dataset_length:
+                        raise ValueError(
+                            'Feature index wrong length {} instead of'
+                            ' {}'.format(len(data_index),
+                                         self.dataset_length))
+                elif len(data_index) == 0:
+                    data_index = data_index.astype(numpy.int64)
+                return numpy.asarray(dataset[data_index])
+        return super(NumpyTupleDatasetFeatureIndexer,
+                     self)._extract_feature(data_index, j)
+
     def extract_feature(self, i, j):
         return self.datasets[j][i]
@@ -0,0 +1,45 @@
+import numpy
+
+from chainer_chemistry.dataset.indexer import BaseFeatureIndexer
+
+
+class NumpyTupleDatasetViewFeatureIndexer(BaseFeatureIndexer):
+    """FeatureIndexer for NumpyTupleDatasetView
+
+    Indices are translated into the indices of the base dataset, and the
+    features are extracted by the feature indexer of the base dataset at
+    once.
+
+    Args:
+        dataset (NumpyTupleDatasetView): dataset instance
+
+    """
+
+    def __init__(self, dataset):
+        super(NumpyTupleDatasetViewFeatureIndexer, self).__init__(dataset)
+        self.base_features = dataset.get_base_dataset().features
+        self.indices = dataset.get_indices()
+
+    def features_length(self):
+        return self.base_features.features_length()
+
+    def extract_feature_by_slice(self, slice_index, j):
+        return self.base_features[self.indices[slice_index], j]
+
+    def _extract_feature(self, data_index, j):
+        if isinstance(data_index, (list, numpy.ndarray)):
+            self.check_type_feature_index(j)
+            data_index = numpy.asarray(data_index)
+            if data_index.dtype == numpy.bool_:
+                if len(data_index) != self.dataset_length:
+                    raise ValueError(
+                        'Feature index wrong length {} instead of'
+                        ' {}'.format(len(data_index), self.dataset_length))
+            elif len(data_index) == 0:
+                data_index = data_index.astype(numpy.int64)
+            return self.base_features[self.indices[data_index], j]
+        return super(NumpyTupleDatasetViewFeatureIndexer,
+                     self)._extract_feature(data_index, j)
+
+    def extract_feature(self, i, j):
+        return self.base_features[self.indices[i], j]
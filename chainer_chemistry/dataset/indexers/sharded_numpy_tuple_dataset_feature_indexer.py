@@ -0,0 +1,71 @@
+import numpy
+
+from chainer_chemistry.dataset.indexer import BaseFeatureIndexer
+from chainer_chemistry.dataset.ragged_array import RaggedArray
+
+
+class ShardedNumpyTupleDatasetFeatureIndexer(BaseFeatureIndexer):
+    """FeatureIndexer for ShardedNumpyTupleDataset
+
+    Args:
+        dataset (ShardedNumpyTupleDataset): dataset instance
+
+    """
+
+    def __init__(self, dataset):
+        super(ShardedNumpyTupleDatasetFeatureIndexer, self).__init__(dataset)
+
+    def features_length(self):
+        return self.dataset.num_features
+
+    def extract_feature_by_slice(self, slice_index, j):
+        indices = numpy.arange(*slice_index.indices(self.dataset_length))
+        return self._extract_feature_by_indices(indices, j)
+
+    def _extract_feature(self, data_index, j):
+        if isinstance(data_index, (list, numpy.ndarray)) \
+                and len(data_index) > 0:
+            self.check_type_feature_index(j)
+            data_index = numpy.asarray(data_index)
+            if data_index.dtype == numpy.bool_:
+                if len(data_index) != self.dataset_length:
+                    raise ValueError(
+                        'Feature index wrong length {} instead of'
+                        ' {}'.format(len(data_index), self.dataset_length))
+                data_index = numpy.argwhere(data_index).ravel()
+            return self._extract_feature_by_indices(data_index, j)
+        return super(ShardedNumpyTupleDatasetFeatureIndexer,
+                     self)._extract_feature(data_index, j)
+
+    def _extract_feature_by_indices(self, indices, j):
+        shards = self.dataset.get_shards()
+        if len(indices) == 0:
+            return shards[0].get_datasets()[j][0:0]
+        shard_ids, local_indices = self.dataset.locate_indices(indices)
+
+        # Gather from each shard by fancy indexing, and then restore the
+        # order specified by `indices`.
+        order = numpy.argsort(shard_ids, kind='stable')
+        parts = []
+        for shard_id in numpy.unique(shard_ids):
+            target = local_indices[shard_ids == shard_id]
+            parts.append(shards[shard_id].get_datasets()[j][target])
+        inverse = numpy.empty_like(order)
+        inverse[order] = numpy.arange(len(order))
+        if all(isinstance(part, RaggedArray) for part in parts):
+            return RaggedArray.concatenate(parts)[inverse]
+        try:
+            feature = numpy.concatenate(parts)
+        except ValueError:
+            # Each shard may have different shape of features, e.g., when
+            # features are not padded.
+            items = [item for part in parts for item in part]
+            feature = numpy.empty(len(items), dtype=object)
+            for k, item in enumerate(items):
+                feature[k] = item
+        return feature[inverse]
+
+    def extract_feature(self, i, j):
+        shard_index, local_index = self.dataset.locate(i)
+        return self.dataset.get_shards()[shard_index].get_datasets()[j][
+            local_index]
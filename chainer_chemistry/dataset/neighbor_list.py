@@ -0,0 +1,106 @@
+import numpy
+from scipy.spatial import cKDTree
+
+
+def _construct_periodic_images(coordinates, lattice, cutoff):
+    """Wraps atoms into the unit cell and replicates them within `cutoff`
+
+    Returns (tuple): wrapped coordinates of the shape ``(num_atoms, 3)`` and
+        coordinates of the images of the shape ``(num_images * num_atoms, 3)``.
+        The first `num_atoms` images are the atoms in the unit cell itself,
+        and the original atom of the k-th image is ``k % num_atoms``.
+
+    """
+    lattice = numpy.asarray(lattice, dtype=numpy.float64)
+    if lattice.shape != (3, 3):
+        raise ValueError('lattice must be of the shape (3, 3), got {}'
+                         .format(lattice.shape))
+    reciprocal = numpy.linalg.inv(lattice)
+    fractional = coordinates.dot(reciprocal)
+    fractional -= numpy.floor(fractional)
+    coordinates = fractional.dot(lattice)
+
+    # the distance between the lattice planes along the k-th axis is
+    # 1 / |b_k|, where b_k is the k-th reciprocal lattice vector.
+    num_repeats = numpy.ceil(
+        cutoff * numpy.linalg.norm(reciprocal, axis=0)).astype(numpy.int64)
+    offsets = [numpy.concatenate(([0], numpy.arange(-n, 0),
+                                  numpy.arange(1, n + 1)))
+               for n in num_repeats]
+    offsets = numpy.stack(numpy.meshgrid(*offsets, indexing='ij'),
+                          axis=-1).reshape(-1, 3)
+    shifts = offsets.dot(lattice)
+    images = (shifts[:, None, :] + coordinates[None, :, :]).reshape(-1, 3)
+    return coordinates, images
+
+
+def construct_neighbor_list(coordinates, cutoff, max_num_neighbors=-1,
+                            lattice=None):
+    """Constructs the list of pairs of atoms within the cutoff radius
+
+    Pairs are searched with k-d trees, so both time and memory are linear in
+    the number of atoms for a fixed density, instead of quadratic of the
+    dense distance matrix.
+
+    The pairs are directed, i.e. both ``(i, j)`` and ``(j, i)`` are
+    returned, and sorted by the center atom ``i`` and then by the distance.
+    An atom is not a neighbor of itself, but its periodic images can be.
+
+    Args:
+        coordinates (numpy.ndarray): coordinates of the atoms of the shape
+            ``(num_atoms, 3)``.
+        cutoff (float): cutoff radius. Pairs whose distance is less or equal
+            to this value are returned.
+        max_num_neighbors (int): If not negative, only the nearest
+            `max_num_neighbors` neighbors of each atom are kept.
+            Setting negative value indicates no limit.
+        lattice (numpy.ndarray or None): lattice vectors of the shape
+            ``(3, 3)``, each row of which is a lattice vector. If specified,
+            periodic boundary conditions are applied, and an atom may have
+            several images of the same atom as its neighbors.
+
+    Returns (tuple): `index` and `distance`. `index` is the int array of the
+        shape ``(2, num_pairs)``, ``index[0]`` represents the center atoms
+        and ``index[1]`` represents their neighbors. `distance` is the float
+        array of the shape ``(num_pairs,)``.
+
+    """
+    coordinates = numpy.asarray(coordinates, dtype=numpy.float64)
+    if coordinates.ndim != 2 or coordinates.shape[1] != 3:
+        raise ValueError('coordinates must be of the shape (num_atoms, 3), '
+                         'got {}'.format(coordinates.shape))
+    if cutoff <= 0:
+        raise ValueError('cutoff must be positive, got {}'.format(cutoff))
+    num_atoms = len(coordinates)
+    if num_atoms == 0:
+        return (numpy.zeros((2, 0), dtype=numpy.int64),
+                numpy.zeros((0,), dtype=numpy.float64))
+    if lattice is None:
+        images = coordinates
+    else:
+        coordinates, images = _construct_periodic_images(
+            coordinates, lattice, cutoff)
+
+    pairs = cKDTree(coordinates).sparse_distance_matrix(
+        cKDTree(images), cutoff, output_type='ndarray')
+    center = pairs['i'].astype(numpy.int64)
+    image = pairs['j'].astype(numpy.int64)
+    # the first `num_atoms` images are the atoms themselves.
+    is_self = image == center
+    center = center[~is_self]
+    image = image[~is_self]
+    distance = numpy.sqrt(((coordinates[center] - images[image]) ** 2)
+                          .sum(axis=1))
+
+    order = numpy.lexsort((image, distance, center))
+    center = center[order]
+    image = image[order]
+    distance = distance[order]
+    if max_num_neighbors >= 0:
+        rank = numpy.arange(len(center)) - numpy.searchsorted(center, center)
+        keep = rank < max_num_neighbors
+        center = center[keep]
+        image = image[keep]
+        distance = distance[keep]
+    index = numpy.stack((center, image % num_atoms))
+    return index, distance
@@ -1,3 +1,16 @@
+import joblib
+from tqdm import tqdm
+
+from chainer_chemistry.dataset.parsers.feature_collector import FeatureCollector  # NOQA
+
+
+def _parse_chunk(parse_fn, chunk, args, journal, key):
+    result = parse_fn(chunk, *args)
+    if journal is not None:
+        journal.commit(key, result)
+    return key, result
+
+
 class BaseParser(object):
     def __init__(self):
         pass
@@ -12,3 +25,68 @@ class BaseFileParser(BaseParser):
 
     def parse(self, filepath):
         raise NotImplementedError
+
+    @staticmethod
+    def _parse_chunks(parse_fn, chunks, args=(), n_jobs=1, journal=None,
+                      collector=None):
+        """Parses each chunk with `parse_fn` and merges results in order
+
+        Args:
+            parse_fn (Callable): function which takes a chunk and `args`, and
+                returns `(features, smiles_list, is_successful_list,
+                fail_count)`, where `features` is a list of each feature,
+                i.e. an array or a list of the examples, or `None`.
+            chunks (iterable): chunks to be parsed. It is consumed lazily.
+            args (tuple): additional arguments passed to `parse_fn`.
+            n_jobs (int): Number of worker processes used by `joblib`.
+            journal (ParseJournal or None): If specified, the result of each
+                chunk is committed to the journal, and the chunks already
+                committed are loaded from it instead of being parsed.
+            collector (FeatureCollector or None): collector into which the
+                features of all chunks are merged. If `None`, they are
+                merged into lists.
+
+        Returns (tuple): `(features, smiles_list, is_successful_list,
+            fail_count)` of all chunks.
+
+        """
+        num_chunks = [0]
+
+        def tasks():
+            for key, chunk in enumerate(tqdm(chunks)):
+                num_chunks[0] = key + 1
+                if journal is not None and journal.is_committed(key):
+                    continue
+                yield joblib.delayed(_parse_chunk)(
+                    parse_fn, chunk, args, journal, key)
+
+        if collector is None:
+            collector = FeatureCollector()
+        smiles_list = []
+        is_successful_list = []
+        fail_count = 0
+
+        def merge(chunk_result):
+            (chunk_features, chunk_smiles, chunk_is_successful,
+             chunk_fail_count) = chunk_result
+            if chunk_features is not None:
+                collector.extend(chunk_features)
+            smiles_list.extend(chunk_smiles)
+            is_successful_list.extend(chunk_is_successful)
+            return chunk_fail_count
+
+        # The results are returned in the order of the chunks as soon as
+        # they are parsed, so each chunk is merged into `collector` and
+        # released before the later chunks are parsed. The chunks skipped by
+        # `journal` are loaded from it at their positions.
+        next_key = 0
+        for key, chunk_result in joblib.Parallel(
+                n_jobs=n_jobs, return_as='generator')(tasks()):
+            for committed_key in range(next_key, key):
+                fail_count += merge(journal.load(committed_key))
+            fail_count += merge(chunk_result)
+            next_key = key + 1
+        for committed_key in range(next_key, num_chunks[0]):
+            fail_count += merge(journal.load(committed_key))
+        features = collector.finish()
+        return features, smiles_list, is_successful_list, fail_count
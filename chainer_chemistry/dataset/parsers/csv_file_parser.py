@@ -1,6 +1,13 @@
+import os
+
+import numpy
 import pandas
 
+from chainer_chemistry.dataset.feature_cache import get_config_hash
 from chainer_chemistry.dataset.parsers.data_frame_parser import DataFrameParser
+from chainer_chemistry.dataset.parsers.journal import ParseJournal
+from chainer_chemistry.dataset.preprocessors.mol_preprocessor import MolPreprocessor  # NOQA
+from chainer_chemistry.datasets.sharded_numpy_tuple_dataset import ShardedNumpyTupleDataset  # NOQA
 
 
 class CSVFileParser(DataFrameParser):
@@ -17,20 +24,24 @@ class CSVFileParser(DataFrameParser):
         postprocess_label (Callable): post processing function if necessary
         postprocess_fn (Callable): post processing function if necessary
         logger:
+        feature_cache (FeatureCache or None): cache of input features.
+            See `DataFrameParser` for details.
     """
 
     def __init__(self, preprocessor,
                  labels=None,
                  smiles_col='smiles',
                  postprocess_label=None, postprocess_fn=None,
-                 logger=None):
+                 logger=None, feature_cache=None):
         super(CSVFileParser, self).__init__(
             preprocessor, labels=labels, smiles_col=smiles_col,
             postprocess_label=postprocess_label, postprocess_fn=postprocess_fn,
-            logger=logger)
+            logger=logger, feature_cache=feature_cache)
 
     def parse(self, filepath, return_smiles=False, target_index=None,
-              return_is_successful=False):
+              return_is_successful=False, n_jobs=1, chunksize=1000,
+              shard_dir=None, shard_size=100000, work_dir=None,
+              deduplicate=False, label_reducer='mean', memmap_dir=None):
         """parse csv file using `preprocessor`
 
         Label is extracted from `labels` columns and input features are
@@ -48,16 +59,163 @@ class CSVFileParser(DataFrameParser):
                 returned in the key 'is_successful'. It represents
                 preprocessing has succeeded or not for each SMILES.
                 If set to False, `None` is returned in the key 'is_success'.
+            n_jobs (int): Number of worker processes used for featurization.
+                See `DataFrameParser.parse` for details.
+            chunksize (int): Number of rows processed by one worker task.
+            shard_dir (str or None): If specified, the file is parsed in
+                streaming mode. Every `shard_size` rows are read, featurized
+                and saved to a numbered shard directory under `shard_dir`,
+                so that peak memory does not grow with the file size.
+                `ShardedNumpyTupleDataset` which memory-maps all the shards
+                is returned in the key 'dataset'.
+                `target_index` must be sorted in ascending order without
+                duplicates in this mode, since the rows are read in the order
+                of the file.
+            shard_size (int): Number of rows of the csv file stored in one
+                shard. It is only used when `shard_dir` is specified.
+            work_dir (str or None): directory to journal the parse, so that
+                an interrupted parse can be resumed.
+                See `DataFrameParser.parse` for details. In streaming mode,
+                each shard is committed when it is saved, and the shards
+                already saved are skipped on resume.
+            deduplicate (bool): If set to `True`, each unique molecule is
+                featurized only once and 'index_map' is returned.
+                See `DataFrameParser.parse` for details. It can not be used
+                in streaming mode.
+            label_reducer (str or Callable): How to merge labels of the
+                duplicated rows. See `DataFrameParser.parse` for details.
+            memmap_dir (str or None): directory to write the features into
+                memory-mapped arrays. See `DataFrameParser.parse` for
+                details. It can not be used in streaming mode, where the
+                features are written into the shard directories directly
+                when `postprocess_fn` is not specified.
 
         Returns (dict): dictionary that contains Dataset, 1-d numpy array with
             dtype=object(string) which is a vector of smiles for each example
             or None.
 
         """
+        if shard_dir is not None:
+            if deduplicate:
+                raise ValueError('deduplicate can not be used with '
+                                 'shard_dir')
+            if memmap_dir is not None:
+                raise ValueError('memmap_dir can not be used with '
+                                 'shard_dir')
+            return self._parse_to_shards(
+                filepath, shard_dir, shard_size, return_smiles=return_smiles,
+                target_index=target_index,
+                return_is_successful=return_is_successful, n_jobs=n_jobs,
+                chunksize=chunksize, work_dir=work_dir)
         df = pandas.read_csv(filepath)
         return super(CSVFileParser, self).parse(
             df, return_smiles=return_smiles, target_index=target_index,
-            return_is_successful=return_is_successful)
+            return_is_successful=return_is_successful, n_jobs=n_jobs,
+            chunksize=chunksize, work_dir=work_dir, deduplicate=deduplicate,
+            label_reducer=label_reducer, memmap_dir=memmap_dir)
+
+    def _parse_to_shards(self, filepath, shard_dir, shard_size,
+                         return_smiles=False, target_index=None,
+                         return_is_successful=False, n_jobs=1,
+                         chunksize=1000, work_dir=None):
+        """Streaming version of `parse`, see `parse` for the arguments"""
+        logger = self.logger
+        pp = self.preprocessor
+        if not isinstance(pp, MolPreprocessor):
+            raise NotImplementedError
+        if type(pp).create_dataset is not MolPreprocessor.create_dataset:
+            # Shards are always stored as `NumpyTupleDataset`.
+            raise NotImplementedError(
+                'streaming parse is not supported for {}, which creates '
+                'its own dataset type'.format(type(pp).__name__))
+        if shard_size <= 0:
+            raise ValueError('shard_size must be positive, got {}'
+                             .format(shard_size))
+        if target_index is not None:
+            # rows are extracted in the order of the file.
+            target_index = numpy.asarray(target_index)
+            if (numpy.diff(target_index) <= 0).any():
+                raise ValueError('target_index must be sorted without '
+                                 'duplicates when shard_dir is specified')
+        journal = None
+        if work_dir is not None:
+            stat = os.stat(filepath)
+            journal = ParseJournal(work_dir, self._get_journal_config(
+                [stat.st_size, stat.st_mtime],
+                target_index=get_config_hash(target_index),
+                return_smiles=return_smiles,
+                return_is_successful=return_is_successful,
+                shard_dir=os.path.abspath(shard_dir), shard_size=shard_size))
+        elif os.path.isdir(shard_dir) and os.listdir(shard_dir):
+            raise ValueError('shard_dir {} is not empty'.format(shard_dir))
+
+        smiles_list = []
+        is_successful_list = []
+        total_count = 0
+        success_count = 0
+        fail_count = 0
+        num_shards = 0
+        row_offset = 0
+        for key, df in enumerate(
+                pandas.read_csv(filepath, chunksize=shard_size)):
+            row_index = numpy.arange(row_offset, row_offset + df.shape[0])
+            row_offset += df.shape[0]
+            if target_index is not None:
+                df = df.iloc[numpy.isin(row_index, target_index)]
+            total_count += df.shape[0]
+            if df.shape[0] == 0:
+                continue
+
+            if journal is not None and journal.is_committed(key):
+                # this shard is already saved by the interrupted parse.
+                (chunk_smiles, chunk_is_successful, chunk_fail_count,
+                 chunk_success_count, saved) = journal.load(key)
+            else:
+                shard_path = os.path.join(shard_dir,
+                                          '{:05d}'.format(num_shards))
+                # Without `postprocess_fn`, features are written into the
+                # shard directly.
+                memmap_dir = shard_path if self.postprocess_fn is None \
+                    else None
+                features, chunk_smiles, chunk_is_successful, \
+                    chunk_fail_count = self._featurize(
+                        df, return_smiles, return_is_successful, n_jobs,
+                        chunksize, memmap_dir=memmap_dir)
+                chunk_success_count = 0
+                saved = features is not None
+                if saved:
+                    chunk_success_count = len(features[0])
+                    if memmap_dir is None:
+                        result = self.postprocess_fn(
+                            *self._to_feature_arrays(features))
+                        ShardedNumpyTupleDataset.save_shard(shard_path,
+                                                            result)
+                        del result
+                del features
+                if journal is not None:
+                    journal.commit(key, (chunk_smiles, chunk_is_successful,
+                                         chunk_fail_count,
+                                         chunk_success_count, saved))
+            smiles_list.extend(chunk_smiles)
+            is_successful_list.extend(chunk_is_successful)
+            fail_count += chunk_fail_count
+            success_count += chunk_success_count
+            if saved:
+                num_shards += 1
+        logger.info('Preprocess finished. FAIL {}, SUCCESS {}, TOTAL {}, '
+                    'SHARDS {}'.format(fail_count, success_count, total_count,
+                                       num_shards))
+
+        smileses = numpy.array(
+            smiles_list, dtype=object) if return_smiles else None
+        if return_is_successful:
+            is_successful = numpy.array(is_successful_list)
+        else:
+            is_successful = None
+        return {"dataset": ShardedNumpyTupleDataset.load(shard_dir),
+                "smiles": smileses,
+                "is_successful": is_successful,
+                "index_map": None}
 
     def extract_total_num(self, filepath):
         """Extracts total number of data which can be parsed
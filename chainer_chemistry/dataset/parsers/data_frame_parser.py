@@ -1,12 +1,20 @@
 from logging import getLogger
 
+import hashlib
+
+import joblib
 import numpy
+import pandas
 from rdkit import Chem
 from tqdm import tqdm
 
+from chainer_chemistry.dataset.feature_cache import get_config_hash
 from chainer_chemistry.dataset.parsers.base_parser import BaseFileParser
+from chainer_chemistry.dataset.parsers.feature_collector import FeatureCollector  # NOQA
+from chainer_chemistry.dataset.parsers.journal import ParseJournal
 from chainer_chemistry.dataset.preprocessors.common import MolFeatureExtractionError  # NOQA
 from chainer_chemistry.dataset.preprocessors.mol_preprocessor import MolPreprocessor  # NOQA
+from chainer_chemistry.dataset.ragged_array import to_feature_array
 
 import traceback
 
@@ -25,13 +33,16 @@ class DataFrameParser(BaseFileParser):
         postprocess_label (Callable): post processing function if necessary
         postprocess_fn (Callable): post processing function if necessary
         logger:
+        feature_cache (FeatureCache or None): If specified, input features
+            are looked up in the cache by canonical smiles, and only the
+            molecules which are not cached are featurized.
     """
 
     def __init__(self, preprocessor,
                  labels=None,
                  smiles_col='smiles',
                  postprocess_label=None, postprocess_fn=None,
-                 logger=None):
+                 logger=None, feature_cache=None):
         super(DataFrameParser, self).__init__(preprocessor)
         if isinstance(labels, str):
             labels = [labels, ]
@@ -40,9 +51,12 @@ class DataFrameParser(BaseFileParser):
         self.postprocess_label = postprocess_label
         self.postprocess_fn = postprocess_fn
         self.logger = logger or getLogger(__name__)
+        self.feature_cache = feature_cache
 
     def parse(self, df, return_smiles=False, target_index=None,
-              return_is_successful=False):
+              return_is_successful=False, n_jobs=1, chunksize=1000,
+              work_dir=None, deduplicate=False, label_reducer='mean',
+              memmap_dir=None):
         """parse DataFrame using `preprocessor`
 
         Label is extracted from `labels` columns and input features are
@@ -60,6 +74,45 @@ class DataFrameParser(BaseFileParser):
                 returned in the key 'is_successful'. It represents
                 preprocessing has succeeded or not for each SMILES.
                 If set to False, `None` is returned in the key 'is_success'.
+            n_jobs (int): Number of worker processes used for featurization.
+                If it is 1 (default), all rows are processed in this process.
+                Otherwise `df` is split into chunks of `chunksize` rows which
+                are processed in parallel with `joblib`, and the results are
+                merged in the original row order. Negative values follow the
+                `joblib` convention, e.g. -1 uses all CPUs.
+            chunksize (int): Number of rows processed by one worker task.
+                It is only used when `n_jobs` is not 1 or `work_dir` is
+                specified.
+            work_dir (str or None): If specified, the parse is journaled to
+                this directory. Rows are processed in chunks of `chunksize`
+                rows and the result of each chunk is committed as soon as it
+                is finished. When the parse is interrupted, running the same
+                parse again with the same `work_dir` continues from the
+                committed chunks, and the result is identical to the one of
+                an uninterrupted run. `ValueError` is raised if `work_dir`
+                contains the journal of a different parse.
+            deduplicate (bool): If set to `True`, rows are grouped by the
+                canonical smiles computed by `preprocessor`, and each unique
+                molecule is featurized only once. The dataset contains one
+                example per unique molecule, in the order of its first
+                appearance. The key 'index_map' of the returned dictionary
+                is an int array of the number of rows which represents the
+                index of the example made from each row, or -1 if failed.
+                `is_successful` is also returned for each row.
+            label_reducer (str or Callable): How to merge labels of the
+                duplicated rows, it is only used when `deduplicate` is
+                `True`. 'mean' (default) and 'max' ignore missing values,
+                'first' uses labels of the first row. If callable, it takes
+                1-d numpy array of the label values of one column and
+                returns the merged value.
+            memmap_dir (str or None): If specified, input features are
+                written into arrays memory-mapped to `arr_{i}.npy` files in
+                this directory, followed by the labels, so that the dataset
+                does not need to fit in memory. The features are saved
+                before `postprocess_fn` is applied, and the directory can be
+                loaded again by `ShardedNumpyTupleDataset.load_shard`.
+                Features are written directly only when `preprocessor`
+                declares their shapes by `get_feature_spec`.
 
         Returns (dict): dictionary that contains Dataset, 1-d numpy array with
             dtype=object(string) which is a vector of smiles for each example
@@ -68,97 +121,56 @@ class DataFrameParser(BaseFileParser):
         """
         logger = self.logger
         pp = self.preprocessor
-        smiles_list = []
-        is_successful_list = []
 
-        # counter = 0
         if isinstance(pp, MolPreprocessor):
             if target_index is not None:
                 df = df.iloc[target_index]
+            if deduplicate:
+                num_rows = df.shape[0]
+                df, unique_index, prepared = self._deduplicate(
+                    df, label_reducer, n_jobs, chunksize)
+                # success flags of unique molecules are required to make
+                # `index_map`
+                requested_is_successful = return_is_successful
+                return_is_successful = True
 
-            features = None
-            smiles_index = df.columns.get_loc(self.smiles_col)
-            if self.labels is None:
-                labels_index = []  # dummy list
-            else:
-                labels_index = [df.columns.get_loc(c) for c in self.labels]
+            if memmap_dir is not None and pp.get_feature_spec() is None:
+                logger.warning(
+                    '{} does not declare the shapes of the features, they '
+                    'are collected in memory before saved to memmap_dir'
+                    .format(type(pp).__name__))
 
-            total_count = df.shape[0]
-            fail_count = 0
-            success_count = 0
-            for row in tqdm(df.itertuples(index=False), total=df.shape[0]):
-                smiles = row[smiles_index]
-                # TODO(Nakago): Check.
-                # currently it assumes list
-                labels = [row[i] for i in labels_index]
-                try:
-                    mol = Chem.MolFromSmiles(smiles)
-                    if mol is None:
-                        fail_count += 1
-                        if return_is_successful:
-                            is_successful_list.append(False)
-                        continue
-                    # Note that smiles expression is not unique.
-                    # we obtain canonical smiles
-                    canonical_smiles, mol = pp.prepare_smiles_and_mol(mol)
-                    input_features = pp.get_input_features(mol)
+            journal = None
+            if work_dir is not None:
+                journal = ParseJournal(work_dir, self._get_journal_config(
+                    self._hash_data_frame(df), return_smiles=return_smiles,
+                    return_is_successful=return_is_successful,
+                    chunksize=chunksize))
 
-                    # Extract label
-                    if self.postprocess_label is not None:
-                        labels = self.postprocess_label(labels)
-
-                    if return_smiles:
-                        smiles_list.append(canonical_smiles)
-                except MolFeatureExtractionError as e:  # NOQA
-                    # This is expected error that extracting feature failed,
-                    # skip this molecule.
-                    fail_count += 1
-                    if return_is_successful:
-                        is_successful_list.append(False)
-                    continue
-                except Exception as e:
-                    logger.warning('parse(), type: {}, {}'
-                                   .format(type(e).__name__, e.args))
-                    logger.info(traceback.format_exc())
-                    fail_count += 1
-                    if return_is_successful:
-                        is_successful_list.append(False)
-                    continue
-                # Initialize features: list of list
-                if features is None:
-                    if isinstance(input_features, tuple):
-                        num_features = len(input_features)
-                    else:
-                        num_features = 1
-                    if self.labels is not None:
-                        num_features += 1
-                    features = [[] for _ in range(num_features)]
-
-                if isinstance(input_features, tuple):
-                    for i in range(len(input_features)):
-                        features[i].append(input_features[i])
-                else:
-                    features[0].append(input_features)
-                if self.labels is not None:
-                    features[len(features) - 1].append(labels)
-                success_count += 1
-                if return_is_successful:
-                    is_successful_list.append(True)
-            ret = []
-
-            for feature in features:
-                try:
-                    feat_array = numpy.asarray(feature)
-                except ValueError:
-                    # Temporal work around.
-                    # See,
-                    # https://stackoverflow.com/questions/26885508/why-do-i-get-error-trying-to-cast-np-arraysome-list-valueerror-could-not-broa
-                    feat_array = numpy.empty(len(feature), dtype=numpy.ndarray)
-                    feat_array[:] = feature[:]
-                ret.append(feat_array)
-            result = tuple(ret)
+            total_count = df.shape[0]
+            features, smiles_list, is_successful_list, fail_count = \
+                self._featurize(df, return_smiles, return_is_successful,
+                                n_jobs, chunksize, journal=journal,
+                                memmap_dir=memmap_dir,
+                                prepared=prepared if deduplicate else None)
+            success_count = 0 if features is None else len(features[0])
+            result = self._to_feature_arrays(features)
             logger.info('Preprocess finished. FAIL {}, SUCCESS {}, TOTAL {}'
                         .format(fail_count, success_count, total_count))
+
+            index_map = None
+            if deduplicate:
+                unique_successful = numpy.array(is_successful_list,
+                                                dtype=bool)
+                example_index = numpy.cumsum(unique_successful) - 1
+                example_index[~unique_successful] = -1
+                index_map = numpy.full(num_rows, -1, dtype=numpy.int64)
+                found = unique_index >= 0
+                index_map[found] = example_index[unique_index[found]]
+                return_is_successful = requested_is_successful
+                is_successful_list = index_map >= 0
+                logger.info('Deduplication finished. ROWS {}, UNIQUE {}'
+                            .format(num_rows, total_count))
         else:
             raise NotImplementedError
 
@@ -179,7 +191,279 @@ class DataFrameParser(BaseFileParser):
             dataset = pp.create_dataset(*result)
         return {"dataset": dataset,
                 "smiles": smileses,
-                "is_successful": is_successful}
+                "is_successful": is_successful,
+                "index_map": index_map}
+
+    def _deduplicate(self, df, label_reducer='mean', n_jobs=1,
+                     chunksize=1000):
+        """Merges rows of the same molecule
+
+        Args:
+            df (pandas.DataFrame): dataframe to be deduplicated.
+            label_reducer (str or Callable): See `parse`.
+            n_jobs (int): Number of worker processes used to compute
+                canonical smiles.
+            chunksize (int): Number of rows processed by one worker task.
+
+        Returns (tuple): `(unique_df, unique_index, prepared)`, where
+            `unique_df` is the dataframe which contains the first row of each
+            molecule with merged labels, `unique_index` is the index of the
+            row of `unique_df` for each row of `df`, or -1 if the smiles is
+            invalid, and `prepared` is the list of the canonical smiles and
+            the mol returned by `prepare_smiles_and_mol` for each row of
+            `unique_df`, so that they are featurized without being parsed
+            again.
+
+        """
+        if not (label_reducer in ('mean', 'first', 'max') or
+                callable(label_reducer)):
+            raise ValueError('label_reducer must be mean, first, max or '
+                             'callable, got {}'.format(label_reducer))
+        if n_jobs == 1:
+            keys, mols = self._get_canonical_smiles(df)
+        else:
+            if chunksize <= 0:
+                raise ValueError('chunksize must be positive, got {}'
+                                 .format(chunksize))
+            keys = []
+            mols = []
+            for chunk_keys, chunk_mols in joblib.Parallel(n_jobs=n_jobs)(
+                    joblib.delayed(self._get_canonical_smiles)(
+                        df.iloc[i:i + chunksize])
+                    for i in range(0, df.shape[0], chunksize)):
+                keys.extend(chunk_keys)
+                mols.extend(chunk_mols)
+
+        # codes are assigned in the order of the first appearance, and
+        # invalid smiles (`None`) is coded as -1.
+        unique_index, _ = pandas.factorize(pandas.Series(keys, dtype=object),
+                                           sort=False)
+        found = unique_index >= 0
+        _, first_rows = numpy.unique(unique_index[found], return_index=True)
+        first_rows = numpy.flatnonzero(found)[first_rows]
+        unique_df = df.iloc[first_rows].copy()
+        prepared = [(keys[i], mols[i]) for i in first_rows]
+        if self.labels is not None and label_reducer != 'first':
+            grouped = df[self.labels][found].groupby(unique_index[found])
+            if label_reducer == 'mean':
+                merged = grouped.mean()
+            elif label_reducer == 'max':
+                merged = grouped.max()
+            else:
+                merged = grouped.agg(lambda x: label_reducer(x.values))
+            for label in self.labels:
+                unique_df[label] = merged[label].values
+        return unique_df, unique_index, prepared
+
+    def _get_canonical_smiles(self, df):
+        """Returns canonical smiles and prepared mol of each row of `df`
+
+        Returns (tuple): `(keys, mols)`, where `keys` is the list of the
+            canonical smiles of each row, `None` for invalid one, and `mols`
+            is the list of the mols prepared by `prepare_smiles_and_mol`.
+            The mol is kept only for the first row of each molecule in `df`,
+            and it is `None` for the others.
+
+        """
+        logger = self.logger
+        pp = self.preprocessor
+        keys = []
+        mols = []
+        seen = set()
+        for smiles in df[self.smiles_col]:
+            key = None
+            mol = None
+            try:
+                mol = Chem.MolFromSmiles(smiles)
+                if mol is not None:
+                    key, mol = pp.prepare_smiles_and_mol(mol)
+            except MolFeatureExtractionError:
+                # This is expected error, the row is treated as invalid.
+                pass
+            except Exception as e:
+                logger.warning('parse(), type: {}, {}'
+                               .format(type(e).__name__, e.args))
+                logger.info(traceback.format_exc())
+            if key is None or key in seen:
+                mol = None
+            else:
+                seen.add(key)
+            keys.append(key)
+            mols.append(mol)
+        return keys, mols
+
+    def _featurize(self, df, return_smiles=False, return_is_successful=False,
+                   n_jobs=1, chunksize=1000, journal=None, memmap_dir=None,
+                   prepared=None):
+        """Extracts features from all rows of `df`, in parallel if requested
+
+        Returns (tuple): `(features, smiles_list, is_successful_list,
+            fail_count)`, same format with `_parse_rows`.
+
+        """
+        if n_jobs == 1 and journal is None:
+            return self._parse_rows(df, return_smiles, return_is_successful,
+                                    verbose=True, memmap_dir=memmap_dir,
+                                    prepared=prepared)
+
+        if chunksize <= 0:
+            raise ValueError('chunksize must be positive, got {}'
+                             .format(chunksize))
+        if prepared is None:
+            parse_fn = self._parse_rows
+            chunks = (df.iloc[i:i + chunksize]
+                      for i in range(0, df.shape[0], chunksize))
+        else:
+            parse_fn = self._parse_prepared_rows
+            chunks = ((df.iloc[i:i + chunksize], prepared[i:i + chunksize])
+                      for i in range(0, df.shape[0], chunksize))
+        return self._parse_chunks(
+            parse_fn, chunks,
+            args=(return_smiles, return_is_successful), n_jobs=n_jobs,
+            journal=journal, collector=FeatureCollector(
+                self.preprocessor.get_feature_spec(), capacity=df.shape[0],
+                memmap_dir=memmap_dir))
+
+    def _get_journal_config(self, data, **kwargs):
+        """Returns configuration which identifies the parse for `ParseJournal`
+
+        Args:
+            data: json serializable fingerprint of the input data.
+            **kwargs: options of the parse which affect its result.
+
+        """
+        config = {
+            'parser': type(self).__name__,
+            'preprocessor': get_config_hash(self.preprocessor),
+            'labels': self.labels,
+            'smiles_col': self.smiles_col,
+            'postprocess_label': get_config_hash(self.postprocess_label),
+            'data': data,
+        }
+        config.update(kwargs)
+        return config
+
+    def _hash_data_frame(self, df):
+        """Computes the hash of the columns of `df` used by the parse"""
+        columns = [self.smiles_col] + list(self.labels or [])
+        values = pandas.util.hash_pandas_object(df[columns], index=True)
+        return hashlib.sha1(values.values.tobytes()).hexdigest()
+
+    @staticmethod
+    def _to_feature_arrays(features):
+        """Converts list of each feature into tuple of numpy arrays"""
+        return tuple(to_feature_array(feature) for feature in features)
+
+    def _parse_prepared_rows(self, chunk, return_smiles=False,
+                             return_is_successful=False):
+        """`_parse_rows` for the chunk of the rows and their prepared mols"""
+        df, prepared = chunk
+        return self._parse_rows(df, return_smiles, return_is_successful,
+                                prepared=prepared)
+
+    def _parse_rows(self, df, return_smiles=False, return_is_successful=False,
+                    verbose=False, memmap_dir=None, prepared=None):
+        """Extracts features from each row of `df`
+
+        This method is the unit of work of `parse`. It only depends on the
+        rows given, so it may be executed in a worker process for a chunk of
+        the whole dataframe.
+
+        Args:
+            df (pandas.DataFrame): dataframe to be parsed.
+            return_smiles (bool): If `True`, canonical smiles of successfully
+                processed rows are collected.
+            return_is_successful (bool): If `True`, success flag of each row
+                is collected.
+            verbose (bool): If `True`, progress bar is shown.
+            memmap_dir (str or None): directory to memory-map the features.
+                See `FeatureCollector`.
+            prepared (list or None): If specified, the canonical smiles and
+                the prepared mol of each row, which are used instead of
+                parsing the smiles of the row.
+
+        Returns (tuple): `(features, smiles_list, is_successful_list,
+            fail_count)`, where `features` is a list of each feature, i.e.
+            an array or a list of the examples (see
+            `FeatureCollector.finish`), or `None` when no row is
+            successfully processed.
+
+        """
+        logger = self.logger
+        pp = self.preprocessor
+        smiles_list = []
+        is_successful_list = []
+
+        collector = FeatureCollector(pp.get_feature_spec(),
+                                     capacity=df.shape[0],
+                                     memmap_dir=memmap_dir)
+        smiles_index = df.columns.get_loc(self.smiles_col)
+        if self.labels is None:
+            labels_index = []  # dummy list
+        else:
+            labels_index = [df.columns.get_loc(c) for c in self.labels]
+
+        feature_cache = self.feature_cache
+        if feature_cache is not None:
+            namespace = feature_cache.get_namespace(pp)
+
+        fail_count = 0
+        for i, row in enumerate(tqdm(df.itertuples(index=False),
+                                     total=df.shape[0],
+                                     disable=not verbose)):
+            smiles = row[smiles_index]
+            # TODO(Nakago): Check.
+            # currently it assumes list
+            labels = [row[i] for i in labels_index]
+            try:
+                if prepared is not None:
+                    canonical_smiles, mol = prepared[i]
+                else:
+                    mol = Chem.MolFromSmiles(smiles)
+                    if mol is None:
+                        fail_count += 1
+                        if return_is_successful:
+                            is_successful_list.append(False)
+                        continue
+                    # Note that smiles expression is not unique.
+                    # we obtain canonical smiles
+                    canonical_smiles, mol = pp.prepare_smiles_and_mol(mol)
+                if feature_cache is None:
+                    input_features = pp.get_input_features(mol)
+                else:
+                    input_features = feature_cache.get_input_features(
+                        pp, canonical_smiles, mol, namespace=namespace)
+
+                # Extract label
+                if self.postprocess_label is not None:
+                    labels = self.postprocess_label(labels)
+
+                if return_smiles:
+                    smiles_list.append(canonical_smiles)
+            except MolFeatureExtractionError as e:  # NOQA
+                # This is expected error that extracting feature failed,
+                # skip this molecule.
+                fail_count += 1
+                if return_is_successful:
+                    is_successful_list.append(False)
+                continue
+            except Exception as e:
+                logger.warning('parse(), type: {}, {}'
+                               .format(type(e).__name__, e.args))
+                logger.info(traceback.format_exc())
+                fail_count += 1
+                if return_is_successful:
+                    is_successful_list.append(False)
+                continue
+            if not isinstance(input_features, tuple):
+                input_features = (input_features,)
+            if self.labels is not None:
+                input_features = input_features + (labels,)
+            collector.append(input_features)
+            if return_is_successful:
+                is_successful_list.append(True)
+        features = collector.finish()
+        return features, smiles_list, is_successful_list, fail_count
 
     def extract_total_num(self, df):
         """Extracts total number of data which can be parsed
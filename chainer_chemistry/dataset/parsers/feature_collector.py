@@ -0,0 +1,237 @@
+import os
+
+import numpy
+
+from chainer_chemistry.dataset.ragged_array import RaggedArray
+from chainer_chemistry.dataset.ragged_array import to_feature_array
+
+
+def _shrink_npy(filepath, length):
+    """Truncates `.npy` file of C-contiguous array to `length` examples
+
+    The header is rewritten in place with the same size, and the data after
+    the `length`-th example is cut off.
+
+    """
+    with open(filepath, 'r+b') as f:
+        version = numpy.lib.format.read_magic(f)
+        header_start = f.tell() + (2 if version == (1, 0) else 4)
+        if version == (1, 0):
+            shape, fortran_order, dtype = \
+                numpy.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = \
+                numpy.lib.format.read_array_header_2_0(f)
+        data_start = f.tell()
+        shape = (length,) + tuple(shape[1:])
+        header = "{{'descr': {!r}, 'fortran_order': {!r}, 'shape': {!r}, }}" \
+            .format(numpy.lib.format.dtype_to_descr(dtype), fortran_order,
+                    shape)
+        # shorter shape never makes the header longer, pad it to the
+        # original size so that the data offset does not change.
+        header = header.ljust(data_start - header_start - 1) + '\n'
+        f.seek(header_start)
+        f.write(header.encode('latin1'))
+        f.truncate(data_start + int(numpy.prod(shape)) * dtype.itemsize)
+
+
+class FeatureCollector(object):
+
+    """Collects features of each example into feature arrays
+
+    Features whose shape and dtype are declared by `spec` are written
+    directly into arrays preallocated for `capacity` examples, instead of
+    being kept in a list of small arrays which must be copied again when the
+    dataset is made. Other features, e.g. labels, are kept in lists.
+
+    When some example does not match `spec`, the collector falls back to
+    lists for all the features, so the result is always identical to the
+    one made from lists.
+
+    Args:
+        spec (tuple or None): tuple of `(shape, dtype)` of the leading
+            features of each example, typically returned by
+            `MolPreprocessor.get_feature_spec`. If `None`, all features are
+            kept in lists.
+        capacity (int or None): Maximum number of examples expected. If
+            `None`, arrays are grown when they are full.
+        memmap_dir (str or None): If specified, arrays are memory-mapped to
+            `arr_{i}.npy` files in this directory, and features which are
+            kept in lists are also saved there by `finish`. The directory
+            can be loaded by `ShardedNumpyTupleDataset.load_shard`.
+            `capacity` must be specified.
+
+    """
+
+    def __init__(self, spec=None, capacity=None, memmap_dir=None):
+        if memmap_dir is not None and capacity is None:
+            raise ValueError('capacity must be specified to use memmap_dir')
+        self.spec = spec
+        self.capacity = capacity
+        self.memmap_dir = memmap_dir
+        self._size = 0
+        # `_columns[i]` is a list, preallocated array or `None`.
+        self._columns = None
+        self._finished = False
+
+    def __len__(self):
+        return self._size
+
+    def _get_path(self, i):
+        return os.path.join(self.memmap_dir, 'arr_{}.npy'.format(i))
+
+    def _allocate(self, num_columns, capacity):
+        self._columns = [[] for _ in range(num_columns)]
+        if self.memmap_dir is not None and not os.path.exists(
+                self.memmap_dir):
+            os.makedirs(self.memmap_dir)
+        if self.spec is None or len(self.spec) > num_columns:
+            self.spec = None
+            return
+        for i, (shape, dtype) in enumerate(self.spec):
+            shape = (capacity,) + tuple(shape)
+            if self.memmap_dir is None:
+                self._columns[i] = numpy.empty(shape, dtype=dtype)
+            else:
+                self._columns[i] = numpy.lib.format.open_memmap(
+                    self._get_path(i), mode='w+', dtype=dtype, shape=shape)
+
+    def _match(self, column_values):
+        for value, (shape, dtype) in zip(column_values, self.spec):
+            if not isinstance(value, numpy.ndarray) \
+                    or value.shape != tuple(shape) or value.dtype != dtype:
+                return False
+        return True
+
+    def _fall_back_to_lists(self):
+        for i in range(len(self.spec)):
+            array = numpy.array(self._columns[i][:self._size])
+            self._columns[i] = list(array)
+        if self.memmap_dir is not None:
+            for i in range(len(self.spec)):
+                os.remove(self._get_path(i))
+        self.spec = None
+
+    def _reserve(self, size):
+        capacity = len(self._columns[0])
+        if size <= capacity:
+            return
+        if self.memmap_dir is not None:
+            raise ValueError('number of examples exceeds capacity {}'
+                             .format(capacity))
+        capacity = max(size, capacity * 2, 16)
+        for i in range(len(self.spec)):
+            array = self._columns[i]
+            array.resize((capacity,) + array.shape[1:], refcheck=False)
+
+    def append(self, features):
+        """Appends features of one example
+
+        Args:
+            features (tuple): features of the example, e.g. input features
+                followed by the label.
+
+        """
+        if self._columns is None:
+            capacity = 16 if self.capacity is None else self.capacity
+            self._allocate(len(features), capacity)
+        if self.spec is not None and not self._match(features):
+            self._fall_back_to_lists()
+        if self.spec is None:
+            for column, value in zip(self._columns, features):
+                column.append(value)
+        else:
+            self._reserve(self._size + 1)
+            num_arrays = len(self.spec)
+            for i, value in enumerate(features):
+                if i < num_arrays:
+                    self._columns[i][self._size] = value
+                else:
+                    self._columns[i].append(value)
+        self._size += 1
+
+    def extend(self, features):
+        """Appends features of several examples
+
+        Args:
+            features (list): list of features of the examples, each element
+                is a list or an array of one feature, e.g. the result of
+                `finish` of another collector.
+
+        """
+        size = len(features[0])
+        if size == 0:
+            return
+        if self._columns is None:
+            capacity = size if self.capacity is None else self.capacity
+            self._allocate(len(features), capacity)
+        if self.spec is not None:
+            for column, (shape, dtype) in zip(features, self.spec):
+                if not isinstance(column, numpy.ndarray) \
+                        or column.shape[1:] != tuple(shape) \
+                        or column.dtype != dtype:
+                    self._fall_back_to_lists()
+                    break
+        if self.spec is None:
+            for column, values in zip(self._columns, features):
+                column.extend(values)
+        else:
+            self._reserve(self._size + size)
+            num_arrays = len(self.spec)
+            for i, values in enumerate(features):
+                if i < num_arrays:
+                    self._columns[i][self._size:self._size + size] = values
+                else:
+                    self._columns[i].extend(values)
+        self._size += size
+
+    def finish(self):
+        """Returns the collected features
+
+        Preallocated arrays are shrunk to the number of examples. When
+        `memmap_dir` is specified, all the features are stored in it and
+        returned as arrays, memory-mapped ones are reopened in read-only
+        mode.
+
+        Returns (list or None): list of each feature, which is an array of
+            the examples when it is collected into preallocated array or a
+            list otherwise. `None` is returned when no example is appended.
+
+        """
+        if self._finished:
+            raise RuntimeError('finish is already called')
+        self._finished = True
+        if self._columns is None:
+            return None
+        size = self._size
+        num_arrays = 0 if self.spec is None else len(self.spec)
+        columns = self._columns
+        self._columns = None
+        if self.memmap_dir is None:
+            for i in range(num_arrays):
+                columns[i].resize((size,) + columns[i].shape[1:],
+                                  refcheck=False)
+            return columns
+
+        result = []
+        for i, column in enumerate(columns):
+            path = self._get_path(i)
+            if i < num_arrays:
+                column.flush()
+                del column
+                columns[i] = None
+                if size != self.capacity:
+                    _shrink_npy(path, size)
+                try:
+                    result.append(numpy.load(path, mmap_mode='r'))
+                except ValueError:
+                    # empty array can't be memory-mapped.
+                    result.append(numpy.load(path))
+            else:
+                array = to_feature_array(column)
+                if isinstance(array, RaggedArray):
+                    array.save_npy(path[:-len('.npy')])
+                else:
+                    numpy.save(path, array)
+                result.append(array)
+        return result
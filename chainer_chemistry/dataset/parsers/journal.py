@@ -0,0 +1,75 @@
+import io
+import json
+import os
+import pickle
+import tempfile
+
+
+def _atomic_write(filepath, data):
+    """Writes bytes `data` to `filepath` via temporary file and rename"""
+    dirpath = os.path.dirname(filepath)
+    fd, tmp_path = tempfile.mkstemp(dir=dirpath, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ParseJournal(object):
+
+    """Journal of the chunks finished by a resumable parse
+
+    The result of each chunk, i.e. the range of rows or records, is committed
+    to `work_dir` as soon as it is finished. When the same parse is executed
+    again with the same `work_dir`, committed chunks are loaded instead of
+    being parsed again.
+
+    Args:
+        work_dir (str): directory to store the journal.
+        config (dict): json serializable configuration of the parse, which
+            identifies the input data, preprocessor and options. If
+            `work_dir` already contains the journal of a parse with
+            different configuration, `ValueError` is raised.
+
+    """
+
+    manifest_filename = 'journal.json'
+
+    def __init__(self, work_dir, config):
+        self.work_dir = work_dir
+        if not os.path.exists(work_dir):
+            os.makedirs(work_dir)
+        config = json.loads(json.dumps(config, sort_keys=True))
+        manifest_path = os.path.join(work_dir, self.manifest_filename)
+        if os.path.exists(manifest_path):
+            with io.open(manifest_path, 'r', encoding='utf-8') as f:
+                committed_config = json.load(f)
+            if committed_config != config:
+                raise ValueError(
+                    'work_dir {} contains the journal of a different parse, '
+                    'use another directory or remove it'.format(work_dir))
+        else:
+            _atomic_write(manifest_path, json.dumps(
+                config, sort_keys=True).encode('utf-8'))
+
+    def _get_path(self, key):
+        return os.path.join(self.work_dir, 'chunk_{:08d}.pkl'.format(key))
+
+    def is_committed(self, key):
+        return os.path.exists(self._get_path(key))
+
+    def load(self, key):
+        """Returns the result of the `key`-th chunk"""
+        with open(self._get_path(key), 'rb') as f:
+            return pickle.load(f)
+
+    def commit(self, key, result):
+        """Stores the result of the `key`-th chunk atomically"""
+        _atomic_write(self._get_path(key),
+                      pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
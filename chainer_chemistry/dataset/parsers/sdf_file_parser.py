@@ -1,12 +1,71 @@
+import io
 from logging import getLogger
+import os
 
 import numpy
 from rdkit import Chem
 from tqdm import tqdm
 
+from chainer_chemistry.dataset.feature_cache import get_config_hash
 from chainer_chemistry.dataset.parsers.base_parser import BaseFileParser
+from chainer_chemistry.dataset.parsers.feature_collector import FeatureCollector  # NOQA
+from chainer_chemistry.dataset.parsers.journal import ParseJournal
 from chainer_chemistry.dataset.preprocessors.common import MolFeatureExtractionError  # NOQA
 from chainer_chemistry.dataset.preprocessors.mol_preprocessor import MolPreprocessor  # NOQA
+from chainer_chemistry.dataset.ragged_array import to_feature_array
+
+
+def iter_sdf_records(filepath, target_index=None):
+    """Iterates raw records of sdf file in a single forward pass
+
+    Args:
+        filepath (str): file path of sdf file.
+        target_index (set or None): indices of records to be yielded. If
+            `None`, all records are yielded. Reading stops after the last
+            target record is found.
+
+    Returns: generator of str, each of which is a record terminated by
+        `$$$$` line.
+
+    """
+    last_index = None
+    if target_index is not None:
+        if len(target_index) == 0:
+            return
+        last_index = max(target_index)
+    index = 0
+    lines = []
+    with io.open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if target_index is None or index in target_index:
+                lines.append(line)
+            if line.rstrip() == '$$$$':
+                if target_index is None or index in target_index:
+                    yield ''.join(lines)
+                lines = []
+                index += 1
+                if last_index is not None and index > last_index:
+                    return
+    # the last record may not be terminated by `$$$$`
+    if ''.join(lines).strip():
+        yield ''.join(lines) + '$$$$\n'
+
+
+def mol_from_sdf_record(record):
+    """Decodes one raw sdf record into `Mol` with its properties
+
+    Args:
+        record (str): sdf record which contains one molecule.
+
+    Returns (rdkit.Chem.Mol or None): decoded molecule, `None` if failed.
+
+    """
+    mol_supplier = Chem.SDMolSupplier()
+    mol_supplier.SetData(record)
+    try:
+        return next(mol_supplier)
+    except StopIteration:
+        return None
 
 
 class SDFFileParser(BaseFileParser):
@@ -18,18 +77,23 @@ class SDFFileParser(BaseFileParser):
         postprocess_label (Callable): post processing function if necessary
         postprocess_fn (Callable): post processing function if necessary
         logger:
+        feature_cache (FeatureCache or None): If specified, input features
+            are looked up in the cache by canonical smiles, and only the
+            molecules which are not cached are featurized.
     """
 
     def __init__(self, preprocessor, labels=None, postprocess_label=None,
-                 postprocess_fn=None, logger=None):
+                 postprocess_fn=None, logger=None, feature_cache=None):
         super(SDFFileParser, self).__init__(preprocessor)
         self.labels = labels
         self.postprocess_label = postprocess_label
         self.postprocess_fn = postprocess_fn
         self.logger = logger or getLogger(__name__)
+        self.feature_cache = feature_cache
 
     def parse(self, filepath, return_smiles=False, target_index=None,
-              return_is_successful=False):
+              return_is_successful=False, streaming=False, n_jobs=1,
+              chunksize=1000, work_dir=None):
         """parse sdf file using `preprocessor`
 
         Note that label is extracted from preprocessor's method.
@@ -46,6 +110,28 @@ class SDFFileParser(BaseFileParser):
                 returned in the key 'is_successful'. It represents
                 preprocessing has succeeded or not for each SMILES.
                 If set to False, `None` is returned in the key 'is_success'.
+            streaming (bool): If set to `True`, the file is read only once
+                from the beginning, and split into raw records delimited by
+                `$$$$`, instead of building random-access `SDMolSupplier`.
+                Records not in `target_index` are skipped without being
+                decoded, and the examples are stored in the order of the
+                file regardless of the order of `target_index`.
+            n_jobs (int): Number of worker processes used to decode and
+                featurize records. It is only used when `streaming` is `True`.
+                Negative values follow the `joblib` convention, e.g. -1 uses
+                all CPUs.
+            chunksize (int): Number of records processed by one worker task.
+                It is only used when `streaming` is `True` and `n_jobs` is
+                not 1, or `work_dir` is specified.
+            work_dir (str or None): If specified, the parse is journaled to
+                this directory. Records are processed in chunks of
+                `chunksize` records and the result of each chunk is committed
+                as soon as it is finished. When the parse is interrupted,
+                running the same parse again with the same `work_dir`
+                continues from the committed chunks, and the result is
+                identical to the one of an uninterrupted run. `ValueError` is
+                raised if `work_dir` contains the journal of a different
+                parse.
 
         Returns (dict): dictionary that contains Dataset, 1-d numpy array with
             dtype=object(string) which is a vector of smiles for each example
@@ -54,100 +140,58 @@ class SDFFileParser(BaseFileParser):
         """
         logger = self.logger
         pp = self.preprocessor
-        smiles_list = []
-        is_successful_list = []
 
         if isinstance(pp, MolPreprocessor):
-            mol_supplier = Chem.SDMolSupplier(filepath)
-
-            if target_index is None:
-                target_index = list(range(len(mol_supplier)))
-
-            features = None
-
-            total_count = len(mol_supplier)
-            fail_count = 0
-            success_count = 0
-            for index in tqdm(target_index):
-                # `mol_supplier` does not accept numpy.integer, we must use int
-                mol = mol_supplier[int(index)]
-
-                if mol is None:
-                    fail_count += 1
-                    if return_is_successful:
-                        is_successful_list.append(False)
-                    continue
-                try:
-                    # Labels need to be extracted from `mol` before standardize
-                    # smiles.
-                    if self.labels is not None:
-                        label = pp.get_label(mol, self.labels)
-                        if self.postprocess_label is not None:
-                            label = self.postprocess_label(label)
-
-                    # Note that smiles expression is not unique.
-                    # we obtain canonical smiles
-                    smiles = Chem.MolToSmiles(mol)
-                    mol = Chem.MolFromSmiles(smiles)
-                    canonical_smiles, mol = pp.prepare_smiles_and_mol(mol)
-                    input_features = pp.get_input_features(mol)
-
-                    # Initialize features: list of list
-                    if features is None:
-                        if isinstance(input_features, tuple):
-                            num_features = len(input_features)
-                        else:
-                            num_features = 1
-                        if self.labels is not None:
-                            num_features += 1
-                        features = [[] for _ in range(num_features)]
-
-                    if return_smiles:
-                        smiles_list.append(canonical_smiles)
-                except MolFeatureExtractionError as e:  # NOQA
-                    # This is expected error that extracting feature failed,
-                    # skip this molecule.
-                    fail_count += 1
-                    if return_is_successful:
-                        is_successful_list.append(False)
-                    continue
-                except Exception as e:
-                    logger.warning('parse() error, type: {}, {}'
-                                   .format(type(e).__name__, e.args))
-                    fail_count += 1
-                    if return_is_successful:
-                        is_successful_list.append(False)
-                    continue
-
-                if isinstance(input_features, tuple):
-                    for i in range(len(input_features)):
-                        features[i].append(input_features[i])
+            journal = None
+            if work_dir is not None:
+                if chunksize <= 0:
+                    raise ValueError('chunksize must be positive, got {}'
+                                     .format(chunksize))
+                journal = ParseJournal(work_dir, self._get_journal_config(
+                    filepath, target_index, return_smiles=return_smiles,
+                    return_is_successful=return_is_successful,
+                    streaming=streaming, chunksize=chunksize))
+            if streaming:
+                total_count, (features, smiles_list, is_successful_list,
+                              fail_count) = self._parse_streaming(
+                    filepath, return_smiles, target_index,
+                    return_is_successful, n_jobs, chunksize, journal=journal)
+            else:
+                mol_supplier = Chem.SDMolSupplier(filepath)
+                total_count = len(mol_supplier)
+                if target_index is None:
+                    target_index = list(range(total_count))
+                if journal is None:
+                    # `mol_supplier` does not accept numpy.integer, we must
+                    # use int
+                    mols = (mol_supplier[int(index)] for index in
+                            tqdm(target_index))
+                    features, smiles_list, is_successful_list, fail_count = \
+                        self._parse_mols(mols, return_smiles,
+                                         return_is_successful,
+                                         capacity=len(target_index))
                 else:
-                    features[0].append(input_features)
-                if self.labels is not None:
-                    features[len(features) - 1].append(label)
-                success_count += 1
-                if return_is_successful:
-                    is_successful_list.append(True)
-
-            ret = []
-
-            for feature in features:
-                try:
-                    feat_array = numpy.asarray(feature)
-                except ValueError:
-                    # Temporal work around to convert object-type list into
-                    # numpy array.
-                    # See, https://goo.gl/kgJXwb
-                    feat_array = numpy.empty(len(feature), dtype=numpy.ndarray)
-                    feat_array[:] = feature[:]
-                ret.append(feat_array)
-            result = tuple(ret)
+                    # `mol_supplier` can not be sent to worker processes.
+                    chunks = (target_index[i:i + chunksize] for i in
+                              range(0, len(target_index), chunksize))
+                    features, smiles_list, is_successful_list, fail_count = \
+                        self._parse_chunks(
+                            self._parse_indices, chunks,
+                            args=(mol_supplier, return_smiles,
+                                  return_is_successful),
+                            journal=journal, collector=FeatureCollector(
+                                pp.get_feature_spec(),
+                                capacity=len(target_index)))
+            success_count = 0 if features is None else len(features[0])
+
+            result = tuple(to_feature_array(feature) for feature in features)
             logger.info('Preprocess finished. FAIL {}, SUCCESS {}, TOTAL {}'
                         .format(fail_count, success_count, total_count))
         else:
             # Spec not finalized yet for general case
             result = pp.process(filepath)
+            smiles_list = []
+            is_successful_list = []
 
         smileses = numpy.array(
             smiles_list, dtype=object) if return_smiles else None
@@ -168,6 +212,172 @@ class SDFFileParser(BaseFileParser):
                 "smiles": smileses,
                 "is_successful": is_successful}
 
+    def _parse_streaming(self, filepath, return_smiles=False,
+                         target_index=None, return_is_successful=False,
+                         n_jobs=1, chunksize=1000, journal=None):
+        """Parses records of `filepath` in a single forward pass
+
+        Returns (tuple): `(total_count, parse_result)`, where `total_count` is
+            the number of records to be parsed and `parse_result` is same
+            format with `_parse_mols`.
+
+        """
+        if chunksize <= 0:
+            raise ValueError('chunksize must be positive, got {}'
+                             .format(chunksize))
+        if target_index is not None:
+            target_index = set(int(i) for i in target_index)
+        records = iter_sdf_records(filepath, target_index=target_index)
+        total_count = [0]
+
+        def iter_chunks():
+            chunk = []
+            for record in records:
+                chunk.append(record)
+                if len(chunk) == chunksize:
+                    total_count[0] += len(chunk)
+                    yield chunk
+                    chunk = []
+            if chunk:
+                total_count[0] += len(chunk)
+                yield chunk
+
+        # Chunks are dispatched lazily, also when `n_jobs` is 1, so raw
+        # records of the whole file are never kept in memory.
+        result = self._parse_chunks(
+            self._parse_records, iter_chunks(),
+            args=(return_smiles, return_is_successful), n_jobs=n_jobs,
+            journal=journal, collector=FeatureCollector(
+                self.preprocessor.get_feature_spec()))
+        return total_count[0], result
+
+    def _get_journal_config(self, filepath, target_index, **kwargs):
+        """Returns configuration which identifies the parse for `ParseJournal`
+
+        Args:
+            filepath (str): file path to be parsed.
+            target_index (list or None): target index list of the parse.
+            **kwargs: other options of the parse which affect its result.
+
+        """
+        stat = os.stat(filepath)
+        config = {
+            'parser': type(self).__name__,
+            'preprocessor': get_config_hash(self.preprocessor),
+            'labels': self.labels,
+            'postprocess_label': get_config_hash(self.postprocess_label),
+            'data': [stat.st_size, stat.st_mtime],
+            'target_index': get_config_hash(target_index),
+        }
+        config.update(kwargs)
+        return config
+
+    def _parse_indices(self, indices, mol_supplier, return_smiles=False,
+                       return_is_successful=False):
+        # `mol_supplier` does not accept numpy.integer, we must use int
+        mols = (mol_supplier[int(index)] for index in indices)
+        return self._parse_mols(mols, return_smiles, return_is_successful,
+                                capacity=len(indices))
+
+    def _parse_records(self, records, return_smiles=False,
+                       return_is_successful=False):
+        """Decodes raw sdf records and extracts features from them
+
+        This method is the unit of work of streaming `parse`, it may be
+        executed in a worker process.
+
+        Returns (tuple): same format with `_parse_mols`.
+
+        """
+        mols = (mol_from_sdf_record(record) for record in records)
+        return self._parse_mols(mols, return_smiles, return_is_successful,
+                                capacity=len(records))
+
+    def _parse_mols(self, mols, return_smiles=False,
+                    return_is_successful=False, capacity=None):
+        """Extracts features from each molecule of `mols`
+
+        Args:
+            mols (iterable): molecules to be parsed, `None` represents the
+                molecule which could not be read.
+            return_smiles (bool): If `True`, canonical smiles of successfully
+                processed molecules are collected.
+            return_is_successful (bool): If `True`, success flag of each
+                molecule is collected.
+            capacity (int or None): number of molecules if known, it is used
+                to preallocate feature arrays.
+
+        Returns (tuple): `(features, smiles_list, is_successful_list,
+            fail_count)`, where `features` is a list of each feature, i.e.
+            an array or a list of the examples (see
+            `FeatureCollector.finish`), or `None` when no molecule is
+            successfully processed.
+
+        """
+        logger = self.logger
+        pp = self.preprocessor
+        smiles_list = []
+        is_successful_list = []
+
+        collector = FeatureCollector(pp.get_feature_spec(),
+                                     capacity=capacity)
+        feature_cache = self.feature_cache
+        if feature_cache is not None:
+            namespace = feature_cache.get_namespace(pp)
+
+        fail_count = 0
+        for mol in mols:
+            if mol is None:
+                fail_count += 1
+                if return_is_successful:
+                    is_successful_list.append(False)
+                continue
+            try:
+                # Labels need to be extracted from `mol` before standardize
+                # smiles.
+                if self.labels is not None:
+                    label = pp.get_label(mol, self.labels)
+                    if self.postprocess_label is not None:
+                        label = self.postprocess_label(label)
+
+                # Note that smiles expression is not unique.
+                # we obtain canonical smiles
+                smiles = Chem.MolToSmiles(mol)
+                mol = Chem.MolFromSmiles(smiles)
+                canonical_smiles, mol = pp.prepare_smiles_and_mol(mol)
+                if feature_cache is None:
+                    input_features = pp.get_input_features(mol)
+                else:
+                    input_features = feature_cache.get_input_features(
+                        pp, canonical_smiles, mol, namespace=namespace)
+
+                if return_smiles:
+                    smiles_list.append(canonical_smiles)
+            except MolFeatureExtractionError as e:  # NOQA
+                # This is expected error that extracting feature failed,
+                # skip this molecule.
+                fail_count += 1
+                if return_is_successful:
+                    is_successful_list.append(False)
+                continue
+            except Exception as e:
+                logger.warning('parse() error, type: {}, {}'
+                               .format(type(e).__name__, e.args))
+                fail_count += 1
+                if return_is_successful:
+                    is_successful_list.append(False)
+                continue
+
+            if not isinstance(input_features, tuple):
+                input_features = (input_features,)
+            if self.labels is not None:
+                input_features = input_features + (label,)
+            collector.append(input_features)
+            if return_is_successful:
+                is_successful_list.append(True)
+        features = collector.finish()
+        return features, smiles_list, is_successful_list, fail_count
+
     def extract_total_num(self, filepath):
         """Extracts total number of data which can be parsed
 
@@ -13,18 +13,21 @@ class SmilesParser(DataFrameParser):
         postprocess_label (Callable): post processing function if necessary
         postprocess_fn (Callable): post processing function if necessary
         logger:
+        feature_cache (FeatureCache or None): cache of input features.
+            See `DataFrameParser` for details.
     """
 
     def __init__(self, preprocessor,
                  postprocess_label=None, postprocess_fn=None,
-                 logger=None):
+                 logger=None, feature_cache=None):
         super(SmilesParser, self).__init__(
             preprocessor, labels=None, smiles_col='smiles',
             postprocess_label=postprocess_label, postprocess_fn=postprocess_fn,
-            logger=logger)
+            logger=logger, feature_cache=feature_cache)
 
     def parse(self, smiles_list, return_smiles=False, target_index=None,
-              return_is_successful=False):
+              return_is_successful=False, n_jobs=1, chunksize=1000,
+              work_dir=None, deduplicate=False):
         """parse `smiles_list` using `preprocessor`
 
         Label is extracted from `labels` columns and input features are
@@ -42,6 +45,15 @@ class SmilesParser(DataFrameParser):
                 returned in the key 'is_successful'. It represents
                 preprocessing has succeeded or not for each SMILES.
                 If set to False, `None` is returned in the key 'is_success'.
+            n_jobs (int): Number of worker processes used for featurization.
+                See `DataFrameParser.parse` for details.
+            deduplicate (bool): If set to `True`, each unique molecule is
+                featurized only once and 'index_map' is returned.
+                See `DataFrameParser.parse` for details.
+            chunksize (int): Number of rows processed by one worker task.
+            work_dir (str or None): directory to journal the parse, so that
+                an interrupted parse can be resumed.
+                See `DataFrameParser.parse` for details.
 
         Returns (dict): dictionary that contains Dataset, 1-d numpy array with
             dtype=object(string) which is a vector of smiles for each example
@@ -51,7 +63,8 @@ class SmilesParser(DataFrameParser):
         df = pandas.DataFrame({'smiles': smiles_list})
         return super(SmilesParser, self).parse(
             df, return_smiles=return_smiles, target_index=target_index,
-            return_is_successful=return_is_successful)
+            return_is_successful=return_is_successful, n_jobs=n_jobs,
+            chunksize=chunksize, work_dir=work_dir, deduplicate=deduplicate)
 
     def extract_total_num(self, smiles_list):
         """Extracts total number of data which can be parsed
@@ -3,10 +3,17 @@ from chainer_chemistry.dataset.preprocessors.base_preprocessor import BasePrepro
 from chainer_chemistry.dataset.preprocessors.cgcnn_preprocessor import CGCNNPreprocessor  # NOQA
 from chainer_chemistry.dataset.preprocessors.common import construct_adj_matrix  # NOQA
 from chainer_chemistry.dataset.preprocessors.common import construct_atomic_number_array  # NOQA
+from chainer_chemistry.dataset.preprocessors.common import construct_discrete_edge_index  # NOQA
 from chainer_chemistry.dataset.preprocessors.common import construct_discrete_edge_matrix  # NOQA
+from chainer_chemistry.dataset.preprocessors.common import construct_edge_index  # NOQA
 from chainer_chemistry.dataset.preprocessors.common import construct_supernode_feature  # NOQA
+from chainer_chemistry.dataset.preprocessors.common import get_bond_table  # NOQA
+from chainer_chemistry.dataset.preprocessors.common import get_graph_distance_matrix  # NOQA
 from chainer_chemistry.dataset.preprocessors.common import MolFeatureExtractionError  # NOQA
+from chainer_chemistry.dataset.preprocessors.common import share_intermediate_features  # NOQA
 from chainer_chemistry.dataset.preprocessors.common import type_check_num_atoms  # NOQA
+from chainer_chemistry.dataset.preprocessors.composite_preprocessor import CompositeDatasets  # NOQA
+from chainer_chemistry.dataset.preprocessors.composite_preprocessor import CompositePreprocessor  # NOQA
 from chainer_chemistry.dataset.preprocessors.ecfp_preprocessor import ECFPPreprocessor  # NOQA
 from chainer_chemistry.dataset.preprocessors.ggnn_preprocessor import GGNNPreprocessor  # NOQA
 from chainer_chemistry.dataset.preprocessors.gin_preprocessor import GINPreprocessor, GINSparsePreprocessor  # NOQA
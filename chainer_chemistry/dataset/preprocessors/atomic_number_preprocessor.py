@@ -1,3 +1,5 @@
+import numpy
+
 from chainer_chemistry.dataset.preprocessors.common \
     import construct_atomic_number_array
 from chainer_chemistry.dataset.preprocessors.common import type_check_num_atoms
@@ -41,3 +43,8 @@ class AtomicNumberPreprocessor(MolPreprocessor):
         type_check_num_atoms(mol, self.max_atoms)
         atom_array = construct_atomic_number_array(mol, out_size=self.out_size)
         return atom_array
+
+    def get_feature_spec(self):
+        if self.out_size < 0:
+            return None
+        return (((self.out_size,), numpy.int32),)
@@ -4,7 +4,12 @@ import os
 import shutil
 
 from chainer.dataset import download
+from rdkit import Chem
+from rdkit.Chem import AllChem
 
+from chainer_chemistry.dataset.neighbor_list import construct_neighbor_list
+from chainer_chemistry.dataset.preprocessors.common import construct_atomic_number_array  # NOQA
+from chainer_chemistry.dataset.preprocessors.common import MolFeatureExtractionError  # NOQA
 from chainer_chemistry.dataset.preprocessors.mol_preprocessor import MolPreprocessor  # NOQA
 from chainer_chemistry.dataset.utils import GaussianDistance
 from chainer_chemistry.utils import load_json
@@ -40,20 +45,117 @@ def get_atom_init_json_filepath(download_if_not_exist=True):
 class CGCNNPreprocessor(MolPreprocessor):
     """CGCNNPreprocessor
 
+    Atoms are featurized by `atom_init.json` of the original implementation,
+    and the neighbors of each atom within `max_radius` are found by
+    `construct_neighbor_list`, so only the distances of the neighbors are
+    computed.
+
     Args:
-    For Molecule: TODO
+        max_num_nbr (int): Number of the neighbors of each atom. Atoms with
+            less neighbors are padded with the index 0 and the distance
+            ``max_radius + 1``, as in the original implementation.
+        max_radius (float): Cutoff radius of the neighbors.
+        expand_dim (int): Number of the gaussian basis of the distances.
+        add_Hs (bool): If True, implicit Hs are added.
+        kekulize (bool): If True, Kekulizes the molecule.
+        geometry_store (GeometryStore or None): If specified, coordinates are
+            taken from the geometries stored in it. Conformers are generated
+            only for the molecules which are not found in it.
+        conformer_generator (ConformerGenerator or None): If specified,
+            conformers are generated by it. Otherwise `EmbedMolecule` is
+            called for each molecule.
     """
 
-    def __init__(self, max_num_nbr=12, max_radius=8, expand_dim=40):
-        super(CGCNNPreprocessor, self).__init__()
+    def __init__(self, max_num_nbr=12, max_radius=8, expand_dim=40,
+                 add_Hs=False, kekulize=False, geometry_store=None,
+                 conformer_generator=None):
+        super(CGCNNPreprocessor, self).__init__(
+            add_Hs=add_Hs, kekulize=kekulize)
+        if max_num_nbr <= 0:
+            raise ValueError('max_num_nbr must be positive, got {}'
+                             .format(max_num_nbr))
 
         self.max_num_nbr = max_num_nbr
         self.max_radius = max_radius
+        self.geometry_store = geometry_store
+        self.conformer_generator = conformer_generator
         self.gdf = GaussianDistance(centers=numpy.linspace(0, 8, expand_dim))
         feat_dict = load_json(get_atom_init_json_filepath())
         self.atom_features = {int(key): numpy.array(value,
                                                     dtype=numpy.float32)
                               for key, value in feat_dict.items()}
 
+    def _get_coordinates(self, mol):
+        coordinates = None
+        if self.geometry_store is not None:
+            coordinates = self.geometry_store.get_coordinates(mol)
+        if coordinates is None and self.conformer_generator is not None:
+            coordinates = self.conformer_generator.get_coordinates(mol)
+        if coordinates is None:
+            # hydrogens are added at the end, after the atoms of `mol`.
+            mol_with_hs = Chem.AddHs(mol)
+            conf_id = AllChem.EmbedMolecule(mol_with_hs)
+            if conf_id < 0:
+                raise MolFeatureExtractionError(
+                    'failed to embed the molecule')
+            coordinates = mol_with_hs.GetConformer(conf_id).GetPositions()
+            coordinates = coordinates[:mol.GetNumAtoms()]
+        return coordinates
+
     def get_input_features(self, mol):
-        raise NotImplementedError()
+        """get input features
+
+        Args:
+            mol (Mol):
+
+        Returns (tuple): features returned by `get_structure_features` for
+            the conformer of `mol`.
+
+        """
+        atomic_numbers = construct_atomic_number_array(mol)
+        coordinates = self._get_coordinates(mol)
+        return self.get_structure_features(atomic_numbers, coordinates)
+
+    def get_structure_features(self, atomic_numbers, coordinates,
+                               lattice=None):
+        """get input features from the atoms and their coordinates
+
+        It can be used for crystals as well as molecules.
+
+        Args:
+            atomic_numbers (numpy.ndarray): 1-d array of the atomic numbers.
+            coordinates (numpy.ndarray): coordinates of the atoms of the
+                shape ``(num_atoms, 3)``.
+            lattice (numpy.ndarray or None): lattice vectors of the shape
+                ``(3, 3)`` for crystals, see `construct_neighbor_list`.
+
+        Returns (tuple): `atom_feature` of the shape
+            ``(num_atoms, num_atom_features)``, `nbr_feature` of the shape
+            ``(num_atoms, max_num_nbr, expand_dim)`` and `nbr_idx` of the
+            shape ``(num_atoms, max_num_nbr)``.
+
+        """
+        num_atoms = len(atomic_numbers)
+        if num_atoms == 0:
+            raise MolFeatureExtractionError('no atoms are given')
+        try:
+            atom_feature = numpy.stack(
+                [self.atom_features[int(z)] for z in atomic_numbers])
+        except KeyError as e:
+            raise MolFeatureExtractionError(
+                'unknown atomic number {}'.format(e.args[0]))
+
+        index, distance = construct_neighbor_list(
+            coordinates, self.max_radius,
+            max_num_neighbors=self.max_num_nbr, lattice=lattice)
+        center, neighbor = index
+        # neighbors are sorted by the distance for each center atom.
+        rank = numpy.arange(len(center)) - numpy.searchsorted(center, center)
+        nbr_idx = numpy.zeros((num_atoms, self.max_num_nbr),
+                              dtype=numpy.int32)
+        nbr_distance = numpy.full((num_atoms, self.max_num_nbr),
+                                  self.max_radius + 1.)
+        nbr_idx[center, rank] = neighbor
+        nbr_distance[center, rank] = distance
+        nbr_feature = self.gdf.expand_from_distances(nbr_distance)
+        return atom_feature, nbr_feature, nbr_idx
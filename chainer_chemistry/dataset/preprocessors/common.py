@@ -1,4 +1,7 @@
 """Common preprocess method is gethered in this file"""
+import contextlib
+import threading
+
 import numpy
 from rdkit import Chem
 from rdkit.Chem import rdmolops
@@ -10,6 +13,53 @@ class MolFeatureExtractionError(Exception):
     pass
 
 
+# --- Shared intermediate features ---
+_shared = threading.local()
+
+
+@contextlib.contextmanager
+def share_intermediate_features():
+    """Context to compute intermediate features of each molecule only once
+
+    Inside this context, the intermediate features used by several
+    preprocessors, i.e. atomic numbers (`construct_atomic_number_array`),
+    the bond table (`get_bond_table`) and the graph distance matrix
+    (`get_graph_distance_matrix`), are memoized for each mol instance.
+    The memoized arrays are read-only. They are discarded when the
+    outermost context exits.
+
+    .. admonition:: Example
+
+       >>> with share_intermediate_features():
+       ...     adj = construct_adj_matrix(mol)
+       ...     edge = construct_discrete_edge_matrix(mol)  # reuse bond table
+
+    """
+    outer = getattr(_shared, 'memo', None)
+    if outer is None:
+        _shared.memo = {}
+    try:
+        yield
+    finally:
+        _shared.memo = outer
+
+
+def _get_shared(mol, name, compute):
+    memo = getattr(_shared, 'memo', None)
+    if memo is None:
+        return compute(mol)
+    key = (name, id(mol))
+    entry = memo.get(key)
+    # `mol` is kept in the entry so that its id is not reused.
+    if entry is not None and entry[0] is mol:
+        return entry[1]
+    value = compute(mol)
+    for array in (value if isinstance(value, tuple) else (value,)):
+        array.setflags(write=False)
+    memo[key] = (mol, value)
+    return value
+
+
 # --- Type check ---
 def type_check_num_atoms(mol, num_max_atoms=-1):
     """Check number of atoms in `mol` does not exceed `num_max_atoms`
@@ -48,16 +98,16 @@ def construct_atomic_number_array(mol, out_size=-1):
             of atoms in the molecule.
     """
 
-    atom_list = [a.GetAtomicNum() for a in mol.GetAtoms()]
+    atom_list = _get_shared(mol, 'atomic_numbers', _get_atomic_numbers)
     n_atom = len(atom_list)
 
     if out_size < 0:
-        return numpy.array(atom_list, dtype=numpy.int32)
+        return atom_list.copy()
     elif out_size >= n_atom:
         # 'empty' padding for atom_list
         # 0 represents empty place for atom
         atom_array = numpy.zeros(out_size, dtype=numpy.int32)
-        atom_array[:n_atom] = numpy.array(atom_list, dtype=numpy.int32)
+        atom_array[:n_atom] = atom_list
         return atom_array
     else:
         raise ValueError('`out_size` (={}) must be negative or '
@@ -66,8 +116,92 @@ def construct_atomic_number_array(mol, out_size=-1):
                          '.'.format(out_size, n_atom))
 
 
+def _get_atomic_numbers(mol):
+    return numpy.array([a.GetAtomicNum() for a in mol.GetAtoms()],
+                       dtype=numpy.int32)
+
+
 # --- Adjacency matrix preprocessing ---
-def construct_adj_matrix(mol, out_size=-1, self_connection=True):
+_bond_type_to_channel = {
+    Chem.BondType.SINGLE: 0,
+    Chem.BondType.DOUBLE: 1,
+    Chem.BondType.TRIPLE: 2,
+    Chem.BondType.AROMATIC: 3
+}
+_bond_order_to_channel = ((1.0, 0), (2.0, 1), (3.0, 2), (1.5, 3))
+
+
+def get_bond_table(mol):
+    """Returns the atom indices and the types of the bonds of the molecule.
+
+    It is the common input of the adjacency matrix builders, which can be
+    extracted once and passed to several of them by ``bond_table`` argument.
+    Bonds are sorted by the indices of their atoms.
+
+    Args:
+        mol (rdkit.Chem.Mol): Input molecule.
+
+    Returns:
+        tuple: ``(begin, end, bond_type)``. ``begin`` and ``end`` are 1-d
+            int arrays of the indices of the atoms of each bond, where
+            ``begin < end``.
+            ``bond_type`` is 1-d int array of the channel of each bond in
+            :func:`construct_discrete_edge_matrix`, i.e. 0 for single,
+            1 for double, 2 for triple and 3 for aromatic bonds. It is -1
+            for the other types of bonds.
+    """
+    return _get_shared(mol, 'bond_table', _get_bond_table)
+
+
+def _get_bond_table(mol):
+    # Bond order matrix is computed in C++, which is much faster than
+    # iterating bonds in python. `force` avoids the cached matrix which
+    # may be stale, e.g. after `Kekulize`.
+    try:
+        bond_order = rdmolops.GetAdjacencyMatrix(mol, useBO=True, force=True)
+        begin, end = numpy.nonzero(numpy.triu(bond_order))
+    except RuntimeError:
+        bond_order = None
+    if bond_order is not None and len(begin) == mol.GetNumBonds():
+        orders = bond_order[begin, end]
+        bond_type = numpy.full(len(orders), -1, dtype=numpy.int64)
+        for order, channel in _bond_order_to_channel:
+            bond_type[orders == order] = channel
+        return begin.astype(numpy.int64), end.astype(numpy.int64), bond_type
+
+    # Some bonds, e.g. dative bonds, have no bond order.
+    bonds = []
+    for bond in mol.GetBonds():
+        i, j = sorted((bond.GetBeginAtomIdx(), bond.GetEndAtomIdx()))
+        bonds.append((i, j, _bond_type_to_channel.get(bond.GetBondType(), -1)))
+    bonds = numpy.array(sorted(bonds), dtype=numpy.int64).reshape(-1, 3)
+    return bonds[:, 0], bonds[:, 1], bonds[:, 2]
+
+
+def get_graph_distance_matrix(mol):
+    """Returns the topological distance matrix of the molecule.
+
+    Args:
+        mol (rdkit.Chem.Mol): Input molecule.
+
+    Returns:
+        numpy.ndarray: 2-d float array whose ``(i, j)`` element is the
+            number of bonds in the shortest path between ``i``-th and
+            ``j``-th atoms, or ``1e8`` when they are not connected.
+    """
+    return _get_shared(mol, 'graph_distance_matrix', Chem.GetDistanceMatrix)
+
+
+def _check_bond_type(mol, begin, end, bond_type):
+    unknown = numpy.flatnonzero(bond_type < 0)
+    if len(unknown) > 0:
+        bond = mol.GetBondBetweenAtoms(int(begin[unknown[0]]),
+                                       int(end[unknown[0]]))
+        raise KeyError(bond.GetBondType())
+
+
+def construct_adj_matrix(mol, out_size=-1, self_connection=True,
+                         bond_table=None):
     """Returns the adjacent matrix of the given molecule.
 
     This function returns the adjacent matrix of the given molecule.
@@ -85,6 +219,8 @@ def construct_adj_matrix(mol, out_size=-1, self_connection=True):
             columns and bottom rows.
         self_connection (bool): Add self connection or not.
             If True, diagonal element of adjacency matrix is filled with 1.
+        bond_table (tuple or None): The result of :func:`get_bond_table`
+            of ``mol``. If None, it is extracted from ``mol``.
 
     Returns:
         adj_array (numpy.ndarray): The adjacent matrix of the input molecule.
@@ -94,32 +230,29 @@ def construct_adj_matrix(mol, out_size=-1, self_connection=True):
             its size is equal to that value. Otherwise,
             it is equal to the number of atoms in the the molecule.
     """
-
-    adj = rdmolops.GetAdjacencyMatrix(mol)
-    s0, s1 = adj.shape
-    if s0 != s1:
-        raise ValueError('The adjacent matrix of the input molecule'
-                         'has an invalid shape: ({}, {}). '
-                         'It must be square.'.format(s0, s1))
-
-    if self_connection:
-        adj = adj + numpy.eye(s0)
+    N = mol.GetNumAtoms()
     if out_size < 0:
-        adj_array = adj.astype(numpy.float32)
-    elif out_size >= s0:
-        adj_array = numpy.zeros((out_size, out_size),
-                                dtype=numpy.float32)
-        adj_array[:s0, :s1] = adj
+        size = N
+    elif out_size >= N:
+        size = out_size
     else:
         raise ValueError(
             '`out_size` (={}) must be negative or larger than or equal to the '
             'number of atoms in the input molecules (={}).'
-            .format(out_size, s0))
+            .format(out_size, N))
+    begin, end, _ = bond_table or get_bond_table(mol)
+    adj_array = numpy.zeros((size, size), dtype=numpy.float32)
+    adj_array[begin, end] = 1.0
+    adj_array[end, begin] = 1.0
+    if self_connection:
+        diag = numpy.arange(N)
+        adj_array[diag, diag] = 1.0
     return adj_array
 
 
 def construct_discrete_edge_matrix(mol, out_size=-1,
-                                   add_self_connection_channel=False):
+                                   add_self_connection_channel=False,
+                                   bond_table=None):
     """Returns the edge-type dependent adjacency matrix of the given molecule.
 
     Args:
@@ -133,6 +266,8 @@ def construct_discrete_edge_matrix(mol, out_size=-1,
         add_self_connection_channel (bool): Add self connection or not.
             If True, adjacency matrix whose diagonal element filled with 1
             is added to last channel.
+        bond_table (tuple or None): The result of :func:`get_bond_table`
+            of ``mol``. If None, it is extracted from ``mol``.
 
     Returns:
         adj_array (numpy.ndarray): The adjacent matrix of the input molecule.
@@ -159,24 +294,85 @@ def construct_discrete_edge_matrix(mol, out_size=-1,
     else:
         adjs = numpy.zeros((4, size, size), dtype=numpy.float32)
 
-    bond_type_to_channel = {
-        Chem.BondType.SINGLE: 0,
-        Chem.BondType.DOUBLE: 1,
-        Chem.BondType.TRIPLE: 2,
-        Chem.BondType.AROMATIC: 3
-    }
-    for bond in mol.GetBonds():
-        bond_type = bond.GetBondType()
-        ch = bond_type_to_channel[bond_type]
-        i = bond.GetBeginAtomIdx()
-        j = bond.GetEndAtomIdx()
-        adjs[ch, i, j] = 1.0
-        adjs[ch, j, i] = 1.0
+    begin, end, bond_type = bond_table or get_bond_table(mol)
+    _check_bond_type(mol, begin, end, bond_type)
+    adjs[bond_type, begin, end] = 1.0
+    adjs[bond_type, end, begin] = 1.0
     if add_self_connection_channel:
-        adjs[-1] = numpy.eye(N)
+        diag = numpy.arange(N)
+        adjs[-1, diag, diag] = 1.0
     return adjs
 
 
+def construct_edge_index(mol, self_connection=False, bond_table=None):
+    """Returns the edges of the given molecule in COO format.
+
+    Both directions of each bond are included, and the edges are sorted in
+    the same order as the nonzero entries of
+    :func:`construct_adj_matrix`, i.e.
+    ``numpy.nonzero(construct_adj_matrix(mol, self_connection=...))``.
+
+    Args:
+        mol (rdkit.Chem.Mol): Input molecule.
+        self_connection (bool): Add self connection or not.
+        bond_table (tuple or None): The result of :func:`get_bond_table`
+            of ``mol``. If None, it is extracted from ``mol``.
+
+    Returns:
+        edge_index (numpy.ndarray): 2-dimensional int array with shape
+            (2, edges), sources and destinations of the edges.
+    """
+    N = mol.GetNumAtoms()
+    begin, end, _ = bond_table or get_bond_table(mol)
+    src = [begin, end]
+    dst = [end, begin]
+    if self_connection:
+        src.append(numpy.arange(N))
+        dst.append(numpy.arange(N))
+    src = numpy.concatenate(src)
+    dst = numpy.concatenate(dst)
+    order = numpy.argsort(src * N + dst, kind='stable')
+    return numpy.stack([src[order], dst[order]])
+
+
+def construct_discrete_edge_index(mol, add_self_connection_channel=False,
+                                  bond_table=None):
+    """Returns the edge-type dependent edges of the molecule in COO format.
+
+    It is the sparse form of :func:`construct_discrete_edge_matrix`. The
+    edges are sorted by their type, source and destination in this order,
+    which is the order of its nonzero entries.
+
+    Args:
+        mol (rdkit.Chem.Mol): Input molecule.
+        add_self_connection_channel (bool): Add self connection or not.
+            If True, self connections of the type 4 are added.
+        bond_table (tuple or None): The result of :func:`get_bond_table`
+            of ``mol``. If None, it is extracted from ``mol``.
+
+    Returns:
+        tuple: ``(edge_index, edge_type)``. ``edge_index`` is 2-dimensional
+            int array with shape (2, edges), sources and destinations of the
+            edges. ``edge_type`` is 1-dimensional int array of the edge type
+            of each edge.
+    """
+    N = mol.GetNumAtoms()
+    begin, end, bond_type = bond_table or get_bond_table(mol)
+    _check_bond_type(mol, begin, end, bond_type)
+    src = [begin, end]
+    dst = [end, begin]
+    edge_type = [bond_type, bond_type]
+    if add_self_connection_channel:
+        src.append(numpy.arange(N))
+        dst.append(numpy.arange(N))
+        edge_type.append(numpy.full(N, 4, dtype=numpy.int64))
+    src = numpy.concatenate(src)
+    dst = numpy.concatenate(dst)
+    edge_type = numpy.concatenate(edge_type)
+    order = numpy.argsort((edge_type * N + src) * N + dst, kind='stable')
+    return numpy.stack([src[order], dst[order]]), edge_type[order]
+
+
 def mol_basic_info_feature(mol, atom_array, adj):
     n_atoms = mol.GetNumAtoms()
     if n_atoms != len(atom_array):
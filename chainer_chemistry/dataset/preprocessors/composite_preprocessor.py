@@ -0,0 +1,303 @@
+from collections import OrderedDict
+from logging import getLogger
+import traceback
+
+import numpy
+from rdkit import Chem
+
+from chainer_chemistry.dataset.preprocessors.common import MolFeatureExtractionError  # NOQA
+from chainer_chemistry.dataset.preprocessors.common import share_intermediate_features  # NOQA
+from chainer_chemistry.dataset.preprocessors.mol_preprocessor \
+    import MolPreprocessor
+from chainer_chemistry.dataset.ragged_array import to_feature_array
+
+
+# small molecules used to count the features of preprocessors whose
+# `get_feature_spec` returns `None`.
+_PROBE_SMILES = ('C', 'CC(=O)O', 'c1ccccc1O')
+
+
+def _take(column, mask):
+    """Returns the examples of `column` where `mask` is `True`"""
+    if isinstance(column, list):
+        return [c for c, m in zip(column, mask) if m]
+    column = column[mask]
+    if isinstance(column, numpy.ndarray) and column.dtype == object:
+        # it may be object array only because of the placeholders of the
+        # failed molecules.
+        column = to_feature_array(list(column))
+    return column
+
+
+class CompositeDatasets(OrderedDict):
+    """Dict of the datasets made by `CompositePreprocessor`
+
+    Each dataset contains only the examples which its preprocessor
+    succeeded, so the examples of the datasets are different when some
+    preprocessors fail partially. `is_successful` maps them to the examples
+    given to `create_dataset`, i.e. the smiles and the successful rows
+    returned by the parser.
+
+    Attributes:
+        is_successful (numpy.ndarray): bool array of the shape
+            ``(num_examples, num_preprocessors)``, which indicates each
+            preprocessor succeeded for each example.
+
+    .. admonition:: Example
+
+       >>> result = parser.parse('data.csv', return_smiles=True)
+       >>> datasets = result['dataset']
+       >>> nfp_smiles = result['smiles'][datasets.get_mask('nfp')]
+
+    """
+
+    def __init__(self, datasets=(), is_successful=None):
+        super(CompositeDatasets, self).__init__(datasets)
+        self.is_successful = is_successful
+
+    def get_mask(self, name):
+        """Returns which examples are contained in the dataset of `name`
+
+        Args:
+            name (str): name of the preprocessor.
+
+        Returns (numpy.ndarray): 1d bool array of the length of the examples
+            given to `create_dataset`.
+
+        """
+        return self.is_successful[:, list(self).index(name)]
+
+    def get_index(self, name):
+        """Returns the indices of the examples of the dataset of `name`
+
+        Args:
+            name (str): name of the preprocessor.
+
+        Returns (numpy.ndarray): 1d int array, the ``i``-th element is the
+            index of the ``i``-th example of the dataset in the examples
+            given to `create_dataset`.
+
+        """
+        return numpy.flatnonzero(self.get_mask(name))
+
+
+class CompositePreprocessor(MolPreprocessor):
+    """Preprocessor which extracts features of several preprocessors at once
+
+    Each molecule is parsed and canonicalized only once, and the
+    intermediate features shared by the preprocessors, e.g. atomic numbers
+    and the bond table, are computed once by `share_intermediate_features`.
+    The molecule with hydrogens and/or kekulized is made once for each
+    combination of `add_Hs` and `kekulize` of the preprocessors.
+
+    `get_input_features` returns the features of all preprocessors
+    concatenated in one tuple, so that it can be used with the parsers as
+    usual. `create_dataset` splits them into the dataset of each
+    preprocessor, and the parser returns the dict of them,
+    `CompositeDatasets`, as its ``'dataset'``.
+
+    Failures of feature extraction are handled for each preprocessor, i.e.
+    each dataset contains the molecules which its preprocessor can process,
+    which is the same with the dataset parsed by the preprocessor alone.
+    `CompositeDatasets.get_mask` maps them to the smiles returned by the
+    parser.
+
+    Args:
+        preprocessors (dict or list): dict, or list of the pairs, of the
+            name and the `MolPreprocessor` instance. Preprocessors must not
+            override `prepare_smiles_and_mol`.
+
+    .. admonition:: Example
+
+       >>> preprocessor = CompositePreprocessor.from_methods(
+       ...     ['nfp', 'ggnn', 'weavenet'])
+       >>> parser = CSVFileParser(preprocessor, labels='y',
+       ...                        smiles_col='smiles')
+       >>> datasets = parser.parse('data.csv')['dataset']
+       >>> nfp_dataset = datasets['nfp']
+
+    """
+
+    def __init__(self, preprocessors):
+        super(CompositePreprocessor, self).__init__(
+            add_Hs=False, kekulize=False)
+        if isinstance(preprocessors, dict):
+            preprocessors = preprocessors.items()
+        preprocessors = OrderedDict(preprocessors)
+        if len(preprocessors) == 0:
+            raise ValueError('no preprocessors are given')
+        for name, preprocessor in preprocessors.items():
+            if not isinstance(preprocessor, MolPreprocessor):
+                raise ValueError('preprocessor {} must be MolPreprocessor, '
+                                 'got {}'.format(name, type(preprocessor)))
+            if type(preprocessor).prepare_smiles_and_mol is not \
+                    MolPreprocessor.prepare_smiles_and_mol:
+                raise ValueError('preprocessor {} overrides '
+                                 'prepare_smiles_and_mol, which is not '
+                                 'supported'.format(name))
+        self.preprocessors = preprocessors
+        self._num_features = None
+
+    @classmethod
+    def from_methods(cls, methods):
+        """Makes `CompositePreprocessor` from the names of the methods
+
+        Args:
+            methods (list): list of keys of `preprocess_method_dict`. Each
+                preprocessor is made with the default arguments.
+
+        Returns (CompositePreprocessor): composite preprocessor whose names
+            of the preprocessors are `methods`.
+
+        """
+        from chainer_chemistry.dataset.preprocessors import preprocess_method_dict  # NOQA
+        for method in methods:
+            if method not in preprocess_method_dict:
+                raise ValueError('Unknown method {}'.format(method))
+        return cls([(method, preprocess_method_dict[method]())
+                    for method in methods])
+
+    def _extract_each(self, mol):
+        """Returns the list of the features of each preprocessor
+
+        Features of the preprocessors which failed are `None`.
+
+        """
+        mols = {}
+        features = []
+        with share_intermediate_features():
+            for name, preprocessor in self.preprocessors.items():
+                option = (preprocessor.add_Hs, preprocessor.kekulize)
+                if option not in mols:
+                    if preprocessor.add_Hs:
+                        variant = Chem.AddHs(mol)
+                    else:
+                        variant = Chem.Mol(mol)
+                    if preprocessor.kekulize:
+                        Chem.Kekulize(variant)
+                    mols[option] = variant
+                try:
+                    feature = preprocessor.get_input_features(mols[option])
+                except MolFeatureExtractionError:
+                    feature = None
+                except Exception as e:
+                    logger = getLogger(__name__)
+                    logger.warning('get_input_features() of {}, type: {}, {}'
+                                   .format(name, type(e).__name__, e.args))
+                    logger.info(traceback.format_exc())
+                    feature = None
+                if feature is not None and not isinstance(feature, tuple):
+                    feature = (feature,)
+                features.append(feature)
+        return features
+
+    def get_input_features(self, mol):
+        """Returns the features of all preprocessors in one tuple
+
+        Args:
+            mol (Mol): molecule prepared by `prepare_smiles_and_mol`, i.e.
+                without hydrogens and not kekulized.
+
+        Returns (tuple): concatenation of the features returned by
+            `get_input_features` of each preprocessor, followed by the bool
+            array which indicates the preprocessors succeeded. Features of
+            the preprocessors which failed are filled with zeros if their
+            `get_feature_spec` is available, otherwise `None`.
+
+        """
+        features = self._extract_each(mol)
+        is_successful = numpy.array([f is not None for f in features])
+        if not is_successful.any():
+            raise MolFeatureExtractionError(
+                'feature extraction failed for all preprocessors')
+        num_features = self.get_num_features()
+        specs = self._get_specs()
+        result = []
+        for feature, n, spec in zip(features, num_features, specs):
+            if feature is None:
+                if spec is None:
+                    feature = (None,) * n
+                else:
+                    feature = tuple(numpy.zeros(shape, dtype=dtype)
+                                    for shape, dtype in spec)
+            elif len(feature) != n:
+                raise ValueError('number of features {} differs from the '
+                                 'expected one {}'.format(len(feature), n))
+            result.extend(feature)
+        result.append(is_successful)
+        return tuple(result)
+
+    def _get_specs(self):
+        return [preprocessor.get_feature_spec()
+                for preprocessor in self.preprocessors.values()]
+
+    def get_feature_spec(self):
+        specs = self._get_specs()
+        if any(spec is None for spec in specs):
+            return None
+        return tuple(s for spec in specs for s in spec) + \
+            (((len(specs),), numpy.bool_),)
+
+    def get_num_features(self):
+        """Returns the number of features of each preprocessor
+
+        It is taken from `get_feature_spec` of the preprocessor if
+        available, otherwise the features of small molecules are extracted
+        to count them.
+
+        Returns (list): number of features of each preprocessor.
+
+        """
+        if self._num_features is None:
+            num_features = [None if spec is None else len(spec)
+                            for spec in self._get_specs()]
+            for smiles in _PROBE_SMILES:
+                if all(n is not None for n in num_features):
+                    break
+                _, mol = self.prepare_smiles_and_mol(
+                    Chem.MolFromSmiles(smiles))
+                for i, feature in enumerate(self._extract_each(mol)):
+                    if num_features[i] is None and feature is not None:
+                        num_features[i] = len(feature)
+            for name, n in zip(self.preprocessors, num_features):
+                if n is None:
+                    raise ValueError('number of features of {} can not be '
+                                     'determined'.format(name))
+            self._num_features = num_features
+        return self._num_features
+
+    def create_dataset(self, *args, **kwargs):
+        """Splits the features into the dataset of each preprocessor
+
+        Each dataset contains only the molecules whose features are
+        successfully extracted by its preprocessor.
+
+        Args:
+            args: features returned by `get_input_features` followed by the
+                other arrays, e.g. labels, which are passed to all datasets.
+
+        Returns (CompositeDatasets): dict of the name and the dataset made
+            by `create_dataset` of each preprocessor, with the success flags
+            of the preprocessors for each example.
+
+        """
+        num_features = self.get_num_features()
+        total = sum(num_features)
+        if len(args) <= total:
+            raise ValueError('{} features are expected, got {}'
+                             .format(total + 1, len(args)))
+        is_successful = numpy.asarray(args[total], dtype=bool)
+        if len(is_successful) == 0:
+            is_successful = numpy.zeros((0, len(self.preprocessors)),
+                                        dtype=bool)
+        extra = args[total + 1:]
+        datasets = OrderedDict()
+        begin = 0
+        for i, (name, preprocessor) in enumerate(self.preprocessors.items()):
+            n = num_features[i]
+            mask = is_successful[:, i]
+            columns = [_take(column, mask)
+                       for column in args[begin:begin + n] + extra]
+            datasets[name] = preprocessor.create_dataset(*columns, **kwargs)
+            begin += n
+        return CompositeDatasets(datasets, is_successful)
@@ -3,24 +3,48 @@ from logging import getLogger
 import numpy
 from rdkit.Chem import rdMolDescriptors
 
+from chainer_chemistry.dataset.fingerprint_store import pack_fingerprints
 from chainer_chemistry.dataset.preprocessors.common import MolFeatureExtractionError  # NOQA
 from chainer_chemistry.dataset.preprocessors.mol_preprocessor import MolPreprocessor  # NOQA
 
 
 class ECFPPreprocessor(MolPreprocessor):
 
-    def __init__(self, radius=2):
+    """ECFP Preprocessor
+
+    Args:
+        radius (int): radius of the Morgan fingerprint.
+        n_bits (int): number of bits of the fingerprint.
+        packed (bool): If True, the fingerprint is packed into uint64 words
+            by `pack_fingerprints`, which can be stored in
+            `FingerprintStore` and searched by `TanimotoIndex`. Otherwise it
+            is float32 vector.
+
+    """
+
+    def __init__(self, radius=2, n_bits=2048, packed=False):
         super(ECFPPreprocessor, self).__init__()
         self.radius = radius
+        self.n_bits = n_bits
+        self.packed = packed
 
     def get_input_features(self, mol):
         try:
-            fp = rdMolDescriptors.GetMorganFingerprintAsBitVect(mol,
-                                                                self.radius)
+            fp = rdMolDescriptors.GetMorganFingerprintAsBitVect(
+                mol, self.radius, nBits=self.n_bits)
         except Exception as e:
             logger = getLogger(__name__)
             logger.debug('exception caught at ECFPPreprocessor:', e)
             # Extracting feature failed
             raise MolFeatureExtractionError
+        if self.packed:
+            bits = numpy.frombuffer(fp.ToBitString().encode('ascii'),
+                                    dtype=numpy.uint8) - ord('0')
+            return pack_fingerprints(bits)
         # TODO(Nakago): Test it.
         return numpy.asarray(fp, numpy.float32)
+
+    def get_feature_spec(self):
+        if self.packed:
+            return (((-(-self.n_bits // 64),), numpy.uint64),)
+        return (((self.n_bits,), numpy.float32),)
@@ -51,6 +51,12 @@ class GGNNPreprocessor(MolPreprocessor):
 
         return atom_array, adj_array
 
+    def get_feature_spec(self):
+        if self.out_size < 0:
+            return None
+        return (((self.out_size,), numpy.int32),
+                ((4, self.out_size, self.out_size), numpy.float32))
+
 
 class GGNNSparsePreprocessor(GGNNPreprocessor):
     """Sparse GGNN Preprocessor"""
@@ -72,20 +78,11 @@ class GGNNSparsePreprocessor(GGNNPreprocessor):
         Returns:
             SparseGraphData: graph data object for sparse pattern
         """
-        edge_index = [[], []]
-        edge_attr = []
-        label_num, n, _ = adj.shape
-        for label in range(label_num):
-            for i in range(n):
-                for j in range(n):
-                    if adj[label, i, j] != 0.:
-                        edge_index[0].append(i)
-                        edge_index[1].append(i)
-                        edge_attr.append(label)
+        label, i, j = numpy.nonzero(adj)
         return SparseGraphData(
             x=x,
-            edge_index=numpy.array(edge_index, dtype=numpy.int),
-            edge_attr=numpy.array(edge_attr, dtype=numpy.int),
+            edge_index=numpy.stack([i, j]).astype(numpy.int64),
+            edge_attr=label.astype(numpy.int64),
             y=y
         )
 
@@ -49,6 +49,12 @@ class GINPreprocessor(MolPreprocessor):
         adj_array = construct_adj_matrix(mol, out_size=self.out_size)
         return atom_array, adj_array
 
+    def get_feature_spec(self):
+        if self.out_size < 0:
+            return None
+        return (((self.out_size,), numpy.int32),
+                ((self.out_size, self.out_size), numpy.float32))
+
 
 class GINSparsePreprocessor(MolPreprocessor):
     """Sparse GIN Preprocessor"""
@@ -67,6 +73,12 @@ class GINSparsePreprocessor(MolPreprocessor):
         adj_array = construct_adj_matrix(mol, out_size=self.out_size)
         return atom_array, adj_array
 
+    def get_feature_spec(self):
+        if self.out_size < 0:
+            return None
+        return (((self.out_size,), numpy.int32),
+                ((self.out_size, self.out_size), numpy.float32))
+
     def construct_sparse_data(self, x, adj, y):
         """Construct `SparseGraphData` from `x`, `adj`, `y`
 
@@ -78,16 +90,10 @@ class GINSparsePreprocessor(MolPreprocessor):
         Returns:
             SparseGraphData: graph data object for sparse pattern
         """
-        edge_index = [[], []]
-        n, _ = adj.shape
-        for i in range(n):
-            for j in range(n):
-                if adj[i, j] != 0.:
-                    edge_index[0].append(i)
-                    edge_index[1].append(j)
+        edge_index = numpy.stack(numpy.nonzero(adj)).astype(numpy.int64)
         return SparseGraphData(
             x=x,
-            edge_index=numpy.array(edge_index, dtype=numpy.int),
+            edge_index=edge_index,
             y=y
         )
 
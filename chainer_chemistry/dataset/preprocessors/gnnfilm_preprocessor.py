@@ -1,3 +1,5 @@
+import numpy
+
 from chainer_chemistry.dataset.preprocessors.common \
     import construct_atomic_number_array, construct_discrete_edge_matrix  # NOQA
 from chainer_chemistry.dataset.preprocessors.common import type_check_num_atoms  # NOQA
@@ -46,3 +48,9 @@ class GNNFiLMPreprocessor(MolPreprocessor):
         adj_array = construct_discrete_edge_matrix(
             mol, out_size=self.out_size, add_self_connection_channel=True)
         return atom_array, adj_array
+
+    def get_feature_spec(self):
+        if self.out_size < 0:
+            return None
+        return (((self.out_size,), numpy.int32),
+                ((5, self.out_size, self.out_size), numpy.float32))
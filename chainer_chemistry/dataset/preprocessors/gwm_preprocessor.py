@@ -13,6 +13,10 @@ class NFPGWMPreprocessor(NFPPreprocessor):
             mol, atom_array, adj_array)
         return atom_array, adj_array, super_node_x
 
+    def get_feature_spec(self):
+        # `construct_supernode_feature` requires unpadded features.
+        return None
+
 
 class GGNNGWMPreprocessor(GGNNPreprocessor):
     def get_input_features(self, mol):
@@ -22,6 +26,10 @@ class GGNNGWMPreprocessor(GGNNPreprocessor):
             mol, atom_array, adj_array)
         return atom_array, adj_array, super_node_x
 
+    def get_feature_spec(self):
+        # `construct_supernode_feature` requires unpadded features.
+        return None
+
 
 class GINGWMPreprocessor(GINPreprocessor):
     def get_input_features(self, mol):
@@ -31,6 +39,10 @@ class GINGWMPreprocessor(GINPreprocessor):
             mol, atom_array, adj_array)
         return atom_array, adj_array, super_node_x
 
+    def get_feature_spec(self):
+        # `construct_supernode_feature` requires unpadded features.
+        return None
+
 
 class RSGCNGWMPreprocessor(RSGCNPreprocessor):
     def get_input_features(self, mol):
@@ -39,3 +51,7 @@ class RSGCNGWMPreprocessor(RSGCNPreprocessor):
         super_node_x = construct_supernode_feature(
             mol, atom_array, adj_array)
         return atom_array, adj_array, super_node_x
+
+    def get_feature_spec(self):
+        # `construct_supernode_feature` requires unpadded features.
+        return None
@@ -6,6 +6,9 @@ import numpy
 from rdkit import Chem, RDConfig  # NOQA
 from rdkit.Chem import AllChem, ChemicalFeatures, Descriptors, rdmolops  # NOQA
 
+from chainer_chemistry.dataset.neighbor_list import construct_neighbor_list
+from chainer_chemistry.dataset.preprocessors.common import get_bond_table
+from chainer_chemistry.dataset.preprocessors.common import get_graph_distance_matrix  # NOQA
 from chainer_chemistry.dataset.preprocessors.common import MolFeatureExtractionError  # NOQA
 from chainer_chemistry.dataset.preprocessors.common import type_check_num_atoms  # NOQA
 from chainer_chemistry.dataset.preprocessors.mol_preprocessor import MolPreprocessor  # NOQA
@@ -230,7 +233,41 @@ def construct_expanded_distance_vec(distance_matrix_3d, converter, i, j):
     return expanded_distance_vec
 
 
-def construct_pair_feature(mol, use_all_feature):
+def _construct_pair_bond_vec(mol, start_node, end_node):
+    """Returns the bond features of the pairs, zeros for unbonded pairs"""
+    n_atom = mol.GetNumAtoms()
+    begin, end, bond_type = get_bond_table(mol)
+    bond_keys = begin * n_atom + end
+    pair_keys = numpy.minimum(start_node, end_node) * n_atom + \
+        numpy.maximum(start_node, end_node)
+    position = numpy.minimum(numpy.searchsorted(bond_keys, pair_keys),
+                             max(len(bond_keys) - 1, 0))
+    is_bonded = numpy.zeros(len(pair_keys), dtype=bool)
+    if len(bond_keys) > 0:
+        is_bonded = bond_keys[position] == pair_keys
+    pair_bond_type = bond_type[position[is_bonded]]
+    if (pair_bond_type < 0).any():
+        i = numpy.flatnonzero(is_bonded)[
+            numpy.flatnonzero(pair_bond_type < 0)[0]]
+        bond = mol.GetBondBetweenAtoms(int(start_node[i]), int(end_node[i]))
+        raise ValueError("Unknown bond type {}".format(bond.GetBondType()))
+    bond_feature = numpy.zeros((len(pair_keys), 4), dtype=numpy.float32)
+    bond_feature[is_bonded, pair_bond_type] = 1.0
+    return bond_feature
+
+
+def _construct_pair_ring_vec(mol, start_node, end_node):
+    """Returns whether each pair of atoms shares a ring"""
+    sssr = Chem.GetSymmSSSR(mol)
+    is_in_ring = numpy.zeros((mol.GetNumAtoms(), len(sssr)), dtype=bool)
+    for ring_idx, ring in enumerate(sssr):
+        is_in_ring[list(ring), ring_idx] = True
+    return (is_in_ring[start_node] & is_in_ring[end_node]).any(
+        axis=1, keepdims=True).astype(numpy.float32)
+
+
+def construct_pair_feature(mol, use_all_feature, max_radius=None,
+                           max_num_nbr=-1):
     """construct pair feature
 
     Args:
@@ -239,6 +276,13 @@ def construct_pair_feature(mol, use_all_feature):
             If True, all pair features are extracted.
             If False, a part of pair features is extracted.
             You can confirm the detail in the paper.
+        max_radius (float or None): If None, the pairs are the bonds of
+            `mol`. Otherwise, the pairs are the atoms within this distance in
+            the embedded conformer, whether they are bonded or not, which
+            are found by `construct_neighbor_list`.
+        max_num_nbr (int): Max number of the neighbors of each atom, used
+            only when `max_radius` is specified.
+            Setting negative value indicates no limit.
 
     Returns:
         features (numpy.ndarray): The shape is (num_edges, num_edge_features)
@@ -248,15 +292,9 @@ def construct_pair_feature(mol, use_all_feature):
     """
     converter = GaussianDistance()
 
-    # prepare the data for extracting the pair feature
-    bonds = mol.GetBonds()
-    # (n_nodes, n_nodes): distance in terms of the graph bond.
-    graph_distance_matrix = Chem.GetDistanceMatrix(mol)
-    is_in_ring = get_is_in_ring(mol)
     confid = AllChem.EmbedMolecule(mol)
     try:
-        distance_matrix_3d = rdmolops.Get3DDistanceMatrix(
-            mol, confId=confid)
+        positions = mol.GetConformer(confid).GetPositions()
     except ValueError as e:
         logger = getLogger(__name__)
         logger.info('construct_distance_matrix failed, type: {}, {}'
@@ -264,35 +302,32 @@ def construct_pair_feature(mol, use_all_feature):
         logger.debug(traceback.format_exc())
         raise MolFeatureExtractionError
 
-    feature = []
-    bond_idx = []
-    for bond in bonds:
-        start_node = bond.GetBeginAtomIdx()
-        end_node = bond.GetEndAtomIdx()
-
-        # create pair feature
-        distance_feature = numpy.array(
-            graph_distance_matrix[start_node][end_node], dtype=numpy.float32)
-        bond_feature = construct_bond_vec(mol, start_node, end_node)
-        ring_feature = construct_ring_feature_vec(
-            is_in_ring, start_node, end_node)
-
-        bond_idx.append((start_node, end_node))
-        if use_all_feature:
-            expanded_distance_feature = \
-                construct_expanded_distance_vec(
-                    distance_matrix_3d, converter, start_node, end_node)
-            feature.append(numpy.hstack((bond_feature, ring_feature,
-                                         distance_feature,
-                                         expanded_distance_feature)))
-        else:
-            expanded_distance_feature = \
-                construct_expanded_distance_vec(
-                    distance_matrix_3d, converter, start_node, end_node)
-            feature.append(expanded_distance_feature)
+    if max_radius is None:
+        bond_idx = numpy.array([(bond.GetBeginAtomIdx(), bond.GetEndAtomIdx())
+                                for bond in mol.GetBonds()]).T
+    else:
+        bond_idx, _ = construct_neighbor_list(
+            positions, max_radius, max_num_neighbors=max_num_nbr)
+    if bond_idx.size == 0:
+        return numpy.array([]), bond_idx
+    start_node, end_node = bond_idx
+
+    # only the distances of the pairs are computed, instead of the dense
+    # distance matrix.
+    distance = numpy.sqrt(
+        ((positions[start_node] - positions[end_node]) ** 2).sum(axis=1))
+    expanded_distance_feature = converter.expand_from_distances(distance)
+    if not use_all_feature:
+        return expanded_distance_feature, bond_idx
 
-    bond_idx = numpy.array(bond_idx).T
-    feature = numpy.array(feature)
+    # (n_nodes, n_nodes): distance in terms of the graph bond.
+    graph_distance_matrix = get_graph_distance_matrix(mol)
+    distance_feature = graph_distance_matrix[start_node, end_node].astype(
+        numpy.float32)[:, None]
+    bond_feature = _construct_pair_bond_vec(mol, start_node, end_node)
+    ring_feature = _construct_pair_ring_vec(mol, start_node, end_node)
+    feature = numpy.hstack((bond_feature, ring_feature, distance_feature,
+                            expanded_distance_feature))
     return feature, bond_idx
 
 
@@ -334,12 +369,21 @@ class MEGNetPreprocessor(MolPreprocessor):
             If True, even the atom is not in `atom_list`, `atom_type` is set
             as "unknown" atom.
         kekulize (bool): If True, Kekulizes the molecule.
+        max_num_nbr (int): Max number of the neighbors of each atom, used
+            only when `use_neighbor_list` is True.
+        max_radius (float): Cutoff radius of the neighbors, used only when
+            `use_neighbor_list` is True.
+        use_neighbor_list (bool): If True, the pairs are the atoms within
+            `max_radius` in the embedded conformer, found by
+            `construct_neighbor_list`, instead of the bonds. Pair features of
+            the unbonded pairs have zero bond features.
     """
 
     def __init__(self, max_atoms=-1, add_Hs=True,
                  use_all_feature=False, atom_list=None,
                  include_unknown_atom=False, kekulize=False,
-                 max_num_nbr=12, max_radius=8, expand_dim=100):
+                 max_num_nbr=12, max_radius=8, expand_dim=100,
+                 use_neighbor_list=False):
         super(MEGNetPreprocessor, self).__init__(
             add_Hs=add_Hs, kekulize=kekulize)
 
@@ -351,6 +395,7 @@ class MEGNetPreprocessor(MolPreprocessor):
         self.max_num_nbr = max_num_nbr
         self.max_radius = max_radius
         self.expand_dim = expand_dim
+        self.use_neighbor_list = use_neighbor_list
         self.gdf = GaussianDistance(centers=numpy.linspace(0, 5, expand_dim))
 
     def get_input_features(self, mol):
@@ -365,7 +410,12 @@ class MEGNetPreprocessor(MolPreprocessor):
                                               self.atom_list,
                                               self.include_unknown_atom)
 
-        pair_feature, bond_idx = construct_pair_feature(mol,
-                                                        self.use_all_feature)
+        if self.use_neighbor_list:
+            pair_feature, bond_idx = construct_pair_feature(
+                mol, self.use_all_feature, max_radius=self.max_radius,
+                max_num_nbr=self.max_num_nbr)
+        else:
+            pair_feature, bond_idx = construct_pair_feature(
+                mol, self.use_all_feature)
         global_feature = construct_global_state_feature(mol)
         return atom_feature, pair_feature, global_feature, bond_idx
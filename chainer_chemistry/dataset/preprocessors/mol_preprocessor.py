@@ -1,9 +1,75 @@
+import re
+
 from rdkit import Chem
+from rdkit import rdBase
+from rdkit import RDLogger
 
 from chainer_chemistry.dataset.preprocessors.base_preprocessor import BasePreprocessor  # NOQA
 from chainer_chemistry.datasets.numpy_tuple_dataset import NumpyTupleDataset  # NOQA
 
 
+# Sanitization applied to the molecule parsed from the canonical smiles of a
+# sanitized molecule. Kekulization and aromaticity perception are skipped,
+# because the smiles already has the aromaticity perceived for the original
+# molecule. Clean up of functional groups and stereochemistry is not
+# necessary either.
+_canonical_sanitize_ops = (
+    Chem.SanitizeFlags.SANITIZE_PROPERTIES |
+    Chem.SanitizeFlags.SANITIZE_SYMMRINGS |
+    Chem.SanitizeFlags.SANITIZE_FINDRADICALS |
+    Chem.SanitizeFlags.SANITIZE_SETCONJUGATION |
+    Chem.SanitizeFlags.SANITIZE_SETHYBRIDIZATION)
+# Smiles containing hydrogen atoms, which are removed by
+# `Chem.MolFromSmiles`, or aromatic atoms with explicit hydrogens, whose flags
+# are reset by kekulization, are parsed with the full sanitization.
+_full_sanitize_pattern = re.compile(r'\[[a-z]*H')
+
+
+def _has_ring_info(mol):
+    try:
+        mol.GetRingInfo().NumRings()
+    except RuntimeError:
+        # ring information is not initialized.
+        return False
+    return True
+
+
+def _is_sanitized(mol):
+    """Returns whether valences and rings of `mol` are already computed"""
+    if mol.NeedsUpdatePropertyCache():
+        return False
+    block_logs = getattr(rdBase, 'BlockLogs', None)
+    if block_logs is not None:
+        with block_logs():
+            return _has_ring_info(mol)
+    # `BlockLogs` is not available in RDKit older than 2022.03.
+    RDLogger.DisableLog('rdApp.*')
+    try:
+        return _has_ring_info(mol)
+    finally:
+        RDLogger.EnableLog('rdApp.*')
+
+
+def _mol_from_canonical_smiles(canonical_smiles, original_mol):
+    """Parses `canonical_smiles` written from `original_mol`
+
+    The result is same with `Chem.MolFromSmiles(canonical_smiles)`, but
+    the sanitization is lighter when `original_mol` is sanitized.
+
+    """
+    if _full_sanitize_pattern.search(canonical_smiles) is None and \
+            _is_sanitized(original_mol):
+        mol = Chem.MolFromSmiles(canonical_smiles, sanitize=False)
+        if mol is not None:
+            try:
+                Chem.SanitizeMol(mol, sanitizeOps=_canonical_sanitize_ops)
+                return mol
+            except ValueError:
+                # fall back to the full sanitization.
+                pass
+    return Chem.MolFromSmiles(canonical_smiles)
+
+
 class MolPreprocessor(BasePreprocessor):
     """preprocessor class specified for rdkit mol instance
 
@@ -33,7 +99,7 @@ class MolPreprocessor(BasePreprocessor):
         # we obtain canonical smiles which is unique in `mol`
         canonical_smiles = Chem.MolToSmiles(mol, isomericSmiles=False,
                                             canonical=True)
-        mol = Chem.MolFromSmiles(canonical_smiles)
+        mol = _mol_from_canonical_smiles(canonical_smiles, mol)
         if self.add_Hs:
             mol = Chem.AddHs(mol)
         if self.kekulize:
@@ -93,6 +159,20 @@ class MolPreprocessor(BasePreprocessor):
         """
         raise NotImplementedError
 
+    def get_feature_spec(self):
+        """Returns shapes and dtypes of the features of each molecule
+
+        Preprocessors whose `get_input_features` always returns arrays of the
+        same shape, e.g. when `out_size` is specified, may override this
+        method so that parsers can write features directly into
+        preallocated arrays.
+
+        Returns (tuple or None): tuple of `(shape, dtype)` of each feature
+            returned by `get_input_features`, in the same order. `None`
+            (default) means the shapes are not fixed.
+        """
+        return None
+
     def create_dataset(self, *args, **kwargs):
         return NumpyTupleDataset(*args)
 
@@ -1,3 +1,5 @@
+import numpy
+
 from chainer_chemistry.dataset.preprocessors.common import construct_adj_matrix
 from chainer_chemistry.dataset.preprocessors.common \
     import construct_atomic_number_array
@@ -47,3 +49,9 @@ class NFPPreprocessor(MolPreprocessor):
         atom_array = construct_atomic_number_array(mol, out_size=self.out_size)
         adj_array = construct_adj_matrix(mol, out_size=self.out_size)
         return atom_array, adj_array
+
+    def get_feature_spec(self):
+        if self.out_size < 0:
+            return None
+        return (((self.out_size,), numpy.int32),
+                ((self.out_size, self.out_size), numpy.float32))
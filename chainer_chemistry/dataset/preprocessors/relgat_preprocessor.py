@@ -1,3 +1,5 @@
+import numpy
+
 from chainer_chemistry.dataset.preprocessors.common import construct_atomic_number_array  # NOQA
 from chainer_chemistry.dataset.preprocessors.common import construct_discrete_edge_matrix  # NOQA
 from chainer_chemistry.dataset.preprocessors.common import MolFeatureExtractionError  # NOQA
@@ -42,3 +44,9 @@ class RelGATPreprocessor(MolPreprocessor):
         atom_array = construct_atomic_number_array(mol, out_size=self.out_size)
         adj_array = construct_discrete_edge_matrix(mol, out_size=self.out_size)
         return atom_array, adj_array
+
+    def get_feature_spec(self):
+        if self.out_size < 0:
+            return None
+        return (((self.out_size,), numpy.int32),
+                ((4, self.out_size, self.out_size), numpy.float32))
@@ -61,3 +61,9 @@ class RSGCNPreprocessor(MolPreprocessor):
             degree_sqrt_inv[None, :], (num_atoms, num_atoms))
 
         return atom_array, adj_array
+
+    def get_feature_spec(self):
+        if self.out_size < 0:
+            return None
+        return (((self.out_size,), numpy.int32),
+                ((self.out_size, self.out_size), numpy.float32))
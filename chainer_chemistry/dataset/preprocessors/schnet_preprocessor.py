@@ -13,13 +13,18 @@ from chainer_chemistry.dataset.preprocessors.mol_preprocessor \
     import MolPreprocessor
 
 
-def construct_distance_matrix(mol, out_size=-1, contain_Hs=False):
+def construct_distance_matrix(mol, out_size=-1, contain_Hs=False,
+                              coordinates=None):
     """Construct distance matrix
 
     Args:
         mol (Chem.Mol):
         out_size (int):
         contain_Hs (bool):
+        coordinates (numpy.ndarray or None): coordinates of the shape
+            ``(mol.GetNumAtoms(), 3)``, e.g. the ones returned by
+            `GeometryStore.get_coordinates`. If `None`, the conformer is
+            generated by `EmbedMolecule`.
 
     Returns (numpy.ndarray): 2 dimensional array which represents distance
         between atoms
@@ -38,6 +43,16 @@ def construct_distance_matrix(mol, out_size=-1, contain_Hs=False):
                                         'of atoms in mol {}'
                                         .format(out_size, N))
 
+    if coordinates is not None:
+        coordinates = numpy.asarray(coordinates, dtype=numpy.float64)
+        if coordinates.shape != (N, 3):
+            raise MolFeatureExtractionError(
+                'coordinates of the shape {} does not match number of atoms '
+                'in mol {}'.format(coordinates.shape, N))
+        diff = coordinates[:, None, :] - coordinates[None, :, :]
+        return _pad_distance_matrix(numpy.sqrt((diff ** 2).sum(axis=2)),
+                                    size)
+
     if contain_Hs:
         mol2 = mol
     else:
@@ -55,8 +70,11 @@ def construct_distance_matrix(mol, out_size=-1, contain_Hs=False):
                     .format(type(e).__name__, e.args))
         logger.debug(traceback.format_exc())
         raise MolFeatureExtractionError
+    return _pad_distance_matrix(dist_matrix, size)
+
 
-    if size > N:
+def _pad_distance_matrix(dist_matrix, size):
+    if size > len(dist_matrix):
         dists = numpy.zeros((size, size), dtype=numpy.float32)
         a0, a1 = dist_matrix.shape
         dists[:a0, :a1] = dist_matrix
@@ -80,11 +98,20 @@ class SchNetPreprocessor(MolPreprocessor):
             Setting negative value indicates do not pad returned array.
         add_Hs (bool): If True, implicit Hs are added.
         kekulize (bool): If True, Kekulizes the molecule.
+        geometry_store (GeometryStore or None): If specified, distances are
+            computed from the geometries stored in it, e.g. the one returned
+            by `get_qm9_geometry_store`. Conformers are generated only for
+            the molecules which are not found in it.
+        conformer_generator (ConformerGenerator or None): If specified,
+            conformers are generated by it, which uses fixed random seed and
+            can cache the geometries. Otherwise `EmbedMolecule` is called
+            for each molecule.
 
     """
 
     def __init__(self, max_atoms=-1, out_size=-1, add_Hs=False,
-                 kekulize=False):
+                 kekulize=False, geometry_store=None,
+                 conformer_generator=None):
         super(SchNetPreprocessor, self).__init__(
             add_Hs=add_Hs, kekulize=kekulize)
         if max_atoms >= 0 and out_size >= 0 and max_atoms > out_size:
@@ -92,6 +119,8 @@ class SchNetPreprocessor(MolPreprocessor):
                              'out_size {}'.format(max_atoms, out_size))
         self.max_atoms = max_atoms
         self.out_size = out_size
+        self.geometry_store = geometry_store
+        self.conformer_generator = conformer_generator
 
     def get_input_features(self, mol):
         """get input features
@@ -104,6 +133,18 @@ class SchNetPreprocessor(MolPreprocessor):
         """
         type_check_num_atoms(mol, self.max_atoms)
         atom_array = construct_atomic_number_array(mol, out_size=self.out_size)
+        coordinates = None
+        if self.geometry_store is not None:
+            coordinates = self.geometry_store.get_coordinates(mol)
+        if coordinates is None and self.conformer_generator is not None:
+            coordinates = self.conformer_generator.get_coordinates(mol)
         dist_array = construct_distance_matrix(mol, out_size=self.out_size,
-                                               contain_Hs=self.add_Hs)
+                                               contain_Hs=self.add_Hs,
+                                               coordinates=coordinates)
         return atom_array, dist_array
+
+    def get_feature_spec(self):
+        if self.out_size < 0:
+            return None
+        return (((self.out_size,), numpy.int32),
+                ((self.out_size, self.out_size), numpy.float32))
@@ -1,23 +1,23 @@
-import os
-
 import numpy
 from rdkit import Chem
 from rdkit.Chem import AllChem
-from rdkit.Chem import ChemicalFeatures
-from rdkit import RDConfig
 
 from chainer_chemistry.config import WEAVE_DEFAULT_NUM_MAX_ATOMS
 from chainer_chemistry.dataset.preprocessors.common \
     import construct_atomic_number_array
 from chainer_chemistry.dataset.preprocessors.common \
     import MolFeatureExtractionError
+from chainer_chemistry.dataset.preprocessors.common import get_bond_table
+from chainer_chemistry.dataset.preprocessors.common import get_graph_distance_matrix  # NOQA
 from chainer_chemistry.dataset.preprocessors.common import type_check_num_atoms
+from chainer_chemistry.dataset.preprocessors.megnet_preprocessor import ChemicalFeaturesFactory  # NOQA
 from chainer_chemistry.dataset.preprocessors.mol_preprocessor \
     import MolPreprocessor
 
 
 ATOM = ['H', 'C', 'N', 'O', 'S', 'Cl', 'Br', 'F', 'P', 'I']
 MAX_DISTANCE = 2  # 7
+_hybridization_index = {'SP1': 0, 'SP2': 1, 'SP3': 2}
 
 
 # --- Atom feature extraction ---
@@ -30,19 +30,22 @@ def construct_atom_type_vec(mol, num_max_atoms=WEAVE_DEFAULT_NUM_MAX_ATOMS,
         n_atom_type = len(atom_list) + 1
     else:
         n_atom_type = len(atom_list)
-    n_atom = mol.GetNumAtoms()
     atom_type_vec = numpy.zeros((num_max_atoms, n_atom_type),
                                 dtype=numpy.float32)
-    for i in range(n_atom):
-        a = mol.GetAtomWithIdx(i)
-        try:
-            atom_idx = atom_list.index(a.GetSymbol())
-        except ValueError as e:
-            if include_unknown_atom:
-                atom_idx = len(atom_list)
-            else:
-                raise MolFeatureExtractionError(e)
-        atom_type_vec[i, atom_idx] = 1.0
+    atom_index = {}
+    for i, symbol in enumerate(atom_list):
+        atom_index.setdefault(symbol, i)
+    indices = []
+    for a in mol.GetAtoms():
+        symbol = a.GetSymbol()
+        if symbol in atom_index:
+            indices.append(atom_index[symbol])
+        elif include_unknown_atom:
+            indices.append(len(atom_list))
+        else:
+            raise MolFeatureExtractionError(
+                '{!r} is not in list'.format(symbol))
+    atom_type_vec[numpy.arange(len(indices)), indices] = 1.0
     return atom_type_vec
 
 
@@ -50,30 +53,25 @@ def construct_formal_charge_vec(mol,
                                 num_max_atoms=WEAVE_DEFAULT_NUM_MAX_ATOMS):
     n_atom = mol.GetNumAtoms()
     formal_charge_vec = numpy.zeros((num_max_atoms, 1), dtype=numpy.float32)
-    for i in range(n_atom):
-        a = mol.GetAtomWithIdx(i)
-        formal_charge_vec[i, 0] = a.GetFormalCharge()
+    formal_charge_vec[:n_atom, 0] = [a.GetFormalCharge()
+                                     for a in mol.GetAtoms()]
     return formal_charge_vec
 
 
 def construct_hybridization_vec(mol,
                                 num_max_atoms=WEAVE_DEFAULT_NUM_MAX_ATOMS):
-    # TODO(Oono)
-    # Can we enhance preprocessing speed by making factory once
-    # prior to calling this function many times?
-    n_atom = mol.GetNumAtoms()
     hybridization_vec = numpy.zeros((num_max_atoms, 3), dtype=numpy.float32)
-    for i in range(n_atom):
-        a = mol.GetAtomWithIdx(i)
-        if a.GetHybridization() is None:
+    rows = []
+    cols = []
+    for i, a in enumerate(mol.GetAtoms()):
+        hybridization = a.GetHybridization()
+        if hybridization is None:
             continue
-        hybridization_type = str(a.GetHybridization())
-        if hybridization_type == 'SP1':
-            hybridization_vec[i, 0] = 1.0
-        elif hybridization_type == 'SP2':
-            hybridization_vec[i, 1] = 1.0
-        elif hybridization_type == 'SP3':
-            hybridization_vec[i, 2] = 1.0
+        col = _hybridization_index.get(str(hybridization))
+        if col is not None:
+            rows.append(i)
+            cols.append(col)
+    hybridization_vec[rows, cols] = 1.0
     return hybridization_vec
 
 
@@ -82,57 +80,41 @@ def construct_partial_charge_vec(
     AllChem.ComputeGasteigerCharges(mol)
     n = mol.GetNumAtoms()
     partial_charge_vec = numpy.zeros((num_max_atoms, 1), dtype=numpy.float32)
-    for i in range(n):
-        a = mol.GetAtomWithIdx(i)
-        partial_charge_vec[i, 0] = a.GetProp("_GasteigerCharge")
+    partial_charge_vec[:n, 0] = [float(a.GetProp("_GasteigerCharge"))
+                                 for a in mol.GetAtoms()]
     return partial_charge_vec
 
 
 def construct_atom_ring_vec(mol, num_max_atoms=WEAVE_DEFAULT_NUM_MAX_ATOMS):
-    nAtom = mol.GetNumAtoms()
     sssr = Chem.GetSymmSSSR(mol)
     ring_feature = numpy.zeros((num_max_atoms, 6,), dtype=numpy.float32)
     for ring in sssr:
-        ring = list(ring)
-        for i in range(nAtom):
-            if i in ring:
-                ring_size = len(ring)
-                if ring_size >= 3 and ring_size <= 8:
-                    ring_feature[i, ring_size - 3] = 1.0
+        ring_size = len(ring)
+        if ring_size >= 3 and ring_size <= 8:
+            ring_feature[list(ring), ring_size - 3] = 1.0
     return ring_feature
 
 
 def construct_hydrogen_bonding(mol, num_max_atoms=WEAVE_DEFAULT_NUM_MAX_ATOMS):
-    fdefName = os.path.join(RDConfig.RDDataDir, 'BaseFeatures.fdef')
-    factory = ChemicalFeatures.BuildFeatureFactory(fdefName)
-    feats = factory.GetFeaturesForMol(mol)
+    factory = ChemicalFeaturesFactory.get_instance()
     hydrogen_bonding_vec = numpy.zeros((num_max_atoms, 2), dtype=numpy.float32)
-    for f in feats:
-        if f.GetFamily() == 'Donor':
+    # only the patterns of the families used are matched.
+    for col, family in enumerate(('Donor', 'Acceptor')):
+        for f in factory.GetFeaturesForMol(mol, includeOnly=family):
             idx = f.GetAtomIds()[0]
-            hydrogen_bonding_vec[idx, 0] = 1.0
-        if f.GetFamily() == 'Acceptor':
-            idx = f.GetAtomIds()[0]
-            hydrogen_bonding_vec[idx, 1] = 1.0
+            hydrogen_bonding_vec[idx, col] = 1.0
     return hydrogen_bonding_vec
 
 
 def construct_num_hydrogens_vec(mol,
                                 num_max_atoms=WEAVE_DEFAULT_NUM_MAX_ATOMS):
     n_hydrogen_vec = numpy.zeros((num_max_atoms, 1), dtype=numpy.float32)
-    n_atom = mol.GetNumAtoms()
-    for i in range(n_atom):
-        n = 0
-        for j in range(n_atom):
-            if i == j:
-                continue
-            a = mol.GetAtomWithIdx(j)
-            if a.GetSymbol() != 'H':
-                continue
-            k = mol.GetBondBetweenAtoms(i, j)
-            if k is not None:
-                n += 1
-        n_hydrogen_vec[i, 0] = n
+    is_hydrogen = numpy.array([a.GetSymbol() == 'H' for a in mol.GetAtoms()],
+                              dtype=bool)
+    begin, end, _ = _get_bond_arrays(mol)
+    # each bond to a hydrogen counts for the atom at the other end.
+    numpy.add.at(n_hydrogen_vec[:, 0], begin[is_hydrogen[end]], 1)
+    numpy.add.at(n_hydrogen_vec[:, 0], end[is_hydrogen[begin]], 1)
     return n_hydrogen_vec
 
 
@@ -199,6 +181,21 @@ def construct_atom_feature(mol, add_Hs,
 
 
 # --- Pair feature extraction ---
+def _get_bond_arrays(mol):
+    """Returns the bond table of `mol` checking that all bond types are known
+
+    Bond types are the column indices of `construct_bond_vec`.
+
+    """
+    begin, end, bond_type = get_bond_table(mol)
+    unknown = numpy.flatnonzero(bond_type < 0)
+    if len(unknown) > 0:
+        bond = mol.GetBondBetweenAtoms(int(begin[unknown[0]]),
+                                       int(end[unknown[0]]))
+        raise ValueError("Unknown bond type {}".format(bond.GetBondType()))
+    return begin, end, bond_type
+
+
 def construct_bond_vec(mol, i, j):
     bond_feature_vec = numpy.zeros((4, ), dtype=numpy.float32)
     k = mol.GetBondBetweenAtoms(i, j)
@@ -230,13 +227,9 @@ def construct_ring_feature_vec(mol, num_max_atoms=WEAVE_DEFAULT_NUM_MAX_ATOMS):
     ring_feature_vec = numpy.zeros(
         (num_max_atoms ** 2, 1,), dtype=numpy.float32)
     for ring in sssr:
-        ring = list(ring)
-        n_atom_in_ring = len(ring)
-        for i in range(n_atom_in_ring):
-            for j in range(n_atom_in_ring):
-                a0 = ring[i]
-                a1 = ring[j]
-                ring_feature_vec[a0 * n_atom + a1] = 1
+        ring = numpy.array(list(ring), dtype=numpy.intp)
+        # all pairs `(a0, a1)` of the atoms in the ring
+        ring_feature_vec[(ring[:, None] * n_atom + ring[None, :]).ravel()] = 1
     return ring_feature_vec
 
 
@@ -253,17 +246,18 @@ def construct_pair_feature(mol, num_max_atoms=WEAVE_DEFAULT_NUM_MAX_ATOMS):
 
     """
     n_atom = mol.GetNumAtoms()
-    distance_matrix = Chem.GetDistanceMatrix(mol)
+    # row `i * n_atom + j` is the feature of the pair `(i, j)`.
+    distance_matrix = get_graph_distance_matrix(mol)
+    distance = numpy.minimum(MAX_DISTANCE,
+                             distance_matrix.astype(numpy.int64)).ravel()
     distance_feature = numpy.zeros((num_max_atoms ** 2, MAX_DISTANCE,),
                                    dtype=numpy.float32)
-    for i in range(n_atom):
-        for j in range(n_atom):
-            distance_feature[i * n_atom + j] = construct_distance_vec(
-                distance_matrix, i, j)
+    distance_feature[:n_atom ** 2] = \
+        distance[:, None] > numpy.arange(MAX_DISTANCE)
     bond_feature = numpy.zeros((num_max_atoms ** 2, 4,), dtype=numpy.float32)
-    for i in range(n_atom):
-        for j in range(n_atom):
-            bond_feature[i * n_atom + j] = construct_bond_vec(mol, i, j)
+    begin, end, types = _get_bond_arrays(mol)
+    bond_feature[begin * n_atom + end, types] = 1.0
+    bond_feature[end * n_atom + begin, types] = 1.0
     ring_feature = construct_ring_feature_vec(mol, num_max_atoms=num_max_atoms)
     feature = numpy.hstack((distance_feature, bond_feature, ring_feature))
     return feature
@@ -333,3 +327,21 @@ class WeaveNetPreprocessor(MolPreprocessor):
         pair_feature = construct_pair_feature(mol,
                                               num_max_atoms=self.max_atoms)
         return atom_array, pair_feature
+
+    def get_feature_spec(self):
+        if self.use_fixed_atom_feature:
+            n_atom_type = len(self.atom_list or ATOM)
+            if self.include_unknown_atom:
+                n_atom_type += 1
+            # atom type, formal charge, partial charge, ring (6),
+            # hybridization (3), hydrogen bonding (2), aromaticity and
+            # number of hydrogens (only when `add_Hs`)
+            atom_feature_size = n_atom_type + 14
+            if self.add_Hs:
+                atom_feature_size += 1
+            atom_spec = ((self.max_atoms, atom_feature_size), numpy.float32)
+        else:
+            atom_spec = ((self.max_atoms,), numpy.int32)
+        # distance, bond type (4) and ring
+        pair_spec = ((self.max_atoms ** 2, MAX_DISTANCE + 5), numpy.float32)
+        return atom_spec, pair_spec
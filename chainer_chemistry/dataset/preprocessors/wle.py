@@ -4,6 +4,8 @@ import numpy as np
 
 from chainer_chemistry.dataset.preprocessors import wle_io
 from chainer_chemistry.dataset.preprocessors import wle_atom_array_update as wle_update
+from chainer_chemistry.utils import load_json
+from chainer_chemistry.utils import save_json
 
 DEBUG = False
 
@@ -28,15 +30,11 @@ def apply_wle_for_datasets(datasets, cutoff=0, k=1):
         - dictionary of label frequencies key:label valeu:frequency count
     """
 
-    atom_arrays, adj_arrays, teach_signals = wle_io.load_dataset_elements(datasets)
-
-    for _ in range(k):
-        atom_arrays, labels_frequencies = wle_update.update_atom_arrays(
-            atom_arrays, adj_arrays, cutoff)
-
-    datasets_expanded = wle_io.create_datasets(atom_arrays, adj_arrays, teach_signals)
+    transformer = WLETransformer('wle', cutoff=cutoff, k=k)
+    datasets_expanded = transformer.fit_transform(datasets)
+    labels_frequencies = transformer.labels_frequencies[-1]
     expanded_labels = list(labels_frequencies.keys())
-    return tuple(datasets_expanded), expanded_labels, labels_frequencies
+    return datasets_expanded, expanded_labels, labels_frequencies
 
 
 def apply_cwle_for_datasets(datasets, k=1):
@@ -59,24 +57,192 @@ def apply_cwle_for_datasets(datasets, k=1):
         - dictionary of label frequencies key:label valeu:frequency count
     """
 
-    if k <= 0:
-        raise ValueError('Iterations should be a positive integer. '
-                         'Found k={}'.format(k))
+    transformer = WLETransformer('cwle', k=k)
+    datasets_expanded = transformer.fit_transform(datasets)
+    labels_frequencies = transformer.labels_frequencies[-1]
+    expanded_labels = list(labels_frequencies.keys())
+    return datasets_expanded, expanded_labels, labels_frequencies
+
 
-    atom_arrays, adj_arrays, teach_signals = wle_io.load_dataset_elements(datasets)
+class WLETransformer(object):
+    """
+    Weisfeiler--Lehman embedding fitted on datasets, which can be applied
+    to new molecules later, e.g. at inference time.
 
-    for i in range(k):
-        if i != k - 1:
-            atom_arrays, labels_frequencies = wle_update.update_atom_arrays(
-                atom_arrays, adj_arrays, 0)
-        else:
-            wle_arrays, labels_frequencies = wle_update.update_atom_arrays(
-                atom_arrays, adj_arrays, 0, False)
+    The vocabulary of the expanded labels of each iteration and their
+    frequencies are kept, and they can be saved with the model by `save`.
+    `transform` expands the labels of new molecules with the vocabulary
+    in time proportional to them, without the datasets used by `fit`.
+    Expanded labels which are not in the vocabulary are mapped to the
+    fallback id.
+
+    Args:
+        method: str, 'wle' for the naive WLE, or 'cwle' for the
+                   Concatenated WLE and the Gated-sum WLE.
+        cutoff: int, if more than 0, the expanded labels
+                   whose freq <= cutoff will be removed. Only for 'wle'.
+        k: int, the number of iterations of neighborhood
+              aggregation.
+        fallback_id: int or None, the label of the unknown expanded
+                        labels. If None, the size of the vocabulary of each
+                        iteration, i.e. the label next to the known ones.
+    """
+
+    def __init__(self, method='wle', cutoff=0, k=1, fallback_id=None):
+        if method not in ('wle', 'cwle'):
+            raise ValueError('method should be wle or cwle. '
+                             'Found method={}'.format(method))
+        if k <= 0:
+            raise ValueError('Iterations should be a positive integer. '
+                             'Found k={}'.format(k))
+        if method == 'cwle' and cutoff > 0:
+            raise ValueError('cutoff is not supported by cwle')
+        self.method = method
+        self.cutoff = cutoff
+        self.k = k
+        self.fallback_id = fallback_id
+        self.labels_frequencies = None
+        self._vocabularies = None
+
+    def _iterations(self):
+        """
+        Yield the cutoff and with_focus_atom of each iteration
+        """
+        for i in range(self.k):
+            if self.method == 'wle':
+                yield self.cutoff, True
+            else:
+                # the last iteration makes the expanded labels
+                # concatenated to the atom labels.
+                yield 0, i != self.k - 1
+
+    def fit_transform(self, datasets):
+        """
+        Make the vocabulary of the expanded labels from the datasets, and
+        apply the embedding for them.
+
+        Args:
+            datasets: tuple of dataset (usually, train/val/test),
+                         each dataset consists of atom_array and
+                         adj_array and teach_signal
+
+        Returns:
+            - tuple of dataset with expanded labels, same as
+              apply_wle_for_datasets or apply_cwle_for_datasets
+        """
+        atom_arrays, adj_arrays, teach_signals = \
+            wle_io.load_dataset_elements(datasets)
+
+        labels_frequencies = []
+        wle_arrays = None
+        for cutoff, with_focus_atom in self._iterations():
+            expanded_arrays, frequencies = wle_update.update_atom_arrays(
+                atom_arrays, adj_arrays, cutoff, with_focus_atom)
+            labels_frequencies.append(frequencies)
+            if with_focus_atom:
+                atom_arrays = expanded_arrays
+            else:
+                wle_arrays = expanded_arrays
+        self.labels_frequencies = labels_frequencies
+        self._vocabularies = None
+
+        datasets_expanded = wle_io.create_datasets(
+            atom_arrays, adj_arrays, teach_signals, wle_arrays)
+        return tuple(datasets_expanded)
+
+    def fit(self, datasets):
+        """
+        Make the vocabulary of the expanded labels from the datasets.
+
+        Returns:
+            - this transformer
+        """
+        self.fit_transform(datasets)
+        return self
+
+    def _get_vocabularies(self):
+        if self.labels_frequencies is None:
+            raise RuntimeError('WLETransformer is not fitted yet.')
+        if self._vocabularies is None:
+            self._vocabularies = [
+                {label: i for i, label in enumerate(frequencies)}
+                for frequencies in self.labels_frequencies]
+        return self._vocabularies
+
+    def get_fallback_id(self, iteration=-1):
+        """
+        Return the label of the unknown expanded labels of the iteration.
+        """
+        if self.fallback_id is not None:
+            return self.fallback_id
+        return len(self._get_vocabularies()[iteration])
+
+    def get_num_labels(self):
+        """
+        Return the number of the expanded labels of the last iteration,
+        including the fallback label, e.g. for the size of the embedding.
+        """
+        return max(len(self._get_vocabularies()[-1]),
+                   self.get_fallback_id() + 1)
+
+    def transform(self, datasets):
+        """
+        Apply the embedding with the fitted vocabulary.
+
+        Args:
+            datasets: tuple of dataset, each dataset consists of
+                         atom_array and adj_array and teach_signal
+
+        Returns:
+            - tuple of dataset with expanded labels
+        """
+        vocabularies = self._get_vocabularies()
+        atom_arrays, adj_arrays, teach_signals = \
+            wle_io.load_dataset_elements(datasets)
+
+        wle_arrays = None
+        for i, (cutoff, with_focus_atom) in enumerate(self._iterations()):
+            expanded_arrays = wle_update.transform_atom_arrays(
+                atom_arrays, adj_arrays, vocabularies[i], cutoff,
+                self.get_fallback_id(i), with_focus_atom)
+            if with_focus_atom:
+                atom_arrays = expanded_arrays
+            else:
+                wle_arrays = expanded_arrays
+
+        datasets_expanded = wle_io.create_datasets(
+            atom_arrays, adj_arrays, teach_signals, wle_arrays)
+        return tuple(datasets_expanded)
+
+    def save(self, filepath):
+        """
+        Save the fitted transformer in json format.
+        """
+        if self.labels_frequencies is None:
+            raise RuntimeError('WLETransformer is not fitted yet.')
+        params = {'method': self.method,
+                  'cutoff': self.cutoff,
+                  'k': self.k,
+                  'fallback_id': self.fallback_id,
+                  # list of pairs keeps the order of the labels.
+                  'labels_frequencies': [
+                      list(frequencies.items())
+                      for frequencies in self.labels_frequencies]}
+        save_json(filepath, params)
+
+    @classmethod
+    def load(cls, filepath):
+        """
+        Load the transformer saved by `save`.
+        """
+        params = load_json(filepath)
+        transformer = cls(params['method'], cutoff=params['cutoff'],
+                          k=params['k'], fallback_id=params['fallback_id'])
+        transformer.labels_frequencies = [
+            dict((label, frequency) for label, frequency in frequencies)
+            for frequencies in params['labels_frequencies']]
+        return transformer
 
-    datasets_expanded = wle_io.create_datasets(
-        atom_arrays, adj_arrays, teach_signals, wle_arrays)
-    expanded_labels = list(labels_frequencies.keys())
-    return tuple(datasets_expanded), expanded_labels, labels_frequencies
 
 def _findmaxidx(datasets, idx):
     atom_data_size = len(datasets[0][0])
@@ -6,17 +6,242 @@ from chainer_chemistry.dataset.preprocessors import wle_util
 
 
 def update_atom_arrays(atom_arrays, adj_arrays, cutoff, with_focus_atom=True):
-    expanded_atom_lists, labels_frequencies = list_all_expanded_labels(
+    expanded_ids, layout, expanded_labels = _relabel(
             atom_arrays, adj_arrays, with_focus_atom)
     if cutoff > 0:
-        expanded_atom_lists, labels_frequencies = shrink_expanded_labels(
-                expanded_atom_lists, labels_frequencies, cutoff)
-    expanded_labels = list(labels_frequencies.keys())
-    atom_arrays = [wle_util.to_index(l, expanded_labels)
-                        for l in expanded_atom_lists]
+        expanded_ids, expanded_labels = _shrink_expanded_ids(
+                expanded_ids, expanded_labels, cutoff)
+    counts = np.bincount(expanded_ids, minlength=len(expanded_labels))
+    labels_frequencies = dict(zip(expanded_labels, counts.tolist()))
+    atom_arrays = [wle_util.to_array_of_arrays(mol_ids)
+                   for mol_ids in _split(expanded_ids, layout)]
     return atom_arrays, labels_frequencies
 
 
+def transform_atom_arrays(atom_arrays, adj_arrays, vocabulary, cutoff,
+                          fallback_id, with_focus_atom=True):
+    """
+    Expand the atom arrays with the fitted vocabulary of expanded labels
+
+    Only the labels of the given molecules are made, so it takes the time
+    proportional to them instead of the datasets the vocabulary is made from.
+
+    Args:
+        atom_arrays: tuple of atom arrays
+        adj_arrays: tuple of adj.arrays
+        vocabulary: dict, key: expanded label, value: its index, which is
+                    made by update_atom_arrays with the same cutoff
+        cutoff: int, the cutoff used to make the vocabulary. If more than
+                0, the labels not in the vocabulary are replaced with their
+                focus node labels, same as the few-appearance labels.
+        fallback_id: int, index of the labels not in the vocabulary
+        with_focus_atom: bool, see list_all_expanded_labels
+
+    Returns:
+        - tuple of expanded atom arrays
+    """
+    expanded_ids, layout, expanded_labels = _relabel(
+            atom_arrays, adj_arrays, with_focus_atom)
+    id_map = np.empty(len(expanded_labels), dtype=np.int64)
+    for i, expanded_label in enumerate(expanded_labels):
+        idx = vocabulary.get(expanded_label)
+        if idx is None and cutoff > 0:
+            idx = vocabulary.get(
+                    wle_util.get_focus_node_label(expanded_label))
+        id_map[i] = fallback_id if idx is None else idx
+    return [wle_util.to_array_of_arrays(mol_ids)
+            for mol_ids in _split(id_map[expanded_ids], layout)]
+
+
+def _split(values, layout):
+    """
+    Split the values of all atoms into 3 (train/val/test) lists of molecules
+
+    Args:
+        values: array or list, a value for each atom of all molecules
+        layout: list of lists of the number of atoms of each molecule
+
+    Returns:
+        - 3 (train/val/test) tuple of list of the values of each molecule
+    """
+    sets = []
+    begin = 0
+    for set_num_atoms in layout:
+        mols = []
+        for num_atoms in set_num_atoms:
+            mols.append(values[begin:begin + num_atoms])
+            begin += num_atoms
+        sets.append(mols)
+    return sets
+
+
+def _relabel(atom_arrays, adj_arrays, with_focus_atom=True):
+    """
+    Integer Weisfeiler-Lehman relabeling of all atoms at once
+
+    The expanded label of an atom is identified by the tuple of its atom
+    label (if with_focus_atom) and the sorted labels of its neighbors,
+    which are hashed into 64-bit integers to find the unique ones with numpy.
+    Strings are made only for the unique labels, once for each.
+
+    Args:
+        atom_arrays: 3 (train/val/test) tuple of atom arrays
+        adj_arrays: 3 (train/val/test) tuple of adj.arrays
+        with_focus_atom: bool, see list_all_expanded_labels
+
+    Returns:
+        - int array, index of the expanded label of each atom of all
+          molecules, in the order of train/val/test, molecules and atoms
+        - list of lists of the number of atoms of each molecule
+        - list of the expanded labels (strings), ordered by their first
+          appearance
+    """
+    layout = []
+    labels = []
+    rows = []
+    cols = []
+    offset = 0
+    for set_atom_arrays, set_adj_arrays in zip(atom_arrays, adj_arrays):
+        if _is_stacked(set_atom_arrays, set_adj_arrays):
+            # molecules of the same size are processed at once.
+            M, N = set_atom_arrays.shape
+            if set_adj_arrays.ndim == 4:
+                set_adj_arrays = np.sum(set_adj_arrays, axis=2)
+            mol, row, col = np.nonzero(set_adj_arrays)
+            is_neighbor = row != col
+            rows.append((mol * N + row)[is_neighbor] + offset)
+            cols.append((mol * N + col)[is_neighbor] + offset)
+            labels.append(set_atom_arrays.ravel())
+            layout.append([N] * M)
+            offset += M * N
+            continue
+        set_num_atoms = []
+        for atom_array, adj_array in zip(set_atom_arrays, set_adj_arrays):
+            N = len(atom_array)
+            adj_array = wle_util.compress_relation_axis(adj_array)
+            assert adj_array.shape == (N, N)
+            # CSR adjacency: neighbors are sorted by row.
+            row, col = np.nonzero(adj_array)
+            is_neighbor = row != col
+            rows.append(row[is_neighbor] + offset)
+            cols.append(col[is_neighbor] + offset)
+            labels.append(np.asarray(atom_array).ravel())
+            set_num_atoms.append(N)
+            offset += N
+        layout.append(set_num_atoms)
+    if offset == 0:
+        return np.zeros(0, dtype=np.int64), layout, []
+
+    # codes of the atom labels keep their order.
+    values, codes = np.unique(np.concatenate(labels), return_inverse=True)
+    codes = codes.ravel().astype(np.int64)
+    rows = np.concatenate(rows).astype(np.int64)
+    neighbor_codes = codes[np.concatenate(cols).astype(np.int64)]
+    order = np.lexsort((neighbor_codes, rows))
+    rows = rows[order]
+    neighbor_codes = neighbor_codes[order]
+    degrees = np.bincount(rows, minlength=offset)
+    max_degree = int(degrees.max()) if len(degrees) > 0 else 0
+
+    # signature of each atom: (focus atom label, sorted neighbor labels)
+    # padded with -1.
+    signatures = np.full((offset, 1 + max_degree), -1, dtype=np.int64)
+    if with_focus_atom:
+        signatures[:, 0] = codes
+    position = np.arange(len(rows)) - np.searchsorted(rows, rows)
+    signatures[rows, 1 + position] = neighbor_codes
+
+    hashes = _hash_rows(signatures)
+    _, first_index, inverse = np.unique(
+        hashes, return_index=True, return_inverse=True)
+    inverse = inverse.ravel()
+    if not np.array_equal(signatures[first_index[inverse]], signatures):
+        # hash collision, find the unique signatures exactly.
+        _, first_index, inverse = np.unique(
+            signatures, axis=0, return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+
+    # order the labels by their first appearance.
+    appearance = np.argsort(first_index)
+    rank = np.empty(len(appearance), dtype=np.int64)
+    rank[appearance] = np.arange(len(appearance))
+    expanded_ids = rank[inverse]
+
+    # different signatures may have the same string, e.g. negative labels.
+    vocabulary = {}
+    id_map = np.empty(len(appearance), dtype=np.int64)
+    for i, atom_idx in enumerate(first_index[appearance]):
+        signature = signatures[atom_idx]
+        neighbor_labels = values[signature[1:1 + degrees[atom_idx]]]
+        expanded_label = wle_util._to_string(
+            values[codes[atom_idx]], neighbor_labels, with_focus_atom)
+        id_map[i] = vocabulary.setdefault(expanded_label, len(vocabulary))
+    return id_map[expanded_ids], layout, list(vocabulary.keys())
+
+
+def _is_stacked(set_atom_arrays, set_adj_arrays):
+    """
+    Check the molecules are stacked in the arrays of shape (M, N) and
+    (M, N, N) or (M, N, R, N)
+    """
+    if not (isinstance(set_atom_arrays, np.ndarray)
+            and isinstance(set_adj_arrays, np.ndarray)):
+        return False
+    if set_atom_arrays.ndim != 2 or set_atom_arrays.dtype == object:
+        return False
+    M, N = set_atom_arrays.shape
+    return (set_adj_arrays.ndim in (3, 4)
+            and set_adj_arrays.shape[:2] == (M, N)
+            and set_adj_arrays.shape[-1] == N)
+
+
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _hash_rows(rows):
+    """
+    Hash each row of the int array into a 64-bit integer
+    """
+    hashes = np.zeros(len(rows), dtype=np.uint64)
+    for column in rows.T:
+        x = column.astype(np.uint64) + np.uint64(1)
+        # mix the value by splitmix64 finalizer
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        x = x ^ (x >> np.uint64(31))
+        hashes = hashes * _HASH_MULTIPLIER + x
+    return hashes
+
+
+def _shrink_expanded_ids(expanded_ids, expanded_labels, cutoff):
+    """
+    Replace the expanded labels which appear cutoff times or less with the
+    focus node labels, same as shrink_expanded_labels.
+
+    Returns:
+        - int array, index of the new label of each atom
+        - list of the new labels, ordered by their first appearance
+    """
+    counts = np.bincount(expanded_ids, minlength=len(expanded_labels))
+    vocabulary = {}
+    id_map = np.empty(len(expanded_labels), dtype=np.int64)
+    for i, (expanded_label, freq) in enumerate(zip(expanded_labels, counts)):
+        if freq > cutoff:
+            label = expanded_label
+        else:
+            label = wle_util.get_focus_node_label(expanded_label)
+        id_map[i] = vocabulary.setdefault(label, len(vocabulary))
+    new_ids = id_map[expanded_ids]
+    labels = list(vocabulary.keys())
+
+    # order the new labels by their first appearance.
+    _, first_index = np.unique(new_ids, return_index=True)
+    appearance = np.argsort(first_index)
+    rank = np.empty(len(labels), dtype=np.int64)
+    rank[appearance] = np.arange(len(labels))
+    return rank[new_ids], [labels[j] for j in appearance]
+
+
 def shrink_expanded_labels(expanded_atom_lists,
                            labels_frequencies,
                            cutoff):
@@ -88,40 +313,11 @@ def list_all_expanded_labels(atom_arrays, adj_arrays, with_focus_atom=True):
 
     """
 
-    expanded_atom_lists = []  # atom_array values are expanded label "STRING", not numbers
-    labels_frequencies = collections.defaultdict(lambda: 0)
-
-    # for each train/val/test, do
-    for set_atom_arrays, set_adj_arrays in zip(atom_arrays, adj_arrays):
-        # for each molecule sample, do
-        set_expanded_atom_list = []
-        for atom_array, adj_array in zip(set_atom_arrays, set_adj_arrays):
-            N = len(atom_array)  # number of molecules
-            # atom_array: N by F
-            # adj_array: N by N or N by R by N
-
-            # compress the relation axis
-            adj_array = wle_util.compress_relation_axis(adj_array)
-            assert adj_array.shape == (N, N)
-            # find neighbors
-            # array[0]: row index array[1]: column index
-            neighbors = np.nonzero(adj_array)
-
-            mol_expanded_atom_list = []
-            # for each node i in the molecule,
-            # get the neighbor's atom label (number index)
-            for i in range(N):
-                expanded_label = wle_util.get_neighbor_representation(
-                    i, atom_array, neighbors, with_focus_atom)
-                mol_expanded_atom_list.append(expanded_label)
-                labels_frequencies[expanded_label] = labels_frequencies[expanded_label] + 1
-            # end i-for
-            set_expanded_atom_list.append(mol_expanded_atom_list)
-        # end zip(atom_arrays, adj_array)-for
-
-        expanded_atom_lists.append(set_expanded_atom_list)
-    # end zip(atom_arrays, adj_array)-for
-
-    # Convert to a normal dictionary because
-    # we cannot pickle defaultdicts with lambdas.
-    return expanded_atom_lists, dict(labels_frequencies)
+    expanded_ids, layout, expanded_labels = _relabel(
+            atom_arrays, adj_arrays, with_focus_atom)
+    counts = np.bincount(expanded_ids, minlength=len(expanded_labels))
+    labels_frequencies = dict(zip(expanded_labels, counts.tolist()))
+    expanded_atom_lists = [
+        [[expanded_labels[i] for i in mol_ids] for mol_ids in set_ids]
+        for set_ids in _split(expanded_ids.tolist(), layout)]
+    return expanded_atom_lists, labels_frequencies
@@ -7,6 +7,19 @@ from chainer_chemistry.datasets.numpy_tuple_dataset import NumpyTupleDataset
 DEBUG = False
 
 
+def _to_array(arrays):
+    """
+    Stack the arrays of molecules, or make the object array of them if
+    their shapes are different.
+    """
+    if len(set(np.shape(a) for a in arrays)) <= 1:
+        return np.array(arrays)
+    result = np.empty(len(arrays), dtype=object)
+    for i, array in enumerate(arrays):
+        result[i] = array
+    return result
+
+
 def create_datasets(atom_arrays, adj_arrays, teach_signals, wle_arrays=None):
     """
     Expand the atomic_num_arrays with the expanded labels,
@@ -35,19 +48,19 @@ def create_datasets(atom_arrays, adj_arrays, teach_signals, wle_arrays=None):
         assert len(atom_arrays) == len(wle_arrays)
     for i in range(len(atom_arrays)):
         # We have swaped the axes 0 and 1 for adj-arrays. re-swap
-        set_adj_arrays = np.array(adj_arrays[i])
+        set_adj_arrays = _to_array(adj_arrays[i])
         for m in range(len(set_adj_arrays)):
             set_adj_arrays[m] = np.swapaxes(set_adj_arrays[m], 0, 1)
 
         if wle_arrays is None:
-            dataset = NumpyTupleDataset(np.array(atom_arrays[i]),
+            dataset = NumpyTupleDataset(_to_array(atom_arrays[i]),
                                         set_adj_arrays,
-                                        np.array(teach_signals[i]))
+                                        _to_array(teach_signals[i]))
         else:
-            dataset = NumpyTupleDataset(np.array(atom_arrays[i]),
+            dataset = NumpyTupleDataset(_to_array(atom_arrays[i]),
                                         set_adj_arrays,
-                                        np.array(wle_arrays[i]),
-                                        np.array(teach_signals[i]))
+                                        _to_array(wle_arrays[i]),
+                                        _to_array(teach_signals[i]))
         output_datasets.append(dataset)
     # end expanded-for
 
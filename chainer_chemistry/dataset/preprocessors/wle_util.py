@@ -4,18 +4,47 @@ import numpy as np
 DEBUG = False
 
 
-def _index(atom, values):
-    idx = values.index(atom)
+def _index(atom, vocabulary):
+    try:
+        idx = vocabulary[atom]
+    except KeyError:
+        raise ValueError('{} is not in list'.format(atom))
     if DEBUG:
         print("idx=", idx)
         print("expanded_label=", atom)
     return idx
 
 
+def to_vocabulary(values):
+    """
+    Make the dict from each value to its index, for the first one if
+    duplicated, which is same as list.index.
+    """
+    vocabulary = {}
+    for idx, value in enumerate(values):
+        vocabulary.setdefault(value, idx)
+    return vocabulary
+
+
+def to_array_of_arrays(mols):
+    """
+    Make the array of int32 arrays of molecules. It is 2-dimensional array
+    if all molecules have the same number of atoms, otherwise object array.
+    """
+    arrays = [np.asarray(mol, dtype=np.int32) for mol in mols]
+    if len(set(len(a) for a in arrays)) <= 1:
+        return np.array(arrays)
+    result = np.empty(len(arrays), dtype=object)
+    for i, array in enumerate(arrays):
+        result[i] = array
+    return result
+
+
 def to_index(mols, values):
-    return np.array([np.array([_index(atom, values) for atom in mol],
-                              dtype=np.int32)
-                     for mol in mols])
+    if not isinstance(values, dict):
+        values = to_vocabulary(values)
+    return to_array_of_arrays([[_index(atom, values) for atom in mol]
+                               for mol in mols])
 
 
 def compress_relation_axis(adj_array):
@@ -0,0 +1,319 @@
+import os
+
+import numpy
+import six
+
+
+class RaggedArray(object):
+
+    """Array of variable-shape arrays stored in one flat buffer
+
+    It is the compact alternative of the object array of small arrays, e.g.
+    atom arrays and adjacency matrices of the molecules whose size is not
+    padded. The ``i``-th example is the ``values[offsets[i]:offsets[i + 1]]``
+    reshaped into ``shapes[i]``.
+
+    Indexing with an int returns the example as a numpy array (a view of
+    ``values``). Indexing with a slice, an index array or a boolean mask
+    returns another `RaggedArray`, so it can be used as a dataset of
+    `NumpyTupleDataset` like usual numpy arrays.
+
+    Args:
+        values (numpy.ndarray): 1-d array of the elements of all examples.
+        offsets (numpy.ndarray): 1-d int array of the length
+            ``len(shapes) + 1``, the position of each example in ``values``.
+        shapes (numpy.ndarray): 2-d int array whose ``i``-th row is the shape
+            of the ``i``-th example. All examples must have the same number
+            of dimensions.
+
+    .. admonition:: Example
+
+       >>> x = RaggedArray.from_list([numpy.array([1, 2]),
+       ...                            numpy.array([3, 4, 5])])
+       >>> x[1]
+       array([3, 4, 5])
+       >>> x.to_padded()
+       array([[1, 2, 0],
+              [3, 4, 5]])
+
+    """
+
+    def __init__(self, values, offsets, shapes):
+        values = numpy.asanyarray(values)
+        offsets = numpy.asarray(offsets, dtype=numpy.int64)
+        shapes = numpy.asarray(shapes, dtype=numpy.int64)
+        if values.ndim != 1:
+            raise ValueError('values must be 1-d array, got {}-d array'
+                             .format(values.ndim))
+        if shapes.ndim != 2:
+            raise ValueError('shapes must be 2-d array, got {}-d array'
+                             .format(shapes.ndim))
+        if offsets.shape != (len(shapes) + 1,):
+            raise ValueError('offsets must be 1-d array of the length {}, '
+                             'got shape {}'.format(len(shapes) + 1,
+                                                   offsets.shape))
+        self.values = values
+        self.offsets = offsets
+        self.shapes = shapes
+
+    @classmethod
+    def from_list(cls, arrays, dtype=None):
+        """Makes `RaggedArray` from the list of arrays
+
+        Args:
+            arrays (list): list of arrays or nested lists. All elements
+                must have the same number of dimensions.
+            dtype: dtype of the values. If `None`, the common dtype of all
+                elements is used.
+
+        Returns (RaggedArray): ragged array of the elements of `arrays`.
+
+        """
+        arrays = [numpy.asarray(a) for a in arrays]
+        if len(arrays) == 0:
+            ndim = 1
+        else:
+            ndim = arrays[0].ndim
+            if any(a.ndim != ndim for a in arrays):
+                raise ValueError('all arrays must have the same number of '
+                                 'dimensions')
+        if dtype is None:
+            dtype = numpy.result_type(*arrays) if arrays else numpy.float32
+        shapes = numpy.array([a.shape for a in arrays],
+                             dtype=numpy.int64).reshape(len(arrays), ndim)
+        sizes = numpy.array([a.size for a in arrays], dtype=numpy.int64)
+        offsets = numpy.zeros(len(arrays) + 1, dtype=numpy.int64)
+        numpy.cumsum(sizes, out=offsets[1:])
+        if arrays:
+            values = numpy.concatenate(
+                [a.ravel() for a in arrays]).astype(dtype, copy=False)
+        else:
+            values = numpy.empty(0, dtype=dtype)
+        return cls(values, offsets, shapes)
+
+    @classmethod
+    def concatenate(cls, arrays):
+        """Concatenates `RaggedArray` s along the example axis"""
+        arrays = list(arrays)
+        if len(arrays) == 1:
+            return arrays[0]
+        values = numpy.concatenate([a.values[a.offsets[0]:a.offsets[-1]]
+                                    for a in arrays])
+        shapes = numpy.concatenate([a.shapes for a in arrays])
+        sizes = numpy.concatenate([numpy.diff(a.offsets) for a in arrays])
+        offsets = numpy.zeros(len(sizes) + 1, dtype=numpy.int64)
+        numpy.cumsum(sizes, out=offsets[1:])
+        return cls(values, offsets, shapes)
+
+    def __len__(self):
+        return len(self.shapes)
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    @property
+    def ndim(self):
+        """Number of dimensions including the example axis"""
+        return self.shapes.shape[1] + 1
+
+    def __iter__(self):
+        for i in six.moves.range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                stop = max(start, stop)
+                begin = self.offsets[start]
+                return RaggedArray(
+                    self.values[begin:self.offsets[stop]],
+                    self.offsets[start:stop + 1] - begin,
+                    self.shapes[start:stop])
+            index = numpy.arange(start, stop, step)
+        if isinstance(index, (list, numpy.ndarray)):
+            return self._take(index)
+        length = len(self)
+        if index < 0:
+            index += length
+        if index < 0 or index >= length:
+            raise IndexError('index {} is out of bounds for axis 0 with size '
+                             '{}'.format(index, length))
+        return self.values[self.offsets[index]:self.offsets[index + 1]] \
+            .reshape(self.shapes[index])
+
+    def _take(self, indices):
+        indices = numpy.asarray(indices)
+        if indices.dtype == numpy.bool_:
+            if len(indices) != len(self):
+                raise ValueError('boolean index wrong length {} instead of '
+                                 '{}'.format(len(indices), len(self)))
+            indices = numpy.flatnonzero(indices)
+        indices = indices.astype(numpy.int64, copy=False)
+        indices = numpy.where(indices < 0, indices + len(self), indices)
+        if numpy.any((indices < 0) | (indices >= len(self))):
+            raise IndexError('index is out of bounds for axis 0 with size '
+                             '{}'.format(len(self)))
+        starts = self.offsets[indices]
+        sizes = self.offsets[indices + 1] - starts
+        offsets = numpy.zeros(len(indices) + 1, dtype=numpy.int64)
+        numpy.cumsum(sizes, out=offsets[1:])
+        # position in `values` of each element of the result
+        positions = numpy.arange(offsets[-1], dtype=numpy.int64) + \
+            numpy.repeat(starts - offsets[:-1], sizes)
+        return RaggedArray(self.values[positions], offsets,
+                           self.shapes[indices])
+
+    def to_list(self):
+        """Returns the list of the examples"""
+        return [self[i] for i in six.moves.range(len(self))]
+
+    def to_padded(self, padding=0):
+        """Returns the examples padded into one array
+
+        The result is the same with `concat_mols` of the examples, i.e. the
+        array of the minimum shape that can accommodate all examples.
+
+        Args:
+            padding: Scalar value for extra elements.
+
+        Returns (numpy.ndarray): padded array.
+
+        """
+        n = len(self)
+        max_shape = tuple(self.shapes.max(axis=0)) if n > 0 \
+            else (0,) * (self.ndim - 1)
+        result = numpy.full((n,) + max_shape, padding, dtype=self.dtype)
+        sizes = numpy.diff(self.offsets)
+        rows = numpy.repeat(numpy.arange(n), sizes)
+        # index of each element in its example, decomposed by the shape of
+        # the example it belongs to.
+        local = numpy.arange(self.offsets[0], self.offsets[-1],
+                             dtype=numpy.int64) - \
+            numpy.repeat(self.offsets[:-1], sizes)
+        element_shapes = self.shapes[rows]
+        coords = []
+        for d in six.moves.range(self.ndim - 2, -1, -1):
+            coords.append(local % element_shapes[:, d])
+            local = local // element_shapes[:, d]
+        index = (rows,) + tuple(reversed(coords))
+        result[index] = self.values[self.offsets[0]:self.offsets[-1]]
+        return result
+
+    def to_object_array(self):
+        """Returns the object array of the examples"""
+        result = numpy.empty(len(self), dtype=object)
+        for i in six.moves.range(len(self)):
+            result[i] = self[i]
+        return result
+
+    def __array__(self, dtype=None):
+        # numpy functions see `RaggedArray` as the object array, which is
+        # the representation used before `RaggedArray` is introduced.
+        result = self.to_object_array()
+        if dtype is not None:
+            result = result.astype(dtype)
+        return result
+
+    def __repr__(self):
+        return 'RaggedArray(len={}, dtype={}, ndim={})'.format(
+            len(self), self.dtype, self.ndim)
+
+    def to_dict(self, prefix):
+        """Returns the arrays to save `RaggedArray` with numpy
+
+        Args:
+            prefix (str): prefix of the keys.
+
+        Returns (dict): `{prefix + '_values': values, ...}`, which is
+            restored by `from_dict`.
+
+        """
+        # `values` of the sliced array may not start from 0.
+        begin = self.offsets[0]
+        return {prefix + '_values': self.values[begin:self.offsets[-1]],
+                prefix + '_offsets': self.offsets - begin,
+                prefix + '_shapes': self.shapes}
+
+    def save_npy(self, prefix):
+        """Saves the arrays to `.npy` files whose names start with `prefix`
+
+        `{prefix}_values.npy`, `{prefix}_offsets.npy` and
+        `{prefix}_shapes.npy` are written. Unlike the object array, they can
+        be loaded without pickle and memory-mapped by `load_npy`.
+
+        Args:
+            prefix (str): path prefix of the files.
+
+        """
+        for key, value in self.to_dict(prefix).items():
+            numpy.save(key + '.npy', value)
+
+    @classmethod
+    def load_npy(cls, prefix, mmap_mode=None):
+        """Loads `RaggedArray` saved by `save_npy`
+
+        Args:
+            prefix (str): path prefix of the files.
+            mmap_mode (str or None): `mmap_mode` passed to `numpy.load`.
+
+        Returns (RaggedArray or None): loaded array, `None` is returned when
+            the files do not exist.
+
+        """
+        if not os.path.exists(prefix + '_values.npy'):
+            return None
+        try:
+            values = numpy.load(prefix + '_values.npy', mmap_mode=mmap_mode)
+        except ValueError:
+            # empty array can't be memory-mapped.
+            values = numpy.load(prefix + '_values.npy')
+        # `offsets` and `shapes` are small, they are always loaded.
+        return cls(values, numpy.load(prefix + '_offsets.npy'),
+                   numpy.load(prefix + '_shapes.npy'))
+
+    @classmethod
+    def from_dict(cls, data, prefix):
+        """Restores `RaggedArray` saved by `to_dict`
+
+        Args:
+            data: dict-like object, e.g. `NpzFile`.
+            prefix (str): prefix of the keys.
+
+        Returns (RaggedArray or None): restored array, `None` is returned
+            when `data` does not contain the keys.
+
+        """
+        if prefix + '_values' not in data:
+            return None
+        return cls(data[prefix + '_values'], data[prefix + '_offsets'],
+                   data[prefix + '_shapes'])
+
+
+def to_feature_array(feature):
+    """Converts list of features of each example into numpy array
+
+    Features of different shapes, e.g. not padded atom arrays, are stored in
+    `RaggedArray`. Only when it is not possible, e.g. the features have
+    different number of dimensions, object array is made.
+
+    """
+    if isinstance(feature, (numpy.ndarray, RaggedArray)):
+        return feature
+    try:
+        return numpy.asarray(feature)
+    except ValueError:
+        pass
+    try:
+        feat_array = RaggedArray.from_list(feature)
+        if feat_array.dtype != object:
+            return feat_array
+    except ValueError:
+        pass
+    # Temporal work around.
+    # See,
+    # https://stackoverflow.com/questions/26885508/why-do-i-get-error-trying-to-cast-np-arraysome-list-valueerror-could-not-broa
+    feat_array = numpy.empty(len(feature), dtype=numpy.ndarray)
+    feat_array[:] = feature[:]
+    return feat_array
@@ -1,4 +1,5 @@
 from chainer_chemistry.datasets.numpy_tuple_dataset import NumpyTupleDataset
+from chainer_chemistry.datasets.numpy_tuple_dataset_view import NumpyTupleDatasetView  # NOQA
 
 
 def converter_default(dataset, indices):
@@ -9,8 +10,19 @@ def converter_numpy_tuple_dataset(dataset, indices):
     return NumpyTupleDataset(*dataset.features[indices])
 
 
+def converter_numpy_tuple_dataset_view(dataset, indices):
+    """Makes the subset which refers to `dataset` without copying features
+
+    It can be passed as `converter` of the splitters to get
+    `NumpyTupleDatasetView` instead of `NumpyTupleDataset`.
+
+    """
+    return NumpyTupleDatasetView(dataset, indices)
+
+
 converter_dict = {
-    NumpyTupleDataset: converter_numpy_tuple_dataset
+    NumpyTupleDataset: converter_numpy_tuple_dataset,
+    NumpyTupleDatasetView: converter_numpy_tuple_dataset
 }
 
 
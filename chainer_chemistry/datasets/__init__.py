@@ -6,8 +6,12 @@ from chainer_chemistry.datasets import zinc  # NOQA
 
 # import class and function
 from chainer_chemistry.datasets.numpy_tuple_dataset import NumpyTupleDataset  # NOQA
+from chainer_chemistry.datasets.numpy_tuple_dataset_view import NumpyTupleDatasetView  # NOQA
+from chainer_chemistry.datasets.sharded_numpy_tuple_dataset import ShardedNumpyTupleDataset  # NOQA
 from chainer_chemistry.datasets.qm9 import get_qm9  # NOQA
 from chainer_chemistry.datasets.qm9 import get_qm9_filepath  # NOQA
+from chainer_chemistry.datasets.qm9 import get_qm9_geometry_filepath  # NOQA
+from chainer_chemistry.datasets.qm9 import get_qm9_geometry_store  # NOQA
 from chainer_chemistry.datasets.qm9 import get_qm9_label_names  # NOQA
 from chainer_chemistry.datasets.tox21 import get_tox21  # NOQA
 from chainer_chemistry.datasets.tox21 import get_tox21_filepath  # NOQA
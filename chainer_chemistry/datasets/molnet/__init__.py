@@ -8,4 +8,5 @@ from chainer_chemistry.datasets.molnet.molnet import get_grid_featurized_pdbbind
 from chainer_chemistry.datasets.molnet.molnet import get_molnet_dataframe  # NOQA
 from chainer_chemistry.datasets.molnet.molnet import get_molnet_dataset  # NOQA
 from chainer_chemistry.datasets.molnet.molnet import get_molnet_filepath  # NOQA
+from chainer_chemistry.datasets.molnet.molnet import get_molnet_preprocessed_dirpath  # NOQA
 from chainer_chemistry.datasets.molnet.molnet_config import molnet_default_config  # NOQA
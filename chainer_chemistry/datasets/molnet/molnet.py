@@ -1,14 +1,19 @@
+import hashlib
 import joblib
+import json
 from logging import getLogger
 import os
 import shutil
 import tarfile
+import tempfile
 
 import numpy
 import pandas
 
 from chainer.dataset import download
 
+from chainer_chemistry.dataset.feature_cache import _to_config
+from chainer_chemistry.dataset.feature_cache import get_config_hash
 from chainer_chemistry.dataset.parsers.csv_file_parser import CSVFileParser
 from chainer_chemistry.dataset.preprocessors.atomic_number_preprocessor import AtomicNumberPreprocessor  # NOQA
 from chainer_chemistry.dataset.splitters.base_splitter import BaseSplitter
@@ -18,15 +23,19 @@ from chainer_chemistry.dataset.splitters import split_method_dict
 from chainer_chemistry.datasets.molnet.molnet_config import molnet_default_config  # NOQA
 from chainer_chemistry.datasets.molnet.pdbbind_time import get_pdbbind_time
 from chainer_chemistry.datasets.numpy_tuple_dataset import NumpyTupleDataset
+from chainer_chemistry.datasets.numpy_tuple_dataset_view import NumpyTupleDatasetView  # NOQA
 
 _root = 'pfnet/chainer/molnet'
+_split_names = ('train', 'valid', 'test')
+# options of the parser which do not change the parsed dataset
+_cache_ignored_kwargs = ('n_jobs', 'chunksize', 'work_dir', 'memmap_dir')
 
 
 def get_molnet_dataset(dataset_name, preprocessor=None, labels=None,
                        split=None, frac_train=.8, frac_valid=.1,
                        frac_test=.1, seed=777, return_smiles=False,
                        return_pdb_id=False, target_index=None, task_index=0,
-                       **kwargs):
+                       feature_cache=None, cache=False, **kwargs):
     """Downloads, caches and preprocess MoleculeNet dataset.
 
     Args:
@@ -53,10 +62,21 @@ def get_molnet_dataset(dataset_name, preprocessor=None, labels=None,
             dataset. If `None` (default), all examples are parsed.
         task_index (int): Target task index in dataset for stratification.
             (Stratified Splitter only)
+        feature_cache (FeatureCache or None): cache of input features passed
+            to the parser.
+        cache (bool): If ``True``, the parsed dataset, smiles and split
+            indices are stored under the chainer dataset directory, and they
+            are loaded with memory mapping instead of parsing the dataset
+            again when this function is called with the same dataset name,
+            labels, preprocessor configuration, `target_index` and split
+            settings. It is not used for 'pdbbind_smiles' and
+            'pdbbind_grid'.
     Returns (dict):
         Dictionary that contains dataset that is already split into train,
         valid and test dataset and 1-d numpy array with dtype=object(string)
         which is a vector of smiles for each example or `None`.
+        Each split dataset is `NumpyTupleDatasetView`, which refers to the
+        parsed dataset by indices without copying its features.
 
     """
     if dataset_name not in molnet_default_config:
@@ -90,6 +110,18 @@ def get_molnet_dataset(dataset_name, preprocessor=None, labels=None,
     if preprocessor is None:
         preprocessor = AtomicNumberPreprocessor()
 
+    if dataset_config['dataset_type'] == 'one_file_csv':
+        split = dataset_config['split'] if split is None else split
+    cache_dirpath = None
+    if cache and 'shard_dir' not in kwargs:
+        cache_dirpath = get_molnet_preprocessed_dirpath(
+            dataset_name, labels, preprocessor, target_index=target_index,
+            split=split, frac_train=frac_train, frac_valid=frac_valid,
+            frac_test=frac_test, task_index=task_index, **kwargs)
+        result = _load_preprocessed(cache_dirpath, return_smiles)
+        if result is not None:
+            return result
+
     if dataset_config['task_type'] == 'regression':
         def postprocess_label(label_list):
             return numpy.asarray(label_list, dtype=numpy.float32)
@@ -101,10 +133,9 @@ def get_molnet_dataset(dataset_name, preprocessor=None, labels=None,
 
     parser = CSVFileParser(preprocessor, labels=labels,
                            smiles_col=dataset_config['smiles_columns'],
-                           postprocess_label=postprocess_label)
+                           postprocess_label=postprocess_label,
+                           feature_cache=feature_cache)
     if dataset_config['dataset_type'] == 'one_file_csv':
-        split = dataset_config['split'] if split is None else split
-
         if isinstance(split, str):
             splitter = split_method_dict[split]()
         elif isinstance(split, BaseSplitter):
@@ -113,7 +144,8 @@ def get_molnet_dataset(dataset_name, preprocessor=None, labels=None,
             raise TypeError("split must be None, str or instance of"
                             " BaseSplitter, but got {}".format(type(split)))
 
-        if isinstance(splitter, (ScaffoldSplitter, DeepChemScaffoldSplitter)):
+        if isinstance(splitter, (ScaffoldSplitter, DeepChemScaffoldSplitter)) \
+                or cache_dirpath is not None:
             get_smiles = True
         else:
             get_smiles = return_smiles
@@ -129,9 +161,17 @@ def get_molnet_dataset(dataset_name, preprocessor=None, labels=None,
                                             frac_train=frac_train,
                                             frac_valid=frac_valid,
                                             frac_test=frac_test, **kwargs)
-        train = NumpyTupleDataset(*dataset.features[train_ind])
-        valid = NumpyTupleDataset(*dataset.features[valid_ind])
-        test = NumpyTupleDataset(*dataset.features[test_ind])
+        if cache_dirpath is not None:
+            arrays = {'smiles': smiles,
+                      'is_successful': result.get('is_successful'),
+                      'index_map': result.get('index_map')}
+            for name, ind in zip(_split_names,
+                                 (train_ind, valid_ind, test_ind)):
+                arrays['{}_indices'.format(name)] = numpy.asarray(ind)
+            _save_preprocessed(cache_dirpath, {'dataset': dataset}, arrays)
+        train = NumpyTupleDatasetView(dataset, train_ind)
+        valid = NumpyTupleDatasetView(dataset, valid_ind)
+        test = NumpyTupleDatasetView(dataset, test_ind)
 
         result['dataset'] = (train, valid, test)
         if return_smiles:
@@ -143,19 +183,31 @@ def get_molnet_dataset(dataset_name, preprocessor=None, labels=None,
             result['smiles'] = None
     elif dataset_config['dataset_type'] == 'separate_csv':
         result = {}
+        get_smiles = return_smiles or cache_dirpath is not None
         train_result = parser.parse(get_molnet_filepath(dataset_name, 'train'),
-                                    return_smiles=return_smiles,
+                                    return_smiles=get_smiles,
                                     target_index=target_index)
         valid_result = parser.parse(get_molnet_filepath(dataset_name, 'valid'),
-                                    return_smiles=return_smiles,
+                                    return_smiles=get_smiles,
                                     target_index=target_index)
         test_result = parser.parse(get_molnet_filepath(dataset_name, 'test'),
-                                   return_smiles=return_smiles,
+                                   return_smiles=get_smiles,
                                    target_index=target_index)
+        split_results = (train_result, valid_result, test_result)
+        if cache_dirpath is not None:
+            _save_preprocessed(
+                cache_dirpath,
+                {name: r['dataset']
+                 for name, r in zip(_split_names, split_results)},
+                {'{}_smiles'.format(name): r['smiles']
+                 for name, r in zip(_split_names, split_results)})
         result['dataset'] = (train_result['dataset'], valid_result['dataset'],
                              test_result['dataset'])
-        result['smiles'] = (train_result['smiles'], valid_result['smiles'],
-                            test_result['smiles'])
+        if return_smiles:
+            result['smiles'] = (train_result['smiles'],
+                                valid_result['smiles'], test_result['smiles'])
+        else:
+            result['smiles'] = (None, None, None)
     else:
         raise ValueError('dataset_type={} is not supported'
                          .format(dataset_config['dataset_type']))
@@ -163,6 +215,140 @@ def get_molnet_dataset(dataset_name, preprocessor=None, labels=None,
     return result
 
 
+def get_molnet_preprocessed_dirpath(dataset_name, labels, preprocessor,
+                                    target_index=None, split=None,
+                                    frac_train=.8, frac_valid=.1,
+                                    frac_test=.1, task_index=0, **kwargs):
+    """Construct a directory path which stores preprocessed dataset
+
+    The directory is used by `get_molnet_dataset` with ``cache=True``. Its
+    name contains the hash of the arguments which determine the dataset,
+    i.e. labels, the configuration of the preprocessor (see
+    `get_config_hash`), `target_index` and split settings.
+
+    Args:
+        dataset_name (str): MoleculeNet dataset name.
+        labels (list): List of target labels.
+        preprocessor (BasePreprocessor): Preprocessor.
+        target_index (list or None): target index list passed to the parser.
+        split (str or BaseSplitter or None): splitter or its name.
+        frac_train (float): fraction of train dataset.
+        frac_valid (float): fraction of validation dataset.
+        frac_test (float): fraction of test dataset.
+        task_index (int): Target task index for stratification.
+        kwargs: other keyword arguments of `get_molnet_dataset`.
+
+    Returns (str): directory path, it may not exist.
+
+    """
+    config = {'dataset_name': dataset_name,
+              'labels': _to_config(labels),
+              'preprocessor': get_config_hash(preprocessor),
+              'target_index': _to_config(target_index),
+              'split': _to_config(split),
+              'frac': [frac_train, frac_valid, frac_test],
+              'task_index': task_index,
+              'kwargs': _to_config({k: v for k, v in kwargs.items()
+                                    if k not in _cache_ignored_kwargs})}
+    data = json.dumps(config, sort_keys=True).encode('utf-8')
+    key = hashlib.sha1(data).hexdigest()
+    cache_root = download.get_dataset_directory(_root)
+    return os.path.join(cache_root, 'preprocessed',
+                        '{}_{}'.format(dataset_name, key))
+
+
+def _save_preprocessed(dirpath, datasets, arrays):
+    """Saves the datasets and arrays to `dirpath` directory
+
+    They are written in a temporary directory which is renamed to `dirpath`
+    at last, so that incomplete directory is never loaded.
+
+    Args:
+        dirpath (str): directory to save.
+        datasets (dict): `NumpyTupleDataset` s saved in 'npy' format.
+        arrays (dict): 1d arrays saved in `.npy` files. `None` is skipped.
+
+    """
+    logger = getLogger(__name__)
+    if not all(isinstance(d, NumpyTupleDataset) for d in datasets.values()):
+        logger.warning('dataset is not NumpyTupleDataset, it is not cached')
+        return
+    parent = os.path.dirname(dirpath)
+    if not os.path.exists(parent):
+        os.makedirs(parent)
+    tmp_dirpath = tempfile.mkdtemp(dir=parent)
+    try:
+        for name, dataset in datasets.items():
+            NumpyTupleDataset.save(os.path.join(tmp_dirpath, name), dataset,
+                                   format='npy')
+        for name, array in arrays.items():
+            if array is None:
+                continue
+            array = numpy.asarray(array)
+            if array.dtype == object:
+                # smiles are saved as unicode array to load without pickle
+                array = array.astype(str)
+            numpy.save(os.path.join(tmp_dirpath, name + '.npy'), array)
+        os.rename(tmp_dirpath, dirpath)
+    except OSError:
+        # another process may have saved the same dataset.
+        if not os.path.isdir(dirpath):
+            raise
+    finally:
+        if os.path.exists(tmp_dirpath):
+            shutil.rmtree(tmp_dirpath)
+    logger.info('Preprocessed dataset is saved to {}'.format(dirpath))
+
+
+def _load_preprocessed(dirpath, return_smiles):
+    """Loads the result of `get_molnet_dataset` saved by `_save_preprocessed`
+
+    Returns (dict or None): same with `get_molnet_dataset`, `None` is
+        returned when `dirpath` does not exist.
+
+    """
+    if not os.path.isdir(dirpath):
+        return None
+    getLogger(__name__).info('Loading preprocessed dataset from {}'
+                             .format(dirpath))
+
+    def load_array(name):
+        filepath = os.path.join(dirpath, name + '.npy')
+        if not os.path.exists(filepath):
+            return None
+        array = numpy.load(filepath)
+        if array.dtype.kind == 'U':
+            array = array.astype(object)
+        return array
+
+    result = {}
+    dataset_dirpath = os.path.join(dirpath, 'dataset')
+    if os.path.isdir(dataset_dirpath):
+        # one_file_csv: the whole dataset and split indices
+        dataset = NumpyTupleDataset.load(dataset_dirpath, mmap_mode='r')
+        indices = [load_array('{}_indices'.format(name))
+                   for name in _split_names]
+        result['dataset'] = tuple(NumpyTupleDatasetView(dataset, ind)
+                                  for ind in indices)
+        smiles = load_array('smiles')
+        if return_smiles:
+            result['smiles'] = tuple(smiles[ind] for ind in indices)
+        else:
+            result['smiles'] = None
+        result['is_successful'] = load_array('is_successful')
+        result['index_map'] = load_array('index_map')
+    else:
+        # separate_csv: each split dataset
+        result['dataset'] = tuple(
+            NumpyTupleDataset.load(os.path.join(dirpath, name),
+                                   mmap_mode='r')
+            for name in _split_names)
+        result['smiles'] = tuple(
+            load_array('{}_smiles'.format(name)) if return_smiles else None
+            for name in _split_names)
+    return result
+
+
 def get_molnet_dataframe(dataset_name, pdbbind_subset=None):
     """Downloads, caches and get the dataframe of MoleculeNet dataset.
 
@@ -358,9 +544,9 @@ def get_pdbbind_smiles(pdbbind_subset, preprocessor=None, labels=None,
                                         frac_train=frac_train,
                                         frac_valid=frac_valid,
                                         frac_test=frac_test, **kwargs)
-    train = NumpyTupleDataset(*dataset.features[train_ind])
-    valid = NumpyTupleDataset(*dataset.features[valid_ind])
-    test = NumpyTupleDataset(*dataset.features[test_ind])
+    train = NumpyTupleDatasetView(dataset, train_ind)
+    valid = NumpyTupleDatasetView(dataset, valid_ind)
+    test = NumpyTupleDatasetView(dataset, test_ind)
 
     result['dataset'] = (train, valid, test)
 
@@ -422,9 +608,9 @@ def get_pdbbind_grid(pdbbind_subset, split=None, frac_train=.8, frac_valid=.1,
                                         frac_train=frac_train,
                                         frac_valid=frac_valid,
                                         frac_test=frac_test, **kwargs)
-    train = NumpyTupleDataset(*dataset.features[train_ind])
-    valid = NumpyTupleDataset(*dataset.features[valid_ind])
-    test = NumpyTupleDataset(*dataset.features[test_ind])
+    train = NumpyTupleDatasetView(dataset, train_ind)
+    valid = NumpyTupleDatasetView(dataset, valid_ind)
+    test = NumpyTupleDatasetView(dataset, test_ind)
 
     result['dataset'] = (train, valid, test)
     result['smiles'] = None
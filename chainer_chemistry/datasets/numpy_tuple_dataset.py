@@ -1,10 +1,14 @@
+import io
+import json
 import os
 import six
 
 import numpy
 
+from chainer_chemistry.dataset.column_batch import ColumnBatch
 from chainer_chemistry.dataset.converters import concat_mols
 from chainer_chemistry.dataset.indexers.numpy_tuple_dataset_feature_indexer import NumpyTupleDatasetFeatureIndexer  # NOQA
+from chainer_chemistry.dataset.ragged_array import RaggedArray
 
 
 class NumpyTupleDataset(object):
@@ -13,7 +17,8 @@ class NumpyTupleDataset(object):
 
     It combines multiple datasets into one dataset. Each example is represented
     by a tuple whose ``i``-th item corresponds to the i-th dataset.
-    And each ``i``-th dataset is expected to be an instance of numpy.ndarray.
+    And each ``i``-th dataset is expected to be an instance of numpy.ndarray,
+    or `RaggedArray` for the features of different shapes.
 
     Args:
         datasets: Underlying datasets. The ``i``-th one is used for the
@@ -22,6 +27,9 @@ class NumpyTupleDataset(object):
 
     """
 
+    manifest_filename = 'manifest.json'
+    manifest_version = 1
+
     def __init__(self, *datasets):
         if not datasets:
             raise ValueError('no datasets are given')
@@ -33,6 +41,8 @@ class NumpyTupleDataset(object):
         self._datasets = datasets
         self._length = length
         self._features_indexer = NumpyTupleDatasetFeatureIndexer(self)
+        # `(dirpath, allow_pickle, mmap_mode)` when it is memory-mapped
+        self._mmap_source = None
 
     def __getitem__(self, index):
         batches = [dataset[index] for dataset in self._datasets]
@@ -46,6 +56,34 @@ class NumpyTupleDataset(object):
     def __len__(self):
         return self._length
 
+    def get_batch(self, indices):
+        """Extracts the examples of `indices` as one batch
+
+        Unlike ``dataset[indices]``, which makes a tuple for each example,
+        each feature of the batch is extracted by one fancy indexing.
+        The result can be converted by `concat_mols` without unpacking the
+        examples.
+
+        Args:
+            indices (slice, list or numpy.ndarray): indices of the examples.
+
+        Returns (ColumnBatch): batch of the examples.
+
+        """
+        if isinstance(indices, slice):
+            indices = numpy.arange(*indices.indices(self._length))
+        indices = numpy.asarray(indices)
+        if indices.dtype != numpy.bool_:
+            indices = indices.astype(numpy.int64, copy=False)
+        columns = []
+        for dataset in self._datasets:
+            if isinstance(dataset, (numpy.ndarray, RaggedArray)):
+                columns.append(dataset[indices])
+            else:
+                columns.append([dataset[i] for i in
+                                numpy.arange(self._length)[indices]])
+        return ColumnBatch(columns)
+
     def get_datasets(self):
         return self._datasets
 
@@ -74,26 +112,91 @@ class NumpyTupleDataset(object):
         """
         return self._features_indexer
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self._mmap_source is not None:
+            # Memory-mapped arrays are opened again by the process which
+            # unpickles the dataset, instead of copying their contents.
+            del state['_datasets']
+            del state['_features_indexer']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if '_datasets' not in state:
+            dirpath, allow_pickle, mmap_mode = self._mmap_source
+            self._datasets = self._load_dir(dirpath, allow_pickle, mmap_mode)
+            self._features_indexer = NumpyTupleDatasetFeatureIndexer(self)
+
     @classmethod
-    def save(cls, filepath, numpy_tuple_dataset):
-        """save the dataset to filepath in npz format
+    def save(cls, filepath, numpy_tuple_dataset, format='npz'):
+        """save the dataset to filepath
+
+        Two formats are supported.
+
+        - 'npz': all arrays are saved in one npz file.
+        - 'npy': `filepath` is a directory, each array is saved in its own
+          `.npy` file and `manifest.json` describes them. The dataset saved
+          in this format can be opened with memory mapping by `load`.
+
+        `RaggedArray` is saved as its values, offsets and shapes arrays, so
+        that it can be loaded without pickle.
 
         Args:
             filepath (str): filepath to save dataset. It is recommended to end
-                with '.npz' extension.
+                with '.npz' extension for 'npz' format.
             numpy_tuple_dataset (NumpyTupleDataset): dataset instance
+            format (str): 'npz' (default) or 'npy'.
 
         """
         if not isinstance(numpy_tuple_dataset, NumpyTupleDataset):
             raise TypeError('numpy_tuple_dataset is not instance of '
                             'NumpyTupleDataset, got {}'
                             .format(type(numpy_tuple_dataset)))
-        numpy.savez(filepath, *numpy_tuple_dataset._datasets)
+        if format == 'npy':
+            cls._save_dir(filepath, numpy_tuple_dataset._datasets)
+            return
+        elif format != 'npz':
+            raise ValueError("format must be 'npz' or 'npy', got {}"
+                             .format(format))
+        arrays = {}
+        for i, dataset in enumerate(numpy_tuple_dataset._datasets):
+            key = 'arr_{}'.format(i)
+            if isinstance(dataset, RaggedArray):
+                arrays.update(dataset.to_dict(key))
+            else:
+                arrays[key] = dataset
+        numpy.savez(filepath, **arrays)
 
     @classmethod
-    def load(cls, filepath, allow_pickle=True):
+    def load(cls, filepath, allow_pickle=True, mmap_mode=None):
+        """load the dataset saved by `save`
+
+        Args:
+            filepath (str): filepath of the dataset, npz file or the
+                directory saved in 'npy' format.
+            allow_pickle (bool): `allow_pickle` passed to `numpy.load`.
+                It is required to load object arrays.
+            mmap_mode (str or None): If specified and the dataset is saved
+                in 'npy' format, arrays are memory-mapped with this mode
+                (e.g. 'r'), so that loading is almost instant and the pages
+                are shared by the processes which load the same dataset.
+                Object arrays can not be memory-mapped, they are fully
+                loaded. It is ignored for npz file.
+
+        Returns (NumpyTupleDataset or None): loaded dataset, `None` is
+            returned when `filepath` does not exist.
+
+        """
         if not os.path.exists(filepath):
             return None
+        if os.path.isdir(filepath):
+            dataset = NumpyTupleDataset(
+                *cls._load_dir(filepath, allow_pickle, mmap_mode))
+            if mmap_mode is not None:
+                dataset._mmap_source = (os.path.abspath(filepath),
+                                        allow_pickle, mmap_mode)
+            return dataset
         load_data = numpy.load(filepath, allow_pickle=allow_pickle)
         result = []
         i = 0
@@ -103,5 +206,84 @@ class NumpyTupleDataset(object):
                 result.append(load_data[key])
                 i += 1
             else:
-                break
+                ragged_array = RaggedArray.from_dict(load_data, key)
+                if ragged_array is None:
+                    break
+                result.append(ragged_array)
+                i += 1
         return NumpyTupleDataset(*result)
+
+    @classmethod
+    def _save_dir(cls, dirpath, datasets):
+        """Saves each array of `datasets` to `.npy` files under `dirpath`"""
+        if not os.path.exists(dirpath):
+            os.makedirs(dirpath)
+        features = []
+        for i, dataset in enumerate(datasets):
+            key = 'arr_{}'.format(i)
+            prefix = os.path.join(dirpath, key)
+            if isinstance(dataset, RaggedArray):
+                dataset.save_npy(prefix)
+                kind = 'ragged'
+                shape = [len(dataset)]
+            else:
+                dataset = numpy.asarray(dataset)
+                numpy.save(prefix + '.npy', dataset)
+                kind = 'ndarray'
+                shape = list(dataset.shape)
+            features.append({'key': key, 'type': kind,
+                             'dtype': str(dataset.dtype), 'shape': shape})
+        manifest = {'format': 'NumpyTupleDataset',
+                    'version': cls.manifest_version,
+                    'length': len(datasets[0]) if datasets else 0,
+                    'features': features}
+        # manifest is written at last, the directory without it is regarded
+        # as incomplete.
+        with io.open(os.path.join(dirpath, cls.manifest_filename), 'w',
+                     encoding='utf-8') as f:
+            f.write(six.text_type(json.dumps(manifest, indent=2)))
+
+    @classmethod
+    def _load_dir(cls, dirpath, allow_pickle=True, mmap_mode=None):
+        """Loads arrays saved by `_save_dir`
+
+        The directory without the manifest, e.g. made by `FeatureCollector`,
+        is also loaded by searching `arr_{i}` files.
+
+        """
+        manifest_path = os.path.join(dirpath, cls.manifest_filename)
+        if os.path.exists(manifest_path):
+            with io.open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version', 0) > cls.manifest_version:
+                raise ValueError('{} is saved by newer version of '
+                                 'NumpyTupleDataset'.format(dirpath))
+            features = [(feature['key'], feature['type'])
+                        for feature in manifest['features']]
+        else:
+            features = []
+            while True:
+                key = 'arr_{}'.format(len(features))
+                prefix = os.path.join(dirpath, key)
+                if os.path.exists(prefix + '.npy'):
+                    features.append((key, 'ndarray'))
+                elif os.path.exists(prefix + '_values.npy'):
+                    features.append((key, 'ragged'))
+                else:
+                    break
+
+        result = []
+        for key, kind in features:
+            prefix = os.path.join(dirpath, key)
+            if kind == 'ragged':
+                result.append(RaggedArray.load_npy(prefix,
+                                                   mmap_mode=mmap_mode))
+                continue
+            try:
+                result.append(numpy.load(prefix + '.npy',
+                                         mmap_mode=mmap_mode))
+            except ValueError:
+                # object array and empty array can't be memory-mapped.
+                result.append(numpy.load(prefix + '.npy',
+                                         allow_pickle=allow_pickle))
+        return result
@@ -0,0 +1,99 @@
+import numpy
+
+from chainer_chemistry.dataset.indexers.numpy_tuple_dataset_view_feature_indexer import NumpyTupleDatasetViewFeatureIndexer  # NOQA
+from chainer_chemistry.datasets.numpy_tuple_dataset import NumpyTupleDataset
+
+
+class NumpyTupleDatasetView(NumpyTupleDataset):
+
+    """Subset of a dataset which refers to the examples by indices
+
+    It keeps only the base dataset and the index array, instead of copying
+    the features of the subset, e.g. train, valid and test datasets split
+    from one dataset. The features are extracted from the base dataset by
+    fancy indexing when they are accessed.
+
+    It can be used as `NumpyTupleDataset`. The features of the subset are
+    copied only when they are required as a whole, e.g. by `get_datasets`
+    or `NumpyTupleDataset.save`, and they are kept after that.
+
+    Args:
+        dataset (NumpyTupleDataset or ShardedNumpyTupleDataset): base
+            dataset. When it is also `NumpyTupleDatasetView`, the new view
+            refers to its base dataset directly.
+        indices (list or numpy.ndarray): indices of the examples in
+            `dataset`, or a boolean mask of them.
+
+    """
+
+    def __init__(self, dataset, indices):
+        indices = numpy.asarray(indices)
+        if indices.dtype == numpy.bool_:
+            if len(indices) != len(dataset):
+                raise ValueError('boolean index wrong length {} instead of '
+                                 '{}'.format(len(indices), len(dataset)))
+            indices = numpy.flatnonzero(indices)
+        if indices.ndim != 1:
+            raise ValueError('indices must be 1-d array, got {}-d array'
+                             .format(indices.ndim))
+        indices = indices.astype(numpy.int64)
+        indices[indices < 0] += len(dataset)
+        if numpy.any((indices < 0) | (indices >= len(dataset))):
+            raise IndexError('index is out of bounds for dataset with size '
+                             '{}'.format(len(dataset)))
+        if isinstance(dataset, NumpyTupleDatasetView):
+            indices = dataset.get_indices()[indices]
+            dataset = dataset.get_base_dataset()
+        self._base = dataset
+        self._indices = indices
+        self._length = len(indices)
+        self._materialized = None
+        self._mmap_source = None
+        self._features_indexer = NumpyTupleDatasetViewFeatureIndexer(self)
+
+    def __getitem__(self, index):
+        return self._base[self._indices[index]]
+
+    def get_batch(self, indices):
+        """Extracts the examples of `indices` from the base dataset at once
+
+        Args:
+            indices (slice, list or numpy.ndarray): indices of the examples.
+
+        Returns (ColumnBatch): batch of the examples.
+
+        """
+        if isinstance(indices, slice):
+            indices = numpy.arange(*indices.indices(self._length))
+        indices = numpy.asarray(indices)
+        if indices.dtype != numpy.bool_:
+            indices = indices.astype(numpy.int64, copy=False)
+        return self._base.get_batch(self._indices[indices])
+
+    @property
+    def _datasets(self):
+        if self._materialized is None:
+            self._materialized = tuple([
+                self._features_indexer[:, j] for j in
+                range(self._features_indexer.features_length())])
+        return self._materialized
+
+    def get_base_dataset(self):
+        return self._base
+
+    def get_indices(self):
+        return self._indices
+
+    def to_numpy_tuple_dataset(self):
+        """Copies the features of the subset into `NumpyTupleDataset`
+
+        Returns (NumpyTupleDataset): dataset of the same examples.
+
+        """
+        return NumpyTupleDataset(*self._datasets)
+
+    def __getstate__(self):
+        return self.__dict__.copy()
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
@@ -1,20 +1,23 @@
-import glob
 from logging import getLogger
 import os
-import shutil
 import tarfile
-import tempfile
 
 from chainer.dataset import download
+import joblib
 import numpy
 import pandas
+from rdkit import Chem
 from tqdm import tqdm
 
+from chainer_chemistry.dataset.geometry_store import GeometryStore
+from chainer_chemistry.dataset.geometry_store import get_geometry_key
 from chainer_chemistry.dataset.parsers.csv_file_parser import CSVFileParser
 from chainer_chemistry.dataset.preprocessors.atomic_number_preprocessor import AtomicNumberPreprocessor  # NOQA
+from chainer_chemistry.dataset.ragged_array import RaggedArray
 
 download_url = 'https://ndownloader.figshare.com/files/3195389'
 file_name = 'qm9.csv'
+geometry_file_name = 'qm9_geometry.npz'
 
 _root = 'pfnet/chainer/qm9'
 
@@ -29,7 +32,7 @@ def get_qm9_label_names():
 
 
 def get_qm9(preprocessor=None, labels=None, return_smiles=False,
-            target_index=None):
+            target_index=None, feature_cache=None):
     """Downloads, caches and preprocesses QM9 dataset.
 
     Args:
@@ -41,6 +44,8 @@ def get_qm9(preprocessor=None, labels=None, return_smiles=False,
             smiles array is also returned.
         target_index (list or None): target index list to partially extract
             dataset. If None (default), all examples are parsed.
+        feature_cache (FeatureCache or None): cache of input features passed
+            to the parser.
 
     Returns:
         dataset, which is composed of `features`, which depends on
@@ -58,7 +63,8 @@ def get_qm9(preprocessor=None, labels=None, return_smiles=False,
     if preprocessor is None:
         preprocessor = AtomicNumberPreprocessor()
     parser = CSVFileParser(preprocessor, postprocess_label=postprocess_label,
-                           labels=labels, smiles_col='SMILES1')
+                           labels=labels, smiles_col='SMILES1',
+                           feature_cache=feature_cache)
     result = parser.parse(get_qm9_filepath(), return_smiles=return_smiles,
                           target_index=target_index)
 
@@ -68,7 +74,7 @@ def get_qm9(preprocessor=None, labels=None, return_smiles=False,
         return result['dataset']
 
 
-def get_qm9_filepath(download_if_not_exist=True):
+def get_qm9_filepath(download_if_not_exist=True, n_jobs=-1):
     """Construct a filepath which stores qm9 dataset for config_name
 
     This method check whether the file exist or not,  and downloaded it if
@@ -77,6 +83,8 @@ def get_qm9_filepath(download_if_not_exist=True):
     Args:
         download_if_not_exist (bool): If `True` download dataset
             if it is not downloaded yet.
+        n_jobs (int): Number of worker processes used to parse the files
+            of the dataset.
 
     Returns (str): file path for qm9 dataset (formatted to csv)
 
@@ -84,7 +92,8 @@ def get_qm9_filepath(download_if_not_exist=True):
     cache_path = _get_qm9_filepath()
     if not os.path.exists(cache_path):
         if download_if_not_exist:
-            is_successful = download_and_extract_qm9(save_filepath=cache_path)
+            is_successful = download_and_extract_qm9(
+                save_filepath=cache_path, n_jobs=n_jobs)
             if not is_successful:
                 logger = getLogger(__name__)
                 logger.warning('Download failed.')
@@ -104,29 +113,151 @@ def _get_qm9_filepath():
     return cache_path
 
 
-def download_and_extract_qm9(save_filepath):
+def get_qm9_geometry_filepath(download_if_not_exist=True, n_jobs=-1):
+    """Construct a filepath of the columnar cache of qm9 dataset
+
+    The cache is `.npz` file which holds the properties, the smiles and the
+    DFT optimized geometry of the molecules. It is made together with the
+    csv file by `download_and_extract_qm9`.
+
+    Args:
+        download_if_not_exist (bool): If `True` download dataset
+            if it is not downloaded yet.
+        n_jobs (int): Number of worker processes used to parse the files
+            of the dataset.
+
+    Returns (str): file path of the cache.
+
+    """
+    cache_path = _get_qm9_geometry_filepath()
+    if not os.path.exists(cache_path):
+        if download_if_not_exist:
+            is_successful = download_and_extract_qm9(
+                save_filepath=_get_qm9_filepath(), n_jobs=n_jobs)
+            if not is_successful:
+                logger = getLogger(__name__)
+                logger.warning('Download failed.')
+    return cache_path
+
+
+def _get_qm9_geometry_filepath():
+    cache_root = download.get_dataset_directory(_root)
+    return os.path.join(cache_root, geometry_file_name)
+
+
+def get_qm9_geometry_store(download_if_not_exist=True, n_jobs=-1):
+    """Returns the DFT optimized geometries of QM9 dataset
+
+    The returned store can be passed to distance based preprocessors, e.g.
+    `SchNetPreprocessor(geometry_store=get_qm9_geometry_store())`, so that
+    they use the geometries instead of generating conformers.
+
+    Args:
+        download_if_not_exist (bool): If `True` download dataset
+            if it is not downloaded yet.
+        n_jobs (int): Number of worker processes used to parse the files
+            of the dataset.
+
+    Returns (GeometryStore): geometries of the molecules.
+
+    """
+    return GeometryStore.load(get_qm9_geometry_filepath(
+        download_if_not_exist=download_if_not_exist, n_jobs=n_jobs))
+
+
+def _parse_xyz(text):
+    """Parses the content of `.xyz` file of QM9 dataset
+
+    Returns (tuple): `(smiles, properties, atomic_numbers, coordinates)`,
+        where `smiles` is the list of two smiles in the file.
+
+    """
+    data = [line.strip() for line in text.splitlines()]
+    num_atom = int(data[0])
+    properties = list(map(float, data[1].split('\t')[1:]))
+    table = Chem.GetPeriodicTable()
+    atomic_numbers = numpy.empty(num_atom, dtype=numpy.int32)
+    coordinates = numpy.empty((num_atom, 3), dtype=numpy.float32)
+    for i, line in enumerate(data[2:2 + num_atom]):
+        values = line.split()
+        atomic_numbers[i] = table.GetAtomicNumber(values[0])
+        # some values are written in the format like `1.2*^-6`.
+        coordinates[i] = [float(v.replace('*^', 'e')) for v in values[1:4]]
+    smiles = data[3 + num_atom].split('\t')
+    return smiles, properties, atomic_numbers, coordinates
+
+
+def _parse_xyz_chunk(chunk):
+    results = []
+    for name, content in chunk:
+        smiles, properties, atomic_numbers, coordinates = _parse_xyz(
+            content.decode('utf-8'))
+        mol = Chem.MolFromSmiles(smiles[0])
+        key = '' if mol is None else get_geometry_key(mol)
+        results.append((name, smiles, properties, key, atomic_numbers,
+                        coordinates))
+    return results
+
+
+def _iter_xyz_chunks(tf, chunksize):
+    """Reads `.xyz` files in the tar file as a stream, `chunksize` at once"""
+    chunk = []
+    for member in tf:
+        if not member.isfile() or not member.name.endswith('.xyz'):
+            continue
+        chunk.append((os.path.basename(member.name),
+                      tf.extractfile(member).read()))
+        if len(chunk) == chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def download_and_extract_qm9(save_filepath, n_jobs=-1, chunksize=1000):
+    """Downloads QM9 dataset and converts it into csv and columnar cache
+
+    Files in the downloaded tar file are read as a stream and parsed by
+    `n_jobs` worker processes, without extracting them into a disk. The
+    csv file is saved to `save_filepath`, and the `.npz` cache returned by
+    `get_qm9_geometry_filepath`, which also holds the geometries of the
+    molecules, is saved in the same directory.
+
+    Args:
+        save_filepath (str): file path of the csv file.
+        n_jobs (int): Number of worker processes. Negative values follow
+            the `joblib` convention, e.g. -1 uses all CPUs.
+        chunksize (int): Number of files parsed by a worker at once.
+
+    Returns (bool): `True` when the dataset is saved.
+
+    """
     logger = getLogger(__name__)
     logger.warning('Extracting QM9 dataset, it takes time...')
     download_file_path = download.cached_download(download_url)
-    tf = tarfile.open(download_file_path, 'r')
-    temp_dir = tempfile.mkdtemp()
-    tf.extractall(temp_dir)
-    file_re = os.path.join(temp_dir, '*.xyz')
-    file_pathes = glob.glob(file_re)
+    with tarfile.open(download_file_path, 'r|*') as tf:
+        chunk_results = joblib.Parallel(n_jobs=n_jobs)(
+            joblib.delayed(_parse_xyz_chunk)(chunk)
+            for chunk in tqdm(_iter_xyz_chunks(tf, chunksize)))
+    results = [r for chunk_result in chunk_results for r in chunk_result]
     # Make sure the order is sorted
-    file_pathes.sort()
-    ls = []
-    for path in tqdm(file_pathes):
-        with open(path, 'r') as f:
-            data = [line.strip() for line in f]
-
-        num_atom = int(data[0])
-        properties = list(map(float, data[1].split('\t')[1:]))
-        smiles = data[3 + num_atom].split('\t')
-        new_ls = smiles + properties
-        ls.append(new_ls)
+    results.sort(key=lambda r: r[0])
 
+    ls = [smiles + properties for _, smiles, properties, _, _, _ in results]
     df = pandas.DataFrame(ls, columns=_smiles_column_names + _label_names)
     df.to_csv(save_filepath)
-    shutil.rmtree(temp_dir)
+
+    store = GeometryStore([r[3] for r in results],
+                          RaggedArray.from_list([r[4] for r in results],
+                                                dtype=numpy.int32),
+                          RaggedArray.from_list([r[5] for r in results],
+                                                dtype=numpy.float32))
+    data = store.to_dict()
+    data['smiles1'] = df['SMILES1'].values.astype(str)
+    data['smiles2'] = df['SMILES2'].values.astype(str)
+    data['labels'] = df[_label_names].values.astype(numpy.float64)
+    data['label_names'] = numpy.asarray(_label_names)
+    geometry_filepath = os.path.join(os.path.dirname(save_filepath),
+                                     geometry_file_name)
+    numpy.savez(geometry_filepath, **data)
     return True
@@ -0,0 +1,197 @@
+import glob
+import os
+
+import numpy
+import six
+
+from chainer_chemistry.dataset.column_batch import ColumnBatch
+from chainer_chemistry.dataset.converters import concat_mols
+from chainer_chemistry.dataset.indexers.sharded_numpy_tuple_dataset_feature_indexer import ShardedNumpyTupleDatasetFeatureIndexer  # NOQA
+from chainer_chemistry.datasets.numpy_tuple_dataset import NumpyTupleDataset
+
+
+class ShardedNumpyTupleDataset(object):
+
+    """Dataset which combines several `NumpyTupleDataset` shards as one.
+
+    Each shard is typically stored in its own directory by
+    :meth:`save_shard` and opened with memory mapping by :meth:`load`,
+    so that only the pages accessed are read into memory.
+
+    Args:
+        shards (list): list of `NumpyTupleDataset`. All shards must have the
+            same number of features.
+
+    """
+
+    def __init__(self, shards):
+        if not shards:
+            raise ValueError('no shards are given')
+        num_features = len(shards[0].get_datasets())
+        for i, shard in enumerate(shards):
+            if len(shard.get_datasets()) != num_features:
+                raise ValueError(
+                    'shard of the index {} has a wrong number of features'
+                    .format(i))
+        self._shards = shards
+        self._num_features = num_features
+        # `_offsets[i]` is the global index of the first example of i-th shard
+        self._offsets = numpy.cumsum(
+            [0] + [len(shard) for shard in shards])
+        self._length = int(self._offsets[-1])
+        self._features_indexer = ShardedNumpyTupleDatasetFeatureIndexer(self)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            current, stop, step = index.indices(self._length)
+            index = numpy.arange(current, stop, step)
+        if isinstance(index, (list, numpy.ndarray)):
+            return [self._get_example(i) for i in index]
+        else:
+            return self._get_example(index)
+
+    def _get_example(self, index):
+        shard_index, local_index = self.locate(index)
+        return self._shards[shard_index][local_index]
+
+    def __len__(self):
+        return self._length
+
+    def locate(self, index):
+        """Returns the shard and the local index of the `index`-th example
+
+        Args:
+            index (int): global index of the example.
+
+        Returns (tuple): `(shard_index, local_index)`
+
+        """
+        if index < 0:
+            index += self._length
+        if index < 0 or index >= self._length:
+            raise IndexError('index {} is out of bounds for dataset with '
+                             'size {}'.format(index, self._length))
+        shard_index = int(numpy.searchsorted(
+            self._offsets, index, side='right')) - 1
+        return shard_index, int(index - self._offsets[shard_index])
+
+    def locate_indices(self, indices):
+        """Vectorized version of `locate`
+
+        Args:
+            indices (numpy.ndarray): 1d array of global indices.
+
+        Returns (tuple): `(shard_indices, local_indices)`, both are 1d arrays.
+
+        """
+        indices = numpy.asarray(indices, dtype=numpy.int64)
+        indices = numpy.where(indices < 0, indices + self._length, indices)
+        if numpy.any((indices < 0) | (indices >= self._length)):
+            raise IndexError('index is out of bounds for dataset with size '
+                             '{}'.format(self._length))
+        shard_indices = numpy.searchsorted(
+            self._offsets, indices, side='right') - 1
+        return shard_indices, indices - self._offsets[shard_indices]
+
+    def get_batch(self, indices):
+        """Extracts the examples of `indices` as one batch
+
+        Its usage is same with `NumpyTupleDataset.get_batch`. Each feature is
+        gathered from the shards by fancy indexing.
+
+        Args:
+            indices (slice, list or numpy.ndarray): indices of the examples.
+
+        Returns (ColumnBatch): batch of the examples.
+
+        """
+        if isinstance(indices, slice):
+            indices = numpy.arange(*indices.indices(self._length))
+        indices = numpy.asarray(indices)
+        if indices.dtype != numpy.bool_:
+            indices = indices.astype(numpy.int64, copy=False)
+        return ColumnBatch([self.features[indices, j]
+                            for j in six.moves.range(self._num_features)])
+
+    def get_shards(self):
+        return self._shards
+
+    @property
+    def num_features(self):
+        return self._num_features
+
+    @property
+    def converter(self):
+        return concat_mols
+
+    @property
+    def features(self):
+        """Extract features according to the specified index.
+
+        Its usage is same with `NumpyTupleDataset.features`.
+
+        """
+        return self._features_indexer
+
+    @staticmethod
+    def save_shard(dirpath, datasets):
+        """Save one shard, i.e. tuple of feature arrays, to `dirpath`
+
+        The shard is saved in 'npy' format of `NumpyTupleDataset.save`, each
+        feature array is saved in a separate `.npy` file so that it can be
+        opened with memory mapping.
+
+        Args:
+            dirpath (str): directory path to save the shard.
+            datasets (tuple): tuple of numpy.ndarray or `RaggedArray`,
+                features of the shard.
+
+        """
+        NumpyTupleDataset._save_dir(dirpath, datasets)
+
+    @staticmethod
+    def load_shard(dirpath, mmap_mode='r'):
+        """Load one shard saved by `save_shard`
+
+        Arrays of `object` dtype cannot be memory-mapped, they are fully
+        loaded into memory instead.
+
+        Args:
+            dirpath (str): directory path of the shard.
+            mmap_mode (str or None): `mmap_mode` passed to `numpy.load`.
+
+        Returns (NumpyTupleDataset): shard dataset.
+
+        """
+        return NumpyTupleDataset.load(dirpath, mmap_mode=mmap_mode)
+
+    @classmethod
+    def load(cls, dirpath, mmap_mode='r'):
+        """Load the dataset whose shards are stored under `dirpath`
+
+        Shards are the sub directories of `dirpath`, they are combined in the
+        order of the directory names (numbered names are sorted numerically).
+
+        Args:
+            dirpath (str): directory path which contains shard directories.
+            mmap_mode (str or None): `mmap_mode` passed to `numpy.load`.
+
+        Returns (ShardedNumpyTupleDataset or None): loaded dataset, `None` is
+            returned when `dirpath` contains no shard.
+
+        """
+        shard_dirs = sorted(
+            (d for d in glob.glob(os.path.join(dirpath, '*'))
+             if os.path.isdir(d)),
+            key=lambda d: (len(d), d))
+        if len(shard_dirs) == 0:
+            return None
+        return cls([cls.load_shard(d, mmap_mode=mmap_mode)
+                    for d in shard_dirs])
+
+    def to_numpy_tuple_dataset(self):
+        """Concatenates all shards into one `NumpyTupleDataset` in memory"""
+        datasets = []
+        for j in six.moves.range(self._num_features):
+            datasets.append(self.features[:, j])
+        return NumpyTupleDataset(*datasets)
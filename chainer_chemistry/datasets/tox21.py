@@ -42,7 +42,7 @@ def get_tox21_label_names():
 
 def get_tox21(preprocessor=None, labels=None, return_smiles=False,
               train_target_index=None, val_target_index=None,
-              test_target_index=None):
+              test_target_index=None, feature_cache=None):
     """Downloads, caches and preprocesses Tox21 dataset.
 
     Args:
@@ -57,6 +57,8 @@ def get_tox21(preprocessor=None, labels=None, return_smiles=False,
             extract val dataset. If None (default), all examples are parsed.
         test_target_index (list or None): target index list to partially
             extract test dataset. If None (default), all examples are parsed.
+        feature_cache (FeatureCache or None): cache of input features passed
+            to the parser.
 
     Returns:
         The 3-tuple consisting of train, validation and test
@@ -78,7 +80,7 @@ def get_tox21(preprocessor=None, labels=None, return_smiles=False,
         preprocessor = AtomicNumberPreprocessor()
     parser = SDFFileParser(preprocessor,
                            postprocess_label=postprocess_label,
-                           labels=labels)
+                           labels=labels, feature_cache=feature_cache)
 
     train_result = parser.parse(
         get_tox21_filepath('train'), return_smiles=return_smiles,
@@ -23,7 +23,7 @@ def get_zinc250k_label_names():
 
 
 def get_zinc250k(preprocessor=None, labels=None, return_smiles=False,
-                 target_index=None):
+                 target_index=None, feature_cache=None):
     """Downloads, caches and preprocesses Zinc 250K dataset.
 
     Args:
@@ -35,6 +35,8 @@ def get_zinc250k(preprocessor=None, labels=None, return_smiles=False,
             smiles array is also returned.
         target_index (list or None): target index list to partially extract
             dataset. If None (default), all examples are parsed.
+        feature_cache (FeatureCache or None): cache of input features passed
+            to the parser.
 
     Returns:
         dataset, which is composed of `features`, which depends on
@@ -52,7 +54,8 @@ def get_zinc250k(preprocessor=None, labels=None, return_smiles=False,
     if preprocessor is None:
         preprocessor = AtomicNumberPreprocessor()
     parser = CSVFileParser(preprocessor, postprocess_label=postprocess_label,
-                           labels=labels, smiles_col='smiles')
+                           labels=labels, smiles_col='smiles',
+                           feature_cache=feature_cache)
     result = parser.parse(get_zinc250k_filepath(), return_smiles=return_smiles,
                           target_index=target_index)
 
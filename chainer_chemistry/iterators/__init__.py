@@ -1,2 +1,9 @@
 from chainer_chemistry.iterators.balanced_serial_iterator import BalancedSerialIterator  # NOQA
+from chainer_chemistry.iterators.bucket_iterator import BucketIterator  # NOQA
+from chainer_chemistry.iterators.bucket_iterator import BucketOrderSampler  # NOQA
+from chainer_chemistry.iterators.dynamic_batch_iterator import DynamicBatchIterator  # NOQA
+from chainer_chemistry.iterators.example_sizes import get_example_sizes  # NOQA
 from chainer_chemistry.iterators.index_iterator import IndexIterator  # NOQA
+from chainer_chemistry.iterators.prefetch_iterator import prefetched  # NOQA
+from chainer_chemistry.iterators.prefetch_iterator import PrefetchIterator  # NOQA
+from chainer_chemistry.iterators.serial_iterator import SerialIterator  # NOQA
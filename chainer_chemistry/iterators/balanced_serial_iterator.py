@@ -6,6 +6,7 @@ from chainer.dataset import iterator
 import numpy
 
 from chainer_chemistry.iterators.index_iterator import IndexIterator
+from chainer_chemistry.iterators.serial_iterator import fetch_batch
 
 
 class BalancedSerialIterator(iterator.Iterator):
@@ -84,15 +85,15 @@ class BalancedSerialIterator(iterator.Iterator):
         i_end = i + self.batch_size
         N = self.N_augmented
 
-        batch = [self.dataset[index] for index in self._order[i:i_end]]
+        indices = self._order[i:i_end]
 
         if i_end >= N:
             if self._repeat:
                 rest = i_end - N
                 self._update_order()
                 if rest > 0:
-                    batch.extend([self.dataset[index]
-                                  for index in self._order[:rest]])
+                    indices = numpy.concatenate(
+                        [indices, self._order[:rest]])
                 self.current_position = rest
             else:
                 self.current_position = 0
@@ -103,7 +104,7 @@ class BalancedSerialIterator(iterator.Iterator):
             self.is_new_epoch = False
             self.current_position = i_end
 
-        return batch
+        return fetch_batch(self.dataset, indices)
 
     next = __next__
 
@@ -0,0 +1,117 @@
+from chainer.iterators import order_samplers
+import numpy
+
+from chainer_chemistry.iterators.example_sizes import get_example_sizes
+from chainer_chemistry.iterators.serial_iterator import SerialIterator
+
+
+class BucketOrderSampler(order_samplers.OrderSampler):
+
+    """Sampler that generates orders whose batches have similar sizes
+
+    Examples are grouped into the buckets of the sizes
+    ``[0, bucket_width)``, ``[bucket_width, 2 * bucket_width)``, ... and
+    shuffled in each bucket. The buckets are concatenated in the order of the
+    sizes and split into the batches, so all batches but the last one are
+    full, and a batch spans several buckets only at their boundaries. The
+    full batches are shuffled, and the last one is kept at the end of the
+    order.
+
+    Args:
+        sizes (numpy.ndarray): 1d array of the sizes of the examples.
+        batch_size (int): Number of examples within each batch.
+        bucket_width (int): Range of the sizes in each bucket. Larger value
+            makes the batches more random and the padding larger.
+        shuffle (bool): If ``False``, the examples are sorted by their sizes
+            and the order is same in every epoch.
+        random_state (numpy.random.RandomState): Pseudo-random number
+            generator.
+
+    """
+
+    def __init__(self, sizes, batch_size, bucket_width=1, shuffle=True,
+                 random_state=None):
+        sizes = numpy.asarray(sizes)
+        if sizes.ndim != 1:
+            raise ValueError('sizes must be 1d array, got the shape {}'
+                             .format(sizes.shape))
+        if batch_size <= 0:
+            raise ValueError('batch_size must be positive, got {}'
+                             .format(batch_size))
+        if bucket_width <= 0:
+            raise ValueError('bucket_width must be positive, got {}'
+                             .format(bucket_width))
+        if random_state is None:
+            random_state = numpy.random.random.__self__
+        self.sizes = sizes
+        self.batch_size = batch_size
+        self.bucket_width = bucket_width
+        self.shuffle = shuffle
+        self._random = random_state
+        self._buckets = sizes // bucket_width
+
+    def __call__(self, current_order, current_position):
+        if len(current_order) != len(self.sizes):
+            raise ValueError('sizes of {} examples are given, but the '
+                             'dataset has {} examples'.format(
+                                 len(self.sizes), len(current_order)))
+        if not self.shuffle:
+            return numpy.argsort(self.sizes, kind='stable')
+
+        # sorts by the bucket, and randomly in each bucket.
+        order = numpy.lexsort((self._random.random_sample(len(self.sizes)),
+                               self._buckets))
+        num_batches = len(order) // self.batch_size
+        num_full = num_batches * self.batch_size
+        batches = order[:num_full].reshape(num_batches, self.batch_size)
+        batches = batches[self._random.permutation(num_batches)]
+        return numpy.concatenate((batches.ravel(), order[num_full:]))
+
+
+class BucketIterator(SerialIterator):
+
+    """Dataset iterator that makes batches of examples of similar sizes
+
+    `concat_mols` pads each batch to its largest molecule, so the batches of
+    randomly sampled molecules are mostly padding when the numbers of atoms
+    vary widely. This iterator groups the examples into the buckets by the
+    number of atoms, see `BucketOrderSampler`, which reduces the padding of
+    the datasets made with ``out_size=-1``.
+
+    The order of each epoch is saved by `serialize`, so the training can be
+    resumed from the middle of the epoch. When `repeat` is ``True``, the last
+    batch of an epoch is filled with the first examples of the next epoch as
+    :class:`SerialIterator` does.
+
+    Args:
+        dataset: Dataset to iterate.
+        batch_size (int): Number of examples within each batch.
+        sizes (numpy.ndarray or None): 1d array of the sizes of the examples.
+            If ``None``, the lengths of the first features of the examples,
+            e.g. atom arrays, are used.
+        bucket_width (int): Range of the number of atoms in each bucket.
+        repeat (bool): If ``True``, it infinitely loops over the dataset.
+            Otherwise, it stops iteration at the end of the first epoch.
+        shuffle (bool): If ``True``, the examples in each bucket and the
+            batches are shuffled at the beginning of each epoch. Otherwise,
+            the examples are sorted by their sizes, which is useful for the
+            evaluation.
+        random_state (numpy.random.RandomState): Pseudo-random number
+            generator.
+
+    .. admonition:: Example
+
+       >>> preprocessor = GGNNPreprocessor(out_size=-1)
+       >>> train_iter = BucketIterator(train, 32, bucket_width=4)
+
+    """
+
+    def __init__(self, dataset, batch_size, sizes=None, bucket_width=1,
+                 repeat=True, shuffle=True, random_state=None):
+        if sizes is None:
+            sizes = get_example_sizes(dataset)
+        order_sampler = BucketOrderSampler(
+            sizes, batch_size, bucket_width=bucket_width, shuffle=shuffle,
+            random_state=random_state)
+        super(BucketIterator, self).__init__(
+            dataset, batch_size, repeat=repeat, order_sampler=order_sampler)
@@ -0,0 +1,189 @@
+from __future__ import division
+
+from chainer.dataset import iterator
+import numpy
+
+from chainer_chemistry.iterators.example_sizes import get_example_sizes
+from chainer_chemistry.iterators.serial_iterator import fetch_batch
+
+
+_costs = {
+    # number of the atoms of the padded batch.
+    'atoms': lambda num_examples, max_size: num_examples * max_size,
+    # size of the padded adjacency matrices.
+    'atoms_squared':
+        lambda num_examples, max_size: num_examples * max_size ** 2,
+}
+
+
+class DynamicBatchIterator(iterator.Iterator):
+
+    """Dataset iterator that packs examples into a batch within a budget
+
+    The number of examples in each batch is not fixed. Examples are added to
+    a batch while the cost of the padded batch is within `budget`, so small
+    molecules are batched more and large molecules less, and the memory of
+    each iteration is almost steady. An example whose cost exceeds `budget`
+    by itself makes a batch alone.
+
+    To pack the examples tightly, they are sorted by the buckets of their
+    sizes and shuffled in each bucket, see `BucketOrderSampler`. After the
+    examples are packed, the batches are shuffled.
+
+    A batch does not cross the end of an epoch, and `epoch_detail` is the
+    ratio of the examples, not of the batches, iterated in the epoch. The
+    order and the batches of the current epoch are saved by `serialize`.
+
+    Args:
+        dataset: Dataset to iterate.
+        budget (int): Maximum cost of each batch.
+        sizes (numpy.ndarray or None): 1d array of the sizes of the examples.
+            If ``None``, the lengths of the first features of the examples,
+            e.g. atom arrays, are used.
+        cost (str): Cost of a batch. ``'atoms'`` is the number of the atoms
+            of the padded batch, i.e. ``batch_size * max_atoms``.
+            ``'atoms_squared'`` is the size of the padded adjacency
+            matrices, i.e. ``batch_size * max_atoms ** 2``, which suits the
+            models with dense adjacency matrices.
+        bucket_width (int): Range of the number of atoms in each bucket.
+        repeat (bool): If ``True``, it infinitely loops over the dataset.
+            Otherwise, it stops iteration at the end of the first epoch.
+        shuffle (bool): If ``True``, the examples in each bucket and the
+            batches are shuffled at the beginning of each epoch. Otherwise,
+            the examples are sorted by their sizes.
+        random_state (numpy.random.RandomState): Pseudo-random number
+            generator.
+
+    .. admonition:: Example
+
+       >>> train_iter = DynamicBatchIterator(train, 4096,
+       ...                                   cost='atoms_squared')
+       >>> run_train(model, train_iter, ...)
+
+    """
+
+    def __init__(self, dataset, budget, sizes=None, cost='atoms',
+                 bucket_width=1, repeat=True, shuffle=True,
+                 random_state=None):
+        if budget <= 0:
+            raise ValueError('budget must be positive, got {}'
+                             .format(budget))
+        if cost not in _costs:
+            raise ValueError('cost must be one of {}, got {}'
+                             .format(sorted(_costs.keys()), cost))
+        if bucket_width <= 0:
+            raise ValueError('bucket_width must be positive, got {}'
+                             .format(bucket_width))
+        if sizes is None:
+            sizes = get_example_sizes(dataset)
+        sizes = numpy.asarray(sizes)
+        if sizes.shape != (len(dataset),):
+            raise ValueError('sizes must be of the shape ({},), got {}'
+                             .format(len(dataset), sizes.shape))
+        if random_state is None:
+            random_state = numpy.random.random.__self__
+        self.dataset = dataset
+        self.budget = budget
+        self.sizes = sizes
+        self.cost = cost
+        self.bucket_width = bucket_width
+        self._repeat = repeat
+        self._shuffle = shuffle
+        self._random = random_state
+        self.reset()
+
+    def _pack(self, order):
+        """Returns the bool array which is True at the end of each batch"""
+        cost = _costs[self.cost]
+        is_end = numpy.zeros(len(order), dtype=numpy.bool_)
+        num_examples = 0
+        max_size = 0
+        for i, size in enumerate(self.sizes[order]):
+            new_max_size = max(max_size, size)
+            if num_examples > 0 and \
+                    cost(num_examples + 1, new_max_size) > self.budget:
+                is_end[i - 1] = True
+                num_examples = 0
+                new_max_size = size
+            num_examples += 1
+            max_size = new_max_size
+        if len(order) > 0:
+            is_end[-1] = True
+        return is_end
+
+    def _update_order(self):
+        if not self._shuffle:
+            self._order = numpy.argsort(self.sizes, kind='stable')
+            self._is_end = self._pack(self._order)
+            return
+
+        # sorts by the bucket, and randomly in each bucket.
+        order = numpy.lexsort((self._random.random_sample(len(self.sizes)),
+                               self.sizes // self.bucket_width))
+        is_end = self._pack(order)
+        batches = numpy.split(order, numpy.flatnonzero(is_end)[:-1] + 1)
+        batches = [batches[i]
+                   for i in self._random.permutation(len(batches))]
+        self._order = numpy.concatenate(batches)
+        self._is_end = numpy.zeros(len(order), dtype=numpy.bool_)
+        self._is_end[numpy.cumsum([len(batch) for batch in batches]) - 1] = \
+            True
+
+    def __next__(self):
+        if not self._repeat and self.epoch > 0:
+            raise StopIteration
+
+        self._previous_epoch_detail = self.epoch_detail
+
+        i = self.current_position
+        i_end = i + int(numpy.argmax(self._is_end[i:])) + 1
+        indices = self._order[i:i_end]
+
+        if i_end >= len(self._order):
+            if self._repeat:
+                self._update_order()
+            self.current_position = 0
+            self.epoch += 1
+            self.is_new_epoch = True
+        else:
+            self.current_position = i_end
+            self.is_new_epoch = False
+
+        return fetch_batch(self.dataset, indices)
+
+    next = __next__
+
+    @property
+    def epoch_detail(self):
+        return self.epoch + self.current_position / len(self._order)
+
+    @property
+    def previous_epoch_detail(self):
+        # This iterator saves ``-1`` as _previous_epoch_detail instead of
+        # ``None`` because some serializers do not support ``None``.
+        if self._previous_epoch_detail < 0:
+            return None
+        return self._previous_epoch_detail
+
+    def serialize(self, serializer):
+        self.current_position = serializer('current_position',
+                                           self.current_position)
+        self.epoch = serializer('epoch', self.epoch)
+        self.is_new_epoch = serializer('is_new_epoch', self.is_new_epoch)
+        serializer('order', self._order)
+        serializer('is_end', self._is_end)
+        self._previous_epoch_detail = serializer(
+            'previous_epoch_detail', self._previous_epoch_detail)
+
+    def reset(self):
+        self._update_order()
+        self.current_position = 0
+        self.epoch = 0
+        self.is_new_epoch = False
+
+        # use -1 instead of None internally.
+        self._previous_epoch_detail = -1.
+
+    @property
+    def repeat(self):
+        return self._repeat
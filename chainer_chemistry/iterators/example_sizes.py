@@ -0,0 +1,32 @@
+import numpy
+
+from chainer_chemistry.dataset.ragged_array import RaggedArray
+from chainer_chemistry.datasets.numpy_tuple_dataset import NumpyTupleDataset
+
+
+def get_example_sizes(dataset):
+    """Returns the length of the first feature, e.g. atoms, of each example
+
+    For `NumpyTupleDataset`, the lengths are read from its first dataset
+    without extracting the examples: the shapes of `RaggedArray`, the second
+    axis of a padded array, or the lengths of the elements of an object
+    array. For the other datasets, every example is extracted.
+
+    Args:
+        dataset: Dataset whose first feature of each example is an array,
+            e.g. the atom array of the molecule.
+
+    Returns (numpy.ndarray): 1d array of the sizes of the examples.
+
+    """
+    if isinstance(dataset, NumpyTupleDataset):
+        features = dataset.get_datasets()[0]
+        if isinstance(features, RaggedArray):
+            # the shapes are read without the values of the features.
+            return features.shapes[:, 0]
+        if features.dtype != object:
+            # padded features have the same length.
+            return numpy.full(len(features), features.shape[1]
+                              if features.ndim > 1 else 1)
+        return numpy.array([len(feature) for feature in features])
+    return numpy.array([len(example[0]) for example in dataset])
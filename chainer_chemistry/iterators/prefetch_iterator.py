@@ -0,0 +1,200 @@
+import collections
+from concurrent import futures
+import copy
+
+import chainer
+from chainer.dataset import convert
+from chainer.dataset import iterator
+import numpy
+
+
+# converter of the worker processes, which is set when they start.
+_process_converter = None
+_process_device = None
+
+
+def _initialize_process(converter, device):
+    global _process_converter, _process_device
+    _process_converter = converter
+    _process_device = device
+
+
+def _convert_in_process(batch):
+    return convert._call_converter(_process_converter, batch, _process_device)
+
+
+def prefetched(batch, device=None):
+    """Converter for the batches of `PrefetchIterator`
+
+    The batches are already converted by `PrefetchIterator`, so they are
+    returned as they are. Pass this function as the converter of the
+    updaters and evaluators which iterate `PrefetchIterator`.
+
+    """
+    return batch
+
+
+class PrefetchIterator(iterator.Iterator):
+
+    """Iterator that converts the next batches in the background
+
+    The batches of `iterator` are converted by `converter` in a thread pool
+    (or a process pool), while the current batch is computed. At most
+    `n_prefetch` batches are converted ahead, and they are returned in the
+    same order as `iterator`. Use `prefetched` as the converter of the
+    updater or the evaluator, since the returned batches are already
+    converted.
+
+    `epoch`, `epoch_detail` and `is_new_epoch` are those of the last returned
+    batch, not of `iterator` which is ahead of it, and `serialize` saves the
+    state after the last returned batch, so the prefetched batches are not
+    skipped when the training is resumed. It assumes that `iterator`
+    replaces its arrays instead of updating them in place, as the iterators
+    of Chainer and Chainer Chemistry do.
+
+    Args:
+        iterator: Iterator whose batches are converted.
+        converter (callable): Converter of the batches, e.g. `concat_mols`.
+        device: Device to which the batches are sent by `converter`.
+        n_prefetch (int): Number of the batches converted ahead.
+        n_workers (int): Number of the threads or processes which convert
+            the batches.
+        use_processes (bool): If ``True``, the batches are converted in
+            processes, which is not blocked by GIL. The batches must be
+            picklable, and `device` must be CPU.
+
+    .. admonition:: Example
+
+       >>> train_iter = PrefetchIterator(SerialIterator(train, 32),
+       ...                               concat_mols, n_prefetch=4)
+       >>> updater = StandardUpdater(train_iter, optimizer,
+       ...                           converter=prefetched)
+
+    """
+
+    def __init__(self, iterator, converter=convert.concat_examples,
+                 device=None, n_prefetch=2, n_workers=1,
+                 use_processes=False):
+        if n_prefetch <= 0:
+            raise ValueError('n_prefetch must be positive, got {}'
+                             .format(n_prefetch))
+        if n_workers <= 0:
+            raise ValueError('n_workers must be positive, got {}'
+                             .format(n_workers))
+        if device is not None:
+            device = chainer.get_device(device)
+            if use_processes and device.xp is not numpy:
+                raise ValueError('batches converted in processes can not be '
+                                 'sent to {}'.format(device))
+        self.iterator = iterator
+        self.converter = converter
+        self.device = device
+        self.n_prefetch = n_prefetch
+        self.n_workers = n_workers
+        self.use_processes = use_processes
+        self._executor = None
+        # pairs of the future of the converted batch and the copy of
+        # `iterator` just after the batch is extracted.
+        self._queue = collections.deque()
+        self._exhausted = False
+        self._current = copy.copy(iterator)
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.use_processes:
+                # the converter is passed once to each process, which is not
+                # pickled when the processes are forked.
+                self._executor = futures.ProcessPoolExecutor(
+                    self.n_workers, initializer=_initialize_process,
+                    initargs=(self.converter, self.device))
+            else:
+                self._executor = futures.ThreadPoolExecutor(self.n_workers)
+        return self._executor
+
+    def _fill(self):
+        while not self._exhausted and len(self._queue) < self.n_prefetch:
+            try:
+                batch = self.iterator.next()
+            except StopIteration:
+                self._exhausted = True
+                break
+            if self.use_processes:
+                future = self._get_executor().submit(
+                    _convert_in_process, batch)
+            else:
+                future = self._get_executor().submit(
+                    convert._call_converter, self.converter, batch,
+                    self.device)
+            self._queue.append((future, copy.copy(self.iterator)))
+
+    def _clear(self):
+        for future, _ in self._queue:
+            future.cancel()
+        self._queue.clear()
+        self._exhausted = False
+
+    def __next__(self):
+        self._fill()
+        if not self._queue:
+            raise StopIteration
+        future, self._current = self._queue.popleft()
+        # the next batches are converted while this batch is computed.
+        self._fill()
+        return future.result()
+
+    next = __next__
+
+    @property
+    def epoch(self):
+        return self._current.epoch
+
+    @property
+    def epoch_detail(self):
+        return self._current.epoch_detail
+
+    @property
+    def previous_epoch_detail(self):
+        return self._current.previous_epoch_detail
+
+    @property
+    def is_new_epoch(self):
+        return self._current.is_new_epoch
+
+    @property
+    def repeat(self):
+        return getattr(self.iterator, 'repeat', None)
+
+    def reset(self):
+        self._clear()
+        self.iterator.reset()
+        self._current = copy.copy(self.iterator)
+
+    def serialize(self, serializer):
+        if isinstance(serializer, chainer.serializer.Deserializer):
+            self._clear()
+            self.iterator.serialize(serializer)
+            self._current = copy.copy(self.iterator)
+        else:
+            self._current.serialize(serializer)
+
+    def shutdown(self):
+        """Stops the workers without finalizing `iterator`
+
+        The batches converted ahead are discarded, so it is called at the end
+        of the iteration. The workers are started again when the next batch
+        is requested, e.g. after `reset`.
+
+        """
+        self._clear()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def finalize(self):
+        self.shutdown()
+        self.iterator.finalize()
+
+    def __del__(self):
+        # `iterator` is finalized by itself when it is deleted.
+        if getattr(self, '_executor', None) is not None:
+            self.shutdown()
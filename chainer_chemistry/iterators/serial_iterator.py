@@ -0,0 +1,59 @@
+from chainer.iterators import _statemachine
+from chainer.iterators import serial_iterator
+
+
+def fetch_batch(dataset, indices):
+    """Extracts the examples of `indices` from `dataset`
+
+    When `dataset` has `get_batch` method, e.g. `NumpyTupleDataset`, the
+    batch is extracted by it at once. Otherwise the list of the examples is
+    made as Chainer's iterators do.
+
+    Args:
+        dataset: dataset to extract the examples.
+        indices (numpy.ndarray): 1d array of indices.
+
+    Returns (ColumnBatch or list): batch of the examples.
+
+    """
+    if hasattr(dataset, 'get_batch'):
+        return dataset.get_batch(indices)
+    return [dataset[index] for index in indices]
+
+
+class SerialIterator(serial_iterator.SerialIterator):
+
+    """Dataset iterator that serially reads the examples.
+
+    It is the same with :class:`chainer.iterators.SerialIterator` except
+    that the batch is extracted by `get_batch` method of the dataset when it
+    is available. For `NumpyTupleDataset` the batch is `ColumnBatch`, each
+    feature of which is stacked by one fancy indexing, and `concat_mols`
+    converts it without unpacking each example.
+
+    Args:
+        dataset: Dataset to iterate.
+        batch_size (int): Number of examples within each batch.
+        repeat (bool): If ``True``, it infinitely loops over the dataset.
+            Otherwise, it stops iteration at the end of the first epoch.
+        shuffle (bool): If ``True``, the order of examples is shuffled at the
+            beginning of each epoch. Otherwise, examples are extracted in the
+            order of indexes. If ``None`` and no ``order_sampler`` is given,
+            the behavior is the same as the case with ``shuffle=True``.
+        order_sampler (callable): A callable that generates the order
+            of the indices to sample in the next epoch when a epoch finishes.
+            This option cannot be used when ``shuffle`` is not ``None``.
+
+    """
+
+    def __next__(self):
+        self._previous_epoch_detail = self.epoch_detail
+        self._state, indices = _statemachine.iterator_statemachine(
+            self._state, self.batch_size, self.repeat, self.order_sampler,
+            len(self.dataset))
+        if indices is None:
+            raise StopIteration
+
+        return fetch_batch(self.dataset, indices)
+
+    next = __next__
@@ -5,10 +5,15 @@ import numpy
 import chainer
 from chainer import cuda
 from chainer.dataset.convert import concat_examples
-from chainer.iterators import SerialIterator
 from chainer import link
 import chainerx  # NOQA
 
+from chainer_chemistry.dataset.column_batch import ColumnBatch
+from chainer_chemistry.dataset.converters import concat_mols
+from chainer_chemistry.iterators.prefetch_iterator import prefetched
+from chainer_chemistry.iterators.prefetch_iterator import PrefetchIterator
+from chainer_chemistry.iterators.serial_iterator import SerialIterator
+
 
 def _to_tuple(x):
     if not isinstance(x, tuple):
@@ -61,11 +66,13 @@ class BaseForwardModel(link.Chain):
 
     def _forward(self, data, fn, batchsize=16,
                  converter=concat_examples, retain_inputs=False,
-                 preprocess_fn=None, postprocess_fn=None):
+                 preprocess_fn=None, postprocess_fn=None, n_prefetch=0):
         """Forward data by iterating with batch
 
         Args:
-            data: "train_x array" or "chainer dataset"
+            data: "train_x array" or "chainer dataset". When the dataset
+                has `get_batch` method, e.g. `NumpyTupleDataset`, each batch
+                is extracted by it at once.
             fn (Callable): Main function to forward. Its input argument is
                 either Variable, cupy.ndarray or numpy.ndarray, and returns
                 Variable.
@@ -79,17 +86,30 @@ class BaseForwardModel(link.Chain):
             postprocess_fn (Callable): Its input argument is Variable,
                 but this method may return either Variable, cupy.ndarray or
                 numpy.ndarray.
+            n_prefetch (int): If positive, this number of the next batches
+                are converted in the background by `PrefetchIterator` while
+                the current batch is forwarded.
 
         Returns (tuple or numpy.ndarray): forward result
 
         """
+        def convert(batch, device):
+            if isinstance(batch, ColumnBatch) and converter is concat_examples:
+                # Same result with `concat_examples`, without unpacking the
+                # examples extracted by `get_batch` of the dataset.
+                return concat_mols(batch, device, padding=None)
+            return converter(batch, device)
+
         input_list = None
         output_list = None
         it = SerialIterator(data, batch_size=batchsize, repeat=False,
                             shuffle=False)
+        if n_prefetch > 0:
+            it = PrefetchIterator(it, convert, device=self.device,
+                                  n_prefetch=n_prefetch)
+            convert = prefetched
         for batch in it:
-            inputs = converter(batch, self.device)
-            inputs = _to_tuple(inputs)
+            inputs = _to_tuple(convert(batch, self.device))
 
             if preprocess_fn:
                 inputs = preprocess_fn(*inputs)
@@ -112,6 +132,7 @@ class BaseForwardModel(link.Chain):
                 outputs = _to_tuple(outputs)
             for j, output in enumerate(outputs):
                 output_list[j].append(_extract_numpy(output))
+        it.finalize()
 
         if retain_inputs:
             self.inputs = [numpy.concatenate(
@@ -186,7 +186,7 @@ class Classifier(BaseForwardModel):
     def predict_proba(
             self, data, batchsize=16, converter=concat_examples,
             retain_inputs=False, preprocess_fn=None,
-            postprocess_fn=chainer.functions.softmax):
+            postprocess_fn=chainer.functions.softmax, n_prefetch=0):
         """Calculate probability of each category.
 
         Args:
@@ -204,6 +204,9 @@ class Classifier(BaseForwardModel):
                 numpy.ndarray.
             retain_inputs (bool): If True, this instance keeps inputs in
                 `self.inputs` or not.
+            n_prefetch (int): If positive, this number of the next batches
+                are converted in the background while the current batch is
+                forwarded.
 
         Returns (tuple or numpy.ndarray): Typically, it is 2-dimensional float
             array with shape (batchsize, number of category) which represents
@@ -214,12 +217,14 @@ class Classifier(BaseForwardModel):
             proba = self._forward(
                 data, fn=self.predictor, batchsize=batchsize,
                 converter=converter, retain_inputs=retain_inputs,
-                preprocess_fn=preprocess_fn, postprocess_fn=postprocess_fn)
+                preprocess_fn=preprocess_fn, postprocess_fn=postprocess_fn,
+                n_prefetch=n_prefetch)
         return proba
 
     def predict(
             self, data, batchsize=16, converter=concat_examples,
-            retain_inputs=False, preprocess_fn=None, postprocess_fn=_argmax):
+            retain_inputs=False, preprocess_fn=None, postprocess_fn=_argmax,
+            n_prefetch=0):
         """Predict label of each category by taking .
 
         Args:
@@ -234,6 +239,9 @@ class Classifier(BaseForwardModel):
                 numpy.ndarray.
             retain_inputs (bool): If True, this instance keeps inputs in
                 `self.inputs` or not.
+            n_prefetch (int): If positive, this number of the next batches
+                are converted in the background while the current batch is
+                forwarded.
 
         Returns (tuple or numpy.ndarray): Typically, it is 1-dimensional int
             array with shape (batchsize, ) which represents each examples
@@ -244,7 +252,8 @@ class Classifier(BaseForwardModel):
             predict_labels = self._forward(
                 data, fn=self.predictor, batchsize=batchsize,
                 converter=converter, retain_inputs=retain_inputs,
-                preprocess_fn=preprocess_fn, postprocess_fn=postprocess_fn)
+                preprocess_fn=preprocess_fn, postprocess_fn=postprocess_fn,
+                n_prefetch=n_prefetch)
         return predict_labels
 
     # --- For backward compatibility ---
@@ -151,7 +151,8 @@ class Regressor(BaseForwardModel):
 
     def predict(
             self, data, batchsize=16, converter=concat_examples,
-            retain_inputs=False, preprocess_fn=None, postprocess_fn=None):
+            retain_inputs=False, preprocess_fn=None, postprocess_fn=None,
+            n_prefetch=0):
         """Predict label of each category by taking .
 
         Args:
@@ -166,6 +167,9 @@ class Regressor(BaseForwardModel):
                 numpy.ndarray.
             retain_inputs (bool): If True, this instance keeps inputs in
                 `self.inputs` or not.
+            n_prefetch (int): If positive, this number of the next batches
+                are converted in the background while the current batch is
+                forwarded.
 
         Returns (tuple or numpy.ndarray): Typically, it is 1-dimensional int
             array with shape (batchsize, ) which represents each examples
@@ -176,5 +180,6 @@ class Regressor(BaseForwardModel):
             predict_labels = self._forward(
                 data, fn=self.predictor, batchsize=batchsize,
                 converter=converter, retain_inputs=retain_inputs,
-                preprocess_fn=preprocess_fn, postprocess_fn=postprocess_fn)
+                preprocess_fn=preprocess_fn, postprocess_fn=postprocess_fn,
+                n_prefetch=n_prefetch)
         return predict_labels
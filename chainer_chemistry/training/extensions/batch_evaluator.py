@@ -6,9 +6,16 @@ import numpy
 import chainer
 from chainer import cuda
 from chainer.dataset import convert
+from chainer import iterators
 from chainer import reporter
 from chainer.training.extensions import Evaluator
 
+from chainer_chemistry.dataset.column_batch import ColumnBatch
+from chainer_chemistry.dataset.converters import concat_mols
+from chainer_chemistry.iterators.prefetch_iterator import prefetched
+from chainer_chemistry.iterators.prefetch_iterator import PrefetchIterator
+from chainer_chemistry.iterators.serial_iterator import SerialIterator
+
 
 def _get_1d_numpy_array(v):
     """Convert array or Variable to 1d numpy array
@@ -25,16 +32,33 @@ def _get_1d_numpy_array(v):
     return cuda.to_cpu(v).ravel()
 
 
+def _to_batch_fetch_iterator(iterator):
+    """Replaces Chainer's `SerialIterator` to extract batch at once
+
+    Only non-repeating and non-shuffling iterator over the dataset which
+    has `get_batch` method is replaced, so that the order of the examples is
+    not changed.
+
+    """
+    if type(iterator) is iterators.SerialIterator \
+            and iterator.order_sampler is None and not iterator.repeat \
+            and hasattr(iterator.dataset, 'get_batch'):
+        return SerialIterator(iterator.dataset, iterator.batch_size,
+                              repeat=False, shuffle=False)
+    return iterator
+
+
 class BatchEvaluator(Evaluator):
 
     def __init__(self, iterator, target, converter=convert.concat_examples,
                  device=None, eval_hook=None, eval_func=None, metrics_fun=None,
-                 name=None, logger=None):
+                 name=None, logger=None, n_prefetch=0):
         super(BatchEvaluator, self).__init__(
             iterator, target, converter=converter, device=device,
             eval_hook=eval_hook, eval_func=eval_func)
         self.name = name
         self.logger = logger or getLogger()
+        self.n_prefetch = n_prefetch
 
         if callable(metrics_fun):
             # TODO(mottodora): use better name or infer
@@ -57,11 +81,26 @@ class BatchEvaluator(Evaluator):
             it = iterator
         else:
             it = copy.copy(iterator)
+        it = _to_batch_fetch_iterator(it)
+
+        def converter(batch, device):
+            if isinstance(batch, ColumnBatch) \
+                    and self.converter is convert.concat_examples:
+                # Same result with `concat_examples`, without unpacking the
+                # examples extracted by `get_batch` of the dataset.
+                return concat_mols(batch, device, padding=None)
+            return self.converter(batch, device)
+
+        if self.n_prefetch > 0:
+            # batches are converted in the background while evaluated.
+            it = PrefetchIterator(it, converter, device=self.device,
+                                  n_prefetch=self.n_prefetch)
+            converter = prefetched
 
         y_total = []
         t_total = []
         for batch in it:
-            in_arrays = self.converter(batch, self.device)
+            in_arrays = converter(batch, self.device)
             with chainer.no_backprop_mode(), chainer.using_config('train',
                                                                   False):
                 y = eval_func(*in_arrays[:-1])
@@ -70,6 +109,9 @@ class BatchEvaluator(Evaluator):
             t_data = _get_1d_numpy_array(t)
             y_total.append(y_data)
             t_total.append(t_data)
+        if self.n_prefetch > 0:
+            # `iterator` is not finalized since it is reused.
+            it.shutdown()
 
         y_total = numpy.concatenate(y_total).ravel()
         t_total = numpy.concatenate(t_total).ravel()
@@ -2,12 +2,25 @@ import chainer
 from chainer import optimizers, training, Optimizer  # NOQA
 from chainer._backend import Device
 from chainer.dataset import convert, Iterator  # NOQA
-from chainer.iterators import SerialIterator
 from chainer.training import extensions
 
+from chainer_chemistry.dataset.column_batch import ColumnBatch
+from chainer_chemistry.dataset.converters import concat_mols
+from chainer_chemistry.iterators.prefetch_iterator import prefetched
+from chainer_chemistry.iterators.prefetch_iterator import PrefetchIterator
+from chainer_chemistry.iterators.serial_iterator import SerialIterator
 from chainer_chemistry.training.extensions.auto_print_report import AutoPrintReport  # NOQA
 
 
+@chainer.dataset.converter()
+def _concat_examples(batch, device=None, padding=None):
+    if isinstance(batch, ColumnBatch):
+        # Same result with `concat_examples`, without unpacking the examples
+        # extracted by `get_batch` of the dataset.
+        return concat_mols(batch, device, padding=padding)
+    return convert.concat_examples(batch, device, padding=padding)
+
+
 def run_train(model, train, valid=None,
               batch_size=16, epoch=10,
               optimizer=None,
@@ -16,7 +29,8 @@ def run_train(model, train, valid=None,
               device=-1,
               converter=convert.concat_examples,
               use_default_extensions=True,
-              resume_path=None):
+              resume_path=None,
+              n_prefetch=0):
     """Util function to train chainer's model with StandardUpdater.
 
     Typical Regression/Classification tasks suffices to use this method to
@@ -37,6 +51,9 @@ def run_train(model, train, valid=None,
             to `trainer`.
         resume_path (None or str): If specified, `trainer` is resumed with this
             serialized file.
+        n_prefetch (int): If positive, this number of the next batches are
+            converted in the background by `PrefetchIterator` while the
+            current batch is computed.
     """
     if optimizer is None:
         # Use Adam optimizer as default
@@ -46,6 +63,8 @@ def run_train(model, train, valid=None,
                          "but passed {}".format(type(Optimizer)))
 
     optimizer.setup(model)
+    if converter is convert.concat_examples:
+        converter = _concat_examples
 
     if isinstance(train, Iterator):
         train_iter = train
@@ -53,8 +72,14 @@ def run_train(model, train, valid=None,
         # Assume `train` as training dataset, Use SerialIterator as default.
         train_iter = SerialIterator(train, batch_size=batch_size)
 
+    iter_converter = converter
+    if n_prefetch > 0:
+        train_iter = PrefetchIterator(train_iter, converter, device=device,
+                                      n_prefetch=n_prefetch)
+        iter_converter = prefetched
+
     updater = training.StandardUpdater(
-        train_iter, optimizer, device=device, converter=converter)
+        train_iter, optimizer, device=device, converter=iter_converter)
     trainer = training.Trainer(updater, (epoch, 'epoch'), out=out)
     if use_default_extensions:
         if valid is not None:
@@ -65,8 +90,12 @@ def run_train(model, train, valid=None,
                 # Use SerialIterator as default.
                 valid_iter = SerialIterator(valid, batch_size=batch_size,
                                             shuffle=False, repeat=False)
+            if n_prefetch > 0:
+                valid_iter = PrefetchIterator(
+                    valid_iter, converter, device=device,
+                    n_prefetch=n_prefetch)
             trainer.extend(extensions.Evaluator(
-                valid_iter, model, device=device, converter=converter))
+                valid_iter, model, device=device, converter=iter_converter))
 
         trainer.extend(extensions.LogReport())
         trainer.extend(AutoPrintReport())
@@ -14,6 +14,7 @@ from chainer_chemistry.training.extensions.roc_auc_evaluator import ROCAUCEvalua
 from chainer import serializers
 
 from chainer_chemistry.dataset.converters import concat_mols
+from chainer_chemistry.dataset.preprocessors.wle import WLETransformer
 from chainer_chemistry.datasets import NumpyTupleDataset
 from chainer_chemistry.datasets.molnet.molnet_config import molnet_default_config  # NOQA
 from chainer_chemistry.models.prediction import Classifier
@@ -26,7 +27,8 @@ from chainer_chemistry.links.scaler.standard_scaler import StandardScaler  # NOQ
 from chainer_chemistry.models.prediction.graph_conv_predictor import GraphConvPredictor  # NOQA
 from train_molnet_wle import dict_for_wles
 from train_molnet_wle import dataset_part_filename
-from train_molnet_wle import download_entire_dataset
+from train_molnet_wle import download_dataset_parts
+from train_molnet_wle import WLE_TRANSFORMER_FILENAME
 
 dict_for_wles()
 
@@ -83,6 +85,16 @@ def main():
         cache_dir = os.path.join('input', '{}_{}_all'.format(dataset_name,
                                                              method))
 
+    # Model-related data is stored this directory.
+    model_dir = os.path.join(args.in_dir, os.path.basename(cache_dir))
+
+    # The expanded labels fitted in the training are applied to the dataset.
+    wle_transformer = None
+    wle_transformer_path = os.path.join(model_dir, WLE_TRANSFORMER_FILENAME)
+    if os.path.exists(wle_transformer_path):
+        print('Loading fitted WLE from {}.'.format(wle_transformer_path))
+        wle_transformer = WLETransformer.load(wle_transformer_path)
+
     # Load the cached dataset.
     filename = dataset_part_filename('test', num_data)
     path = os.path.join(cache_dir, filename)
@@ -90,11 +102,11 @@ def main():
         print('Loading cached dataset from {}.'.format(path))
         test = NumpyTupleDataset.load(path)
     else:
-        _, _, test = download_entire_dataset(dataset_name, num_data, labels,
-                                             method, cache_dir)
-
-    # Model-related data is stored this directory.
-    model_dir = os.path.join(args.in_dir, os.path.basename(cache_dir))
+        _, _, test = download_dataset_parts(dataset_name, num_data, labels,
+                                            method)
+        if wle_transformer is not None:
+            # only the predicted part is expanded with the fitted labels
+            test, = wle_transformer.transform((test,))
 
     model_filename = {'classification': 'classifier.pkl',
                       'regression': 'regressor.pkl'}
@@ -7,6 +7,7 @@ import os
 import types
 
 import pickle
+import shutil
 
 import chainer
 from chainer import iterators
@@ -126,19 +127,16 @@ def dataset_part_filename(dataset_part, num_data):
     return '{}_data.npz'.format(dataset_part)
 
 
-def download_entire_dataset(dataset_name, num_data, labels, method, cache_dir, apply_wle_flag=False, cutoff_wle=0, apply_cwle_flag=False, apply_gwle_flag=False, n_hop=1):
-    """Downloads the train/valid/test parts of a dataset and stores them in the
-    cache directory.
+WLE_TRANSFORMER_FILENAME = 'wle_transformer.json'
+
+
+def download_dataset_parts(dataset_name, num_data, labels, method):
+    """Downloads the train/valid/test parts of a dataset without applying WLE.
     Args:
         dataset_name: Dataset to be downloaded.
         num_data: Amount of data samples to be parsed from the dataset.
         labels: Target labels for regression.
         method: Method name. See `parse_arguments`.
-        cache_dir: Directory to store the dataset to.
-        apply_wle_flag: boolean, set True if you apply the naive WL embeddding
-        cutoff_wle: int set more than zero to cut off WEEs
-        apply_cwle_flag: boolean, set True if you apply Concatenating WLE (CWLE)
-        apply_gwle_flag: boolean, set True if you apply Gated-sum WLE (GWLE)
     """
 
     print('Downloading {}...'.format(dataset_name))
@@ -154,16 +152,38 @@ def download_entire_dataset(dataset_name, num_data, labels, method, cache_dir, a
                                                 split=dc_scaffold_splitter,
                                                 target_index=target_index)
 
-    dataset_parts = dataset_parts['dataset']
+    return dataset_parts['dataset']
+
+
+def download_entire_dataset(dataset_name, num_data, labels, method, cache_dir, apply_wle_flag=False, cutoff_wle=0, apply_cwle_flag=False, apply_gwle_flag=False, n_hop=1):
+    """Downloads the train/valid/test parts of a dataset and stores them in the
+    cache directory.
+    Args:
+        dataset_name: Dataset to be downloaded.
+        num_data: Amount of data samples to be parsed from the dataset.
+        labels: Target labels for regression.
+        method: Method name. See `parse_arguments`.
+        cache_dir: Directory to store the dataset to.
+        apply_wle_flag: boolean, set True if you apply the naive WL embeddding
+        cutoff_wle: int set more than zero to cut off WEEs
+        apply_cwle_flag: boolean, set True if you apply Concatenating WLE (CWLE)
+        apply_gwle_flag: boolean, set True if you apply Gated-sum WLE (GWLE)
+    """
+
+    dataset_parts = download_dataset_parts(dataset_name, num_data, labels,
+                                           method)
 
     # Cache the downloaded dataset.
     if not os.path.exists(cache_dir):
         os.makedirs(cache_dir)
 
     # apply Neighboring Label Expansion
+    wle_transformer = None
     if apply_wle_flag:
-        dataset_parts_expand, labels_expanded, labels_frequency = wle.apply_wle_for_datasets(dataset_parts, cutoff_wle, n_hop)
-        dataset_parts = dataset_parts_expand
+        wle_transformer = wle.WLETransformer('wle', cutoff_wle, n_hop)
+        dataset_parts = wle_transformer.fit_transform(dataset_parts)
+        labels_frequency = wle_transformer.labels_frequencies[-1]
+        labels_expanded = list(labels_frequency.keys())
         num_expanded_symbols = len(labels_expanded)
         print("WLE Expanded Labels Applied to datasets: vocab=", num_expanded_symbols)
         print(labels_expanded)
@@ -182,8 +202,10 @@ def download_entire_dataset(dataset_name, num_data, labels, method, cache_dir, a
             pickle.dump( (labels_expanded, labels_frequency), fout)
 
     elif apply_cwle_flag:
-        dataset_parts_expand, labels_expanded, labels_frequency = wle.apply_cwle_for_datasets(dataset_parts, n_hop)
-        dataset_parts = dataset_parts_expand
+        wle_transformer = wle.WLETransformer('cwle', k=n_hop)
+        dataset_parts = wle_transformer.fit_transform(dataset_parts)
+        labels_frequency = wle_transformer.labels_frequencies[-1]
+        labels_expanded = list(labels_frequency.keys())
         num_expanded_symbols = len(labels_expanded)
         print("Concatenating WLE Expanded Labels Applied to datasets: vocab=", num_expanded_symbols)
         print(labels_expanded)
@@ -202,8 +224,10 @@ def download_entire_dataset(dataset_name, num_data, labels, method, cache_dir, a
             pickle.dump( (labels_expanded, labels_frequency), fout)
 
     elif apply_gwle_flag:
-        dataset_parts_expand, labels_expanded, labels_frequency = wle.apply_cwle_for_datasets(dataset_parts, n_hop)
-        dataset_parts = dataset_parts_expand
+        wle_transformer = wle.WLETransformer('cwle', k=n_hop)
+        dataset_parts = wle_transformer.fit_transform(dataset_parts)
+        labels_frequency = wle_transformer.labels_frequencies[-1]
+        labels_expanded = list(labels_frequency.keys())
         num_expanded_symbols = len(labels_expanded)
         print("Gated-sum WLE Expanded Labels Applied to datasets: vocab=", num_expanded_symbols)
         print(labels_expanded)
@@ -225,6 +249,10 @@ def download_entire_dataset(dataset_name, num_data, labels, method, cache_dir, a
     else:
         labels_expanded = []
 
+    if wle_transformer is not None:
+        # the fitted WLE is saved with the model to apply it to new molecules
+        wle_transformer.save(os.path.join(cache_dir, WLE_TRANSFORMER_FILENAME))
+
     # ToDO: scaler should be placed here
     # ToDo: fit the scaler
     # ToDo: transform dataset_parts[0-2]
@@ -343,16 +371,21 @@ def main():
     # ToDo: set label_scaler always None
     # Set up the predictor.
 
+    # The embedding includes the fallback label of the unknown expanded
+    # labels, which are given to new molecules at the prediction.
+    if apply_wle_flag or apply_cwle_flag or apply_gwle_flag:
+        wle_transformer = wle.WLETransformer.load(
+            os.path.join(cache_dir, WLE_TRANSFORMER_FILENAME))
+
     if apply_wle_flag:
         # find the num_atoms
-        max_symbol_index = wle.findmaxidx(dataset_parts)
+        max_symbol_index = wle_transformer.get_num_labels()
         print("number of expanded symbols (WLE) = ", max_symbol_index)
         predictor = set_up_predictor(
             method, n_unit, conv_layers, class_num,
             label_scaler=scaler, n_atom_types=max_symbol_index)
     elif apply_cwle_flag or apply_gwle_flag:
-        n_wle_types = wle.findmaxidx(
-            dataset_parts, 'wle_label')
+        n_wle_types = wle_transformer.get_num_labels()
         # Kenta Oono (oono@preferred.jp)
         # In the previous implementation, we use MAX_WLE_NUM
         # as the dimension of one-hot vectors for WLE labels
@@ -462,6 +495,11 @@ def main():
     print('Saving the trained model to {}...'.format(model_path))
     model.save_pickle(model_path, protocol=args.protocol)
 
+    # Save the fitted WLE with the model, which is used by the prediction.
+    wle_transformer_path = os.path.join(cache_dir, WLE_TRANSFORMER_FILENAME)
+    if os.path.exists(wle_transformer_path):
+        shutil.copy(wle_transformer_path, model_dir)
+
     # dump the parameter, if CWLE
     #if apply_cwle_flag:
     #    cwle = predictor.graph_conv
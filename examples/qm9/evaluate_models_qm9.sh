@@ -13,6 +13,10 @@ label=${3:-all}
 
 echo evaluating label ${label}
 
+# Parse the dataset once for all methods, `train_qm9.py` and
+# `predict_qm9.py` load the cached dataset of each method.
+python preprocess_qm9.py --methods ${methods[@]} --label ${label}
+
 for method in ${methods[@]}
 do
     result_dir=${prefix}${method}
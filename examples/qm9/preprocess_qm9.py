@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+from __future__ import print_function
+
+import argparse
+import os
+
+import numpy
+
+from chainer_chemistry.dataset.preprocessors import CompositePreprocessor
+from chainer_chemistry import datasets as D
+from chainer_chemistry.datasets import NumpyTupleDataset
+
+
+def parse_arguments():
+    # Lists of supported preprocessing methods.
+    method_list = ['nfp', 'ggnn', 'schnet', 'weavenet', 'rsgcn', 'relgcn',
+                   'relgat', 'gin', 'gnnfilm', 'nfp_gwm', 'ggnn_gwm',
+                   'rsgcn_gwm', 'gin_gwm', 'megnet']
+    label_names = ['A', 'B', 'C', 'mu', 'alpha', 'homo', 'lumo', 'gap', 'r2',
+                   'zpve', 'U0', 'U', 'H', 'G', 'Cv']
+
+    # Set up the argument parser.
+    parser = argparse.ArgumentParser(
+        description='Preprocess QM9 for several methods at once.')
+    parser.add_argument('--methods', '-m', type=str, nargs='+',
+                        choices=method_list, default=['nfp'],
+                        help='method names')
+    parser.add_argument('--label', '-l', type=str,
+                        choices=label_names + ['all'], default='all',
+                        help='target label for regression; all means '
+                        'predicting all properties at once')
+    parser.add_argument('--num-data', type=int, default=-1,
+                        help='amount of data to be parsed; -1 indicates '
+                        'parsing all data.')
+    return parser.parse_args()
+
+
+def main():
+    # Parse the arguments.
+    args = parse_arguments()
+
+    if args.label != 'all':
+        labels = args.label
+    else:
+        labels = None
+
+    # The cached datasets are loaded by `train_qm9.py` and `predict_qm9.py`.
+    num_data = args.num_data
+    if num_data >= 0:
+        dataset_filename = 'data_{}.npz'.format(num_data)
+    else:
+        dataset_filename = 'data.npz'
+
+    cache_paths = {}
+    for method in args.methods:
+        cache_dir = os.path.join('input', '{}_{}'.format(method, args.label))
+        cache_paths[method] = os.path.join(cache_dir, dataset_filename)
+    methods = [method for method in args.methods
+               if not os.path.exists(cache_paths[method])]
+    if not methods:
+        print('All datasets are already cached.')
+        return
+
+    # Each molecule is parsed once for all methods.
+    print('Preprocessing dataset for {}...'.format(', '.join(methods)))
+    preprocessor = CompositePreprocessor.from_methods(methods)
+    if num_data >= 0:
+        # Select the first `num_data` samples from the dataset.
+        target_index = numpy.arange(num_data)
+        datasets = D.get_qm9(preprocessor, labels=labels,
+                             target_index=target_index)
+    else:
+        # Load the entire dataset.
+        datasets = D.get_qm9(preprocessor, labels=labels)
+
+    for method, dataset in datasets.items():
+        cache_dir = os.path.dirname(cache_paths[method])
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        if isinstance(dataset, NumpyTupleDataset):
+            print('Saving the dataset of {} to {}.'
+                  .format(method, cache_paths[method]))
+            NumpyTupleDataset.save(cache_paths[method], dataset)
+        # TODO: support caching of other dataset type...
+
+
+if __name__ == '__main__':
+    main()
@@ -6,7 +6,7 @@ from setuptools import find_packages
 setup_requires = []
 install_requires = [
     'chainer >=7.0.0',
-    'joblib',
+    'joblib >=1.3',
     'matplotlib',
     'pandas',
     'scikit-learn',
@@ -0,0 +1,35 @@
+import numpy
+import pytest
+
+from chainer_chemistry.dataset.parsers.base_parser import BaseFileParser
+from chainer_chemistry.dataset.parsers.feature_collector import FeatureCollector  # NOQA
+
+
+def test_parse_chunks_merged_in_order():
+    events = []
+
+    def parse_fn(chunk):
+        events.append(('parse', chunk))
+        return [numpy.array([chunk])], [str(chunk)], [True], 0
+
+    class RecordingCollector(FeatureCollector):
+
+        def extend(self, features):
+            events.append(('merge', int(features[0][0])))
+            super(RecordingCollector, self).extend(features)
+
+    features, smiles, is_successful, fail_count = \
+        BaseFileParser._parse_chunks(parse_fn, range(4),
+                                     collector=RecordingCollector())
+    numpy.testing.assert_array_equal(features[0], [0, 1, 2, 3])
+    assert smiles == ['0', '1', '2', '3']
+    assert is_successful == [True] * 4
+    assert fail_count == 0
+    # each chunk is merged before the next one is parsed, so the parsed
+    # results of all chunks are not kept at once.
+    assert events == [(event, key) for key in range(4)
+                      for event in ('parse', 'merge')]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '-s'])
@@ -1,5 +1,6 @@
 import os
 
+import mock
 import numpy
 import pandas
 import pytest
@@ -168,5 +169,93 @@ def test_csv_parser_return_is_successful(csv_file_invalid, mols, label_a):
         check_features(dataset[i], expect, label_a[i])
 
 
+@pytest.mark.parametrize('shard_size', [1, 2, 10])
+@pytest.mark.parametrize('out_size', [-1, 10])
+def test_csv_parser_shard_dir(tmpdir, csv_file_invalid, mols, label_a,
+                              shard_size, out_size):
+    # features are written into the shards directly when `out_size` is
+    # specified.
+    preprocessor = NFPPreprocessor(out_size=out_size)
+    parser = CSVFileParser(preprocessor, labels='labelA',
+                           smiles_col='smiles')
+    shard_dir = os.path.join(str(tmpdir), 'shards')
+    result = parser.parse(csv_file_invalid, return_smiles=True,
+                          return_is_successful=True, shard_dir=shard_dir,
+                          shard_size=shard_size)
+    expect = parser.parse(csv_file_invalid, return_smiles=True,
+                          return_is_successful=True)
+
+    dataset = result['dataset']
+    assert len(dataset) == 3
+    numpy.testing.assert_array_equal(result['smiles'], expect['smiles'])
+    numpy.testing.assert_array_equal(result['is_successful'],
+                                     expect['is_successful'])
+    for i in range(3):
+        expect_features = preprocessor.get_input_features(mols[i])
+        check_features(dataset[i], expect_features, label_a[i])
+
+
+def test_csv_parser_shard_dir_memmap_dir(tmpdir, csv_file_invalid):
+    parser = CSVFileParser(NFPPreprocessor(), labels='labelA',
+                           smiles_col='smiles')
+    with pytest.raises(ValueError):
+        parser.parse(csv_file_invalid, shard_dir=str(tmpdir),
+                     memmap_dir=str(tmpdir))
+
+
+def test_csv_parser_shard_dir_target_index(tmpdir, csv_file_invalid):
+    preprocessor = NFPPreprocessor()
+    parser = CSVFileParser(preprocessor, labels='labelA',
+                           smiles_col='smiles')
+    shard_dir = os.path.join(str(tmpdir), 'shards')
+    result = parser.parse(csv_file_invalid, return_smiles=True,
+                          target_index=[0, 3, 4], shard_dir=shard_dir,
+                          shard_size=2)
+    expect = parser.parse(csv_file_invalid, return_smiles=True,
+                          target_index=[0, 3, 4])
+    assert len(result['dataset']) == 2
+    numpy.testing.assert_array_equal(result['smiles'], expect['smiles'])
+    # the rows can not be reordered or duplicated in streaming mode.
+    for target_index in ([4, 0, 3], [0, 0, 3]):
+        with pytest.raises(ValueError):
+            parser.parse(csv_file_invalid, target_index=target_index,
+                         shard_dir=os.path.join(str(tmpdir), 'invalid'))
+
+
+def test_csv_parser_shard_dir_work_dir(tmpdir, csv_file_invalid):
+    shard_dir = os.path.join(str(tmpdir), 'shards')
+    work_dir = os.path.join(str(tmpdir), 'work')
+    parser = CSVFileParser(NFPPreprocessor(), labels='labelA',
+                           smiles_col='smiles')
+    kwargs = dict(return_smiles=True, return_is_successful=True,
+                  shard_dir=shard_dir, shard_size=2, work_dir=work_dir)
+    num_calls = [0]
+    featurize = parser._featurize
+
+    def interrupted_featurize(*args, **kwargs):
+        if num_calls[0] == 2:
+            raise RuntimeError('interrupted')
+        num_calls[0] += 1
+        return featurize(*args, **kwargs)
+
+    with mock.patch.object(parser, '_featurize',
+                           side_effect=interrupted_featurize):
+        with pytest.raises(RuntimeError):
+            parser.parse(csv_file_invalid, **kwargs)
+    with mock.patch.object(parser, '_featurize', side_effect=featurize) as m:
+        result = parser.parse(csv_file_invalid, **kwargs)
+        # only the last shard is featurized
+        assert m.call_count == 1
+
+    expect = parser.parse(csv_file_invalid, return_smiles=True,
+                          return_is_successful=True)
+    assert len(result['dataset']) == 3
+    for a, e in six.moves.zip(result['dataset'], expect['dataset']):
+        check_input_features(a, e)
+    numpy.testing.assert_array_equal(result['smiles'], expect['smiles'])
+    numpy.testing.assert_array_equal(result['is_successful'],
+                                     expect['is_successful'])
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-s', '-v'])
@@ -1,3 +1,4 @@
+import mock
 import numpy
 import pandas
 import pytest
@@ -5,7 +6,9 @@ from rdkit import Chem
 import six
 
 from chainer_chemistry.dataset.parsers import DataFrameParser
+from chainer_chemistry.dataset import RaggedArray
 from chainer_chemistry.dataset.preprocessors import NFPPreprocessor
+from chainer_chemistry.datasets.sharded_numpy_tuple_dataset import ShardedNumpyTupleDataset  # NOQA
 
 
 @pytest.fixture
@@ -149,6 +152,234 @@ def test_data_frame_parser_return_is_successful(mols, label_a):
         check_features(dataset[i], expect, label_a[i])
 
 
+@pytest.mark.parametrize('chunksize', [1, 2, 10])
+def test_data_frame_parser_n_jobs(mols, label_a, chunksize):
+    """parallel parse must give the same result as the serial one."""
+    preprocessor = NFPPreprocessor()
+    parser = DataFrameParser(preprocessor, labels='labelA',
+                             smiles_col='smiles')
+    df = pandas.DataFrame({
+        'smiles': ['var', 'CN=C=O', 'hoge', 'Cc1ccccc1', 'CC1=CC2CC(CC1)O2'],
+        'labelA': [0., 2.1, 0., 5.3, -1.2],
+    })
+    result = parser.parse(df, return_smiles=True, return_is_successful=True,
+                          n_jobs=2, chunksize=chunksize)
+    expect_result = parser.parse(df, return_smiles=True,
+                                 return_is_successful=True)
+
+    dataset = result['dataset']
+    assert len(dataset) == 3
+    for i in range(3):
+        expect = preprocessor.get_input_features(mols[i])
+        check_features(dataset[i], expect, label_a[i])
+    numpy.testing.assert_array_equal(result['smiles'],
+                                     expect_result['smiles'])
+    numpy.testing.assert_array_equal(result['is_successful'],
+                                     expect_result['is_successful'])
+
+
+def test_data_frame_parser_n_jobs_invalid_chunksize(data_frame):
+    parser = DataFrameParser(NFPPreprocessor(), smiles_col='smiles')
+    with pytest.raises(ValueError):
+        parser.parse(data_frame, n_jobs=2, chunksize=0)
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+@pytest.mark.parametrize('use_memmap_dir', [False, True])
+def test_data_frame_parser_feature_spec(tmpdir, n_jobs, use_memmap_dir):
+    """features written into preallocated arrays must be identical"""
+    df = pandas.DataFrame({
+        'smiles': ['var', 'CN=C=O', 'hoge', 'Cc1ccccc1', 'CC1=CC2CC(CC1)O2'],
+        'labelA': [0., 2.1, 0., 5.3, -1.2],
+    })
+    parser = DataFrameParser(NFPPreprocessor(out_size=10), labels='labelA',
+                             smiles_col='smiles')
+    memmap_dir = str(tmpdir) if use_memmap_dir else None
+    result = parser.parse(df, n_jobs=n_jobs, chunksize=2,
+                          memmap_dir=memmap_dir)
+    with mock.patch.object(NFPPreprocessor, 'get_feature_spec',
+                           return_value=None):
+        expect = parser.parse(df)
+
+    actual_datasets = result['dataset'].get_datasets()
+    expect_datasets = expect['dataset'].get_datasets()
+    assert len(actual_datasets) == len(expect_datasets)
+    for a, e in six.moves.zip(actual_datasets, expect_datasets):
+        assert a.dtype == e.dtype
+        numpy.testing.assert_array_equal(a, e)
+    if use_memmap_dir:
+        assert isinstance(actual_datasets[0], numpy.memmap)
+        loaded = ShardedNumpyTupleDataset.load_shard(memmap_dir)
+        for a, e in six.moves.zip(loaded.get_datasets(), expect_datasets):
+            numpy.testing.assert_array_equal(a, e)
+
+
+def test_data_frame_parser_ragged_array(tmpdir, data_frame, mols):
+    """features of different shapes are stored in `RaggedArray`"""
+    preprocessor = NFPPreprocessor()
+    parser = DataFrameParser(preprocessor, labels='labelA',
+                             smiles_col='smiles')
+    dataset = parser.parse(data_frame)['dataset']
+    atoms, adjs, labels = dataset.get_datasets()
+    assert isinstance(atoms, RaggedArray)
+    assert isinstance(adjs, RaggedArray)
+    assert isinstance(labels, numpy.ndarray)
+    for i in range(3):
+        expect = preprocessor.get_input_features(mols[i])
+        check_input_features(dataset[i][:2], expect)
+
+    shard_path = str(tmpdir)
+    ShardedNumpyTupleDataset.save_shard(shard_path, dataset.get_datasets())
+    loaded = ShardedNumpyTupleDataset.load_shard(shard_path)
+    for a, e in six.moves.zip(loaded, dataset):
+        check_input_features(a, e)
+
+
+class InterruptedDataFrameParser(DataFrameParser):
+    """Parser which fails at the rows from `fail_from`, if it is set"""
+
+    fail_from = None
+    parsed_rows = []
+
+    def _parse_rows(self, df, *args, **kwargs):
+        if self.fail_from is not None and df.index[-1] >= self.fail_from:
+            raise RuntimeError('interrupted')
+        self.parsed_rows.extend(df.index)
+        return super(InterruptedDataFrameParser, self)._parse_rows(
+            df, *args, **kwargs)
+
+
+def test_data_frame_parser_work_dir(tmpdir):
+    work_dir = str(tmpdir)
+    df = pandas.DataFrame({
+        'smiles': ['var', 'CN=C=O', 'hoge', 'Cc1ccccc1', 'CC1=CC2CC(CC1)O2'],
+        'labelA': [0., 2.1, 0., 5.3, -1.2],
+    })
+    parser = InterruptedDataFrameParser(NFPPreprocessor(), labels='labelA',
+                                        smiles_col='smiles')
+    parser.parsed_rows = []
+    parser.fail_from = 3
+    with pytest.raises(RuntimeError):
+        parser.parse(df, return_smiles=True, return_is_successful=True,
+                     chunksize=2, work_dir=work_dir)
+    assert parser.parsed_rows == [0, 1]
+
+    # resume from the committed chunk
+    parser.parsed_rows = []
+    parser.fail_from = None
+    result = parser.parse(df, return_smiles=True, return_is_successful=True,
+                          chunksize=2, work_dir=work_dir)
+    assert parser.parsed_rows == [2, 3, 4]
+
+    expect = parser.parse(df, return_smiles=True, return_is_successful=True)
+    assert len(result['dataset']) == len(expect['dataset'])
+    for a, e in six.moves.zip(result['dataset'], expect['dataset']):
+        check_input_features(a, e)
+    numpy.testing.assert_array_equal(result['smiles'], expect['smiles'])
+    numpy.testing.assert_array_equal(result['is_successful'],
+                                     expect['is_successful'])
+
+
+def test_data_frame_parser_work_dir_different_parse(tmpdir, data_frame):
+    work_dir = str(tmpdir)
+    parser = DataFrameParser(NFPPreprocessor(), labels='labelA',
+                             smiles_col='smiles')
+    parser.parse(data_frame, work_dir=work_dir)
+    with pytest.raises(ValueError):
+        parser.parse(data_frame, target_index=[0, 1], work_dir=work_dir)
+    with pytest.raises(ValueError):
+        DataFrameParser(NFPPreprocessor(max_atoms=10), labels='labelA',
+                        smiles_col='smiles').parse(data_frame,
+                                                   work_dir=work_dir)
+
+
+@pytest.fixture()
+def data_frame_duplicated():
+    # 'OCC' and 'C(O)C' are the same molecule as 'CCO'
+    return pandas.DataFrame({
+        'smiles': ['CCO', 'var', 'Cc1ccccc1', 'OCC', 'c1ccccc1C', 'C(O)C'],
+        'labelA': [1., 0., 2., 3., numpy.nan, 8.],
+    })
+
+
+@pytest.mark.parametrize('label_reducer,expect_labels', [
+    ('mean', [4., 2.]),
+    ('max', [8., 2.]),
+    ('first', [1., 2.]),
+    (lambda x: len(x), [3., 2.]),
+])
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_data_frame_parser_deduplicate(data_frame_duplicated, label_reducer,
+                                       expect_labels, n_jobs):
+    preprocessor = NFPPreprocessor()
+    parser = DataFrameParser(preprocessor, labels='labelA',
+                             smiles_col='smiles')
+    m = mock.patch.object(NFPPreprocessor, 'get_input_features',
+                          side_effect=preprocessor.get_input_features)
+    m_prepare = mock.patch.object(
+        NFPPreprocessor, 'prepare_smiles_and_mol',
+        side_effect=preprocessor.prepare_smiles_and_mol)
+    with m as m, m_prepare as m_prepare:
+        result = parser.parse(data_frame_duplicated, return_smiles=True,
+                              return_is_successful=True, deduplicate=True,
+                              label_reducer=label_reducer, n_jobs=n_jobs,
+                              chunksize=2)
+        if n_jobs == 1:
+            # featurized once for each unique molecule
+            assert m.call_count == 2
+            # the mols prepared for the deduplication are featurized
+            # without being prepared again.
+            assert m_prepare.call_count == 5
+
+    dataset = result['dataset']
+    assert len(dataset) == 2
+    numpy.testing.assert_array_equal(result['smiles'], ['CCO', 'Cc1ccccc1'])
+    for i, smiles in enumerate(['CCO', 'Cc1ccccc1']):
+        expect = preprocessor.get_input_features(Chem.MolFromSmiles(smiles))
+        check_features(dataset[i], expect, expect_labels[i])
+    numpy.testing.assert_array_equal(result['index_map'],
+                                     [0, -1, 1, 0, 1, 0])
+    numpy.testing.assert_array_equal(
+        result['is_successful'], [True, False, True, True, True, True])
+
+
+def test_data_frame_parser_deduplicate_feature_failure():
+    preprocessor = NFPPreprocessor(max_atoms=3)
+    parser = DataFrameParser(preprocessor, smiles_col='smiles')
+    df = pandas.DataFrame({'smiles': ['CCCC', 'CCO', 'C(C)CC', 'OCC']})
+    result = parser.parse(df, deduplicate=True)
+    assert len(result['dataset']) == 1
+    assert result['is_successful'] is None
+    numpy.testing.assert_array_equal(result['index_map'], [-1, 0, -1, 0])
+
+
+def test_data_frame_parser_deduplicate_prepare_error():
+    class FailingPreprocessor(NFPPreprocessor):
+
+        def prepare_smiles_and_mol(self, mol):
+            if mol.GetNumAtoms() == 4:
+                raise RuntimeError('unexpected')
+            return super(FailingPreprocessor, self).prepare_smiles_and_mol(
+                mol)
+
+    logger = mock.MagicMock()
+    parser = DataFrameParser(FailingPreprocessor(), smiles_col='smiles',
+                             logger=logger)
+    df = pandas.DataFrame({'smiles': ['CCCC', 'CCO', 'OCC']})
+    result = parser.parse(df, deduplicate=True)
+    assert len(result['dataset']) == 1
+    numpy.testing.assert_array_equal(result['index_map'], [-1, 0, 0])
+    # the unexpected error is not hidden.
+    assert logger.warning.call_count == 1
+
+
+def test_data_frame_parser_deduplicate_invalid_reducer(data_frame):
+    parser = DataFrameParser(NFPPreprocessor(), labels='labelA',
+                             smiles_col='smiles')
+    with pytest.raises(ValueError):
+        parser.parse(data_frame, deduplicate=True, label_reducer='median')
+
+
 def test_data_frame_parser_extract_total_num(data_frame):
     """test `labels` option and retain_smiles=True."""
     preprocessor = NFPPreprocessor()
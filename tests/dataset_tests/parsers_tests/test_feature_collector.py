@@ -0,0 +1,151 @@
+import os
+
+import numpy
+import pytest
+
+from chainer_chemistry.dataset.parsers.feature_collector import FeatureCollector  # NOQA
+from chainer_chemistry.datasets.sharded_numpy_tuple_dataset import ShardedNumpyTupleDataset  # NOQA
+
+
+spec = (((3,), numpy.int32), ((3, 3), numpy.float32))
+
+
+def make_examples(n, shape=(3,)):
+    examples = []
+    for i in range(n):
+        atom = numpy.full(shape, i, dtype=numpy.int32)
+        adj = numpy.full(shape + shape, i / 2., dtype=numpy.float32)
+        examples.append((atom, adj, [i * 1.5]))
+    return examples
+
+
+def check_result(actual, examples):
+    assert len(actual) == 3
+    for j in range(2):
+        numpy.testing.assert_array_equal(
+            numpy.asarray(actual[j]), numpy.asarray([e[j] for e in examples]))
+        assert numpy.asarray(actual[j]).dtype == examples[0][j].dtype
+    assert list(actual[2]) == [e[2] for e in examples]
+
+
+@pytest.mark.parametrize('capacity', [None, 5, 10])
+def test_append(capacity):
+    examples = make_examples(5)
+    collector = FeatureCollector(spec, capacity=capacity)
+    for example in examples:
+        collector.append(example)
+    assert len(collector) == 5
+    result = collector.finish()
+    assert isinstance(result[0], numpy.ndarray)
+    assert isinstance(result[1], numpy.ndarray)
+    assert isinstance(result[2], list)
+    check_result(result, examples)
+
+
+def test_append_grow():
+    examples = make_examples(40)
+    collector = FeatureCollector(spec)
+    for example in examples:
+        collector.append(example)
+    check_result(collector.finish(), examples)
+
+
+def test_append_without_spec():
+    examples = make_examples(3)
+    collector = FeatureCollector()
+    for example in examples:
+        collector.append(example)
+    result = collector.finish()
+    assert all(isinstance(column, list) for column in result)
+    check_result(result, examples)
+
+
+def test_append_fall_back_to_lists():
+    examples = make_examples(3) + make_examples(2, shape=(4,))
+    collector = FeatureCollector(spec, capacity=5)
+    for example in examples:
+        collector.append(example)
+    result = collector.finish()
+    assert all(isinstance(column, list) for column in result)
+    for j in range(2):
+        for actual, example in zip(result[j], examples):
+            numpy.testing.assert_array_equal(actual, example[j])
+
+
+@pytest.mark.parametrize('chunk_spec,expect_type', [
+    (spec, numpy.ndarray), (None, list)])
+def test_extend(chunk_spec, expect_type):
+    examples = make_examples(7)
+    chunk_collectors = [FeatureCollector(spec), FeatureCollector(chunk_spec)]
+    for example in examples[:4]:
+        chunk_collectors[0].append(example)
+    for example in examples[4:]:
+        chunk_collectors[1].append(example)
+
+    collector = FeatureCollector(spec, capacity=7)
+    for chunk_collector in chunk_collectors:
+        collector.extend(chunk_collector.finish())
+    result = collector.finish()
+    assert isinstance(result[0], expect_type)
+    check_result(result, examples)
+
+
+def test_finish_empty():
+    collector = FeatureCollector(spec, capacity=3)
+    assert collector.finish() is None
+
+
+def test_finish_twice():
+    collector = FeatureCollector(spec, capacity=3)
+    collector.finish()
+    with pytest.raises(RuntimeError):
+        collector.finish()
+
+
+@pytest.mark.parametrize('capacity', [5, 8])
+def test_memmap_dir(tmpdir, capacity):
+    memmap_dir = os.path.join(str(tmpdir), 'features')
+    examples = make_examples(5)
+    collector = FeatureCollector(spec, capacity=capacity,
+                                 memmap_dir=memmap_dir)
+    for example in examples:
+        collector.append(example)
+    result = collector.finish()
+    assert isinstance(result[0], numpy.memmap)
+    assert isinstance(result[1], numpy.memmap)
+    check_result(result, examples)
+
+    dataset = ShardedNumpyTupleDataset.load_shard(memmap_dir)
+    assert len(dataset) == 5
+    check_result(dataset.get_datasets(), examples)
+
+
+def test_memmap_dir_fall_back_to_lists(tmpdir):
+    memmap_dir = os.path.join(str(tmpdir), 'features')
+    examples = make_examples(3)
+    collector = FeatureCollector((((4,), numpy.int32),), capacity=3,
+                                 memmap_dir=memmap_dir)
+    for example in examples:
+        collector.append(example)
+    result = collector.finish()
+    check_result(result, examples)
+    dataset = ShardedNumpyTupleDataset.load_shard(memmap_dir)
+    check_result(dataset.get_datasets(), examples)
+
+
+def test_memmap_dir_exceeds_capacity(tmpdir):
+    collector = FeatureCollector(spec, capacity=1,
+                                 memmap_dir=str(tmpdir))
+    examples = make_examples(2)
+    collector.append(examples[0])
+    with pytest.raises(ValueError):
+        collector.append(examples[1])
+
+
+def test_memmap_dir_without_capacity(tmpdir):
+    with pytest.raises(ValueError):
+        FeatureCollector(spec, memmap_dir=str(tmpdir))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '-s'])
@@ -6,6 +6,9 @@ from rdkit import Chem
 import six
 
 from chainer_chemistry.dataset.parsers import SDFFileParser
+from chainer_chemistry.dataset.parsers import sdf_file_parser
+from chainer_chemistry.dataset.parsers.sdf_file_parser import iter_sdf_records  # NOQA
+from chainer_chemistry.dataset.parsers.sdf_file_parser import mol_from_sdf_record  # NOQA
 from chainer_chemistry.dataset.preprocessors import NFPPreprocessor
 
 
@@ -142,5 +145,136 @@ def test_sdf_file_parser_extract_total_num(sdf_file):
     assert num == 3
 
 
+@pytest.fixture()
+def sdf_file_with_label(tmpdir):
+    fname = os.path.join(str(tmpdir), 'test_label.sdf')
+    writer = Chem.SDWriter(fname)
+    for i, smiles in enumerate(['CCCCCCCCCCCC', 'CN=C=O', 'CCCCCCCCCCCCCCCC',
+                                'Cc1ccccc1', 'CC1=CC2CC(CC1)O2']):
+        mol = Chem.MolFromSmiles(smiles)
+        mol.SetProp('labelA', str(i))
+        writer.write(mol)
+    writer.close()
+    # append broken record
+    with open(fname, 'a') as f:
+        f.write('broken\n\n\n  1  0  0  0  0  0  0  0  0  0999 V2000\n'
+                'M  END\n$$$$\n')
+    return fname
+
+
+def check_same_result(actual, expect):
+    assert len(actual['dataset']) == len(expect['dataset'])
+    for a, e in six.moves.zip(actual['dataset'], expect['dataset']):
+        check_input_features(a, e)
+    numpy.testing.assert_array_equal(actual['smiles'], expect['smiles'])
+    numpy.testing.assert_array_equal(actual['is_successful'],
+                                     expect['is_successful'])
+
+
+@pytest.mark.parametrize('n_jobs,chunksize', [(1, 1000), (2, 1), (2, 4)])
+def test_sdf_file_parser_streaming(sdf_file_with_label, n_jobs, chunksize):
+    preprocessor = NFPPreprocessor(max_atoms=10)
+    parser = SDFFileParser(preprocessor, labels='labelA')
+    expect = parser.parse(sdf_file_with_label, return_smiles=True,
+                          return_is_successful=True)
+    actual = parser.parse(sdf_file_with_label, return_smiles=True,
+                          return_is_successful=True, streaming=True,
+                          n_jobs=n_jobs, chunksize=chunksize)
+    assert len(actual['is_successful']) == 6
+    check_same_result(actual, expect)
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_sdf_file_parser_streaming_target_index(sdf_file_with_label, n_jobs):
+    preprocessor = NFPPreprocessor()
+    parser = SDFFileParser(preprocessor, labels='labelA')
+    expect = parser.parse(sdf_file_with_label, return_smiles=True,
+                          return_is_successful=True, target_index=[1, 3, 4])
+    # records are parsed in the order of the file.
+    actual = parser.parse(sdf_file_with_label, return_smiles=True,
+                          return_is_successful=True, target_index=[4, 1, 3],
+                          streaming=True, n_jobs=n_jobs, chunksize=1)
+    check_same_result(actual, expect)
+
+
+def test_sdf_file_parser_streaming_lazy(sdf_file_with_label, monkeypatch):
+    num_read = [0]
+
+    def counting_iter_sdf_records(*args, **kwargs):
+        for record in iter_sdf_records(*args, **kwargs):
+            num_read[0] += 1
+            yield record
+
+    num_read_at_parse = []
+
+    class CountingSDFFileParser(SDFFileParser):
+
+        def _parse_records(self, records, *args, **kwargs):
+            num_read_at_parse.append(num_read[0])
+            return super(CountingSDFFileParser, self)._parse_records(
+                records, *args, **kwargs)
+
+    monkeypatch.setattr(sdf_file_parser, 'iter_sdf_records',
+                        counting_iter_sdf_records)
+    parser = CountingSDFFileParser(NFPPreprocessor(), labels='labelA')
+    result = parser.parse(sdf_file_with_label, return_is_successful=True,
+                          streaming=True, chunksize=2)
+    assert len(result['is_successful']) == 6
+    # records are read only as far as the chunk being parsed.
+    assert num_read_at_parse[0] < 6
+    assert len(num_read_at_parse) == 3
+
+
+class InterruptedSDFFileParser(SDFFileParser):
+    """Parser which fails after `max_calls` chunks, if it is set"""
+
+    max_calls = None
+    num_calls = 0
+
+    def _parse_mols(self, *args, **kwargs):
+        if self.max_calls is not None and self.num_calls >= self.max_calls:
+            raise RuntimeError('interrupted')
+        self.num_calls += 1
+        return super(InterruptedSDFFileParser, self)._parse_mols(
+            *args, **kwargs)
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_sdf_file_parser_work_dir(tmpdir, sdf_file_with_label, streaming):
+    work_dir = os.path.join(str(tmpdir), 'work')
+    parser = InterruptedSDFFileParser(NFPPreprocessor(max_atoms=10),
+                                      labels='labelA')
+    expect = parser.parse(sdf_file_with_label, return_smiles=True,
+                          return_is_successful=True)
+
+    kwargs = dict(return_smiles=True, return_is_successful=True,
+                  streaming=streaming, chunksize=2, work_dir=work_dir)
+    parser.num_calls = 0
+    parser.max_calls = 1
+    with pytest.raises(RuntimeError):
+        parser.parse(sdf_file_with_label, **kwargs)
+
+    # resume from the committed chunk
+    parser.num_calls = 0
+    parser.max_calls = None
+    actual = parser.parse(sdf_file_with_label, **kwargs)
+    assert parser.num_calls == 2
+    check_same_result(actual, expect)
+
+
+def test_iter_sdf_records(sdf_file_with_label):
+    records = list(iter_sdf_records(sdf_file_with_label))
+    assert len(records) == 6
+    assert all(r.rstrip().endswith('$$$$') for r in records)
+    assert Chem.MolToSmiles(mol_from_sdf_record(records[1])) == 'CN=C=O'
+    assert mol_from_sdf_record(records[1]).GetProp('labelA') == '1'
+    assert mol_from_sdf_record(records[5]) is None
+
+    records = list(iter_sdf_records(sdf_file_with_label, target_index={2}))
+    assert len(records) == 1
+    assert Chem.MolToSmiles(mol_from_sdf_record(records[0])) == \
+        'CCCCCCCCCCCCCCCC'
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-s', '-v'])
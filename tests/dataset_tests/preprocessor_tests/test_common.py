@@ -147,6 +147,63 @@ class TestConstructDiscreteEdgeMatrix(object):
         with pytest.raises(ValueError):
             adj = common.construct_discrete_edge_matrix(sample_molecule_2, 6)  # NOQA
 
+    def test_add_self_connection_channel_padding(self, sample_molecule_2):
+        adj = common.construct_discrete_edge_matrix(
+            sample_molecule_2, 8, add_self_connection_channel=True)
+        assert adj.shape == (5, 8, 8)
+        numpy.testing.assert_equal(adj[4], numpy.diag([1.] * 7 + [0.]))
+
+    def test_bond_table(self, sample_molecule_2):
+        bond_table = common.get_bond_table(sample_molecule_2)
+        adj = common.construct_discrete_edge_matrix(sample_molecule_2,
+                                                    bond_table=bond_table)
+        numpy.testing.assert_equal(adj, self.expect_adj)
+
+    def test_unknown_bond_type(self):
+        mol = Chem.RWMol(Chem.MolFromSmiles('CC'))
+        mol.GetBondWithIdx(0).SetBondType(Chem.BondType.ZERO)
+        with pytest.raises(KeyError):
+            common.construct_discrete_edge_matrix(mol)
+
+
+class TestGetBondTable(object):
+
+    def test_normal(self, sample_molecule):
+        begin, end, bond_type = common.get_bond_table(sample_molecule)
+        numpy.testing.assert_equal(begin, [0, 1, 2])
+        numpy.testing.assert_equal(end, [1, 2, 3])
+        numpy.testing.assert_equal(bond_type, [0, 1, 1])
+
+    def test_no_bond(self):
+        begin, end, bond_type = common.get_bond_table(Chem.MolFromSmiles('C'))
+        assert begin.shape == end.shape == bond_type.shape == (0,)
+        adj = common.construct_adj_matrix(Chem.MolFromSmiles('C'))
+        numpy.testing.assert_equal(adj, [[1.]])
+
+
+@pytest.mark.parametrize('smiles', ['Cc1ccccc1', 'CN=C=O', 'C#CC.O', 'C'])
+@pytest.mark.parametrize('self_connection', [True, False])
+def test_construct_edge_index(smiles, self_connection):
+    mol = Chem.MolFromSmiles(smiles)
+    edge_index = common.construct_edge_index(
+        mol, self_connection=self_connection)
+    adj = common.construct_adj_matrix(mol, self_connection=self_connection)
+    assert edge_index.shape[0] == 2
+    numpy.testing.assert_equal(edge_index, numpy.nonzero(adj))
+
+
+@pytest.mark.parametrize('smiles', ['Cc1ccccc1', 'CN=C=O', 'C#CC.O', 'C'])
+@pytest.mark.parametrize('add_self_connection_channel', [True, False])
+def test_construct_discrete_edge_index(smiles, add_self_connection_channel):
+    mol = Chem.MolFromSmiles(smiles)
+    edge_index, edge_type = common.construct_discrete_edge_index(
+        mol, add_self_connection_channel=add_self_connection_channel)
+    adj = common.construct_discrete_edge_matrix(
+        mol, add_self_connection_channel=add_self_connection_channel)
+    expect_type, expect_src, expect_dst = numpy.nonzero(adj)
+    numpy.testing.assert_equal(edge_index, [expect_src, expect_dst])
+    numpy.testing.assert_equal(edge_type, expect_type)
+
 
 def test_construct_super_node_feature_adj_ndim2(sample_molecule):
     adj = common.construct_adj_matrix(sample_molecule)
@@ -1,6 +1,24 @@
+import json
+
+import numpy
 import pytest
+from rdkit import Chem
 
+from chainer_chemistry.dataset.neighbor_list import construct_neighbor_list
+from chainer_chemistry.dataset.preprocessors import cgcnn_preprocessor
 from chainer_chemistry.dataset.preprocessors import CGCNNPreprocessor
+from chainer_chemistry.dataset.preprocessors import MolFeatureExtractionError
+
+
+@pytest.fixture
+def atom_init_json(tmpdir, monkeypatch):
+    # small atom features instead of the downloaded ones.
+    filepath = str(tmpdir.join('atom_init.json'))
+    with open(filepath, 'w') as f:
+        json.dump({str(z): [float(z), 1.0] for z in range(1, 10)}, f)
+    monkeypatch.setattr(cgcnn_preprocessor, 'get_atom_init_json_filepath',
+                        lambda: filepath)
+    return filepath
 
 
 def test_cgcnn_preprocessor_init():
@@ -8,5 +26,52 @@ def test_cgcnn_preprocessor_init():
     print('pp.atom_features', pp.atom_features)
 
 
+def test_cgcnn_preprocessor_structure_features(atom_init_json):
+    pp = CGCNNPreprocessor(max_num_nbr=4, max_radius=2.5, expand_dim=10)
+    atomic_numbers = numpy.array([6, 8, 1, 1], dtype=numpy.int32)
+    coordinates = numpy.array([[0., 0., 0.], [3., 0., 0.],
+                               [-0.5, 0.9, 0.], [-0.5, -0.9, 0.]])
+    atom_feature, nbr_feature, nbr_idx = pp.get_structure_features(
+        atomic_numbers, coordinates)
+    numpy.testing.assert_array_equal(atom_feature[:, 0], atomic_numbers)
+    assert nbr_feature.shape == (4, 4, 10)
+    assert nbr_feature.dtype == numpy.float32
+    assert nbr_idx.dtype == numpy.int32
+    # oxygen is out of the radius of all atoms, and the rest is padded.
+    numpy.testing.assert_array_equal(
+        nbr_idx, [[2, 3, 0, 0], [0, 0, 0, 0], [0, 3, 0, 0], [0, 2, 0, 0]])
+    index, distance = construct_neighbor_list(coordinates, 2.5)
+    numpy.testing.assert_array_equal(
+        nbr_feature[0, :2], pp.gdf.expand_from_distances(distance[:2]))
+    numpy.testing.assert_array_equal(
+        nbr_feature[1], pp.gdf.expand_from_distances(numpy.full(4, 3.5)))
+
+
+def test_cgcnn_preprocessor_periodic(atom_init_json):
+    pp = CGCNNPreprocessor(max_num_nbr=6, max_radius=1.5)
+    _, _, nbr_idx = pp.get_structure_features(
+        numpy.array([1]), numpy.zeros((1, 3)), lattice=numpy.eye(3))
+    # 6 images of the atom itself.
+    numpy.testing.assert_array_equal(nbr_idx, numpy.zeros((1, 6)))
+
+
+def test_cgcnn_preprocessor_get_input_features(atom_init_json):
+    pp = CGCNNPreprocessor(max_num_nbr=5)
+    mol = Chem.MolFromSmiles('CC(=O)O')
+    atom_feature, nbr_feature, nbr_idx = pp.get_input_features(mol)
+    assert atom_feature.shape == (4, 2)
+    assert nbr_feature.shape == (4, 5, 40)
+    assert nbr_idx.shape == (4, 5)
+    # heavy atoms of a small molecule are all within the radius.
+    for i in range(4):
+        assert sorted(nbr_idx[i, :3]) == [j for j in range(4) if j != i]
+
+
+def test_cgcnn_preprocessor_unknown_atom(atom_init_json):
+    pp = CGCNNPreprocessor()
+    with pytest.raises(MolFeatureExtractionError):
+        pp.get_input_features(Chem.MolFromSmiles('CCl'))
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v', '-s'])
@@ -0,0 +1,157 @@
+import numpy
+import pandas
+import pytest
+from rdkit import Chem
+
+from chainer_chemistry.dataset.parsers import DataFrameParser
+from chainer_chemistry.dataset.parsers import SmilesParser
+from chainer_chemistry.dataset.preprocessors import CompositeDatasets
+from chainer_chemistry.dataset.preprocessors import CompositePreprocessor
+from chainer_chemistry.dataset.preprocessors import construct_adj_matrix
+from chainer_chemistry.dataset.preprocessors import construct_atomic_number_array  # NOQA
+from chainer_chemistry.dataset.preprocessors import get_bond_table
+from chainer_chemistry.dataset.preprocessors import GGNNPreprocessor
+from chainer_chemistry.dataset.preprocessors import GINSparsePreprocessor
+from chainer_chemistry.dataset.preprocessors import MolPreprocessor
+from chainer_chemistry.dataset.preprocessors import NFPPreprocessor
+from chainer_chemistry.dataset.preprocessors import share_intermediate_features  # NOQA
+from chainer_chemistry.dataset.preprocessors import WeaveNetPreprocessor
+
+
+smiles = ['CC(=O)Oc1ccccc1C(=O)O', 'C#N', 'CN1CCC[C@H]1c1cccnc1',
+          'c1ccc2ccccc2c1', 'OC(=O)C(N)Cc1ccc(O)cc1', 'CCO']
+
+
+def make_preprocessors(sparse=False):
+    preprocessors = [('nfp', NFPPreprocessor()),
+                     ('ggnn', GGNNPreprocessor(out_size=30, kekulize=True)),
+                     # fails for some molecules with hydrogens.
+                     ('weavenet', WeaveNetPreprocessor(max_atoms=20))]
+    if sparse:
+        # `SparseGraphDataset` is made only with labels.
+        preprocessors.append(('gin_sparse', GINSparsePreprocessor()))
+    return preprocessors
+
+
+def postprocess_label(y):
+    return numpy.asarray(y, dtype=numpy.float32)
+
+
+def check_dataset(actual, expect):
+    assert type(actual) is type(expect)
+    assert len(actual) == len(expect)
+    for i in range(len(expect)):
+        a, e = actual[i], expect[i]
+        if not isinstance(e, tuple):
+            a, e = (a.x, a.edge_index, a.y), (e.x, e.edge_index, e.y)
+        assert len(a) == len(e)
+        for a_feature, e_feature in zip(a, e):
+            assert a_feature.dtype == e_feature.dtype
+            numpy.testing.assert_array_equal(a_feature, e_feature)
+
+
+@pytest.mark.parametrize('labels', [None, 'y'])
+def test_composite_preprocessor(labels):
+    df = pandas.DataFrame({'smiles': smiles,
+                           'y': numpy.arange(len(smiles))})
+    sparse = labels is not None
+    pp = CompositePreprocessor(make_preprocessors(sparse))
+    datasets = DataFrameParser(
+        pp, labels=labels,
+        postprocess_label=postprocess_label).parse(df)['dataset']
+    assert list(datasets.keys()) == [
+        name for name, _ in make_preprocessors(sparse)]
+    for name, expect_pp in make_preprocessors(sparse):
+        expect = DataFrameParser(
+            expect_pp, labels=labels,
+            postprocess_label=postprocess_label).parse(df)['dataset']
+        check_dataset(datasets[name], expect)
+    assert len(datasets['weavenet']) < len(smiles)
+
+
+def test_composite_preprocessor_feature_spec():
+    pp = CompositePreprocessor({'nfp': NFPPreprocessor(out_size=30),
+                                'ggnn': GGNNPreprocessor(out_size=30)})
+    spec = pp.get_feature_spec()
+    assert len(spec) == 5
+    assert spec[-1] == ((2,), numpy.bool_)
+    assert pp.get_num_features() == [2, 2]
+    assert CompositePreprocessor(make_preprocessors()).get_feature_spec() \
+        is None
+
+
+def test_composite_preprocessor_all_failed():
+    pp = CompositePreprocessor([('a', NFPPreprocessor(max_atoms=1)),
+                                ('b', NFPPreprocessor(max_atoms=2))])
+    datasets = SmilesParser(pp).parse(['C', 'CCC'])['dataset']
+    assert len(datasets['a']) == 1
+    assert len(datasets['b']) == 1
+
+
+def test_composite_preprocessor_partially_failed():
+    pp = CompositePreprocessor([('a', NFPPreprocessor(max_atoms=1)),
+                                ('b', NFPPreprocessor(max_atoms=2)),
+                                ('c', NFPPreprocessor())])
+    result = SmilesParser(pp).parse(['C', 'CCCC', 'CC', 'var'],
+                                    return_smiles=True,
+                                    return_is_successful=True)
+    datasets = result['dataset']
+    assert isinstance(datasets, CompositeDatasets)
+    assert list(datasets.keys()) == ['a', 'b', 'c']
+    numpy.testing.assert_array_equal(
+        result['is_successful'], [True, True, True, False])
+    numpy.testing.assert_array_equal(
+        result['smiles'][datasets.get_mask('b')], ['C', 'CC'])
+    numpy.testing.assert_array_equal(datasets.get_index('a'), [0])
+    numpy.testing.assert_array_equal(datasets.get_index('c'), [0, 1, 2])
+    # each example of each dataset is the one of its smiles.
+    for name in datasets:
+        smiles = result['smiles'][datasets.get_mask(name)]
+        expect = SmilesParser(pp.preprocessors[name]).parse(smiles)
+        check_dataset(datasets[name], expect['dataset'])
+    # the rows of the input.
+    rows = numpy.flatnonzero(result['is_successful'])
+    numpy.testing.assert_array_equal(rows[datasets.get_index('b')], [0, 2])
+
+
+def test_composite_preprocessor_from_methods():
+    pp = CompositePreprocessor.from_methods(['nfp', 'relgcn'])
+    assert list(pp.preprocessors.keys()) == ['nfp', 'relgcn']
+    with pytest.raises(ValueError):
+        CompositePreprocessor.from_methods(['nfp', 'unknown'])
+
+
+class DummyPreprocessor(MolPreprocessor):
+
+    def prepare_smiles_and_mol(self, mol):
+        return Chem.MolToSmiles(mol), mol
+
+
+def test_composite_preprocessor_invalid():
+    with pytest.raises(ValueError):
+        CompositePreprocessor([])
+    with pytest.raises(ValueError):
+        CompositePreprocessor({'dummy': DummyPreprocessor()})
+
+
+def test_share_intermediate_features():
+    mol = Chem.MolFromSmiles('CC(=O)O')
+    with share_intermediate_features():
+        table = get_bond_table(mol)
+        assert get_bond_table(mol) is table
+        assert not table[0].flags.writeable
+        atoms = construct_atomic_number_array(mol)
+        # returned arrays are not shared.
+        atoms[0] = 0
+        numpy.testing.assert_array_equal(
+            construct_atomic_number_array(mol), [6, 6, 8, 8])
+        with share_intermediate_features():
+            assert get_bond_table(mol) is table
+        assert get_bond_table(mol) is table
+        numpy.testing.assert_array_equal(construct_adj_matrix(mol),
+                                         construct_adj_matrix(Chem.Mol(mol)))
+    assert get_bond_table(mol) is not table
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '-s'])
@@ -1,8 +1,10 @@
 import numpy
 import pytest
+from rdkit import Chem
 
 from chainer_chemistry.dataset.parsers import SmilesParser
 from chainer_chemistry.dataset.preprocessors import GGNNPreprocessor
+from chainer_chemistry.dataset.preprocessors.ggnn_preprocessor import GGNNSparsePreprocessor  # NOQA
 
 
 def test_ggnn_preprocessor():
@@ -130,5 +132,15 @@ def test_ggnn_preprocessor_assert_raises():
         pp = GGNNPreprocessor(max_atoms=3, out_size=2)  # NOQA
 
 
+def test_ggnn_sparse_preprocessor_construct_sparse_data():
+    preprocessor = GGNNSparsePreprocessor(out_size=5)
+    atoms, adjs = preprocessor.get_input_features(
+        Chem.MolFromSmiles('CN=C=O'))
+    data = preprocessor.construct_sparse_data(atoms, adjs, numpy.array([1]))
+    numpy.testing.assert_array_equal(
+        data.edge_index, [[0, 1, 1, 2, 2, 3], [1, 0, 2, 1, 3, 2]])
+    numpy.testing.assert_array_equal(data.edge_attr, [0, 0, 1, 1, 1, 1])
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v', '-s'])
@@ -0,0 +1,76 @@
+import numpy
+import pytest
+from rdkit import Chem
+
+from chainer_chemistry.dataset.preprocessors import megnet_preprocessor
+from chainer_chemistry.dataset.preprocessors import MEGNetPreprocessor
+
+
+@pytest.fixture
+def mol():
+    return Chem.AddHs(Chem.MolFromSmiles('c1ccccc1CC(=O)O'))
+
+
+def expected_pair_feature(mol, start_node, end_node):
+    """Pair features computed for each pair from the dense matrices"""
+    graph_distance_matrix = Chem.GetDistanceMatrix(mol)
+    distance_matrix_3d = Chem.Get3DDistanceMatrix(mol)
+    is_in_ring = megnet_preprocessor.get_is_in_ring(mol)
+    converter = megnet_preprocessor.GaussianDistance()
+    feature = []
+    for i, j in zip(start_node, end_node):
+        feature.append(numpy.hstack((
+            megnet_preprocessor.construct_bond_vec(mol, int(i), int(j)),
+            megnet_preprocessor.construct_ring_feature_vec(is_in_ring, i, j),
+            numpy.float32(graph_distance_matrix[i, j]),
+            megnet_preprocessor.construct_expanded_distance_vec(
+                distance_matrix_3d, converter, i, j))))
+    return numpy.array(feature)
+
+
+def test_construct_pair_feature(mol):
+    feature, bond_idx = megnet_preprocessor.construct_pair_feature(mol, True)
+    assert bond_idx.shape == (2, mol.GetNumBonds())
+    for bond, (i, j) in zip(mol.GetBonds(), bond_idx.T):
+        assert (bond.GetBeginAtomIdx(), bond.GetEndAtomIdx()) == (i, j)
+    assert feature.shape == (mol.GetNumBonds(), 26)
+    assert feature.dtype == numpy.float32
+    numpy.testing.assert_allclose(
+        feature, expected_pair_feature(mol, *bond_idx), atol=1e-6)
+
+
+def test_construct_pair_feature_neighbor_list(mol):
+    feature, bond_idx = megnet_preprocessor.construct_pair_feature(
+        mol, True, max_radius=3., max_num_nbr=6)
+    distance_matrix_3d = Chem.Get3DDistanceMatrix(mol)
+    start_node, end_node = bond_idx
+    assert (start_node != end_node).all()
+    assert (distance_matrix_3d[start_node, end_node] <= 3.).all()
+    assert numpy.bincount(start_node).max() <= 6
+    numpy.testing.assert_allclose(
+        feature, expected_pair_feature(mol, start_node, end_node), atol=1e-6)
+
+
+def test_megnet_preprocessor_neighbor_list(mol):
+    pp = MEGNetPreprocessor(max_radius=2., max_num_nbr=100,
+                            use_neighbor_list=True)
+    atom_feature, pair_feature, global_feature, bond_idx = \
+        pp.get_input_features(mol)
+    assert atom_feature.shape == (mol.GetNumAtoms(), 5)
+    assert pair_feature.shape == (bond_idx.shape[1], 20)
+    # bonds are directed, and both directions are included.
+    pairs = set(map(tuple, bond_idx.T.tolist()))
+    for bond in mol.GetBonds():
+        i, j = bond.GetBeginAtomIdx(), bond.GetEndAtomIdx()
+        assert (i, j) in pairs and (j, i) in pairs
+
+
+def test_construct_pair_feature_single_atom():
+    feature, bond_idx = megnet_preprocessor.construct_pair_feature(
+        Chem.MolFromSmiles('C'), True)
+    assert feature.shape == (0,)
+    assert bond_idx.shape == (0,)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '-s'])
@@ -1,7 +1,20 @@
 import pytest
 from rdkit import Chem
 
+from chainer_chemistry.dataset.preprocessors import AtomicNumberPreprocessor
+from chainer_chemistry.dataset.preprocessors import ECFPPreprocessor
+from chainer_chemistry.dataset.preprocessors import GGNNPreprocessor
+from chainer_chemistry.dataset.preprocessors import GINPreprocessor
+from chainer_chemistry.dataset.preprocessors import GINSparsePreprocessor
 from chainer_chemistry.dataset.preprocessors import MolPreprocessor
+from chainer_chemistry.dataset.preprocessors import mol_preprocessor
+from chainer_chemistry.dataset.preprocessors import NFPGWMPreprocessor
+from chainer_chemistry.dataset.preprocessors import NFPPreprocessor
+from chainer_chemistry.dataset.preprocessors import RelGATPreprocessor
+from chainer_chemistry.dataset.preprocessors import RelGCNPreprocessor
+from chainer_chemistry.dataset.preprocessors import RSGCNPreprocessor
+from chainer_chemistry.dataset.preprocessors import SchNetPreprocessor
+from chainer_chemistry.dataset.preprocessors import WeaveNetPreprocessor
 
 
 @pytest.fixture
@@ -40,5 +53,103 @@ class TestGetLabel(object):
         assert labels == ['1', None]
 
 
+def test_get_feature_spec_default(pp):
+    assert pp.get_feature_spec() is None
+
+
+@pytest.mark.parametrize('preprocessor', [
+    AtomicNumberPreprocessor(out_size=15),
+    ECFPPreprocessor(),
+    GGNNPreprocessor(out_size=15),
+    GINPreprocessor(out_size=15),
+    GINSparsePreprocessor(out_size=15),
+    NFPPreprocessor(out_size=15),
+    RelGATPreprocessor(out_size=15),
+    RelGCNPreprocessor(out_size=15),
+    RSGCNPreprocessor(out_size=15),
+    SchNetPreprocessor(out_size=15),
+    WeaveNetPreprocessor(max_atoms=20),
+    WeaveNetPreprocessor(max_atoms=20, add_Hs=False),
+    WeaveNetPreprocessor(max_atoms=20, use_fixed_atom_feature=True),
+    WeaveNetPreprocessor(max_atoms=20, use_fixed_atom_feature=True,
+                         add_Hs=False, include_unknown_atom=True),
+])
+def test_get_feature_spec(preprocessor):
+    mol = Chem.MolFromSmiles('CC(=O)Oc1ccccc1')
+    _, mol = preprocessor.prepare_smiles_and_mol(mol)
+    features = preprocessor.get_input_features(mol)
+    if not isinstance(features, tuple):
+        features = (features,)
+    spec = preprocessor.get_feature_spec()
+    assert len(spec) == len(features)
+    for feature, (shape, dtype) in zip(features, spec):
+        assert feature.shape == shape
+        assert feature.dtype == dtype
+
+
+@pytest.mark.parametrize('preprocessor', [
+    NFPPreprocessor(), GGNNPreprocessor(), NFPGWMPreprocessor(out_size=15)])
+def test_get_feature_spec_not_fixed(preprocessor):
+    assert preprocessor.get_feature_spec() is None
+
+
+def _mol_signature(mol):
+    atoms = [(a.GetAtomicNum(), a.GetFormalCharge(), a.GetIsAromatic(),
+              a.GetHybridization(), a.GetTotalNumHs(), a.GetNumExplicitHs(),
+              a.GetNoImplicit(), a.GetChiralTag(), a.GetIsotope(),
+              a.GetNumRadicalElectrons(), a.IsInRing())
+             for a in mol.GetAtoms()]
+    bonds = [(b.GetBeginAtomIdx(), b.GetEndAtomIdx(), b.GetBondType(),
+              b.GetIsAromatic(), b.GetIsConjugated(), b.GetStereo())
+             for b in mol.GetBonds()]
+    rings = [tuple(r) for r in mol.GetRingInfo().AtomRings()]
+    return atoms, bonds, rings
+
+
+@pytest.mark.parametrize('smiles', [
+    'OC(=O)c1ccccc1OC(C)=O', 'C1CCN(C1)c1ncccc1', 'c1ccc2[nH]ccc2c1',
+    'C[C@H](N)C(=O)O', 'F/C=C/F', '[13CH4]', '[CH3]', '[CH2]C', '[H]OC',
+    'O=[N+]([O-])c1ccccc1', '[Na+].[Cl-]', 'Cc1ccccc1-c1ccccc1',
+    'C1=CC=CC=C1', '[O-][n+]1ccccc1', 'CC[CH:1]C', 'B1OB(O1)O'])
+@pytest.mark.parametrize('add_Hs', [False, True])
+@pytest.mark.parametrize('kekulize', [False, True])
+def test_prepare_smiles_and_mol(smiles, add_Hs, kekulize):
+    pp = MolPreprocessor(add_Hs=add_Hs, kekulize=kekulize)
+    actual_smiles, actual = pp.prepare_smiles_and_mol(
+        Chem.MolFromSmiles(smiles))
+
+    # same with parsing the canonical smiles again
+    expect_smiles = Chem.MolToSmiles(Chem.MolFromSmiles(smiles),
+                                     isomericSmiles=False, canonical=True)
+    expect = Chem.MolFromSmiles(expect_smiles)
+    if add_Hs:
+        expect = Chem.AddHs(expect)
+    if kekulize:
+        Chem.Kekulize(expect)
+    assert actual_smiles == expect_smiles
+    assert _mol_signature(actual) == _mol_signature(expect)
+
+
+def test_prepare_smiles_and_mol_not_sanitized(pp):
+    mol = Chem.MolFromSmiles('C1=CC=CC=C1', sanitize=False)
+    _, actual = pp.prepare_smiles_and_mol(mol)
+    assert all(atom.GetIsAromatic() for atom in actual.GetAtoms())
+
+
+def test_is_sanitized_without_block_logs(monkeypatch):
+    # `rdBase.BlockLogs` is not available in RDKit older than 2022.03.
+    class _RDBase(object):
+        pass
+    monkeypatch.setattr(mol_preprocessor, 'rdBase', _RDBase())
+
+    assert mol_preprocessor._is_sanitized(Chem.MolFromSmiles('c1ccccc1O'))
+    mol = Chem.MolFromSmiles('c1ccccc1O', sanitize=False)
+    mol.UpdatePropertyCache()
+    assert not mol_preprocessor._is_sanitized(mol)
+    _, actual = MolPreprocessor().prepare_smiles_and_mol(
+        Chem.MolFromSmiles('c1ccccc1O'))
+    assert actual.GetRingInfo().NumRings() == 1
+
+
 if __name__ == '__main__':
     pytest.main()
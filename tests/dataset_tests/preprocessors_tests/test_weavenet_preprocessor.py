@@ -1,10 +1,16 @@
 import numpy
 import pytest
+from rdkit import Chem
 
 from chainer_chemistry.dataset.parsers import SmilesParser
+from chainer_chemistry.dataset.preprocessors import weavenet_preprocessor
 from chainer_chemistry.dataset.preprocessors.weavenet_preprocessor import WeaveNetPreprocessor  # NOQA
 
 
+test_smiles = ['C#N', 'Cc1cnc(C=O)n1C', 'C1CC1C2CCCCCCC2', 'C.CC',
+               'O=C([O-])C[NH3+]', 'c1ccc2ccccc2c1CCl']
+
+
 @pytest.mark.parametrize('max_atoms', [20, 30])
 @pytest.mark.parametrize('use_fixed_atom_feature', [True, False])
 def test_weave_preprocessor(max_atoms, use_fixed_atom_feature):
@@ -31,5 +37,73 @@ def test_weave_preprocessor(max_atoms, use_fixed_atom_feature):
     atoms0, adjs0 = dataset[0]
 
 
+@pytest.mark.parametrize('smiles', test_smiles)
+@pytest.mark.parametrize('add_Hs', [False, True])
+def test_construct_pair_feature(smiles, add_Hs):
+    mol = Chem.MolFromSmiles(smiles)
+    if add_Hs:
+        mol = Chem.AddHs(mol)
+    n_atom = mol.GetNumAtoms()
+    num_max_atoms = 40
+    actual = weavenet_preprocessor.construct_pair_feature(
+        mol, num_max_atoms=num_max_atoms)
+
+    # features of each pair computed one by one.
+    distance_matrix = Chem.GetDistanceMatrix(mol)
+    expect = numpy.zeros((num_max_atoms ** 2, 7), dtype=numpy.float32)
+    for i in range(n_atom):
+        for j in range(n_atom):
+            expect[i * n_atom + j, :2] = \
+                weavenet_preprocessor.construct_distance_vec(
+                    distance_matrix, i, j)
+            expect[i * n_atom + j, 2:6] = \
+                weavenet_preprocessor.construct_bond_vec(mol, i, j)
+    for ring in Chem.GetSymmSSSR(mol):
+        for a0 in ring:
+            for a1 in ring:
+                expect[a0 * n_atom + a1, 6] = 1
+    numpy.testing.assert_array_equal(actual, expect)
+
+
+@pytest.mark.parametrize('smiles', test_smiles + ['[H][H]'])
+def test_construct_num_hydrogens_vec(smiles):
+    mol = Chem.AddHs(Chem.MolFromSmiles(smiles))
+    actual = weavenet_preprocessor.construct_num_hydrogens_vec(
+        mol, num_max_atoms=40)
+    expect = numpy.zeros((40, 1), dtype=numpy.float32)
+    for atom in mol.GetAtoms():
+        expect[atom.GetIdx(), 0] = sum(
+            n.GetSymbol() == 'H' for n in atom.GetNeighbors())
+    numpy.testing.assert_array_equal(actual, expect)
+
+
+def test_construct_atom_feature():
+    mol = Chem.AddHs(Chem.MolFromSmiles('OC(=O)c1ccccc1N'))
+    feature = weavenet_preprocessor.construct_atom_feature(
+        mol, True, num_max_atoms=20)
+    assert feature.shape == (20, 25)
+    # atom type of O, C and H
+    numpy.testing.assert_array_equal(feature[0, :10], numpy.eye(10)[3])
+    numpy.testing.assert_array_equal(feature[1, :10], numpy.eye(10)[1])
+    numpy.testing.assert_array_equal(feature[-1, :10], 0)
+    # ring of size 6
+    numpy.testing.assert_array_equal(feature[:11, 15],
+                                     [0, 0, 0] + [1] * 6 + [0, 0])
+    # hydrogen bond donor and acceptor of the hydroxy group
+    numpy.testing.assert_array_equal(feature[0, 21:23], [1, 1])
+    # number of hydrogens
+    numpy.testing.assert_array_equal(feature[:11, 24],
+                                     [1, 0, 0, 0, 1, 1, 1, 1, 0, 2, 0])
+
+
+def test_construct_atom_type_vec_unknown_atom():
+    mol = Chem.MolFromSmiles('C[Se]C')
+    with pytest.raises(weavenet_preprocessor.MolFeatureExtractionError):
+        weavenet_preprocessor.construct_atom_type_vec(mol, num_max_atoms=5)
+    actual = weavenet_preprocessor.construct_atom_type_vec(
+        mol, num_max_atoms=5, include_unknown_atom=True)
+    numpy.testing.assert_array_equal(actual[:3, -1], [0, 1, 0])
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v', '-s'])
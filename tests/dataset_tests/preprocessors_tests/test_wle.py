@@ -1,3 +1,5 @@
+import chainer
+from chainer import links
 import numpy as np
 import pytest
 
@@ -236,3 +238,139 @@ def test_findmaxidx_wle(cwle_datasets):
     actual = WLE.findmaxidx(cwle_datasets, 'wle_label')
     expect = 10 * 50
     assert actual == expect
+
+
+def _make_dataset(mols):
+    atom_arrays = np.empty(len(mols), dtype=object)
+    adj_arrays = np.empty(len(mols), dtype=object)
+    for i, (atom_array, edges) in enumerate(mols):
+        adj_array = np.eye(len(atom_array), dtype=np.float32)
+        for j, k in edges:
+            adj_array[j, k] = adj_array[k, j] = 1
+        atom_arrays[i] = np.array(atom_array, dtype=np.int32)
+        adj_arrays[i] = adj_array
+    teach_signals = np.arange(len(mols), dtype=np.int32)
+    return NumpyTupleDataset(atom_arrays, adj_arrays, teach_signals)
+
+
+@pytest.fixture
+def chain_datasets():
+    # atom labels 0: C, 1: O, 2: N
+    train = _make_dataset([([0, 0, 1], [(0, 1), (1, 2)]),
+                           ([0, 0, 0, 1], [(0, 1), (1, 2), (2, 3)]),
+                           ([0, 1], [(0, 1)])])
+    val = _make_dataset([([0, 0, 1], [(0, 1), (1, 2)])])
+    return train, val
+
+
+def _check_datasets(actuals, expects):
+    assert len(actuals) == len(expects)
+    for actual, expect in zip(actuals, expects):
+        assert len(actual) == len(expect)
+        for actual_mol, expect_mol in zip(actual, expect):
+            assert len(actual_mol) == len(expect_mol)
+            for a, e in zip(actual_mol, expect_mol):
+                np.testing.assert_array_equal(a, e)
+
+
+@pytest.mark.parametrize('method,cutoff,k', [('wle', 0, 1), ('wle', 1, 2),
+                                             ('cwle', 0, 1), ('cwle', 0, 2)])
+def test_wle_transformer(chain_datasets, method, cutoff, k):
+    transformer = WLE.WLETransformer(method, cutoff=cutoff, k=k)
+    actual = transformer.fit_transform(chain_datasets)
+    if method == 'wle':
+        expect, labels, frequency = WLE.apply_wle_for_datasets(
+            chain_datasets, cutoff, k)
+    else:
+        expect, labels, frequency = WLE.apply_cwle_for_datasets(
+            chain_datasets, k)
+    _check_datasets(actual, expect)
+    assert transformer.labels_frequencies[-1] == frequency
+    assert len(transformer.labels_frequencies) == k
+
+    # the same datasets are transformed to the same labels.
+    _check_datasets(transformer.transform(chain_datasets), expect)
+    _check_datasets(transformer.transform(chain_datasets[1:]), expect[1:])
+
+
+def test_wle_transformer_unknown_labels(chain_datasets):
+    transformer = WLE.WLETransformer('wle').fit(chain_datasets)
+    assert transformer.get_fallback_id() == 5
+    assert transformer.get_num_labels() == 6
+    # 'C-N', 'N-C' and 'O-O' are not in the vocabulary.
+    test = _make_dataset([([0, 2, 0, 1], [(0, 1), (2, 3)]),
+                          ([1, 1], [(0, 1)])])
+    actual, = transformer.transform((test,))
+    vocabulary = {label: i for i, label in
+                  enumerate(transformer.labels_frequencies[-1])}
+    np.testing.assert_array_equal(
+        actual[0][0], [5, 5, vocabulary['0-1'], vocabulary['1-0']])
+    np.testing.assert_array_equal(actual[1][0], [5, 5])
+    np.testing.assert_array_equal(actual[0][2], 0)
+
+    transformer = WLE.WLETransformer('wle', fallback_id=0).fit(
+        chain_datasets)
+    actual, = transformer.transform((test,))
+    np.testing.assert_array_equal(actual[1][0], [0, 0])
+
+
+@pytest.mark.parametrize('method,target', [('wle', 'atom_label'),
+                                           ('cwle', 'wle_label')])
+def test_wle_transformer_num_labels_embedding(chain_datasets, method,
+                                              target):
+    transformer = WLE.WLETransformer(method)
+    fitted = transformer.fit_transform(chain_datasets)
+    # 'C-N', 'N-C' and 'O-O' are not in the vocabulary.
+    test = _make_dataset([([0, 2, 0, 1], [(0, 1), (2, 3)]),
+                          ([1, 1], [(0, 1)])])
+    actual, = transformer.transform((test,))
+    idx = 0 if target == 'atom_label' else 2
+    labels = np.concatenate([mol[idx] for mol in actual])
+    # the unknown labels are out of the labels found in the fitted datasets.
+    assert labels.max() == WLE.findmaxidx(fitted, target)
+
+    # the ids are checked to be in the range of the embedding.
+    with chainer.using_config('debug', True):
+        h = links.EmbedID(transformer.get_num_labels(), 3)(labels)
+        assert h.shape == (len(labels), 3)
+        with pytest.raises(ValueError):
+            links.EmbedID(WLE.findmaxidx(fitted, target), 3)(labels)
+
+
+def test_wle_transformer_cutoff(chain_datasets):
+    transformer = WLE.WLETransformer('wle', cutoff=1).fit(chain_datasets)
+    # the labels which appear once are replaced with the focus node labels.
+    vocabulary = {label: i for i, label in
+                  enumerate(transformer.labels_frequencies[-1])}
+    assert set(vocabulary) == {'0-0', '0-0.1', '1-0', '0'}
+    # unknown 'C-N' also falls back to the focus node label 'C', but 'N'
+    # is not in the vocabulary either.
+    test = _make_dataset([([0, 2], [(0, 1)])])
+    actual, = transformer.transform((test,))
+    np.testing.assert_array_equal(actual[0][0], [vocabulary['0'], 4])
+
+
+def test_wle_transformer_save_load(chain_datasets, tmpdir):
+    transformer = WLE.WLETransformer('cwle', k=2)
+    expect = transformer.fit_transform(chain_datasets)
+    filepath = str(tmpdir.join('wle_transformer.json'))
+    transformer.save(filepath)
+
+    loaded = WLE.WLETransformer.load(filepath)
+    assert loaded.method == 'cwle'
+    assert loaded.k == 2
+    assert loaded.labels_frequencies == transformer.labels_frequencies
+    assert list(loaded.labels_frequencies[-1]) == \
+        list(transformer.labels_frequencies[-1])
+    _check_datasets(loaded.transform(chain_datasets), expect)
+
+
+def test_wle_transformer_invalid(chain_datasets):
+    with pytest.raises(ValueError):
+        WLE.WLETransformer('unknown')
+    with pytest.raises(ValueError):
+        WLE.WLETransformer('wle', k=0)
+    with pytest.raises(ValueError):
+        WLE.WLETransformer('cwle', cutoff=1)
+    with pytest.raises(RuntimeError):
+        WLE.WLETransformer('wle').transform(chain_datasets)
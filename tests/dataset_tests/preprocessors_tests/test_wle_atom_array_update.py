@@ -1,9 +1,11 @@
+import collections
 import itertools
 
 import numpy as np
 import pytest
 
 from chainer_chemistry.dataset.preprocessors import wle_atom_array_update as wle_update
+from chainer_chemistry.dataset.preprocessors import wle_util
 from chainer_chemistry.datasets.numpy_tuple_dataset import NumpyTupleDataset
 
 
@@ -257,8 +259,8 @@ def test_list_all_expanded_labels_with_focus_atom(small_datasets):
 def test_list_all_expanded_labels_without_focus_atom(small_datasets):
     atom_arrays = [[mol[0] for mol in d] for d in small_datasets]
     adj_arrays = [[mol[1] for mol in d] for d in small_datasets]
-    actual_atom_lists, actual_frequencies = wle_update.list_all_expanded_labels(
-        atom_arrays, adj_arrays, False)
+    actual_atom_lists, actual_frequencies = \
+        wle_update.list_all_expanded_labels(atom_arrays, adj_arrays, False)
 
     expected_frequency = {'1.2': 3,
                           '0.2': 3,
@@ -275,3 +277,128 @@ def test_list_all_expanded_labels_without_focus_atom(small_datasets):
     for actual_atom_list in actual_atom_lists:
         for a, e in zip(actual_atom_list, expect_atom_list):
             assert set(a) == e
+
+
+def _reference_update(atom_arrays, adj_arrays, cutoff, with_focus_atom):
+    # expanded labels made by the string representation of each atom.
+    expanded_atom_lists = []
+    for set_atom_arrays, set_adj_arrays in zip(atom_arrays, adj_arrays):
+        set_expanded_atom_list = []
+        for atom_array, adj_array in zip(set_atom_arrays, set_adj_arrays):
+            adj_array = np.asarray(adj_array)
+            if adj_array.ndim == 3:
+                adj_array = adj_array.sum(axis=1)
+            neighbors = np.nonzero(adj_array)
+            set_expanded_atom_list.append(
+                [wle_util.get_neighbor_representation(
+                    i, atom_array, neighbors, with_focus_atom)
+                 for i in range(len(atom_array))])
+        expanded_atom_lists.append(set_expanded_atom_list)
+    frequencies = collections.Counter(
+        label for s in expanded_atom_lists for m in s for label in m)
+    if cutoff > 0:
+        expanded_atom_lists = [
+            [[label if frequencies[label] > cutoff
+              else wle_util.get_focus_node_label(label) for label in m]
+             for m in s]
+            for s in expanded_atom_lists]
+    labels = []
+    for label in (label for s in expanded_atom_lists for m in s
+                  for label in m):
+        if label not in labels:
+            labels.append(label)
+    frequencies = collections.Counter(
+        label for s in expanded_atom_lists for m in s for label in m)
+    atom_arrays = [[[labels.index(label) for label in m] for m in s]
+                   for s in expanded_atom_lists]
+    return atom_arrays, [(label, frequencies[label]) for label in labels]
+
+
+@pytest.fixture
+def random_datasets():
+    rs = np.random.RandomState(0)
+    atom_arrays = []
+    adj_arrays = []
+    for num_mols in (20, 5, 5):
+        set_atom_arrays = []
+        set_adj_arrays = []
+        for _ in range(num_mols):
+            N = rs.randint(1, 8)
+            set_atom_arrays.append(rs.randint(0, 3, size=N).astype(np.int32))
+            # adjacency with 2 relation types and self loops.
+            adj = rs.uniform(size=(N, 2, N)) < 0.2
+            adj = adj | adj.transpose(2, 1, 0)
+            adj[np.arange(N), 0, np.arange(N)] = True
+            set_adj_arrays.append(adj.astype(np.float32))
+        atom_arrays.append(set_atom_arrays)
+        adj_arrays.append(set_adj_arrays)
+    return atom_arrays, adj_arrays
+
+
+@pytest.mark.parametrize('cutoff, with_focus_atom',
+                         [(0, True), (2, True), (0, False)])
+def test_update_atom_arrays_reference(random_datasets, cutoff,
+                                      with_focus_atom):
+    atom_arrays, adj_arrays = random_datasets
+    for _ in range(2):
+        expect_atom_arrays, expect_frequencies = _reference_update(
+            atom_arrays, adj_arrays, cutoff, with_focus_atom)
+        atom_arrays, frequencies = wle_update.update_atom_arrays(
+            atom_arrays, adj_arrays, cutoff, with_focus_atom)
+        # same labels in the same order.
+        assert list(frequencies.items()) == expect_frequencies
+        for actual_mols, expect_mols in zip(atom_arrays, expect_atom_arrays):
+            assert len(actual_mols) == len(expect_mols)
+            for a, e in zip(actual_mols, expect_mols):
+                assert a.dtype == np.int32
+                np.testing.assert_array_equal(a, e)
+
+
+def test_update_atom_arrays_hash_collision(random_datasets, monkeypatch):
+    atom_arrays, adj_arrays = random_datasets
+    expect = wle_update.update_atom_arrays(atom_arrays, adj_arrays, 0)
+    monkeypatch.setattr(wle_update, '_hash_rows',
+                        lambda rows: np.zeros(len(rows), dtype=np.uint64))
+    actual = wle_update.update_atom_arrays(atom_arrays, adj_arrays, 0)
+    assert list(actual[1].items()) == list(expect[1].items())
+    for actual_mols, expect_mols in zip(actual[0], expect[0]):
+        for a, e in zip(actual_mols, expect_mols):
+            np.testing.assert_array_equal(a, e)
+
+
+def test_update_atom_arrays_stacked(random_datasets):
+    atom_arrays, adj_arrays = random_datasets
+    # pad all molecules to the same size.
+    N = 8
+    stacked_atom_arrays = [
+        np.stack([np.pad(a, (0, N - len(a)), 'constant') for a in s])
+        for s in atom_arrays]
+    stacked_adj_arrays = [
+        np.stack([np.pad(a, [(0, N - len(a)), (0, 0), (0, N - len(a))],
+                         'constant') for a in s])
+        for s in adj_arrays]
+    expect = wle_update.update_atom_arrays(
+        [list(s) for s in stacked_atom_arrays],
+        [list(s) for s in stacked_adj_arrays], 1)
+    actual = wle_update.update_atom_arrays(
+        stacked_atom_arrays, stacked_adj_arrays, 1)
+    assert list(actual[1].items()) == list(expect[1].items())
+    for a, e in zip(actual[0], expect[0]):
+        assert a.shape == e.shape
+        np.testing.assert_array_equal(a, e)
+
+
+def test_update_atom_arrays_ragged():
+    atom_arrays = [np.zeros((1, 1), dtype=np.int32),
+                   [np.zeros(2, dtype=np.int32), np.zeros(3, dtype=np.int32)]]
+    adj_arrays = [np.ones((1, 1, 1), dtype=np.int32),
+                  [np.ones((2, 2), dtype=np.int32),
+                   np.ones((3, 3), dtype=np.int32)]]
+    actual_atom_arrays, actual_label_frequency = \
+        wle_update.update_atom_arrays(atom_arrays, adj_arrays, 0)
+    assert actual_label_frequency == {'0-': 1, '0-0': 2, '0-0.0': 3}
+    np.testing.assert_array_equal(actual_atom_arrays[0], [[0]])
+    # molecules of different sizes are kept in an object array.
+    assert actual_atom_arrays[1].dtype == object
+    np.testing.assert_array_equal(actual_atom_arrays[1][0], [1, 1])
+    np.testing.assert_array_equal(actual_atom_arrays[1][1], [2, 2, 2])
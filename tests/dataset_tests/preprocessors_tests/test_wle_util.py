@@ -111,3 +111,23 @@ def test_get_focus_node_label(label, expect):
 def test_get_focus_node_label_invalid(label):
     with pytest.raises(ValueError):
         wle_util.get_focus_node_label(label)
+
+
+def test_to_index_vocabulary():
+    values = ['foo', 'bar', 'foo']
+    vocabulary = wle_util.to_vocabulary(values)
+    # the first index of duplicated values, same as list.index.
+    assert vocabulary == {'foo': 0, 'bar': 1}
+    actual = wle_util.to_index([['bar', 'foo'], ['foo', 'foo']], vocabulary)
+    assert actual.dtype == np.int32
+    np.testing.assert_array_equal(actual, [[1, 0], [0, 0]])
+    with pytest.raises(ValueError):
+        wle_util.to_index([['buz']], vocabulary)
+
+
+def test_to_array_of_arrays():
+    actual = wle_util.to_array_of_arrays([[0, 1], [2]])
+    assert actual.dtype == object
+    assert len(actual) == 2
+    np.testing.assert_array_equal(actual[1], [2])
+    assert actual[1].dtype == np.int32
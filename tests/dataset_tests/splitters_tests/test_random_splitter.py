@@ -1,8 +1,10 @@
 import numpy
 import pytest
 
+from chainer_chemistry.dataset.splitters.base_splitter import converter_numpy_tuple_dataset_view  # NOQA
 from chainer_chemistry.dataset.splitters.random_splitter import RandomSplitter
 from chainer_chemistry.datasets import NumpyTupleDataset
+from chainer_chemistry.datasets import NumpyTupleDatasetView
 
 
 @pytest.fixture
@@ -77,6 +79,20 @@ def test_train_valid_test_split_return_dataset(dataset):
     assert len(test) == 1
 
 
+def test_train_valid_test_split_return_dataset_view(dataset):
+    splitter = RandomSplitter()
+    train, valid, test = splitter.train_valid_test_split(
+        dataset, return_index=False,
+        converter=converter_numpy_tuple_dataset_view)
+    for subset, length in [(train, 8), (valid, 1), (test, 1)]:
+        assert type(subset) is NumpyTupleDatasetView
+        assert subset.get_base_dataset() is dataset
+        assert len(subset) == length
+    indices = numpy.concatenate([subset.get_indices()
+                                 for subset in (train, valid, test)])
+    numpy.testing.assert_array_equal(numpy.sort(indices), numpy.arange(10))
+
+
 def test_train_valid_test_split_ndarray_return_dataset(ndarray_dataset):
     splitter = RandomSplitter()
     train, valid, test = splitter.train_valid_test_split(ndarray_dataset,
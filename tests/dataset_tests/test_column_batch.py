@@ -0,0 +1,59 @@
+from chainer.dataset import concat_examples
+import numpy
+import pytest
+
+from chainer_chemistry.dataset.column_batch import ColumnBatch
+from chainer_chemistry.dataset import RaggedArray
+
+
+@pytest.fixture
+def columns():
+    x = numpy.arange(8, dtype=numpy.float32).reshape(4, 2)
+    ragged = RaggedArray.from_list([numpy.arange(n) for n in range(1, 5)])
+    t = [0, 1, 0, 1]
+    return x, ragged, t
+
+
+def test_len(columns):
+    assert len(ColumnBatch(columns)) == 4
+
+
+def test_invalid_columns(columns):
+    with pytest.raises(ValueError):
+        ColumnBatch([])
+    with pytest.raises(ValueError):
+        ColumnBatch([columns[0], columns[2][:3]])
+
+
+@pytest.mark.parametrize('index', [0, 3, -1])
+def test_getitem_int(columns, index):
+    actual = ColumnBatch(columns)[index]
+    assert isinstance(actual, tuple)
+    numpy.testing.assert_array_equal(actual[0], columns[0][index])
+    numpy.testing.assert_array_equal(actual[1], columns[1][index])
+    assert actual[2] == columns[2][index]
+
+
+@pytest.mark.parametrize('index', [slice(1, 3), [3, 0], numpy.array([2])])
+def test_getitem_array(columns, index):
+    actual = ColumnBatch(columns)[index]
+    assert isinstance(actual, ColumnBatch)
+    expect_index = numpy.arange(4)[index]
+    assert len(actual) == len(expect_index)
+    for a, i in zip(actual, expect_index):
+        numpy.testing.assert_array_equal(a[1], columns[1][i])
+        assert a[2] == columns[2][i]
+
+
+def test_iter(columns):
+    # converters which expect the list of examples can be used
+    batch = ColumnBatch(columns[:2])
+    expect = concat_examples([(columns[0][i], columns[1][i])
+                              for i in range(4)], padding=0)
+    actual = concat_examples(batch, padding=0)
+    for a, e in zip(actual, expect):
+        numpy.testing.assert_array_equal(a, e)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '-s'])
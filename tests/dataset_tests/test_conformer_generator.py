@@ -0,0 +1,130 @@
+import numpy
+import pytest
+from rdkit import Chem
+
+from chainer_chemistry.dataset.conformer_generator import ConformerGenerator
+from chainer_chemistry.dataset.preprocessors.common import MolFeatureExtractionError  # NOQA
+from chainer_chemistry.dataset.preprocessors.schnet_preprocessor import SchNetPreprocessor  # NOQA
+
+
+smiles_list = ['CN=C=O', 'OCCCC', 'c1ccccc1O']
+
+
+def distance_matrix(coordinates):
+    diff = coordinates[:, None, :] - coordinates[None, :, :]
+    return numpy.sqrt((diff ** 2).sum(axis=2))
+
+
+@pytest.mark.parametrize('num_conformers', [1, 4])
+def test_generate_reproducible(num_conformers):
+    mol = Chem.MolFromSmiles('OCCCC')
+    atomic_numbers, coordinates = ConformerGenerator(
+        num_conformers=num_conformers).generate(mol)
+    assert coordinates.shape == (15, 3)
+    assert coordinates.dtype == numpy.float32
+    numpy.testing.assert_array_equal(atomic_numbers[:5], [8, 6, 6, 6, 6])
+    _, coordinates2 = ConformerGenerator(
+        num_conformers=num_conformers).generate(mol)
+    numpy.testing.assert_array_equal(coordinates, coordinates2)
+
+
+def test_generate_lowest_energy():
+    mol = Chem.MolFromSmiles('OCCCCCCN')
+    generator = ConformerGenerator(num_conformers=5)
+    _, coordinates = generator.generate(mol)
+    # the chosen conformer is optimized, so C-C bonds are close to 1.53A.
+    dists = distance_matrix(coordinates)
+    numpy.testing.assert_allclose(dists[1, 2], 1.53, atol=0.02)
+
+
+def test_invalid_num_conformers():
+    with pytest.raises(ValueError):
+        ConformerGenerator(num_conformers=0)
+
+
+@pytest.mark.parametrize('smiles', smiles_list)
+def test_get_coordinates_atom_order(smiles):
+    generator = ConformerGenerator()
+    mol = Chem.MolFromSmiles(smiles)
+    expect = distance_matrix(generator.get_coordinates(mol))
+    # the atom order is reversed, but the same geometry is used. Atoms may
+    # be swapped with the symmetrically equivalent ones.
+    order = list(range(mol.GetNumAtoms()))[::-1]
+    renumbered = Chem.RenumberAtoms(mol, order)
+    actual = distance_matrix(generator.get_coordinates(renumbered))
+    numpy.testing.assert_allclose(numpy.sort(actual.ravel()),
+                                  numpy.sort(expect.ravel()), atol=1e-5)
+    for bond in renumbered.GetBonds():
+        assert actual[bond.GetBeginAtomIdx(), bond.GetEndAtomIdx()] < 1.6
+
+
+def test_get_coordinates_with_Hs():
+    generator = ConformerGenerator()
+    mol = Chem.AddHs(Chem.MolFromSmiles('CN=C=O'))
+    assert generator.get_coordinates(mol).shape == (7, 3)
+
+
+def test_cache(tmpdir, monkeypatch):
+    cache_dir = str(tmpdir)
+    generator = ConformerGenerator(cache_dir=cache_dir)
+    assert generator.precompute(smiles_list + ['OCCCC', 'C1=CC=CC=C1O']) == 3
+    assert generator.precompute(smiles_list) == 0
+    mol = Chem.MolFromSmiles('OCCCC')
+    expect = generator.get_coordinates(mol)
+
+    # another generator only reads the cache.
+    generator = ConformerGenerator(cache_dir=cache_dir)
+
+    def generate(mol):
+        raise AssertionError('conformer must be loaded from the cache')
+
+    monkeypatch.setattr(generator, 'generate', generate)
+    assert generator.precompute(smiles_list) == 0
+    numpy.testing.assert_array_equal(generator.get_coordinates(mol), expect)
+
+    # the cache is not shared with different configuration.
+    generator = ConformerGenerator(random_seed=1, cache_dir=cache_dir)
+    assert generator.precompute(smiles_list) == 3
+
+
+def test_precompute_n_jobs(tmpdir):
+    generator = ConformerGenerator(cache_dir=str(tmpdir))
+    assert generator.precompute(smiles_list, n_jobs=2, chunksize=1) == 3
+    mol = Chem.MolFromSmiles('CN=C=O')
+    expect = ConformerGenerator().get_coordinates(mol)
+    numpy.testing.assert_array_equal(generator.get_coordinates(mol), expect)
+
+
+def test_get_coordinates_failure(tmpdir):
+    generator = ConformerGenerator(cache_dir=str(tmpdir))
+    mol = Chem.MolFromSmiles('C')
+
+    def generate(mol):
+        return None
+
+    generator.generate = generate
+    with pytest.raises(MolFeatureExtractionError):
+        generator.get_coordinates(mol)
+    # the failure is also cached.
+    generator = ConformerGenerator(cache_dir=str(tmpdir))
+    generator.generate = None
+    with pytest.raises(MolFeatureExtractionError):
+        generator.get_coordinates(mol)
+
+
+def test_schnet_preprocessor():
+    generator = ConformerGenerator()
+    pp = SchNetPreprocessor(out_size=6, conformer_generator=generator)
+    _, mol = pp.prepare_smiles_and_mol(Chem.MolFromSmiles('OCCCC'))
+    atoms, dists = pp.get_input_features(mol)
+    expect = distance_matrix(generator.get_coordinates(mol))
+    assert dists.dtype == numpy.float32
+    numpy.testing.assert_allclose(dists[:5, :5], expect, rtol=1e-6)
+    _, dists2 = SchNetPreprocessor(
+        out_size=6, conformer_generator=ConformerGenerator()) \
+        .get_input_features(mol)
+    numpy.testing.assert_array_equal(dists, dists2)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '-s'])
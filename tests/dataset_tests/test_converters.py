@@ -2,7 +2,9 @@ import chainer
 import numpy
 import pytest
 
+from chainer_chemistry.dataset.column_batch import ColumnBatch
 from chainer_chemistry.dataset.converters import concat_mols
+from chainer_chemistry.dataset import RaggedArray
 
 
 @pytest.fixture
@@ -45,6 +47,46 @@ def test_concat_mols_2d_cpu(data_2d, data_2d_expect):
     assert numpy.array_equal(result[1], data_2d_expect[1])
 
 
+def test_concat_mols_ragged_array_cpu(data_2d, data_2d_expect):
+    result = concat_mols(RaggedArray.from_list(data_2d), device=-1)
+    numpy.testing.assert_array_equal(result, numpy.asarray(data_2d_expect))
+
+
+def test_concat_mols_ragged_array_padding_none(data_1d):
+    with pytest.raises(ValueError):
+        concat_mols(RaggedArray.from_list(data_1d), padding=None)
+    result = concat_mols(RaggedArray.from_list([data_1d[0], data_1d[0]]),
+                         padding=None)
+    numpy.testing.assert_array_equal(result, [[1, 2], [1, 2]])
+
+
+@pytest.mark.parametrize('padding', [0, -1])
+def test_concat_mols_column_batch(data_2d, padding):
+    label = numpy.array([[0.5], [1.5]], dtype=numpy.float32)
+    atoms = numpy.array([[1, 2], [3, 4]], dtype=numpy.int32)
+    examples = [(atoms[i], data_2d[i], label[i]) for i in range(2)]
+    batch = ColumnBatch([atoms, RaggedArray.from_list(data_2d), label])
+    actual = concat_mols(batch, device=-1, padding=padding)
+    expect = concat_mols(examples, device=-1, padding=padding)
+    assert isinstance(actual, tuple)
+    assert len(actual) == len(expect)
+    for a, e in zip(actual, expect):
+        assert a.dtype == e.dtype
+        numpy.testing.assert_array_equal(a, e)
+
+
+def test_concat_mols_column_batch_list(data_1d, data_1d_expect):
+    # features which are not arrays are concatenated as examples
+    batch = ColumnBatch([list(data_1d)])
+    actual = concat_mols(batch, device=-1)
+    numpy.testing.assert_array_equal(actual[0], numpy.asarray(data_1d_expect))
+
+
+def test_concat_mols_column_batch_empty():
+    with pytest.raises(ValueError):
+        concat_mols(ColumnBatch([numpy.zeros((0, 3))]))
+
+
 @pytest.mark.gpu
 def test_concat_mols_1d_gpu(data_1d, data_1d_expect):
     result = concat_mols(data_1d, device=0)
@@ -0,0 +1,144 @@
+import os
+
+import mock
+import numpy
+import pandas
+import pytest
+from rdkit import Chem
+
+from chainer_chemistry.dataset.feature_cache import FeatureCache
+from chainer_chemistry.dataset.feature_cache import get_config_hash
+from chainer_chemistry.dataset.parsers import CSVFileParser
+from chainer_chemistry.dataset.parsers import SDFFileParser
+from chainer_chemistry.dataset.preprocessors import MolFeatureExtractionError
+from chainer_chemistry.dataset.preprocessors import NFPPreprocessor
+from chainer_chemistry.dataset.preprocessors import WeaveNetPreprocessor
+
+
+@pytest.fixture
+def cache(tmpdir):
+    return FeatureCache(os.path.join(str(tmpdir), 'cache'))
+
+
+@pytest.fixture
+def csv_file(tmpdir):
+    fname = os.path.join(str(tmpdir), 'test.csv')
+    df = pandas.DataFrame({
+        'smiles': ['CN=C=O', 'var', 'Cc1ccccc1', 'CC1=CC2CC(CC1)O2'],
+        'labelA': [2.1, 0., 5.3, -1.2],
+    })
+    df.to_csv(fname)
+    return fname
+
+
+def check_dataset(actual, expect):
+    assert len(actual) == len(expect)
+    for example_a, example_e in zip(actual, expect):
+        for a, e in zip(example_a, example_e):
+            numpy.testing.assert_array_equal(a, e)
+
+
+def test_get_config_hash():
+    assert get_config_hash(NFPPreprocessor()) == \
+        get_config_hash(NFPPreprocessor())
+    assert get_config_hash(NFPPreprocessor()) != \
+        get_config_hash(NFPPreprocessor(max_atoms=10))
+    assert get_config_hash(NFPPreprocessor(out_size=30)) != \
+        get_config_hash(NFPPreprocessor(out_size=40))
+    assert get_config_hash(NFPPreprocessor(add_Hs=True)) != \
+        get_config_hash(NFPPreprocessor())
+    assert get_config_hash(WeaveNetPreprocessor()) != \
+        get_config_hash(NFPPreprocessor())
+
+
+def test_get_set(cache):
+    features = (numpy.arange(3, dtype=numpy.int32),
+                numpy.ones((3, 3), dtype=numpy.float32))
+    assert cache.get('ns', 'CCO') is None
+    assert cache.set('ns', 'CCO', features)
+    actual = cache.get('ns', 'CCO')
+    assert isinstance(actual, tuple)
+    assert len(actual) == 2
+    for a, e in zip(actual, features):
+        assert a.dtype == e.dtype
+        numpy.testing.assert_array_equal(a, e)
+    assert cache.get('other_ns', 'CCO') is None
+    assert cache.get('ns', 'CCC') is None
+
+
+def test_get_set_single_array(cache):
+    cache.set('ns', 'CCO', numpy.arange(4))
+    actual = cache.get('ns', 'CCO')
+    assert isinstance(actual, numpy.ndarray)
+    numpy.testing.assert_array_equal(actual, numpy.arange(4))
+
+
+def test_set_failed(cache):
+    cache.set('ns', 'CCO', None)
+    with pytest.raises(MolFeatureExtractionError):
+        cache.get('ns', 'CCO')
+
+
+def test_set_object_array(cache):
+    features = numpy.empty(2, dtype=object)
+    assert not cache.set('ns', 'CCO', features)
+    assert cache.get('ns', 'CCO') is None
+
+
+def test_get_input_features(cache):
+    pp = NFPPreprocessor()
+    smiles, mol = pp.prepare_smiles_and_mol(Chem.MolFromSmiles('CCO'))
+    expect = pp.get_input_features(mol)
+    with mock.patch.object(pp, 'get_input_features',
+                           wraps=pp.get_input_features) as m:
+        actual1 = cache.get_input_features(pp, smiles, mol)
+        actual2 = cache.get_input_features(pp, smiles, mol)
+        assert m.call_count == 1
+    for a1, a2, e in zip(actual1, actual2, expect):
+        numpy.testing.assert_array_equal(a1, e)
+        numpy.testing.assert_array_equal(a2, e)
+
+
+def test_get_input_features_failed(cache):
+    pp = NFPPreprocessor(max_atoms=1)
+    smiles, mol = pp.prepare_smiles_and_mol(Chem.MolFromSmiles('CCO'))
+    with mock.patch.object(pp, 'get_input_features',
+                           wraps=pp.get_input_features) as m:
+        for _ in range(2):
+            with pytest.raises(MolFeatureExtractionError):
+                cache.get_input_features(pp, smiles, mol)
+        assert m.call_count == 1
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_csv_file_parser_with_cache(cache, csv_file, n_jobs):
+    pp = NFPPreprocessor()
+    parser = CSVFileParser(pp, labels='labelA', feature_cache=cache)
+    expect = CSVFileParser(pp, labels='labelA').parse(
+        csv_file, return_smiles=True)
+    # first parse fills the cache, second one reads it.
+    for _ in range(2):
+        actual = parser.parse(csv_file, return_smiles=True, n_jobs=n_jobs)
+        numpy.testing.assert_array_equal(actual['smiles'], expect['smiles'])
+        check_dataset(actual['dataset'], expect['dataset'])
+
+
+def test_sdf_file_parser_with_cache(tmpdir, cache):
+    fname = os.path.join(str(tmpdir), 'test.sdf')
+    writer = Chem.SDWriter(fname)
+    for smiles in ['CN=C=O', 'Cc1ccccc1', 'CC1=CC2CC(CC1)O2']:
+        writer.write(Chem.MolFromSmiles(smiles))
+    writer.close()
+
+    pp = NFPPreprocessor()
+    expect = SDFFileParser(pp).parse(fname)['dataset']
+    parser = SDFFileParser(pp, feature_cache=cache)
+    parser.parse(fname)
+    with mock.patch.object(NFPPreprocessor, 'get_input_features') as m:
+        actual = parser.parse(fname)['dataset']
+        assert m.call_count == 0
+    check_dataset(actual, expect)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '-s'])
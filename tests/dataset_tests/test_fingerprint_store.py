@@ -0,0 +1,135 @@
+import numpy
+import pytest
+from rdkit import Chem
+from rdkit import DataStructs
+from rdkit.Chem import rdMolDescriptors
+
+from chainer_chemistry.dataset.fingerprint_store import FingerprintStore
+from chainer_chemistry.dataset.fingerprint_store import pack_fingerprints
+from chainer_chemistry.dataset.fingerprint_store import popcount
+from chainer_chemistry.dataset.fingerprint_store import TanimotoIndex
+from chainer_chemistry.dataset.fingerprint_store import unpack_fingerprints
+from chainer_chemistry.dataset.parsers import SmilesParser
+from chainer_chemistry.dataset.preprocessors import ECFPPreprocessor
+
+
+smiles = ['CC(=O)Oc1ccccc1C(=O)O', 'C#N', 'CN1CCC[C@H]1c1cccnc1',
+          'c1ccc2ccccc2c1', 'OC(=O)C(N)Cc1ccc(O)cc1', 'CCO', 'CCN', 'CCCO',
+          'c1ccccc1O', 'c1ccccc1N', 'OC(=O)CCc1ccccc1', 'CC(=O)O']
+
+
+@pytest.fixture
+def bits():
+    rs = numpy.random.RandomState(0)
+    return (rs.uniform(size=(300, 100)) <
+            rs.uniform(0.02, 0.3, size=(300, 1))).astype(numpy.uint8)
+
+
+def test_pack_fingerprints(bits):
+    packed = pack_fingerprints(bits)
+    assert packed.shape == (300, 2)
+    assert packed.dtype == numpy.uint64
+    # bit 64 is the lowest bit of the second word.
+    numpy.testing.assert_array_equal(
+        packed[:, 1] & numpy.uint64(1), bits[:, 64])
+    numpy.testing.assert_array_equal(unpack_fingerprints(packed, 100), bits)
+    numpy.testing.assert_array_equal(popcount(packed), bits.sum(axis=1))
+    assert popcount(packed[0]) == bits[0].sum()
+
+
+def test_fingerprint_store_save_load(tmpdir, bits):
+    store = FingerprintStore.from_bits(bits)
+    assert len(store) == 300
+    assert store.n_bits == 100
+    filepath = str(tmpdir.join('fingerprints.npy'))
+    store.save(filepath)
+    loaded = FingerprintStore.load(filepath, n_bits=100, mmap_mode='r')
+    assert isinstance(loaded.fingerprints, numpy.memmap)
+    numpy.testing.assert_array_equal(loaded.get_bits(slice(None)), bits)
+    numpy.testing.assert_array_equal(loaded.get_counts(block_size=7),
+                                     bits.sum(axis=1))
+
+
+def test_fingerprint_store_invalid(bits):
+    with pytest.raises(ValueError):
+        FingerprintStore(bits)
+    with pytest.raises(ValueError):
+        FingerprintStore(pack_fingerprints(bits), n_bits=200)
+
+
+def brute_force_tanimoto(bits, query):
+    common = (bits & query).sum(axis=1)
+    union = (bits | query).sum(axis=1)
+    return numpy.where(union > 0, common / numpy.maximum(union, 1), 1.)
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+@pytest.mark.parametrize('block_size', [1, 16, 1000])
+def test_tanimoto_index(bits, block_size, n_jobs):
+    # duplicated and empty fingerprints have tied similarities.
+    bits = numpy.concatenate((bits, bits[:10], numpy.zeros((3, 100),
+                                                           numpy.uint8)))
+    index = TanimotoIndex(FingerprintStore.from_bits(bits),
+                          block_size=block_size, n_jobs=n_jobs)
+    queries = numpy.concatenate((bits[:20], bits[-1:]))
+    indices, similarities = index.search(pack_fingerprints(queries), k=4)
+    assert indices.shape == (21, 4)
+    for q, query in enumerate(queries):
+        expect = brute_force_tanimoto(bits, query)
+        order = numpy.lexsort((numpy.arange(len(expect)), -expect))[:4]
+        numpy.testing.assert_array_equal(indices[q], order)
+        numpy.testing.assert_allclose(similarities[q], expect[order])
+    # a query.
+    indices, similarities = index.search(pack_fingerprints(bits[3]), k=1000)
+    assert indices.shape == (len(bits),)
+    assert indices[0] == 3
+
+
+@pytest.mark.parametrize('layout', ['memmap', 'fortran'])
+def test_tanimoto_index_layout(tmpdir, bits, layout):
+    packed = pack_fingerprints(bits)
+    if layout == 'memmap':
+        filepath = str(tmpdir.join('fingerprints.npy'))
+        FingerprintStore(packed).save(filepath)
+        store = FingerprintStore.load(filepath, mmap_mode='r')
+    else:
+        store = FingerprintStore(numpy.asfortranarray(packed))
+    indices, similarities = TanimotoIndex(store, block_size=16).search(
+        packed[:5], k=3)
+    for q in range(5):
+        expect = brute_force_tanimoto(bits, bits[q])
+        numpy.testing.assert_allclose(similarities[q], expect[indices[q]])
+        numpy.testing.assert_allclose(similarities[q],
+                                      numpy.sort(expect)[::-1][:3])
+
+
+def test_tanimoto_index_ecfp():
+    preprocessor = ECFPPreprocessor(packed=True)
+    assert preprocessor.get_feature_spec() == (((32,), numpy.uint64),)
+    dataset = SmilesParser(preprocessor).parse(smiles)['dataset']
+    store = FingerprintStore(dataset.get_datasets()[0])
+    numpy.testing.assert_array_equal(
+        store.get_bits(slice(None)),
+        SmilesParser(ECFPPreprocessor()).parse(smiles)['dataset']
+        .get_datasets()[0])
+    index = TanimotoIndex(store, block_size=4)
+    indices, similarities = index.search(store.fingerprints, k=3)
+    fps = [rdMolDescriptors.GetMorganFingerprintAsBitVect(
+        Chem.MolFromSmiles(s), 2) for s in smiles]
+    for q in range(len(smiles)):
+        expect = numpy.array(DataStructs.BulkTanimotoSimilarity(fps[q], fps))
+        numpy.testing.assert_allclose(similarities[q], expect[indices[q]])
+        numpy.testing.assert_allclose(similarities[q],
+                                      numpy.sort(expect)[::-1][:3])
+
+
+def test_tanimoto_index_invalid(bits):
+    index = TanimotoIndex(FingerprintStore.from_bits(bits))
+    with pytest.raises(ValueError):
+        index.search(pack_fingerprints(bits[:, :64]))
+    with pytest.raises(ValueError):
+        index.search(pack_fingerprints(bits), k=0)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '-s'])
@@ -0,0 +1,119 @@
+import pickle
+
+import numpy
+import pytest
+from rdkit import Chem
+from rdkit.Chem import AllChem
+
+from chainer_chemistry.dataset.feature_cache import get_config_hash
+from chainer_chemistry.dataset.geometry_store import GeometryStore
+from chainer_chemistry.dataset.geometry_store import get_geometry_key
+from chainer_chemistry.dataset.geometry_store import match_coordinates
+from chainer_chemistry.dataset.preprocessors.schnet_preprocessor import SchNetPreprocessor  # NOQA
+from chainer_chemistry.dataset.ragged_array import RaggedArray
+
+
+smiles_list = ['CN=C=O', 'Oc1ccccc1', 'OC(=O)C[NH3+]']
+
+
+def make_geometry(smiles, seed=0):
+    """Returns atomic numbers and coordinates in a shuffled atom order"""
+    mol = Chem.AddHs(Chem.MolFromSmiles(smiles))
+    AllChem.EmbedMolecule(mol, randomSeed=0)
+    atomic_numbers = numpy.array([a.GetAtomicNum() for a in mol.GetAtoms()],
+                                 dtype=numpy.int32)
+    coordinates = mol.GetConformer().GetPositions().astype(numpy.float32)
+    perm = numpy.random.RandomState(seed).permutation(len(atomic_numbers))
+    return atomic_numbers[perm], coordinates[perm]
+
+
+def distance_matrix(coordinates):
+    diff = coordinates[:, None, :] - coordinates[None, :, :]
+    return numpy.sqrt((diff ** 2).sum(axis=2))
+
+
+@pytest.fixture
+def store():
+    geometries = [make_geometry(s) for s in smiles_list]
+    keys = [get_geometry_key(Chem.MolFromSmiles(s)) for s in smiles_list]
+    return GeometryStore(
+        keys, RaggedArray.from_list([g[0] for g in geometries]),
+        RaggedArray.from_list([g[1] for g in geometries]))
+
+
+@pytest.mark.parametrize('smiles', smiles_list)
+@pytest.mark.parametrize('add_Hs', [False, True])
+def test_match_coordinates(smiles, add_Hs):
+    atomic_numbers, coordinates = make_geometry(smiles)
+    mol = Chem.MolFromSmiles(smiles)
+    if add_Hs:
+        mol = Chem.AddHs(mol)
+    actual = match_coordinates(mol, atomic_numbers, coordinates)
+    assert actual.shape == (mol.GetNumAtoms(), 3)
+    # each atom gets the coordinates of an atom of the same element, and
+    # bonded atoms of `mol` are close to each other.
+    actual_numbers = [atom.GetAtomicNum() for atom in mol.GetAtoms()]
+    index = [numpy.flatnonzero((coordinates == c).all(axis=1))[0]
+             for c in actual]
+    numpy.testing.assert_array_equal(atomic_numbers[index], actual_numbers)
+    dists = distance_matrix(actual)
+    for bond in mol.GetBonds():
+        assert dists[bond.GetBeginAtomIdx(), bond.GetEndAtomIdx()] < 1.6
+
+
+def test_match_coordinates_mismatch():
+    atomic_numbers, coordinates = make_geometry('CN=C=O')
+    assert match_coordinates(Chem.MolFromSmiles('CC=C=O'), atomic_numbers,
+                             coordinates) is None
+    assert match_coordinates(Chem.MolFromSmiles('CN'), atomic_numbers,
+                             coordinates) is None
+
+
+def test_get_coordinates(store):
+    mol = Chem.MolFromSmiles('c1ccccc1O')
+    actual = store.get_coordinates(mol)
+    assert actual.shape == (7, 3)
+    assert store.get_index(mol) == 1
+    assert store.get_coordinates(Chem.MolFromSmiles('CCC')) is None
+
+
+def test_save_load(tmpdir, store):
+    filepath = str(tmpdir.join('geometry.npz'))
+    store.save(filepath)
+    actual = GeometryStore.load(filepath)
+    assert len(actual) == 3
+    numpy.testing.assert_array_equal(actual.smiles, store.smiles)
+    for i in range(3):
+        numpy.testing.assert_array_equal(actual.coordinates[i],
+                                         store.coordinates[i])
+    assert get_config_hash(SchNetPreprocessor(geometry_store=actual)) == \
+        get_config_hash(SchNetPreprocessor(geometry_store=store))
+
+
+def test_pickle(store):
+    mol = Chem.MolFromSmiles('CN=C=O')
+    store.get_index(mol)
+    actual = pickle.loads(pickle.dumps(store))
+    assert actual._index is None
+    assert actual.get_index(mol) == 0
+
+
+def test_invalid_length():
+    with pytest.raises(ValueError):
+        GeometryStore(['C'], RaggedArray.from_list([]),
+                      RaggedArray.from_list([]))
+
+
+def test_schnet_preprocessor_with_store(store):
+    pp = SchNetPreprocessor(out_size=9, geometry_store=store)
+    _, mol = pp.prepare_smiles_and_mol(Chem.MolFromSmiles('Oc1ccccc1'))
+    atoms, dists = pp.get_input_features(mol)
+    expect = distance_matrix(store.get_coordinates(mol))
+    assert dists.shape == (9, 9)
+    assert dists.dtype == numpy.float32
+    numpy.testing.assert_allclose(dists[:7, :7], expect, rtol=1e-6)
+    numpy.testing.assert_array_equal(dists[7:], 0)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '-s'])
@@ -0,0 +1,92 @@
+import itertools
+
+import numpy
+import pytest
+
+from chainer_chemistry.dataset.neighbor_list import construct_neighbor_list
+
+
+def brute_force(coordinates, cutoff, lattice=None, max_repeat=3):
+    """Returns the set of `(i, j, rounded distance)` of all pairs"""
+    num_atoms = len(coordinates)
+    if lattice is None:
+        shifts = numpy.zeros((1, 3))
+    else:
+        offsets = list(itertools.product(range(-max_repeat, max_repeat + 1),
+                                         repeat=3))
+        shifts = numpy.array(offsets).dot(lattice)
+    pairs = []
+    for i in range(num_atoms):
+        for j in range(num_atoms):
+            for shift in shifts:
+                d = numpy.linalg.norm(coordinates[j] + shift - coordinates[i])
+                if d <= cutoff and not (i == j and d == 0):
+                    pairs.append((i, j, round(d, 6)))
+    return sorted(pairs)
+
+
+def to_pairs(index, distance):
+    return sorted((int(i), int(j), round(d, 6))
+                  for (i, j), d in zip(index.T, distance))
+
+
+@pytest.fixture
+def coordinates():
+    return numpy.random.RandomState(0).uniform(0, 6, size=(40, 3))
+
+
+def test_construct_neighbor_list(coordinates):
+    index, distance = construct_neighbor_list(coordinates, 2.5)
+    assert index.shape == (2, len(distance))
+    assert to_pairs(index, distance) == brute_force(coordinates, 2.5)
+    # sorted by the center atom and then by the distance.
+    order = numpy.lexsort((distance, index[0]))
+    numpy.testing.assert_array_equal(order, numpy.arange(len(distance)))
+
+
+def test_construct_neighbor_list_max_num_neighbors(coordinates):
+    index, distance = construct_neighbor_list(coordinates, 2.5)
+    index3, distance3 = construct_neighbor_list(
+        coordinates, 2.5, max_num_neighbors=3)
+    for i in range(len(coordinates)):
+        numpy.testing.assert_array_equal(
+            distance3[index3[0] == i], distance[index[0] == i][:3])
+    assert numpy.bincount(index3[0]).max() <= 3
+
+
+def test_construct_neighbor_list_periodic():
+    rs = numpy.random.RandomState(1)
+    lattice = numpy.array([[3., 0., 0.], [0.5, 2.5, 0.], [0., 0.3, 2.]])
+    # some atoms are outside of the unit cell.
+    coordinates = rs.uniform(-1, 4, size=(5, 3))
+    index, distance = construct_neighbor_list(coordinates, 3.5,
+                                              lattice=lattice)
+    assert to_pairs(index, distance) == brute_force(coordinates, 3.5,
+                                                    lattice=lattice)
+    # an atom has its own images as its neighbors.
+    assert (index[0] == index[1]).any()
+
+
+def test_construct_neighbor_list_single_atom():
+    index, distance = construct_neighbor_list(numpy.zeros((1, 3)), 1.)
+    assert index.shape == (2, 0)
+    assert distance.shape == (0,)
+    index, distance = construct_neighbor_list(
+        numpy.zeros((1, 3)), 1., lattice=numpy.eye(3))
+    # 6 images at the distance 1.
+    assert index.shape == (2, 6)
+    numpy.testing.assert_allclose(distance, 1.)
+
+
+def test_construct_neighbor_list_invalid():
+    with pytest.raises(ValueError):
+        construct_neighbor_list(numpy.zeros((3, 2)), 1.)
+    with pytest.raises(ValueError):
+        construct_neighbor_list(numpy.zeros((3, 3)), 0.)
+    with pytest.raises(ValueError):
+        construct_neighbor_list(numpy.zeros((3, 3)), 1.,
+                                lattice=numpy.eye(2))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '-s'])
@@ -3,6 +3,7 @@ import pytest
 
 
 from chainer_chemistry.dataset.indexers.numpy_tuple_dataset_feature_indexer import NumpyTupleDatasetFeatureIndexer  # NOQA
+from chainer_chemistry.dataset.ragged_array import RaggedArray
 from chainer_chemistry.datasets.numpy_tuple_dataset import NumpyTupleDataset
 
 
@@ -54,5 +55,38 @@ class TestNumpyTupleDatasetFeatureIndexer(object):
             data[j][ndarray_index])
 
 
+@pytest.mark.parametrize('data_index', [
+    [2, 0], numpy.array([1]), numpy.array([], dtype=numpy.int32),
+    numpy.array([True, False, True]), slice(1, 3)])
+def test_extract_feature_ragged_array(data_index):
+    arrays = [numpy.arange(n) for n in range(1, 4)]
+    dataset = NumpyTupleDataset(numpy.arange(3),
+                                RaggedArray.from_list(arrays))
+    actual = dataset.features[data_index, 1]
+    assert isinstance(actual, RaggedArray)
+    expect_index = numpy.arange(3)[data_index]
+    assert len(actual) == len(expect_index)
+    for a, i in zip(actual, expect_index):
+        numpy.testing.assert_array_equal(a, arrays[i])
+
+
+@pytest.mark.parametrize('data_index', [
+    [2, 0], numpy.array([1]), numpy.array([], dtype=numpy.int32), [],
+    numpy.array([True, False, True])])
+def test_extract_feature_fancy_indexing(data_index):
+    x = numpy.arange(6, dtype=numpy.float32).reshape(3, 2)
+    dataset = NumpyTupleDataset(x, numpy.arange(3))
+    actual = dataset.features[data_index, 0]
+    assert type(actual) is numpy.ndarray
+    assert actual.dtype == numpy.float32
+    numpy.testing.assert_array_equal(actual, x[numpy.arange(3)[data_index]])
+
+
+def test_extract_feature_invalid_bool_index():
+    dataset = NumpyTupleDataset(numpy.arange(3))
+    with pytest.raises(ValueError):
+        dataset.features[numpy.array([True, False]), 0]
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,117 @@
+import os
+
+from chainer.dataset import concat_examples
+import numpy
+import pytest
+
+from chainer_chemistry.dataset.ragged_array import RaggedArray
+
+
+@pytest.fixture
+def arrays():
+    return [numpy.arange(n * n, dtype=numpy.float32).reshape(n, n)
+            for n in [3, 1, 0, 4, 2]]
+
+
+def check_arrays(actual, expect):
+    assert len(actual) == len(expect)
+    for a, e in zip(actual, expect):
+        assert a.dtype == e.dtype
+        numpy.testing.assert_array_equal(a, e)
+
+
+def test_from_list(arrays):
+    x = RaggedArray.from_list(arrays)
+    assert len(x) == 5
+    assert x.dtype == numpy.float32
+    assert x.ndim == 3
+    assert x.values.shape == (30,)
+    numpy.testing.assert_array_equal(x.offsets, [0, 9, 10, 10, 26, 30])
+    check_arrays(list(x), arrays)
+
+
+def test_from_list_different_ndim():
+    with pytest.raises(ValueError):
+        RaggedArray.from_list([numpy.zeros(2), numpy.zeros((2, 2))])
+
+
+def test_invalid_offsets():
+    with pytest.raises(ValueError):
+        RaggedArray(numpy.zeros(3), [0, 3], [[1], [2]])
+
+
+@pytest.mark.parametrize('index', [0, 2, -1])
+def test_getitem_int(arrays, index):
+    x = RaggedArray.from_list(arrays)
+    numpy.testing.assert_array_equal(x[index], arrays[index])
+
+
+def test_getitem_out_of_bounds(arrays):
+    x = RaggedArray.from_list(arrays)
+    with pytest.raises(IndexError):
+        x[5]
+    with pytest.raises(IndexError):
+        x[[0, 5]]
+
+
+@pytest.mark.parametrize('index', [
+    slice(1, 4), slice(None, None, 2), slice(3, 1), slice(None, None, -1),
+    [4, 0, 0], numpy.array([], dtype=numpy.int32), numpy.array([-1, 1]),
+    numpy.array([True, False, False, True, True])])
+def test_getitem_array(arrays, index):
+    x = RaggedArray.from_list(arrays)
+    actual = x[index]
+    assert isinstance(actual, RaggedArray)
+    expect_index = numpy.arange(5)[index]
+    check_arrays(list(actual), [arrays[i] for i in expect_index])
+    # indexing the result again
+    check_arrays(list(actual[::-1]), [arrays[i] for i in expect_index[::-1]])
+
+
+def test_concatenate(arrays):
+    x = RaggedArray.from_list(arrays)
+    actual = RaggedArray.concatenate([x[3:], x[:2], x[[2]]])
+    check_arrays(list(actual), arrays[3:] + arrays[:2] + arrays[2:3])
+
+
+@pytest.mark.parametrize('padding', [0, -1])
+def test_to_padded(arrays, padding):
+    x = RaggedArray.from_list(arrays)
+    numpy.testing.assert_array_equal(
+        x.to_padded(padding), concat_examples(arrays, padding=padding))
+    numpy.testing.assert_array_equal(
+        x[[3, 1]].to_padded(padding),
+        concat_examples([arrays[3], arrays[1]], padding=padding))
+
+
+def test_to_padded_1d():
+    arrays = [numpy.array([1, 2]), numpy.array([3, 4, 5])]
+    numpy.testing.assert_array_equal(
+        RaggedArray.from_list(arrays)[1:].to_padded(), [[3, 4, 5]])
+
+
+def test_asarray(arrays):
+    actual = numpy.asarray(RaggedArray.from_list(arrays))
+    assert actual.dtype == object
+    check_arrays(list(actual), arrays)
+
+
+def test_save_load_npy(tmpdir, arrays):
+    prefix = os.path.join(str(tmpdir), 'arr_0')
+    RaggedArray.from_list(arrays)[1:].save_npy(prefix)
+    actual = RaggedArray.load_npy(prefix, mmap_mode='r')
+    assert isinstance(actual.values, numpy.memmap)
+    check_arrays(list(actual), arrays[1:])
+    assert RaggedArray.load_npy(os.path.join(str(tmpdir), 'arr_1')) is None
+
+
+def test_to_dict_from_dict(arrays):
+    data = RaggedArray.from_list(arrays)[2:].to_dict('arr_1')
+    assert sorted(data.keys()) == ['arr_1_offsets', 'arr_1_shapes',
+                                   'arr_1_values']
+    check_arrays(list(RaggedArray.from_dict(data, 'arr_1')), arrays[2:])
+    assert RaggedArray.from_dict(data, 'arr_0') is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '-s'])
@@ -1,5 +1,6 @@
 import os
 
+import chainer
 import numpy
 import pandas
 import pytest
@@ -7,6 +8,7 @@ import pytest
 from chainer_chemistry.dataset.preprocessors.atomic_number_preprocessor import AtomicNumberPreprocessor  # NOQA
 from chainer_chemistry.datasets import molnet
 from chainer_chemistry.datasets import NumpyTupleDataset
+from chainer_chemistry.datasets import NumpyTupleDatasetView
 
 expect_bbbp_lengths = [1633, 203, 203]
 expect_bbbp_lengths2 = [1021, 611, 407]
@@ -76,9 +78,9 @@ def test_get_molnet_bbbp_dataset():
     assert 'dataset' in datasets.keys()
     datasets = datasets['dataset']
     assert len(datasets) == 3
-    assert type(datasets[0]) == NumpyTupleDataset
-    assert type(datasets[1]) == NumpyTupleDataset
-    assert type(datasets[2]) == NumpyTupleDataset
+    assert type(datasets[0]) == NumpyTupleDatasetView
+    assert type(datasets[1]) == NumpyTupleDatasetView
+    assert type(datasets[2]) == NumpyTupleDatasetView
 
     # Test each train, valid and test dataset
     for i, dataset in enumerate(datasets):
@@ -107,9 +109,9 @@ def test_get_molnet_bbbp_dataset_change_split_ratio():
     assert 'dataset' in datasets.keys()
     datasets = datasets['dataset']
     assert len(datasets) == 3
-    assert type(datasets[0]) == NumpyTupleDataset
-    assert type(datasets[1]) == NumpyTupleDataset
-    assert type(datasets[2]) == NumpyTupleDataset
+    assert type(datasets[0]) == NumpyTupleDatasetView
+    assert type(datasets[1]) == NumpyTupleDatasetView
+    assert type(datasets[2]) == NumpyTupleDatasetView
 
     # Test each train, valid and test dataset
     for i, dataset in enumerate(datasets):
@@ -227,9 +229,9 @@ def test_get_molnet_pdbbind_dataset():
     assert 'pdb_id' in datasets.keys()
     datasets = datasets['dataset']
     assert len(datasets) == 3
-    assert type(datasets[0]) == NumpyTupleDataset
-    assert type(datasets[1]) == NumpyTupleDataset
-    assert type(datasets[2]) == NumpyTupleDataset
+    assert type(datasets[0]) == NumpyTupleDatasetView
+    assert type(datasets[1]) == NumpyTupleDatasetView
+    assert type(datasets[2]) == NumpyTupleDatasetView
 
     # Test each train, valid and test dataset
     for i, dataset in enumerate(datasets):
@@ -291,9 +293,9 @@ def test_get_molnet_grid_featurized_pdbbind_dataset():
     assert 'dataset' in datasets.keys()
     datasets = datasets['dataset']
     assert len(datasets) == 3
-    assert type(datasets[0]) == NumpyTupleDataset
-    assert type(datasets[1]) == NumpyTupleDataset
-    assert type(datasets[2]) == NumpyTupleDataset
+    assert type(datasets[0]) == NumpyTupleDatasetView
+    assert type(datasets[1]) == NumpyTupleDatasetView
+    assert type(datasets[2]) == NumpyTupleDatasetView
 
     # Test each train, valid and test dataset
     for i, dataset in enumerate(datasets):
@@ -322,9 +324,9 @@ def test_get_molnet_qm7_dataset():
     assert 'dataset' in datasets.keys()
     datasets = datasets['dataset']
     assert len(datasets) == 3
-    assert type(datasets[0]) == NumpyTupleDataset
-    assert type(datasets[1]) == NumpyTupleDataset
-    assert type(datasets[2]) == NumpyTupleDataset
+    assert type(datasets[0]) == NumpyTupleDatasetView
+    assert type(datasets[1]) == NumpyTupleDatasetView
+    assert type(datasets[2]) == NumpyTupleDatasetView
 
     # Test each train, valid and test dataset
     for i, dataset in enumerate(datasets):
@@ -356,9 +358,9 @@ def test_get_molnet_qm7_dataset_with_smiles():
     datasets = datasets['dataset']
     assert len(datasets) == 3
     assert len(smileses) == 3
-    assert type(datasets[0]) == NumpyTupleDataset
-    assert type(datasets[1]) == NumpyTupleDataset
-    assert type(datasets[2]) == NumpyTupleDataset
+    assert type(datasets[0]) == NumpyTupleDatasetView
+    assert type(datasets[1]) == NumpyTupleDatasetView
+    assert type(datasets[2]) == NumpyTupleDatasetView
 
     # Test each train, valid and test dataset
     for i, dataset in enumerate(datasets):
@@ -397,6 +399,108 @@ def test_get_molnet_pdbbind_grid_dataframe():
                                                pdbbind_subset='core')
 
 
+_cache_smiles = ['CC', 'CCO', 'CCN', 'C1CC1', 'CC(=O)O', 'c1ccccc1',
+                 'CCCC', 'CO', 'CN', 'CCCl']
+
+
+@pytest.fixture
+def molnet_cache_env(tmpdir, monkeypatch):
+    """Local csv files in place of MoleculeNet files, and dataset root"""
+    filepaths = {}
+    for i, filetype in enumerate(['onefile', 'train', 'valid', 'test']):
+        filepath = os.path.join(str(tmpdir), '{}.csv'.format(filetype))
+        pandas.DataFrame({
+            'mol': _cache_smiles, 'smiles': _cache_smiles,
+            'pIC50': numpy.arange(10, dtype=numpy.float32) + i,
+            'y': numpy.arange(10, dtype=numpy.float32) - i,
+        }).to_csv(filepath, index=False)
+        filepaths[filetype] = filepath
+
+    def get_molnet_filepath(dataset_name, filetype='onefile', **kwargs):
+        return filepaths[filetype]
+
+    monkeypatch.setattr(molnet.molnet, 'get_molnet_filepath',
+                        get_molnet_filepath)
+    dataset_root = chainer.dataset.get_dataset_root()
+    chainer.dataset.set_dataset_root(os.path.join(str(tmpdir), 'root'))
+    yield
+    chainer.dataset.set_dataset_root(dataset_root)
+
+
+def _disable_parse(monkeypatch):
+    def parse(*args, **kwargs):
+        raise AssertionError('dataset is parsed again')
+    monkeypatch.setattr(molnet.molnet.CSVFileParser, 'parse', parse)
+
+
+def _check_same_datasets(actual, expect):
+    assert len(actual) == len(expect)
+    for a, e in zip(actual, expect):
+        assert len(a) == len(e)
+        for x, y in zip(a.get_datasets(), e.get_datasets()):
+            numpy.testing.assert_array_equal(x, y)
+
+
+@pytest.mark.parametrize('return_smiles', [True, False])
+def test_get_molnet_dataset_cache(molnet_cache_env, monkeypatch,
+                                  return_smiles):
+    pp = AtomicNumberPreprocessor(max_atoms=10, out_size=10)
+    expect = molnet.get_molnet_dataset('bace_pIC50', preprocessor=pp,
+                                       cache=True,
+                                       return_smiles=return_smiles)
+    _disable_parse(monkeypatch)
+    actual = molnet.get_molnet_dataset('bace_pIC50', preprocessor=pp,
+                                       cache=True,
+                                       return_smiles=return_smiles)
+    _check_same_datasets(actual['dataset'], expect['dataset'])
+    for dataset in actual['dataset']:
+        assert isinstance(dataset, NumpyTupleDatasetView)
+        assert isinstance(dataset.get_base_dataset().get_datasets()[0],
+                          numpy.memmap)
+    if return_smiles:
+        for a, e in zip(actual['smiles'], expect['smiles']):
+            assert a.dtype == object
+            numpy.testing.assert_array_equal(a, e)
+    else:
+        assert actual['smiles'] is None
+        assert expect['smiles'] is None
+
+
+def test_get_molnet_dataset_cache_key(molnet_cache_env, monkeypatch):
+    pp = AtomicNumberPreprocessor(max_atoms=10, out_size=10)
+    molnet.get_molnet_dataset('bace_pIC50', preprocessor=pp,
+                              cache=True)
+    _disable_parse(monkeypatch)
+    # different preprocessor configuration and split settings
+    with pytest.raises(AssertionError):
+        molnet.get_molnet_dataset(
+            'bace_pIC50',
+            preprocessor=AtomicNumberPreprocessor(max_atoms=9, out_size=10),
+            cache=True)
+    with pytest.raises(AssertionError):
+        molnet.get_molnet_dataset('bace_pIC50', preprocessor=pp,
+                                  frac_train=0.6, frac_valid=0.2,
+                                  frac_test=0.2, cache=True)
+    # n_jobs does not change the dataset
+    molnet.get_molnet_dataset('bace_pIC50', preprocessor=pp,
+                              cache=True, n_jobs=2)
+
+
+def test_get_molnet_dataset_cache_separate_csv(molnet_cache_env,
+                                               monkeypatch):
+    pp = AtomicNumberPreprocessor(max_atoms=10, out_size=10)
+    expect = molnet.get_molnet_dataset('kaggle', preprocessor=pp,
+                                       labels='y', cache=True)
+    assert expect['smiles'] == (None, None, None)
+    _disable_parse(monkeypatch)
+    actual = molnet.get_molnet_dataset('kaggle', preprocessor=pp,
+                                       labels='y', cache=True,
+                                       return_smiles=True)
+    _check_same_datasets(actual['dataset'], expect['dataset'])
+    for smiles in actual['smiles']:
+        assert list(smiles) == _cache_smiles
+
+
 if __name__ == '__main__':
     args = [__file__, '-v', '-s']
     pytest.main(args=args)
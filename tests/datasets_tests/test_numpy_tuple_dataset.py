@@ -1,10 +1,12 @@
 import os
+import pickle
 import tempfile
 
 import numpy
 import pytest
 import six
 
+from chainer_chemistry.dataset import RaggedArray
 from chainer_chemistry.datasets import NumpyTupleDataset
 
 
@@ -107,6 +109,109 @@ class TestNumpyTupleDataset(object):
         for a, d in six.moves.zip(dataset._datasets, load_dataset._datasets):
             numpy.testing.assert_array_equal(a, d)
 
+    def test_save_load_ragged_array(self, tmpdir, data):
+        tmp_cache_path = os.path.join(str(tmpdir), 'tmp.npz')
+        ragged = RaggedArray.from_list([numpy.ones((2, 2)),
+                                        numpy.ones((3, 3))])
+        dataset = NumpyTupleDataset(data[0], ragged)
+        NumpyTupleDataset.save(tmp_cache_path, dataset)
+        load_dataset = NumpyTupleDataset.load(tmp_cache_path,
+                                              allow_pickle=False)
+
+        datasets = load_dataset.get_datasets()
+        assert len(datasets) == 2
+        numpy.testing.assert_array_equal(datasets[0], data[0])
+        assert isinstance(datasets[1], RaggedArray)
+        for a, e in six.moves.zip(datasets[1], ragged):
+            numpy.testing.assert_array_equal(a, e)
+
+    @pytest.mark.parametrize('mmap_mode', [None, 'r'])
+    def test_save_load_npy(self, tmpdir, data, mmap_mode):
+        dirpath = os.path.join(str(tmpdir), 'dataset')
+        ragged = RaggedArray.from_list([numpy.ones((2, 2)),
+                                        numpy.ones((3, 3))])
+        dataset = NumpyTupleDataset(*(data + (ragged,)))
+        NumpyTupleDataset.save(dirpath, dataset, format='npy')
+        assert os.path.exists(os.path.join(dirpath, 'manifest.json'))
+        load_dataset = NumpyTupleDataset.load(dirpath, allow_pickle=False,
+                                              mmap_mode=mmap_mode)
+
+        datasets = load_dataset.get_datasets()
+        assert len(datasets) == 4
+        for a, d in six.moves.zip(datasets[:3], data):
+            assert isinstance(a, numpy.memmap) == (mmap_mode is not None)
+            numpy.testing.assert_array_equal(a, d)
+        assert isinstance(datasets[3], RaggedArray)
+        for a, e in six.moves.zip(datasets[3], ragged):
+            numpy.testing.assert_array_equal(a, e)
+
+    def test_save_load_npy_object_array(self, tmpdir):
+        dirpath = os.path.join(str(tmpdir), 'dataset')
+        a = numpy.empty(2, dtype=object)
+        a[0], a[1] = numpy.zeros(2), numpy.zeros((1, 3))
+        NumpyTupleDataset.save(dirpath, NumpyTupleDataset(a), format='npy')
+        load_dataset = NumpyTupleDataset.load(dirpath, mmap_mode='r')
+        assert load_dataset.get_datasets()[0][1].shape == (1, 3)
+        with pytest.raises(ValueError):
+            NumpyTupleDataset.load(dirpath, allow_pickle=False)
+
+    def test_save_invalid_format(self, tmpdir, data):
+        with pytest.raises(ValueError):
+            NumpyTupleDataset.save(str(tmpdir), NumpyTupleDataset(*data),
+                                   format='hdf5')
+
+    def test_pickle_memory_mapped(self, tmpdir):
+        data = (numpy.arange(1000), numpy.arange(3000).reshape(1000, 3))
+        dirpath = os.path.join(str(tmpdir), 'dataset')
+        NumpyTupleDataset.save(dirpath, NumpyTupleDataset(*data),
+                               format='npy')
+        dataset = NumpyTupleDataset.load(dirpath, mmap_mode='r')
+        dumped = pickle.dumps(dataset)
+        # array contents are not pickled, they are memory-mapped again.
+        assert len(dumped) < sum(d.nbytes for d in data)
+        actual = pickle.loads(dumped)
+        for a, d in six.moves.zip(actual.get_datasets(), data):
+            assert isinstance(a, numpy.memmap)
+            numpy.testing.assert_array_equal(a, d)
+        numpy.testing.assert_array_equal(actual.features[:, 1], data[1])
+
+    def test_get_item_ragged_array(self, long_data):
+        arrays = [numpy.arange(n) for n in range(1, 5)]
+        dataset = NumpyTupleDataset(long_data[0],
+                                    RaggedArray.from_list(arrays))
+        actual = dataset[numpy.array([3, 1])]
+        assert len(actual) == 2
+        for (a, r), i in six.moves.zip(actual, [3, 1]):
+            assert a == long_data[0][i]
+            numpy.testing.assert_array_equal(r, arrays[i])
+
+    @pytest.mark.parametrize('index', [
+        slice(None), slice(1, 3), slice(None, None, -1),
+        numpy.array([3, 0, 3]), [2, 1], [],
+        numpy.array([True, False, True, False])])
+    def test_get_batch(self, long_data, index):
+        dataset = NumpyTupleDataset(*long_data)
+        actual = dataset.get_batch(index)
+        expect = dataset[numpy.arange(4)[index]]
+        assert len(actual) == len(expect)
+        for a, e in six.moves.zip(actual, expect):
+            assert len(a) == len(e)
+            for x, y in six.moves.zip(a, e):
+                numpy.testing.assert_array_equal(x, y)
+        for a, d in six.moves.zip(actual.columns, long_data):
+            assert isinstance(a, numpy.ndarray)
+            assert a.dtype == d.dtype
+
+    def test_get_batch_ragged_array(self, long_data):
+        arrays = [numpy.arange(n) for n in range(1, 5)]
+        dataset = NumpyTupleDataset(long_data[0],
+                                    RaggedArray.from_list(arrays))
+        actual = dataset.get_batch([3, 1])
+        assert isinstance(actual.columns[1], RaggedArray)
+        numpy.testing.assert_array_equal(actual.columns[0], [4, 2])
+        for r, i in six.moves.zip(actual.columns[1], [3, 1]):
+            numpy.testing.assert_array_equal(r, arrays[i])
+
     def test_get_datasets(self, data):
         dataset = NumpyTupleDataset(*data)
         datasets = dataset.get_datasets()
@@ -0,0 +1,140 @@
+import os
+import pickle
+
+import numpy
+import pytest
+import six
+
+from chainer_chemistry.dataset import RaggedArray
+from chainer_chemistry.datasets import NumpyTupleDataset
+from chainer_chemistry.datasets import NumpyTupleDatasetView
+from chainer_chemistry.datasets import ShardedNumpyTupleDataset
+
+
+@pytest.fixture
+def data():
+    a = numpy.arange(6, dtype=numpy.int32)
+    b = numpy.arange(12, dtype=numpy.float32).reshape(6, 2)
+    c = RaggedArray.from_list([numpy.arange(n) for n in range(1, 7)])
+    return a, b, c
+
+
+@pytest.fixture
+def dataset(data):
+    return NumpyTupleDataset(*data)
+
+
+indices = numpy.array([4, 1, 5, 0])
+
+
+def check_example(actual, data, index):
+    assert len(actual) == len(data)
+    for a, d in six.moves.zip(actual, data):
+        numpy.testing.assert_array_equal(a, d[index])
+
+
+def check_datasets(actual, data, index):
+    assert len(actual) == len(data)
+    for a, d in six.moves.zip(actual, data):
+        assert type(a) is type(d)
+        assert a.dtype == d.dtype
+        assert len(a) == len(index)
+        for x, i in six.moves.zip(a, index):
+            numpy.testing.assert_array_equal(x, d[i])
+
+
+class TestNumpyTupleDatasetView(object):
+
+    def test_len(self, dataset):
+        view = NumpyTupleDatasetView(dataset, indices)
+        assert len(view) == 4
+        assert isinstance(view, NumpyTupleDataset)
+
+    @pytest.mark.parametrize('index', [0, 3, -1])
+    def test_get_item_integer_index(self, dataset, data, index):
+        view = NumpyTupleDatasetView(dataset, indices)
+        check_example(view[index], data, indices[index])
+
+    @pytest.mark.parametrize('index', [
+        slice(None), slice(1, 3), numpy.array([3, 0]), [2]])
+    def test_get_item_multiple_index(self, dataset, data, index):
+        view = NumpyTupleDatasetView(dataset, indices)
+        actual = view[index]
+        expect_index = indices[index]
+        assert len(actual) == len(expect_index)
+        for a, i in six.moves.zip(actual, expect_index):
+            check_example(a, data, i)
+
+    @pytest.mark.parametrize('index', [
+        slice(None), slice(None, None, -2), numpy.array([3, 0]), [],
+        numpy.array([True, False, False, True])])
+    def test_features(self, dataset, data, index):
+        view = NumpyTupleDatasetView(dataset, indices)
+        actual = view.features[index]
+        check_datasets(actual, data, indices[index])
+        check_datasets([view.features[index, 1]], data[1:2], indices[index])
+
+    def test_features_invalid_bool_index(self, dataset):
+        view = NumpyTupleDatasetView(dataset, indices)
+        with pytest.raises(ValueError):
+            view.features[numpy.array([True, False])]
+
+    @pytest.mark.parametrize('index', [slice(1, 3), [3, 0, 0]])
+    def test_get_batch(self, dataset, data, index):
+        view = NumpyTupleDatasetView(dataset, indices)
+        actual = view.get_batch(index)
+        check_datasets(actual.columns, data, indices[index])
+
+    def test_bool_indices(self, dataset, data):
+        mask = numpy.array([True, False, False, True, True, False])
+        view = NumpyTupleDatasetView(dataset, mask)
+        numpy.testing.assert_array_equal(view.get_indices(), [0, 3, 4])
+
+    def test_invalid_indices(self, dataset):
+        with pytest.raises(IndexError):
+            NumpyTupleDatasetView(dataset, [0, 6])
+        with pytest.raises(ValueError):
+            NumpyTupleDatasetView(dataset, numpy.array([True, False]))
+        with pytest.raises(ValueError):
+            NumpyTupleDatasetView(dataset, numpy.zeros((2, 2), dtype=int))
+
+    def test_nested_view(self, dataset, data):
+        view = NumpyTupleDatasetView(
+            NumpyTupleDatasetView(dataset, indices), [-1, 2])
+        assert view.get_base_dataset() is dataset
+        numpy.testing.assert_array_equal(view.get_indices(), [0, 5])
+        check_datasets(view.get_datasets(), data, [0, 5])
+
+    def test_get_datasets(self, dataset, data):
+        view = NumpyTupleDatasetView(dataset, indices)
+        datasets = view.get_datasets()
+        check_datasets(datasets, data, indices)
+        # features are copied only once
+        assert view.get_datasets() is datasets
+        check_datasets(view.to_numpy_tuple_dataset().get_datasets(),
+                       data, indices)
+
+    def test_save_load(self, tmpdir, dataset, data):
+        filepath = os.path.join(str(tmpdir), 'view.npz')
+        NumpyTupleDataset.save(filepath, NumpyTupleDatasetView(dataset,
+                                                               indices))
+        actual = NumpyTupleDataset.load(filepath)
+        check_datasets(actual.get_datasets(), data, indices)
+
+    def test_pickle(self, dataset, data):
+        view = pickle.loads(pickle.dumps(
+            NumpyTupleDatasetView(dataset, indices)))
+        check_example(view[1], data, indices[1])
+
+    def test_sharded_base_dataset(self, data):
+        shards = [NumpyTupleDataset(*[d[s:e] for d in data])
+                  for s, e in [(0, 2), (2, 6)]]
+        view = NumpyTupleDatasetView(ShardedNumpyTupleDataset(shards),
+                                     indices)
+        check_example(view[0], data, indices[0])
+        check_datasets(view.get_datasets(), data, indices)
+        check_datasets(view.get_batch([1, 2]).columns, data, indices[1:3])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -1,9 +1,15 @@
+import io
 import os
+import tarfile
 
 import numpy
+import pandas
 import pytest
+from rdkit import Chem
+from rdkit.Chem import AllChem
 
 from chainer_chemistry.dataset.preprocessors.atomic_number_preprocessor import AtomicNumberPreprocessor  # NOQA
+from chainer_chemistry.dataset.preprocessors.schnet_preprocessor import SchNetPreprocessor  # NOQA
 from chainer_chemistry.datasets import qm9
 
 
@@ -92,6 +98,78 @@ def test_get_qm9_smiles():
                                    dtype=numpy.int32))
 
 
+def make_xyz(index, smiles):
+    mol = Chem.AddHs(Chem.MolFromSmiles(smiles))
+    AllChem.EmbedMolecule(mol, randomSeed=0)
+    positions = mol.GetConformer().GetPositions()
+    properties = '\t'.join(str(index + 0.5 * k) for k in range(15))
+    lines = [str(mol.GetNumAtoms()), 'gdb {}\t{}\t'.format(index, properties)]
+    for atom, position in zip(mol.GetAtoms(), positions):
+        lines.append('{}\t{}\t{}\t{}\t0.0'.format(
+            atom.GetSymbol(), *position))
+    # QM9 files contain values like `1.2*^-6`.
+    lines[2] = '\t'.join(lines[2].split('\t')[:3] + ['5.5*^-6', '0.0'])
+    lines.append('0.0\t0.0')
+    lines.append('{}\t{}\t'.format(smiles, smiles))
+    lines.append('InChI=\tInChI=')
+    return '\n'.join(lines) + '\n'
+
+
+@pytest.fixture
+def qm9_tar(tmpdir, monkeypatch):
+    smiles_list = ['C', 'CN=C=O', 'Oc1ccccc1', 'C#N', 'CCO']
+    tar_path = str(tmpdir.join('dsgdb9nsd.xyz.tar.bz2'))
+    with tarfile.open(tar_path, 'w:bz2') as tf:
+        # members are not sorted in the tar file.
+        for i in [3, 0, 4, 2, 1]:
+            content = make_xyz(i + 1, smiles_list[i]).encode('utf-8')
+            info = tarfile.TarInfo('dsgdb9nsd_{:06d}.xyz'.format(i + 1))
+            info.size = len(content)
+            tf.addfile(info, io.BytesIO(content))
+    monkeypatch.setattr(qm9.download, 'cached_download', lambda url: tar_path)
+    return smiles_list
+
+
+@pytest.mark.parametrize('n_jobs,chunksize', [(1, 1000), (2, 2)])
+def test_download_and_extract_qm9(tmpdir, qm9_tar, monkeypatch, n_jobs,
+                                  chunksize):
+    save_dir = tmpdir.mkdir('qm9')
+    csv_path = str(save_dir.join('qm9.csv'))
+    assert qm9.download_and_extract_qm9(csv_path, n_jobs=n_jobs,
+                                        chunksize=chunksize)
+
+    df = pandas.read_csv(csv_path, index_col=0)
+    assert list(df.columns) == ['SMILES1', 'SMILES2'] + \
+        qm9.get_qm9_label_names()
+    assert list(df['SMILES1']) == qm9_tar
+    numpy.testing.assert_array_equal(df['A'], [1, 2, 3, 4, 5])
+    numpy.testing.assert_array_equal(df['Cv'], [8, 9, 10, 11, 12])
+
+    geometry_path = str(save_dir.join(qm9.geometry_file_name))
+    with numpy.load(geometry_path) as data:
+        numpy.testing.assert_array_equal(data['smiles1'], qm9_tar)
+        numpy.testing.assert_array_equal(data['labels'],
+                                         df[qm9.get_qm9_label_names()])
+        numpy.testing.assert_array_equal(data['atomic_numbers_offsets'],
+                                         [0, 5, 12, 25, 28, 37])
+
+    monkeypatch.setattr(qm9, '_get_qm9_geometry_filepath',
+                        lambda: geometry_path)
+    store = qm9.get_qm9_geometry_store(download_if_not_exist=False)
+    assert len(store) == 5
+    numpy.testing.assert_allclose(store.coordinates[0][0, 2], 5.5e-6)
+
+    # distances are computed from the stored geometry.
+    pp = SchNetPreprocessor(geometry_store=store)
+    mol = Chem.MolFromSmiles('CCO')
+    atoms, dists = pp.get_input_features(mol)
+    coordinates = numpy.asarray(store.coordinates[4])
+    heavy = coordinates[numpy.asarray(store.atomic_numbers[4]) != 1]
+    expect = numpy.sqrt(((heavy[:, None] - heavy[None]) ** 2).sum(axis=2))
+    numpy.testing.assert_allclose(numpy.sort(dists.ravel()),
+                                  numpy.sort(expect.ravel()), rtol=1e-5)
+
+
 def test_get_qm9_label_names():
     label_names = qm9.get_qm9_label_names()
     assert isinstance(label_names, list)
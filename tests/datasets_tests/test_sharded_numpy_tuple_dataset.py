@@ -0,0 +1,129 @@
+import os
+
+import numpy
+import pytest
+import six
+
+from chainer_chemistry.dataset import RaggedArray
+from chainer_chemistry.datasets import NumpyTupleDataset
+from chainer_chemistry.datasets import ShardedNumpyTupleDataset
+
+
+@pytest.fixture
+def data():
+    a = numpy.arange(5)
+    b = numpy.arange(5) * 2.
+    c = numpy.arange(15).reshape(5, 3)
+    return a, b, c
+
+
+@pytest.fixture
+def dataset(data):
+    # shards of size 2, 1 and 2
+    boundaries = [(0, 2), (2, 3), (3, 5)]
+    return ShardedNumpyTupleDataset(
+        [NumpyTupleDataset(*[d[s:e] for d in data]) for s, e in boundaries])
+
+
+def check_example(actual, data, index):
+    assert len(actual) == len(data)
+    for a, d in six.moves.zip(actual, data):
+        numpy.testing.assert_array_equal(a, d[index])
+
+
+class TestShardedNumpyTupleDataset(object):
+
+    def test_len(self, dataset):
+        assert len(dataset) == 5
+
+    @pytest.mark.parametrize('index', [0, 1, 2, 3, 4, -1, -5])
+    def test_get_item_integer_index(self, dataset, data, index):
+        check_example(dataset[index], data, index)
+
+    @pytest.mark.parametrize('index', [5, -6])
+    def test_get_item_out_of_bounds(self, dataset, index):
+        with pytest.raises(IndexError):
+            dataset[index]
+
+    @pytest.mark.parametrize('index', [
+        slice(None), slice(1, 4), slice(None, None, -2),
+        numpy.asarray([4, 0, 2]), [3, 1]])
+    def test_get_item_multiple_index(self, dataset, data, index):
+        actual = dataset[index]
+        expect_index = numpy.arange(5)[index]
+        assert len(actual) == len(expect_index)
+        for a, i in six.moves.zip(actual, expect_index):
+            check_example(a, data, i)
+
+    @pytest.mark.parametrize('index', [
+        slice(None), slice(1, 4), numpy.asarray([4, 0, 2]), [3, 1], []])
+    def test_get_batch(self, dataset, data, index):
+        actual = dataset.get_batch(index)
+        expect_index = numpy.arange(5)[index]
+        assert len(actual) == len(expect_index)
+        for a, d in six.moves.zip(actual.columns, data):
+            assert a.dtype == d.dtype
+            numpy.testing.assert_array_equal(a, d[expect_index])
+
+    def test_invalid_shards(self, data):
+        with pytest.raises(ValueError):
+            ShardedNumpyTupleDataset([])
+        with pytest.raises(ValueError):
+            ShardedNumpyTupleDataset([NumpyTupleDataset(*data),
+                                      NumpyTupleDataset(*data[:2])])
+
+    @pytest.mark.parametrize('index', [
+        slice(None), slice(1, 4), numpy.asarray([4, 0, 2]), [3, 1],
+        numpy.asarray([], dtype=numpy.int32),
+        numpy.asarray([True, False, True, False, True])])
+    def test_features(self, dataset, data, index):
+        for j in six.moves.range(len(data)):
+            numpy.testing.assert_array_equal(
+                dataset.features[index, j], data[j][index])
+
+    def test_features_variable_shape(self):
+        shards = [NumpyTupleDataset(numpy.zeros((2, 3))),
+                  NumpyTupleDataset(numpy.zeros((1, 4)))]
+        dataset = ShardedNumpyTupleDataset(shards)
+        actual = dataset.features[[2, 0], 0]
+        assert actual.dtype == object
+        assert actual[0].shape == (4,)
+        assert actual[1].shape == (3,)
+
+    def test_features_ragged_array(self, tmpdir):
+        arrays = [numpy.arange(n) for n in range(1, 6)]
+        ragged = RaggedArray.from_list(arrays)
+        for k, (s, e) in enumerate([(0, 2), (2, 5)]):
+            ShardedNumpyTupleDataset.save_shard(
+                os.path.join(str(tmpdir), str(k)), [ragged[s:e]])
+        dataset = ShardedNumpyTupleDataset.load(str(tmpdir))
+        actual = dataset.features[[4, 0, 3], 0]
+        assert isinstance(actual, RaggedArray)
+        for a, i in six.moves.zip(actual, [4, 0, 3]):
+            numpy.testing.assert_array_equal(a, arrays[i])
+        numpy.testing.assert_array_equal(dataset[1][0], arrays[1])
+
+    def test_save_load(self, tmpdir):
+        dirpath = str(tmpdir)
+        data = (numpy.arange(12), numpy.arange(24).reshape(12, 2))
+        for k in six.moves.range(12):
+            ShardedNumpyTupleDataset.save_shard(
+                os.path.join(dirpath, str(k)), [d[k:k + 1] for d in data])
+        dataset = ShardedNumpyTupleDataset.load(dirpath)
+        assert len(dataset) == 12
+        # shard '10' must come after shard '2'
+        for i in six.moves.range(12):
+            check_example(dataset[i], data, i)
+
+    def test_load_no_shard(self, tmpdir):
+        assert ShardedNumpyTupleDataset.load(str(tmpdir)) is None
+
+    def test_to_numpy_tuple_dataset(self, dataset, data):
+        actual = dataset.to_numpy_tuple_dataset()
+        assert isinstance(actual, NumpyTupleDataset)
+        for a, d in six.moves.zip(actual.get_datasets(), data):
+            numpy.testing.assert_array_equal(a, d)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
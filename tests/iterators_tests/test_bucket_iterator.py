@@ -0,0 +1,134 @@
+import chainer
+import numpy
+import pandas
+import pytest
+from rdkit import Chem
+
+from chainer_chemistry.dataset.converters import concat_mols
+from chainer_chemistry.dataset.parsers import DataFrameParser
+from chainer_chemistry.dataset.preprocessors import NFPPreprocessor
+from chainer_chemistry.dataset.ragged_array import RaggedArray
+from chainer_chemistry.datasets.numpy_tuple_dataset import NumpyTupleDataset
+from chainer_chemistry.iterators.bucket_iterator import BucketIterator
+from chainer_chemistry.iterators.bucket_iterator import BucketOrderSampler
+
+
+@pytest.fixture
+def sizes():
+    return numpy.random.RandomState(0).randint(1, 30, size=50)
+
+
+@pytest.fixture
+def dataset(sizes):
+    # unpadded atom arrays, whose elements are their indices.
+    atoms = numpy.empty(len(sizes), dtype=object)
+    for i, size in enumerate(sizes):
+        atoms[i] = numpy.full(size, i, dtype=numpy.int32)
+    t = numpy.arange(len(sizes), dtype=numpy.int32)
+    return NumpyTupleDataset(atoms, t)
+
+
+@pytest.mark.parametrize('shuffle', [True, False])
+def test_bucket_iterator(dataset, sizes, shuffle):
+    iterator = BucketIterator(dataset, 8, bucket_width=3, repeat=False,
+                              shuffle=shuffle)
+    labels = []
+    for batch in iterator:
+        atoms, t = concat_mols(batch)
+        assert atoms.shape == (len(t), sizes[t].max())
+        labels.append(t)
+    assert [len(t) for t in labels] == [8] * 6 + [2]
+    # batches are the slices of the examples sorted by the buckets.
+    buckets = [numpy.sort(sizes[t] // 3) for t in labels]
+    full_buckets = sorted(buckets[:-1], key=lambda b: (b[0], b[-1]))
+    buckets = numpy.concatenate(full_buckets + buckets[-1:])
+    assert (numpy.diff(buckets) >= 0).all()
+    labels = numpy.concatenate(labels)
+    numpy.testing.assert_array_equal(numpy.sort(labels), numpy.arange(50))
+    if not shuffle:
+        numpy.testing.assert_array_equal(
+            labels, numpy.argsort(sizes, kind='stable'))
+
+
+def test_bucket_iterator_padding(dataset, sizes):
+    iterator = BucketIterator(dataset, 8, repeat=False)
+    num_atoms = sum(concat_mols(batch)[0].size for batch in iterator)
+    serial_iterator = chainer.iterators.SerialIterator(
+        dataset, 8, repeat=False)
+    serial_num_atoms = sum(concat_mols(batch)[0].size
+                           for batch in serial_iterator)
+    assert sizes.sum() <= num_atoms < serial_num_atoms
+
+
+def test_bucket_iterator_shuffle(sizes):
+    rs = numpy.random.RandomState(1)
+    sampler = BucketOrderSampler(sizes, 4, bucket_width=5, random_state=rs)
+    first = sampler(numpy.arange(len(sizes)), 0)
+    second = sampler(first, 0)
+    assert not numpy.array_equal(first, second)
+    for order in (first, second):
+        numpy.testing.assert_array_equal(numpy.sort(order),
+                                         numpy.arange(len(sizes)))
+
+
+def test_bucket_iterator_serialize(dataset):
+    iterator = BucketIterator(dataset, 8)
+    for _ in range(10):
+        iterator.next()
+    target = {}
+    iterator.serialize(chainer.serializers.DictionarySerializer(target))
+
+    resumed = BucketIterator(dataset, 8)
+    resumed.serialize(chainer.serializers.NpzDeserializer(target))
+    assert resumed.epoch == iterator.epoch
+    assert resumed.epoch_detail == iterator.epoch_detail
+    # the rest of the epoch is same.
+    while iterator.current_position + 8 < len(dataset):
+        numpy.testing.assert_array_equal(concat_mols(resumed.next())[1],
+                                         concat_mols(iterator.next())[1])
+
+
+def test_bucket_iterator_sizes():
+    dataset = [(numpy.zeros(size), size) for size in [3, 1, 2, 1]]
+    iterator = BucketIterator(dataset, 2, repeat=False, shuffle=False)
+    assert [[size for _, size in batch] for batch in iterator] == \
+        [[1, 1], [2, 3]]
+    iterator = BucketIterator(dataset, 2, sizes=[0, 1, 1, 0], repeat=False,
+                              shuffle=False)
+    assert [[size for _, size in batch] for batch in iterator] == \
+        [[3, 1], [1, 2]]
+
+
+def test_bucket_iterator_ragged_array():
+    smiles = ['CC(=O)Oc1ccccc1C(=O)O', 'C#N', 'CN1CCC[C@H]1c1cccnc1',
+              'c1ccc2ccccc2c1', 'OC(=O)C(N)Cc1ccc(O)cc1', 'CCO']
+    df = pandas.DataFrame({'smiles': smiles,
+                           'y': numpy.arange(len(smiles), dtype=numpy.int32)})
+    dataset = DataFrameParser(NFPPreprocessor(out_size=-1),
+                              labels='y').parse(df)['dataset']
+    atoms = dataset.get_datasets()[0]
+    assert isinstance(atoms, RaggedArray)
+    sizes = [Chem.MolFromSmiles(s).GetNumAtoms() for s in smiles]
+
+    iterator = BucketIterator(dataset, 2, repeat=False, shuffle=False)
+    numpy.testing.assert_array_equal(iterator.order_sampler.sizes, sizes)
+    labels = []
+    for batch in iterator:
+        atoms, _, t = concat_mols(batch)
+        assert atoms.shape == (len(t), max(sizes[i] for i in t.ravel()))
+        labels.append(t.ravel())
+    numpy.testing.assert_array_equal(
+        numpy.concatenate(labels), numpy.argsort(sizes, kind='stable'))
+
+
+def test_bucket_iterator_invalid(dataset):
+    with pytest.raises(ValueError):
+        BucketIterator(dataset, 8, sizes=[1, 2])
+    with pytest.raises(ValueError):
+        BucketIterator(dataset, 8, bucket_width=0)
+    with pytest.raises(ValueError):
+        BucketIterator(dataset, 0)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '-s'])
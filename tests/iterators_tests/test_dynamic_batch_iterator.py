@@ -0,0 +1,121 @@
+import chainer
+import numpy
+import pytest
+
+from chainer_chemistry.dataset.converters import concat_mols
+from chainer_chemistry.dataset.ragged_array import RaggedArray
+from chainer_chemistry.datasets.numpy_tuple_dataset import NumpyTupleDataset
+from chainer_chemistry.iterators.dynamic_batch_iterator import DynamicBatchIterator  # NOQA
+
+
+@pytest.fixture
+def sizes():
+    return numpy.random.RandomState(0).randint(1, 30, size=50)
+
+
+@pytest.fixture
+def dataset(sizes):
+    # unpadded atom arrays, whose elements are their indices.
+    atoms = numpy.empty(len(sizes), dtype=object)
+    for i, size in enumerate(sizes):
+        atoms[i] = numpy.full(size, i, dtype=numpy.int32)
+    t = numpy.arange(len(sizes), dtype=numpy.int32)
+    return NumpyTupleDataset(atoms, t)
+
+
+@pytest.mark.parametrize('shuffle', [True, False])
+@pytest.mark.parametrize('cost,budget', [('atoms', 64),
+                                         ('atoms_squared', 1024)])
+def test_dynamic_batch_iterator(dataset, sizes, shuffle, cost, budget):
+    iterator = DynamicBatchIterator(dataset, budget, cost=cost,
+                                    repeat=False, shuffle=shuffle)
+    labels = []
+    for batch in iterator:
+        atoms, t = concat_mols(batch)
+        num_examples, max_size = atoms.shape
+        assert max_size == sizes[t].max()
+        if cost == 'atoms':
+            assert atoms.size <= budget
+        else:
+            assert num_examples * max_size ** 2 <= budget
+        labels.append(t)
+    assert iterator.epoch == 1
+    assert iterator.is_new_epoch
+    # small molecules are packed into larger batches.
+    assert len(set(len(t) for t in labels)) > 1
+    labels = numpy.concatenate(labels)
+    numpy.testing.assert_array_equal(numpy.sort(labels), numpy.arange(50))
+    if not shuffle:
+        numpy.testing.assert_array_equal(
+            labels, numpy.argsort(sizes, kind='stable'))
+
+
+def test_dynamic_batch_iterator_ragged_array(dataset, sizes):
+    atoms, t = dataset.get_datasets()
+    dataset = NumpyTupleDataset(RaggedArray.from_list(atoms), t)
+    iterator = DynamicBatchIterator(dataset, 64, repeat=False, shuffle=False)
+    labels = []
+    for batch in iterator:
+        atoms, t = concat_mols(batch)
+        assert atoms.shape[1] == sizes[t].max()
+        assert atoms.size <= 64
+        labels.append(t)
+    numpy.testing.assert_array_equal(
+        numpy.concatenate(labels), numpy.argsort(sizes, kind='stable'))
+
+
+def test_dynamic_batch_iterator_epoch(dataset):
+    iterator = DynamicBatchIterator(dataset, 64)
+    assert iterator.previous_epoch_detail is None
+    num_examples = 0
+    while not iterator.is_new_epoch:
+        previous = iterator.epoch_detail
+        num_examples += len(iterator.next())
+        assert iterator.previous_epoch_detail == previous
+        assert iterator.epoch_detail == pytest.approx(
+            num_examples / 50. if num_examples < 50 else 1.)
+    assert iterator.epoch == 1
+    iterator.next()
+    assert not iterator.is_new_epoch
+    assert 1. < iterator.epoch_detail < 2.
+
+
+def test_dynamic_batch_iterator_large_example():
+    dataset = [(numpy.zeros(size), size) for size in [1, 10, 1, 2]]
+    iterator = DynamicBatchIterator(dataset, 4, repeat=False, shuffle=False)
+    assert [[size for _, size in batch] for batch in iterator] == \
+        [[1, 1], [2], [10]]
+
+
+def test_dynamic_batch_iterator_serialize(dataset):
+    iterator = DynamicBatchIterator(dataset, 64)
+    while iterator.epoch == 0 or iterator.current_position < 10:
+        iterator.next()
+    target = {}
+    iterator.serialize(chainer.serializers.DictionarySerializer(target))
+
+    resumed = DynamicBatchIterator(dataset, 64)
+    resumed.serialize(chainer.serializers.NpzDeserializer(target))
+    assert resumed.epoch == iterator.epoch
+    assert resumed.epoch_detail == iterator.epoch_detail
+    assert resumed.previous_epoch_detail == iterator.previous_epoch_detail
+    # the rest of the epoch is same.
+    while not iterator.is_new_epoch:
+        numpy.testing.assert_array_equal(concat_mols(resumed.next())[1],
+                                         concat_mols(iterator.next())[1])
+    assert resumed.is_new_epoch
+
+
+def test_dynamic_batch_iterator_invalid(dataset):
+    with pytest.raises(ValueError):
+        DynamicBatchIterator(dataset, 0)
+    with pytest.raises(ValueError):
+        DynamicBatchIterator(dataset, 64, cost='unknown')
+    with pytest.raises(ValueError):
+        DynamicBatchIterator(dataset, 64, bucket_width=0)
+    with pytest.raises(ValueError):
+        DynamicBatchIterator(dataset, 64, sizes=[1, 2])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '-s'])
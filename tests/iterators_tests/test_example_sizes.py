@@ -0,0 +1,42 @@
+import numpy
+import pytest
+
+from chainer_chemistry.dataset.ragged_array import RaggedArray
+from chainer_chemistry.datasets.numpy_tuple_dataset import NumpyTupleDataset
+from chainer_chemistry.iterators.example_sizes import get_example_sizes
+
+
+@pytest.fixture
+def atom_arrays():
+    return [numpy.arange(size, dtype=numpy.int32) for size in [3, 1, 4, 2]]
+
+
+def test_get_example_sizes_ragged_array(atom_arrays):
+    dataset = NumpyTupleDataset(RaggedArray.from_list(atom_arrays),
+                                numpy.arange(4))
+    numpy.testing.assert_array_equal(get_example_sizes(dataset),
+                                     [3, 1, 4, 2])
+
+
+def test_get_example_sizes_object_array(atom_arrays):
+    atoms = numpy.empty(len(atom_arrays), dtype=object)
+    atoms[:] = atom_arrays
+    dataset = NumpyTupleDataset(atoms, numpy.arange(4))
+    numpy.testing.assert_array_equal(get_example_sizes(dataset),
+                                     [3, 1, 4, 2])
+
+
+def test_get_example_sizes_padded():
+    dataset = NumpyTupleDataset(numpy.zeros((4, 5), dtype=numpy.int32),
+                                numpy.arange(4))
+    numpy.testing.assert_array_equal(get_example_sizes(dataset), [5] * 4)
+
+
+def test_get_example_sizes_list(atom_arrays):
+    dataset = [(atoms, 0) for atoms in atom_arrays]
+    numpy.testing.assert_array_equal(get_example_sizes(dataset),
+                                     [3, 1, 4, 2])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '-s'])
@@ -0,0 +1,95 @@
+import time
+
+import chainer
+from chainer.iterators import SerialIterator
+import numpy
+import pytest
+
+from chainer_chemistry.dataset.converters import concat_mols
+from chainer_chemistry.datasets.numpy_tuple_dataset import NumpyTupleDataset
+from chainer_chemistry.iterators.prefetch_iterator import prefetched
+from chainer_chemistry.iterators.prefetch_iterator import PrefetchIterator
+
+
+@pytest.fixture
+def dataset():
+    x = numpy.arange(20, dtype=numpy.float32).reshape(10, 2)
+    t = numpy.arange(10, dtype=numpy.int32)
+    return NumpyTupleDataset(x, t)
+
+
+def slow_converter(batch, device=None):
+    # later batches are converted faster.
+    x, t = concat_mols(batch, device)
+    time.sleep(0.01 * (10 - t[0]) / 10.)
+    return x, t
+
+
+def test_prefetch_iterator(dataset):
+    expect_iterator = SerialIterator(dataset, 3, shuffle=False)
+    iterator = PrefetchIterator(SerialIterator(dataset, 3, shuffle=False),
+                                slow_converter, n_prefetch=3, n_workers=3)
+    assert iterator.previous_epoch_detail is None
+    for _ in range(8):
+        expect = concat_mols(expect_iterator.next())
+        actual = prefetched(iterator.next())
+        for a, e in zip(actual, expect):
+            numpy.testing.assert_array_equal(a, e)
+        # the state of the returned batch, not of the prefetched one.
+        assert iterator.epoch == expect_iterator.epoch
+        assert iterator.epoch_detail == expect_iterator.epoch_detail
+        assert iterator.previous_epoch_detail == \
+            expect_iterator.previous_epoch_detail
+        assert iterator.is_new_epoch == expect_iterator.is_new_epoch
+    iterator.finalize()
+
+
+def test_prefetch_iterator_not_repeat(dataset):
+    iterator = PrefetchIterator(
+        SerialIterator(dataset, 4, repeat=False, shuffle=False),
+        concat_mols, n_prefetch=2)
+    assert [len(t) for _, t in iterator] == [4, 4, 2]
+    with pytest.raises(StopIteration):
+        iterator.next()
+    iterator.reset()
+    assert [len(t) for _, t in iterator] == [4, 4, 2]
+    iterator.finalize()
+
+
+def test_prefetch_iterator_process(dataset):
+    iterator = PrefetchIterator(
+        SerialIterator(dataset, 4, repeat=False, shuffle=False),
+        concat_mols, device=-1, n_workers=2, use_processes=True)
+    t = numpy.concatenate([t for _, t in iterator])
+    numpy.testing.assert_array_equal(t, numpy.arange(10))
+    iterator.finalize()
+
+
+def test_prefetch_iterator_serialize(dataset):
+    iterator = PrefetchIterator(SerialIterator(dataset, 3), concat_mols,
+                                n_prefetch=4)
+    for _ in range(2):
+        iterator.next()
+    target = {}
+    iterator.serialize(chainer.serializers.DictionarySerializer(target))
+    # the prefetched batches are not saved as iterated.
+    assert target['current_position'] == 6
+
+    resumed = PrefetchIterator(SerialIterator(dataset, 3), concat_mols,
+                               n_prefetch=4)
+    resumed.serialize(chainer.serializers.NpzDeserializer(target))
+    assert resumed.epoch_detail == iterator.epoch_detail
+    numpy.testing.assert_array_equal(resumed.next()[1], iterator.next()[1])
+    iterator.finalize()
+    resumed.finalize()
+
+
+def test_prefetch_iterator_invalid(dataset):
+    with pytest.raises(ValueError):
+        PrefetchIterator(SerialIterator(dataset, 3), n_prefetch=0)
+    with pytest.raises(ValueError):
+        PrefetchIterator(SerialIterator(dataset, 3), n_workers=0)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '-s'])
@@ -0,0 +1,57 @@
+import chainer
+import numpy
+import pytest
+
+from chainer_chemistry.dataset.column_batch import ColumnBatch
+from chainer_chemistry.dataset.converters import concat_mols
+from chainer_chemistry.datasets.numpy_tuple_dataset import NumpyTupleDataset
+from chainer_chemistry.iterators.serial_iterator import SerialIterator
+
+
+@pytest.fixture
+def dataset():
+    x = numpy.arange(20, dtype=numpy.float32).reshape(10, 2)
+    t = numpy.arange(10, dtype=numpy.int32)
+    return NumpyTupleDataset(x, t)
+
+
+@pytest.mark.parametrize('shuffle', [True, False])
+def test_serial_iterator(dataset, shuffle):
+    iterator = SerialIterator(dataset, 4, repeat=False, shuffle=shuffle)
+    labels = []
+    for batch in iterator:
+        assert isinstance(batch, ColumnBatch)
+        x, t = concat_mols(batch)
+        numpy.testing.assert_array_equal(x[:, 0], t * 2)
+        labels.append(t)
+    assert [len(t) for t in labels] == [4, 4, 2]
+    labels = numpy.concatenate(labels)
+    if shuffle:
+        labels = numpy.sort(labels)
+    numpy.testing.assert_array_equal(labels, numpy.arange(10))
+
+
+def test_serial_iterator_same_with_chainer(dataset):
+    expect_iterator = chainer.iterators.SerialIterator(
+        dataset, 3, shuffle=False)
+    iterator = SerialIterator(dataset, 3, shuffle=False)
+    for _ in range(5):
+        expect = concat_mols(expect_iterator.next())
+        actual = concat_mols(iterator.next())
+        for a, e in zip(actual, expect):
+            assert a.dtype == e.dtype
+            numpy.testing.assert_array_equal(a, e)
+        assert iterator.epoch_detail == expect_iterator.epoch_detail
+        assert iterator.is_new_epoch == expect_iterator.is_new_epoch
+
+
+def test_serial_iterator_without_get_batch():
+    dataset = [numpy.array([i, i + 1]) for i in range(5)]
+    iterator = SerialIterator(dataset, 2, repeat=False, shuffle=False)
+    batch = iterator.next()
+    assert isinstance(batch, list)
+    numpy.testing.assert_array_equal(batch[1], dataset[1])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '-s'])
@@ -5,6 +5,8 @@ from chainer import cuda
 import numpy
 import pytest
 
+from chainer_chemistry.dataset.converters import concat_mols
+from chainer_chemistry.datasets.numpy_tuple_dataset import NumpyTupleDataset
 from chainer_chemistry.models.prediction.base import BaseForwardModel
 
 
@@ -55,5 +57,19 @@ def test_save_load_pickle_gpu(tmpdir):
     _test_save_load_pickle(device=0, tmpdir=tmpdir)
 
 
+@pytest.mark.parametrize('converter', [concat_mols,
+                                       chainer.dataset.concat_examples])
+@pytest.mark.parametrize('n_prefetch', [0, 2])
+def test_forward_numpy_tuple_dataset(converter, n_prefetch):
+    model = DummyForwardModel()
+    x = numpy.random.uniform(size=(7, 3)).astype(numpy.float32)
+    expect = model._forward(x, model, batchsize=3, converter=converter)
+    # batches are extracted by `NumpyTupleDataset.get_batch`
+    actual = model._forward(NumpyTupleDataset(x), model, batchsize=3,
+                            converter=converter, n_prefetch=n_prefetch)
+    assert actual.shape == (7, 10)
+    numpy.testing.assert_allclose(actual, expect)
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v', '-s'])
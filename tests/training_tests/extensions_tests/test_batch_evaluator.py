@@ -0,0 +1,54 @@
+import numpy
+import pytest
+
+import chainer
+from chainer.iterators import SerialIterator
+
+from chainer_chemistry.dataset.column_batch import ColumnBatch
+from chainer_chemistry.dataset.converters import concat_mols
+from chainer_chemistry.datasets.numpy_tuple_dataset import NumpyTupleDataset  # NOQA
+from chainer_chemistry.training.extensions.batch_evaluator import BatchEvaluator  # NOQA
+
+
+class DummyPredictor(chainer.Chain):
+
+    def __call__(self, y):
+        return y
+
+
+def _mean_error(y, t):
+    return numpy.mean(y - t)
+
+
+@pytest.mark.parametrize('shuffle,batch_type', [
+    (False, ColumnBatch), (True, list)])
+@pytest.mark.parametrize('n_prefetch', [0, 2])
+def test_batch_evaluator_batch_fetch(shuffle, batch_type, n_prefetch):
+    y = numpy.arange(5, dtype=numpy.float32)[:, None]
+    t = y - 1
+    dataset = NumpyTupleDataset(y, t)
+    batch_types = []
+
+    def converter(batch, device=None):
+        batch_types.append(type(batch))
+        return concat_mols(batch, device)
+
+    predictor = DummyPredictor()
+    iterator = SerialIterator(dataset, 2, repeat=False, shuffle=shuffle)
+    evaluator = BatchEvaluator(iterator, predictor, converter=converter,
+                               metrics_fun=_mean_error,
+                               n_prefetch=n_prefetch)
+    repo = chainer.Reporter()
+    repo.add_observer('target', predictor)
+    with repo:
+        observation = evaluator.evaluate()
+        assert observation['target/evaluation'] == 1.
+        assert batch_types == [batch_type] * 3
+        # the iterator is reset and evaluated again.
+        observation = evaluator.evaluate()
+        assert observation['target/evaluation'] == 1.
+        assert batch_types == [batch_type] * 6
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '-s'])
@@ -6,9 +6,11 @@ from chainer.iterators import SerialIterator
 from chainer import links
 import chainerx
 
+from chainer_chemistry.dataset.column_batch import ColumnBatch
 from chainer_chemistry.datasets import NumpyTupleDataset
 from chainer_chemistry.models import Regressor
 from chainer_chemistry.utils import run_train
+from chainer_chemistry.utils import train_utils
 
 
 input_dim = 5
@@ -53,6 +55,33 @@ def test_run_train_cpu_iterator(model, train_data, valid_data):
               extensions_list=[lambda t: None])
 
 
+def test_run_train_cpu_prefetch(train_data, valid_data):
+    model = links.Classifier(links.Linear(None, output_dim),
+                             lossfun=chainer.functions.mean_squared_error)
+    model.compute_accuracy = False
+    run_train(model, train_data, valid=valid_data, epoch=2, batch_size=4,
+              n_prefetch=2)
+
+
+def test_run_train_cpu_batch_fetch(train_data, valid_data, monkeypatch):
+    batch_types = []
+    concat_mols = train_utils.concat_mols
+
+    def counting_concat_mols(batch, device=None, padding=0):
+        batch_types.append(type(batch))
+        return concat_mols(batch, device, padding=padding)
+
+    monkeypatch.setattr(train_utils, 'concat_mols', counting_concat_mols)
+    model = links.Classifier(links.Linear(None, output_dim),
+                             lossfun=chainer.functions.mean_squared_error)
+    model.compute_accuracy = False
+    run_train(model, train_data, valid=valid_data, epoch=1, batch_size=4)
+    # batches of the training and the validation are extracted by
+    # `get_batch` at once.
+    assert len(batch_types) == 3 + 2
+    assert all(t is ColumnBatch for t in batch_types)
+
+
 def test_run_train_invalid(model, train_data):
     with pytest.raises(ValueError):
         run_train(model, train_data, optimizer=1)